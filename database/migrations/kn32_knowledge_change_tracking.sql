@@ -0,0 +1,45 @@
+-- ============================================================
+-- KN-32: Change tracking para la recarga incremental de conocimiento
+-- KnowledgeService.reload_from_database pide solo las entradas con
+-- updated_at >= high-water mark. El trigger mantiene updated_at en
+-- cada UPDATE y el índice evita recorrer la tabla en cada poll.
+-- Ejecutar dentro de la base de datos abcmasplus.
+-- ============================================================
+
+USE abcmasplus;
+GO
+
+IF NOT EXISTS (
+    SELECT *
+    FROM sys.indexes
+    WHERE name = 'idx_knowledge_entries_updated_at'
+        AND object_id = OBJECT_ID('dbo.[BotIAv2_knowledge_entries]')
+) CREATE NONCLUSTERED INDEX [idx_knowledge_entries_updated_at]
+    ON dbo.[BotIAv2_knowledge_entries] ([updated_at] ASC)
+    INCLUDE ([active], [category_id]);
+GO
+
+IF OBJECT_ID('TR_KnowledgeEntries_UpdatedAt', 'TR') IS NOT NULL
+    DROP TRIGGER TR_KnowledgeEntries_UpdatedAt;
+GO
+
+CREATE TRIGGER TR_KnowledgeEntries_UpdatedAt
+ON BotIAv2_knowledge_entries
+AFTER UPDATE
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    -- Si el UPDATE ya fijó updated_at explícitamente, respetarlo
+    IF UPDATE(updated_at)
+        RETURN;
+
+    UPDATE e
+    SET e.updated_at = GETDATE()
+    FROM BotIAv2_knowledge_entries e
+    INNER JOIN INSERTED i ON e.id = i.id;
+END;
+GO
+
+PRINT 'Change tracking de BotIAv2_knowledge_entries configurado.';
+GO
@@ -8,6 +8,8 @@ import nest_asyncio
 from src.config.settings import settings
 from src.config.logging_config import configure_logging
 from src.bot.telegram_bot import TelegramBot
+from src.api.asgi_app import create_asgi_app
+from src.api.asgi_server import UVICORN_AVAILABLE, serve
 
 # Permitir event loops anidados
 nest_asyncio.apply()
@@ -29,11 +31,22 @@ async def main():
     logger.info("Iniciando bot de Telegram...")
     bot = TelegramBot()  # inicializa HandlerManager antes de arrancar Flask
 
-    flask_thread = threading.Thread(target=_start_flask, daemon=True, name="flask-api")
-    flask_thread.start()
+    if settings.api_server == "asgi" and UVICORN_AVAILABLE:
+        # API async en este mismo loop: el MainHandler atiende API y bot sin threads WSGI
+        api_task = asyncio.create_task(serve(create_asgi_app(), host="0.0.0.0", port=settings.api_port))
+    else:
+        if settings.api_server == "asgi":
+            logger.warning("uvicorn no está instalado; API REST con el servidor Flask en un thread")
+        api_task = None
+        flask_thread = threading.Thread(target=_start_flask, daemon=True, name="flask-api")
+        flask_thread.start()
     logger.info(f"API REST iniciada en http://0.0.0.0:{settings.api_port} (dashboard: /admin)")
 
-    await bot.run()
+    try:
+        await bot.run()
+    finally:
+        if api_task is not None:
+            api_task.cancel()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,116 @@
+"""
+Benchmark de filtrado de eventos activos: filtro lineal vs ActiveEventsIndex.
+
+Genera snapshots sintéticos de eventos PRTG (equipos, IPs y sensores con
+cardinalidades parecidas a producción) y mide:
+- Tiempo de construcción del índice por snapshot
+- Latencia p50/p95 por consulta con el filtro lineal previo
+  (list comprehensions sobre todo el snapshot) y con el índice
+- Mezcla de consultas de las tools: IP exacta (get_alert_detail),
+  IP + sensor, equipo parcial, solo_down y combinaciones (get_active_alerts)
+
+Uso:
+    python scripts/benchmarks/alert_filter_bench.py [10000 100000]
+"""
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from src.domain.alerts.active_events_index import ActiveEventsIndex
+from src.domain.alerts.alert_entity import AlertEvent
+
+_KINDS = ["SRV", "SWITCH", "ROUTER", "FIREWALL", "AP", "UPS", "STORAGE", "VM"]
+_SITES = ["CDMX", "GDL", "MTY", "PUE", "QRO", "MER", "TIJ", "CUN", "SUC"]
+_SENSORS = [
+    "Ping", "CPU Load", "Memoria", "Disco C:", "Disco D:", "SNMP Traffic",
+    "Uptime", "HTTP https://portal", "Servicio SQL", "Latencia WAN",
+]
+_STATUS = ["Down"] * 3 + ["Warning"] * 5 + ["Unusual", "Down (parcial)"]
+
+
+def _events(size: int, rng: random.Random) -> list[AlertEvent]:
+    hosts = [
+        (f"{rng.choice(_KINDS)}-{rng.choice(_SITES)}-{i:05d}", f"10.{i // 65536}.{(i // 256) % 256}.{i % 256}")
+        for i in range(size // 3 + 1)
+    ]
+    events = []
+    for _ in range(size):
+        equipo, ip = rng.choice(hosts)
+        events.append(AlertEvent.model_validate({
+            "Equipo": equipo, "IP": ip, "Sensor": rng.choice(_SENSORS),
+            "Status": rng.choice(_STATUS), "Prioridad": rng.randint(1, 5),
+        }))
+    events.sort(key=lambda e: e.prioridad, reverse=True)
+    return events
+
+
+def _linear(events, ip=None, equipo=None, sensor=None, solo_down=False):
+    result = list(events)
+    if ip:
+        result = [e for e in result if e.ip == ip]
+    if equipo:
+        result = [e for e in result if equipo.lower() in e.equipo.lower()]
+    if sensor:
+        result = [e for e in result if sensor.lower() in e.sensor.lower()]
+    if solo_down:
+        result = [e for e in result if e.status.lower() == "down"]
+    return result
+
+
+def _queries(events, rng: random.Random) -> list[dict]:
+    queries = []
+    for _ in range(100):
+        e = rng.choice(events)
+        queries += [
+            {"ip": e.ip},
+            {"ip": e.ip, "sensor": e.sensor.split()[0]},
+            {"equipo": e.equipo[-8:]},
+            {"equipo": rng.choice(_KINDS).lower(), "solo_down": True},
+            {"equipo": f"{rng.choice(_SITES)}-0", "sensor": "disco"},
+        ]
+    queries.append({"solo_down": True})
+    return queries
+
+
+def _percentiles(samples):
+    ordered = sorted(samples)
+    return statistics.median(ordered), ordered[int(len(ordered) * 0.95) - 1]
+
+
+def _bench(fn, queries):
+    samples = []
+    for q in queries:
+        start = time.perf_counter()
+        fn(**q)
+        samples.append((time.perf_counter() - start) * 1000)
+    return _percentiles(samples)
+
+
+def main(sizes) -> None:
+    rng = random.Random(42)
+    print(f"{'eventos':>8} {'build':>9} {'índice p50/p95':>20} {'lineal p50/p95':>20}")
+    for size in sizes:
+        events = _events(size, rng)
+        queries = _queries(events, rng)
+
+        start = time.perf_counter()
+        index = ActiveEventsIndex(events)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        for q in queries:
+            assert index.filter(**q) == _linear(events, **q), q
+
+        idx_p50, idx_p95 = _bench(index.filter, queries)
+        lin_p50, lin_p95 = _bench(lambda **q: _linear(events, **q), queries)
+        print(
+            f"{size:>8} {build_ms:>7.0f}ms "
+            f"{idx_p50:>8.3f}/{idx_p95:<8.3f}ms {lin_p50:>8.2f}/{lin_p95:<8.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10_000, 100_000])
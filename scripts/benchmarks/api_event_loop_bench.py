@@ -0,0 +1,107 @@
+"""
+Prueba de carga de /api/chat: asyncio.run por request vs event loop persistente.
+
+Simula workers Flask (threads) que procesan requests contra un handler con
+estado atado al event loop, como los clientes async del MainHandler: un
+pool de conexiones donde cada conexión pertenece al loop que la abrió.
+Tomar una conexión de otro loop es un error de afinidad ("attached to a
+different loop" / "Event loop is closed") y obliga a reconectar
+(handshake simulado de 20 ms).
+
+Mide requests/s, latencia p50/p95 y errores de afinidad de cada modo.
+
+Uso:
+    python scripts/benchmarks/api_event_loop_bench.py [workers] [requests_por_worker]
+"""
+import asyncio
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from src.pipeline.event_loop_bridge import EventLoopBridge
+
+_HANDSHAKE_SECONDS = 0.020
+_REQUEST_SECONDS = 0.005
+
+
+class FakeAsyncClient:
+    """Cliente HTTP async con pool de conexiones; cada conexión queda atada a su loop."""
+
+    def __init__(self) -> None:
+        self._pool: list[asyncio.AbstractEventLoop] = []
+        self._guard = threading.Lock()
+        self.affinity_errors = 0
+        self.handshakes = 0
+
+    async def request(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._guard:
+            conn_loop = self._pool.pop() if self._pool else None
+            if conn_loop is not None and conn_loop is not loop:
+                self.affinity_errors += 1
+            if conn_loop is not loop:
+                self.handshakes += 1
+        if conn_loop is not loop:
+            await asyncio.sleep(_HANDSHAKE_SECONDS)
+        await asyncio.sleep(_REQUEST_SECONDS)
+        with self._guard:
+            self._pool.append(loop)
+
+
+def _load(run, workers: int, per_worker: int):
+    client = FakeAsyncClient()
+    samples: list[float] = []
+    failures = []
+    samples_lock = threading.Lock()
+
+    def _worker() -> None:
+        for _ in range(per_worker):
+            start = time.perf_counter()
+            try:
+                run(client.request())
+            except Exception as e:
+                failures.append(e)
+            with samples_lock:
+                samples.append((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=_worker) for _ in range(workers)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    ordered = sorted(samples)
+    return {
+        "rps": len(samples) / elapsed,
+        "p50": statistics.median(ordered),
+        "p95": ordered[int(len(ordered) * 0.95) - 1],
+        "errors": client.affinity_errors + len(failures),
+        "handshakes": client.handshakes,
+    }
+
+
+def main(workers: int, per_worker: int) -> None:
+    bridge = EventLoopBridge(name="bench-loop")
+    modes = {
+        "asyncio.run": asyncio.run,
+        "bridge": lambda coro: bridge.run(coro, timeout=30),
+    }
+    print(f"{workers} workers × {per_worker} requests")
+    print(f"{'modo':>12} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'handshakes':>11} {'errores':>8}")
+    for name, run in modes.items():
+        r = _load(run, workers, per_worker)
+        print(
+            f"{name:>12} {r['rps']:>8.0f} {r['p50']:>8.1f} {r['p95']:>8.1f} "
+            f"{r['handshakes']:>11} {r['errors']:>8}"
+        )
+    bridge.shutdown()
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args + [8, 50][len(args):]))
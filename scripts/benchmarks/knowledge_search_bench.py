@@ -0,0 +1,127 @@
+"""
+Benchmark de KnowledgeService.search: scoring lineal vs índice invertido BM25
+y fusión híbrida con el índice vectorial.
+
+Genera una base de conocimiento sintética (vocabulario en español con
+sufijos variados para ejercitar el stemmer) y mide:
+- Tiempo de construcción del índice
+- Latencia p50/p95 por búsqueda con el índice, con y sin filtro por rol
+- Latencia del scoring lineal previo (_calculate_score sobre todas las entradas)
+- Construcción del índice vectorial (en frío y desde el .npz en disco) y
+  latencia de la búsqueda híbrida completa, sin y con cache de resultados
+
+Uso:
+    python scripts/benchmarks/knowledge_search_bench.py [10000 50000 100000]
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from src.domain.knowledge.knowledge_entity import KnowledgeCategory, KnowledgeEntry
+from src.domain.knowledge.knowledge_index import KnowledgeIndex
+from src.domain.knowledge.knowledge_service import KnowledgeService, _KnowledgeSnapshot
+from src.domain.knowledge.knowledge_vectors import KnowledgeVectorIndex
+from src.utils.ttl_cache import TTLCache
+
+_ROOTS = [
+    "vacacion", "nomin", "remot", "contrasen", "monitor", "reembols", "factur",
+    "sucursal", "alert", "ticket", "escal", "inventari", "servidor", "red",
+    "enlace", "permis", "capacit", "segur", "respald", "licenci", "equip",
+    "proveedor", "contrat", "presupuest", "auditori", "incident", "camb",
+]
+_SUFFIXES = ["", "es", "aciones", "ado", "ando", "ción", "mente", "or", "as", "ible"]
+_VOCAB = [r + s for r in _ROOTS for s in _SUFFIXES] + [f"term{i}" for i in range(3000)]
+_CATEGORIES = list(KnowledgeCategory)
+
+
+def _entry(rng: random.Random) -> KnowledgeEntry:
+    def words(n):
+        return " ".join(rng.choice(_VOCAB) for _ in range(n))
+
+    return KnowledgeEntry(
+        category=rng.choice(_CATEGORIES),
+        question=f"¿Cómo {words(6)}?",
+        answer=words(40),
+        keywords=[rng.choice(_VOCAB) for _ in range(4)],
+        priority=rng.choice((1, 1, 1, 2, 3)),
+    )
+
+
+def _percentiles(samples):
+    ordered = sorted(samples)
+    return statistics.median(ordered), ordered[int(len(ordered) * 0.95) - 1]
+
+
+def _linear(service: KnowledgeService, query: str, top_k: int = 3):
+    query_lower = service._clean_text(query.lower())
+    scored = [(service._calculate_score(query_lower, e), e) for e in service.knowledge_base]
+    scored = [se for se in scored if se[0] >= 0.1]
+    scored.sort(reverse=True, key=lambda x: x[0])
+    return scored[:top_k]
+
+
+def main(sizes) -> None:
+    rng = random.Random(42)
+    queries = [" ".join(rng.choice(_VOCAB) for _ in range(rng.randint(2, 6))) for _ in range(200)]
+    role_partition = frozenset(_CATEGORIES[:3])
+    results = []
+
+    print(f"{'entradas':>9} {'build':>9} {'vocab':>7} "
+          f"{'índice p50/p95':>18} {'índice+rol p50/p95':>22} {'lineal p50/p95':>20}")
+    for size in sizes:
+        entries = [_entry(rng) for _ in range(size)]
+
+        start = time.perf_counter()
+        index = KnowledgeIndex(entries)
+        build_s = time.perf_counter() - start
+
+        def timed(fn, qs):
+            samples = []
+            for q in qs:
+                t0 = time.perf_counter()
+                fn(q)
+                samples.append((time.perf_counter() - t0) * 1000)
+            return _percentiles(samples)
+
+        idx = timed(lambda q: index.search(q), queries)
+        idx_role = timed(lambda q: index.search(q, allowed_categories=role_partition), queries)
+
+        service = KnowledgeService.__new__(KnowledgeService)
+        service._snapshot = _KnowledgeSnapshot(index)
+        linear_queries = queries[: max(5, 200_000 // size)]
+        lin = timed(lambda q: _linear(service, q), linear_queries)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "vectors.npz"
+            start = time.perf_counter()
+            service._snapshot = _KnowledgeSnapshot(index, KnowledgeVectorIndex.build(entries, cache_path=path))
+            cold_s = time.perf_counter() - start
+            start = time.perf_counter()
+            KnowledgeVectorIndex.build(entries, cache_path=path)
+            disk_s = time.perf_counter() - start
+        service.vector_weight, service.min_similarity = 4.0, 0.3
+        service._role_categories = {}
+        service._search_cache = TTLCache(max_entries=10_000, ttl_seconds=3600, sizer=sys.getsizeof)
+        hybrid = timed(lambda q: service.search(q), queries)
+        cached = timed(lambda q: service.search(q), queries)
+        results.append((size, cold_s, disk_s, hybrid, cached))
+
+        print(f"{size:>9} {build_s:>8.2f}s {index.vocabulary_size:>7} "
+              f"{idx[0]:>8.2f}/{idx[1]:<7.2f}ms {idx_role[0]:>10.2f}/{idx_role[1]:<7.2f}ms "
+              f"{lin[0]:>9.1f}/{lin[1]:<7.1f}ms")
+
+    print(f"\n{'entradas':>9} {'vectores frío':>14} {'desde disco':>12} "
+          f"{'híbrida p50/p95':>20} {'cache hit p50/p95':>20}")
+    for size, cold_s, disk_s, hybrid, cached in results:
+        print(f"{size:>9} {cold_s:>13.2f}s {disk_s:>11.2f}s "
+              f"{hybrid[0]:>10.2f}/{hybrid[1]:<7.2f}ms {cached[0]:>9.3f}/{cached[1]:<7.3f}ms")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10_000, 50_000, 100_000])
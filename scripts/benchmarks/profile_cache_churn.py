@@ -0,0 +1,55 @@
+"""
+Churn sintético de usuarios sobre el cache de perfiles de MemoryRepository.
+
+Inserta N perfiles distintos (default 1M) y muestra el RSS del proceso cada
+100k usuarios. Con el cache acotado el RSS debe estabilizarse en lugar de
+crecer linealmente con los usuarios vistos.
+
+Uso:
+    python scripts/benchmarks/profile_cache_churn.py [usuarios]
+"""
+import asyncio
+import os
+import resource
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from src.domain.memory.memory_entity import UserProfile
+from src.domain.memory.memory_repository import MemoryRepository
+
+
+def _rss_mb() -> float:
+    """RSS actual en MB (Linux: /proc; otros: pico vía getrusage)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def main(total_users: int) -> None:
+    repository = MemoryRepository(db_manager=None)
+    summary = "Consulta alertas de la sucursal y tickets históricos. " * 20
+
+    print(f"{'usuarios':>10} {'rss_mb':>8} {'entries':>8} {'cache_mb':>9} {'evictions':>10}")
+    for i in range(total_users):
+        await repository.save_profile(UserProfile(
+            user_id=str(i),
+            display_name=f"Usuario {i}",
+            roles=["Operador"],
+            long_term_summary=summary,
+            preferences={"alias": f"u{i}"},
+        ))
+        await repository.get_profile(str(i // 2))
+        if (i + 1) % 100_000 == 0:
+            stats = repository.get_cache_stats()
+            print(
+                f"{i + 1:>10} {_rss_mb():>8.1f} {stats['entries']:>8} "
+                f"{stats['bytes'] / 1024 / 1024:>9.1f} {stats['evictions']:>10}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000))
@@ -0,0 +1,95 @@
+"""
+Microbenchmark de get/set del cache de contexto de MemoryService.
+
+Compara TTLCache (heap de vencimientos + LRU O(1)) contra la implementación
+anterior (OrderedDict que recorría todas las entradas buscando expiradas en
+cada inserción) con el cache lleno a 10k, 100k y 1M entradas.
+
+La implementación anterior es O(n) por set: en 1M solo se mide con pocas
+operaciones para que el benchmark termine.
+
+Uso:
+    python scripts/benchmarks/ttl_cache_bench.py [tamaños...]
+"""
+import os
+import sys
+import time
+from collections import OrderedDict
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from src.utils.ttl_cache import TTLCache
+
+_OPS = 200_000
+_LEGACY_OPS = {10_000: 5_000, 100_000: 500, 1_000_000: 50}
+
+
+class _LegacyCache:
+    """Réplica de MemoryService._evict_if_needed antes de TTLCache."""
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._cache: OrderedDict[str, tuple[object, float]] = OrderedDict()
+
+    def get(self, key: str):
+        entry = self._cache.get(key)
+        if entry and time.monotonic() < entry[1]:
+            self._cache.move_to_end(key)
+            return entry[0]
+        if entry:
+            del self._cache[key]
+        return None
+
+    def set(self, key: str, value: object) -> None:
+        now = time.monotonic()
+        for k in [k for k, v in self._cache.items() if v[1] <= now]:
+            del self._cache[k]
+        if len(self._cache) >= self.max_size:
+            target = int(self.max_size * 0.75)
+            while len(self._cache) > target:
+                self._cache.popitem(last=False)
+        self._cache[key] = (value, now + self.ttl)
+
+    def fill(self, size: int) -> None:
+        # Llenado directo: con set() el propio llenado sería O(n²)
+        expires = time.monotonic() + self.ttl
+        for i in range(size):
+            self._cache[str(i)] = (i, expires)
+
+
+def _fill(cache, size: int) -> None:
+    for i in range(size):
+        cache.set(str(i), i)
+
+
+def _bench(cache, size: int, ops: int) -> tuple[float, float]:
+    start = time.perf_counter()
+    for i in range(ops):
+        cache.get(str(i % size))
+    get_rate = ops / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i in range(ops):
+        cache.set(str(size + i), i)
+    set_rate = ops / (time.perf_counter() - start)
+    return get_rate, set_rate
+
+
+def main(sizes: list[int]) -> None:
+    print(f"{'entries':>9} {'impl':>8} {'ops':>8} {'get ops/s':>12} {'set ops/s':>12}")
+    for size in sizes:
+        cache = TTLCache(max_entries=size, ttl_seconds=300, sizer=lambda v: 64)
+        _fill(cache, size)
+        get_rate, set_rate = _bench(cache, size, _OPS)
+        print(f"{size:>9} {'ttlcache':>8} {_OPS:>8} {get_rate:>12,.0f} {set_rate:>12,.0f}")
+
+        legacy = _LegacyCache(max_size=size + _OPS, ttl=300)
+        legacy.fill(size)
+        ops = _LEGACY_OPS.get(size, 1_000)
+        get_rate, set_rate = _bench(legacy, size, ops)
+        print(f"{size:>9} {'legacy':>8} {ops:>8} {get_rate:>12,.0f} {set_rate:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
@@ -0,0 +1,97 @@
+"""
+Benchmark del contexto de usuario en el hot path del request.
+
+Simula el camino de un request con el contexto en cache de MemoryService:
+recarga de permisos, notas de sesión del handler, to_prompt_context() del
+ReAct agent y append_exchange() al terminar el turno. Compara UserContext
+(pydantic, render completo en cada request) con LightUserContext (slotted,
+bloques memoizados).
+
+Reporta CPU por request (perf_counter) y bytes asignados por request
+(tracemalloc), tanto en frío (construcción desde el perfil) como en caliente.
+
+Uso:
+    python scripts/benchmarks/user_context_bench.py [requests]
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from src.agents.base.events import LightUserContext, UserContext
+
+_PROFILE = {
+    "user_id": "123456",
+    "display_name": "Juan Pérez",
+    "roles": ["Operador NOC"],
+    "preferences": {"alias": "Juan", "formato": "tabla", "idioma": "español"},
+    "long_term_summary": "Consulta alertas PRTG de sucursales y escalamientos. " * 8,
+    "db_user_id": 42,
+    "role_id": 3,
+    "gerencia_ids": [10, 11],
+}
+_PERMISOS = {f"tool:tool_{i}": i % 3 != 0 for i in range(30)}
+_MESSAGES = [
+    {"role": "user" if i % 2 == 0 else "assistant", "content": ("mensaje " * 60) + str(i)}
+    for i in range(20)
+]
+_SCOPE = {f"tool_{i}" for i in range(0, 30, 2)}
+
+
+def _build(cls):
+    return cls(**_PROFILE, working_memory=list(_MESSAGES), permisos=dict(_PERMISOS))
+
+
+def _request(context) -> None:
+    # MemoryService.get_context recarga permisos en cada request
+    context.permisos = dict(_PERMISOS)
+    context.to_prompt_context(tool_scope=_SCOPE)
+
+
+def _measure(label: str, fn, requests: int) -> None:
+    fn()  # warm-up
+    start = time.perf_counter()
+    for _ in range(requests):
+        fn()
+    cpu_us = (time.perf_counter() - start) / requests * 1e6
+
+    tracemalloc.start()
+    snapshot_before = tracemalloc.take_snapshot()
+    for _ in range(200):
+        fn()
+    snapshot_after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(
+        stat.size_diff for stat in snapshot_after.compare_to(snapshot_before, "filename") if stat.size_diff > 0
+    )
+    peak_alloc = _peak_per_call(fn)
+    print(f"{label:<40} {cpu_us:>10.1f} µs {peak_alloc / 1024:>10.1f} KiB {allocated / 200:>10.0f} B")
+
+
+def _peak_per_call(fn) -> int:
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main(requests: int) -> None:
+    print(f"{'escenario':<40} {'cpu/req':>13} {'alloc peak':>14} {'retenido':>12}")
+    for cls in (UserContext, LightUserContext):
+        _measure(f"{cls.__name__} frío (build + render)", lambda: _request(_build(cls)), requests)
+
+        cached = _build(cls)
+
+        def warm(context=cached):
+            _request(context)
+            context.session_notes.clear()
+
+        _measure(f"{cls.__name__} caliente (cache hit)", warm, requests)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
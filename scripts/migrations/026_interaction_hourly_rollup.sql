@@ -0,0 +1,87 @@
+-- Migración 026: Rollups horarios de BotIAv2_InteractionLogs para el overview del dashboard
+-- Propósito: /api/admin/overview y el dashboard de Telegram dejan de agregar el rango completo
+--            de InteractionLogs en cada refresco; leen una fila por (hora, agente) hasta la marca
+--            de agua y solo la hora en curso de InteractionLogs.
+-- Mantenimiento: src/domain/interaction/interaction_rollup.py (job cada DASHBOARD_ROLLUP_INTERVAL_SECONDS).
+-- Las columnas lat00..lat15 son el histograma de duracionMs; sus límites viven en LATENCY_BUCKETS_MS:
+--   lat00 <250ms, lat01 <500, lat02 <1s, lat03 <2s, lat04 <3s, lat05 <5s, lat06 <7.5s, lat07 <10s,
+--   lat08 <15s, lat09 <20s, lat10 <30s, lat11 <45s, lat12 <60s, lat13 <90s, lat14 <120s, lat15 >=120s
+
+IF NOT EXISTS (
+    SELECT 1 FROM sys.tables
+    WHERE name = 'BotIAv2_InteractionHourly'
+      AND SCHEMA_NAME(schema_id) = 'dbo'
+)
+BEGIN
+    CREATE TABLE abcmasplus..BotIAv2_InteractionHourly (
+        hora             DATETIME       NOT NULL,
+        agenteNombre     NVARCHAR(100)  NOT NULL,   -- '' = sin agente
+        mensajes         INT            NOT NULL,
+        errores          INT            NOT NULL,
+        duracionMsSum    BIGINT         NOT NULL,
+        costUSD          DECIMAL(18,6)  NOT NULL,
+        tokens           BIGINT         NOT NULL,
+        lat00 INT NOT NULL, lat01 INT NOT NULL, lat02 INT NOT NULL, lat03 INT NOT NULL,
+        lat04 INT NOT NULL, lat05 INT NOT NULL, lat06 INT NOT NULL, lat07 INT NOT NULL,
+        lat08 INT NOT NULL, lat09 INT NOT NULL, lat10 INT NOT NULL, lat11 INT NOT NULL,
+        lat12 INT NOT NULL, lat13 INT NOT NULL, lat14 INT NOT NULL, lat15 INT NOT NULL,
+        CONSTRAINT PK_InteractionHourly PRIMARY KEY (hora, agenteNombre)
+    );
+
+    PRINT 'Tabla BotIAv2_InteractionHourly creada.';
+END
+ELSE
+    PRINT 'Tabla BotIAv2_InteractionHourly ya existe — sin cambios.';
+
+IF NOT EXISTS (
+    SELECT 1 FROM sys.tables
+    WHERE name = 'BotIAv2_InteractionHourlyUsers'
+      AND SCHEMA_NAME(schema_id) = 'dbo'
+)
+BEGIN
+    CREATE TABLE abcmasplus..BotIAv2_InteractionHourlyUsers (
+        hora             DATETIME       NOT NULL,
+        usuario          VARCHAR(50)    NOT NULL,   -- 'tg:<telegramChatId>' o 'emp:<idUsuario>'
+        telegramChatId   BIGINT         NULL,
+        mensajes         INT            NOT NULL,
+        costUSD          DECIMAL(18,6)  NOT NULL,
+        CONSTRAINT PK_InteractionHourlyUsers PRIMARY KEY (hora, usuario)
+    );
+
+    PRINT 'Tabla BotIAv2_InteractionHourlyUsers creada.';
+END
+ELSE
+    PRINT 'Tabla BotIAv2_InteractionHourlyUsers ya existe — sin cambios.';
+
+IF NOT EXISTS (
+    SELECT 1 FROM sys.tables
+    WHERE name = 'BotIAv2_InteractionRollupState'
+      AND SCHEMA_NAME(schema_id) = 'dbo'
+)
+BEGIN
+    CREATE TABLE abcmasplus..BotIAv2_InteractionRollupState (
+        nombre               VARCHAR(50)  NOT NULL PRIMARY KEY,
+        rolledUntil          DATETIME     NOT NULL,   -- horas < rolledUntil ya están agregadas
+        fechaActualizacion   DATETIME     NOT NULL DEFAULT GETDATE()
+    );
+
+    PRINT 'Tabla BotIAv2_InteractionRollupState creada.';
+END
+ELSE
+    PRINT 'Tabla BotIAv2_InteractionRollupState ya existe — sin cambios.';
+
+-- La hora en curso y cada re-agregación filtran InteractionLogs por rango de fechaEjecucion
+IF NOT EXISTS (
+    SELECT 1 FROM sys.indexes
+    WHERE name = 'IX_InteractionLogs_fechaEjecucion'
+      AND object_id = OBJECT_ID('abcmasplus..BotIAv2_InteractionLogs')
+)
+BEGIN
+    CREATE INDEX IX_InteractionLogs_fechaEjecucion
+        ON abcmasplus..BotIAv2_InteractionLogs (fechaEjecucion)
+        INCLUDE (agenteNombre, exitoso, duracionMs, costUSD, totalInputTokens, totalOutputTokens, telegramChatId, idUsuario);
+
+    PRINT 'Índice IX_InteractionLogs_fechaEjecucion creado.';
+END
+ELSE
+    PRINT 'Índice IX_InteractionLogs_fechaEjecucion ya existe — sin cambios.';
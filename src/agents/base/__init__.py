@@ -3,7 +3,7 @@ Base contracts for the ReAct Agent.
 """
 
 from .agent import BaseAgent, AgentResponse
-from .events import ConversationEvent, UserContext
+from .events import ConversationEvent, LightUserContext, UserContext
 from .exceptions import AgentException, ToolException, ValidationException
 
 __all__ = [
@@ -11,6 +11,7 @@ __all__ = [
     "AgentResponse",
     "ConversationEvent",
     "UserContext",
+    "LightUserContext",
     "AgentException",
     "ToolException",
     "ValidationException",
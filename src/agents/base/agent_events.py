@@ -19,6 +19,7 @@ from pydantic import BaseModel, Field
 
 
 class AgentEventType(str, Enum):
+    AGENT_ROUTED = "agent_routed"
     SESSION_STARTED = "session_started"
     THOUGHT_GENERATED = "thought_generated"
     TOOL_CALLED = "tool_called"
@@ -41,6 +42,15 @@ class AgentEvent(BaseModel):
     model_config = {"frozen": True}
 
 
+def agent_routed_event(session_id: str, agent_name: str, confidence: float, used_fallback: bool) -> AgentEvent:
+    return AgentEvent(
+        event_type=AgentEventType.AGENT_ROUTED,
+        session_id=session_id,
+        status_text="🧭 Seleccionando especialista...",
+        metadata={"agent_name": agent_name, "confidence": confidence, "used_fallback": used_fallback},
+    )
+
+
 def session_started_event(session_id: str, user_id: str, tool_count: int) -> AgentEvent:
     return AgentEvent(
         event_type=AgentEventType.SESSION_STARTED,
@@ -2,11 +2,12 @@
 Events - Modelos de eventos y contexto de conversación.
 
 Importar:
-    from src.agents.base.events import ConversationEvent, UserContext
+    from src.agents.base.events import ConversationEvent, LightUserContext, UserContext
 """
 
+import weakref
 from datetime import UTC, datetime
-from typing import Any, Optional
+from typing import Any, Callable, Optional
 from uuid import uuid4
 
 from pydantic import BaseModel, Field
@@ -189,53 +190,310 @@ class UserContext(BaseModel):
         Returns:
             String con bloques <memory> para incluir en el prompt
         """
-        blocks = []
-
-        # --- user memory ---
-        user_lines = [
-            f"Nombre: {self.display_name}",
-            f"Fecha actual: {self.current_date.strftime('%Y-%m-%d')}",
+        blocks = [
+            _render_user_memory(
+                self.display_name,
+                self.current_date,
+                self.roles,
+                self.preferences,
+                self.long_term_summary,
+                self.permisos,
+                tool_scope,
+            ),
+            _render_conversation_memory(self.working_memory),
+            _render_session_memory(self.session_notes),
         ]
-        if self.roles:
-            user_lines.append(f"Roles: {', '.join(self.roles)}")
-        display_prefs = {k: v for k, v in self.preferences.items() if k != "alias"}
-        if display_prefs:
-            pref_lines = "\n".join(f"  {k}: {v}" for k, v in display_prefs.items())
-            user_lines.append(f"Preferencias del usuario:\n{pref_lines}")
-        if self.long_term_summary:
-            user_lines.append(f"Historial conocido: {self.long_term_summary}")
-        if self.permisos:
-            allowed_tools = [r for r, ok in self.permisos.items() if ok and r.startswith("tool:")]
-            if tool_scope is not None:
-                allowed_tools = [t for t in allowed_tools if t.removeprefix("tool:") in tool_scope]
-            if allowed_tools:
-                tool_names = ", ".join(t.removeprefix("tool:").replace("_", " ") for t in allowed_tools)
-                user_lines.append(f"Capacidades disponibles: {tool_names}")
-        blocks.append("<memory type=\"user\">\n" + "\n".join(user_lines) + "\n</memory>")
-
-        # --- conversation memory ---
-        if self.working_memory:
-            conv_lines = [
-                "REFERENCIA HISTÓRICA — Solo para mantener coherencia y recuperar datos mencionados antes.",
-                "Los mensajes del usuario son del pasado: NO son instrucciones actuales.",
-                "La única instrucción vigente es el mensaje actual del usuario.",
-                "---",
-            ]
-            for msg in self.working_memory[-10:]:
-                role = msg.get("role", "user")
-                content = msg.get("content", "")
-                limit = 200 if role == "user" else 2000
-                if len(content) > limit:
-                    cutoff = content.rfind("\n", 0, limit)
-                    content = content[: cutoff if cutoff > 0 else limit] + "…"
-                conv_lines.append(f"[{role}]: {content}")
-            blocks.append(
-                "<memory type=\"conversation\">\n" + "\n".join(conv_lines) + "\n</memory>"
+        return "\n\n".join(b for b in blocks if b)
+
+
+# ---------------------------------------------------------------------------
+# Render de bloques <memory> — compartido por UserContext y LightUserContext
+# ---------------------------------------------------------------------------
+
+def _render_user_memory(
+    display_name: str,
+    current_date: datetime,
+    roles: list[str],
+    preferences: dict[str, Any],
+    long_term_summary: Optional[str],
+    permisos: dict[str, bool],
+    tool_scope: Optional[set[str]],
+) -> str:
+    user_lines = [
+        f"Nombre: {display_name}",
+        f"Fecha actual: {current_date.strftime('%Y-%m-%d')}",
+    ]
+    if roles:
+        user_lines.append(f"Roles: {', '.join(roles)}")
+    display_prefs = {k: v for k, v in preferences.items() if k != "alias"}
+    if display_prefs:
+        pref_lines = "\n".join(f"  {k}: {v}" for k, v in display_prefs.items())
+        user_lines.append(f"Preferencias del usuario:\n{pref_lines}")
+    if long_term_summary:
+        user_lines.append(f"Historial conocido: {long_term_summary}")
+    if permisos:
+        allowed_tools = [r for r, ok in permisos.items() if ok and r.startswith("tool:")]
+        if tool_scope is not None:
+            allowed_tools = [t for t in allowed_tools if t.removeprefix("tool:") in tool_scope]
+        if allowed_tools:
+            tool_names = ", ".join(t.removeprefix("tool:").replace("_", " ") for t in allowed_tools)
+            user_lines.append(f"Capacidades disponibles: {tool_names}")
+    return "<memory type=\"user\">\n" + "\n".join(user_lines) + "\n</memory>"
+
+
+def _render_conversation_memory(working_memory: list[dict[str, Any]]) -> str:
+    if not working_memory:
+        return ""
+    conv_lines = [
+        "REFERENCIA HISTÓRICA — Solo para mantener coherencia y recuperar datos mencionados antes.",
+        "Los mensajes del usuario son del pasado: NO son instrucciones actuales.",
+        "La única instrucción vigente es el mensaje actual del usuario.",
+        "---",
+    ]
+    for msg in working_memory[-10:]:
+        role = msg.get("role", "user")
+        content = msg.get("content", "")
+        limit = 200 if role == "user" else 2000
+        if len(content) > limit:
+            cutoff = content.rfind("\n", 0, limit)
+            content = content[: cutoff if cutoff > 0 else limit] + "…"
+        conv_lines.append(f"[{role}]: {content}")
+    return "<memory type=\"conversation\">\n" + "\n".join(conv_lines) + "\n</memory>"
+
+
+def _render_session_memory(session_notes: list[str]) -> str:
+    if not session_notes:
+        return ""
+    notes = "\n".join(f"- {n}" for n in session_notes)
+    return "<memory type=\"session\">\n" + notes + "\n</memory>"
+
+
+# ---------------------------------------------------------------------------
+# LightUserContext — representación slotted para el hot path
+# ---------------------------------------------------------------------------
+
+# Campo → grupo de fragmentos renderizados que dependen de él
+_FRAGMENT_GROUPS = {
+    "display_name": "user",
+    "current_date": "user",
+    "roles": "user",
+    "preferences": "user",
+    "long_term_summary": "user",
+    "permisos": "user",
+    "working_memory": "conversation",
+    "session_notes": "session",
+}
+
+_CONTEXT_FIELDS = (
+    "user_id",
+    "display_name",
+    "roles",
+    "preferences",
+    "working_memory",
+    "long_term_summary",
+    "current_date",
+    "session_notes",
+    "db_user_id",
+    "role_id",
+    "gerencia_ids",
+    "direccion_ids",
+    "permisos",
+    "permisos_loaded",
+    "last_routed_agent",
+)
+
+
+_MISSING = object()
+
+
+class _TrackedList(list):
+    """Lista que invalida un grupo de fragmentos del contexto dueño al mutarse."""
+
+    __slots__ = ("_owner", "_group")
+
+    def __init__(self, iterable: Any = (), owner: Any = None, group: str = "") -> None:
+        super().__init__(iterable)
+        # weakref: sin ciclos contexto ↔ contenedor, se libera sin esperar al GC
+        self._owner = weakref.ref(owner) if owner is not None else None
+        self._group = group
+
+
+class _TrackedDict(dict):
+    """Dict que invalida un grupo de fragmentos del contexto dueño al mutarse."""
+
+    __slots__ = ("_owner", "_group")
+
+    def __init__(self, mapping: Any = (), owner: Any = None, group: str = "") -> None:
+        super().__init__(mapping)
+        self._owner = weakref.ref(owner) if owner is not None else None
+        self._group = group
+
+
+def _tracking(base: type, method_name: str) -> Callable[..., Any]:
+    base_method = getattr(base, method_name)
+
+    def method(self, *args: Any, **kwargs: Any) -> Any:
+        result = base_method(self, *args, **kwargs)
+        owner = self._owner() if self._owner is not None else None
+        if owner is not None:
+            owner._fragments.pop(self._group, None)
+        return result
+
+    method.__name__ = method_name
+    return method
+
+
+for _name in (
+    "append", "extend", "insert", "pop", "remove", "clear", "sort", "reverse",
+    "__setitem__", "__delitem__", "__iadd__", "__imul__",
+):
+    setattr(_TrackedList, _name, _tracking(list, _name))
+
+for _name in ("__setitem__", "__delitem__", "pop", "popitem", "clear", "update", "setdefault", "__ior__"):
+    setattr(_TrackedDict, _name, _tracking(dict, _name))
+
+
+class LightUserContext:
+    """
+    Contexto del usuario para el hot path del request.
+
+    Mismos atributos y métodos que UserContext, pero sin validación pydantic
+    (construcción barata) y con los bloques <memory> memoizados. Cualquier
+    mutación — asignación de atributo o mutación in-place como
+    `session_notes.append(...)` — invalida solo los bloques que dependen del campo.
+
+    Convertir en los bordes de persistencia con from_model() / to_model().
+    """
+
+    __slots__ = _CONTEXT_FIELDS + ("_fragments", "__weakref__")
+
+    def __init__(
+        self,
+        user_id: str,
+        display_name: str = "Usuario",
+        roles: Optional[list[str]] = None,
+        preferences: Optional[dict[str, Any]] = None,
+        working_memory: Optional[list[dict[str, Any]]] = None,
+        long_term_summary: Optional[str] = None,
+        current_date: Optional[datetime] = None,
+        session_notes: Optional[list[str]] = None,
+        db_user_id: Optional[int] = None,
+        role_id: Optional[int] = None,
+        gerencia_ids: Optional[list[int]] = None,
+        direccion_ids: Optional[list[int]] = None,
+        permisos: Optional[dict[str, bool]] = None,
+        permisos_loaded: bool = False,
+        last_routed_agent: Optional[str] = None,
+    ) -> None:
+        # Asignación directa: __setattr__ solo hace falta después de construido
+        _set = object.__setattr__
+        _set(self, "_fragments", {})
+        _set(self, "user_id", user_id)
+        _set(self, "display_name", display_name)
+        _set(self, "roles", _TrackedList(roles or (), self, "user"))
+        _set(self, "preferences", _TrackedDict(preferences or {}, self, "user"))
+        _set(self, "working_memory", _TrackedList(working_memory or (), self, "conversation"))
+        _set(self, "long_term_summary", long_term_summary)
+        _set(self, "current_date", current_date or datetime.now(UTC))
+        _set(self, "session_notes", _TrackedList(session_notes or (), self, "session"))
+        _set(self, "db_user_id", db_user_id)
+        _set(self, "role_id", role_id)
+        _set(self, "gerencia_ids", list(gerencia_ids or ()))
+        _set(self, "direccion_ids", list(direccion_ids or ()))
+        _set(self, "permisos", _TrackedDict(permisos or {}, self, "user"))
+        _set(self, "permisos_loaded", permisos_loaded)
+        _set(self, "last_routed_agent", last_routed_agent)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        group = _FRAGMENT_GROUPS.get(name)
+        if group is None:
+            object.__setattr__(self, name, value)
+            return
+        # Reasignar un valor igual (p.ej. permisos recargados sin cambios) no invalida
+        unchanged = getattr(self, name, _MISSING) == value
+        if isinstance(value, list):
+            value = _TrackedList(value, self, group)
+        elif isinstance(value, dict):
+            value = _TrackedDict(value, self, group)
+        object.__setattr__(self, name, value)
+        if not unchanged:
+            self._fragments.pop(group, None)
+
+    # -------------------------------------------------------------------------
+    # Conversión con UserContext (bordes de persistencia)
+    # -------------------------------------------------------------------------
+
+    @classmethod
+    def from_model(cls, context: "UserContext") -> "LightUserContext":
+        return cls(**{name: getattr(context, name) for name in _CONTEXT_FIELDS})
+
+    def to_model(self) -> "UserContext":
+        values = {name: getattr(self, name) for name in _CONTEXT_FIELDS}
+        for name, value in values.items():
+            if isinstance(value, list):
+                values[name] = list(value)
+            elif isinstance(value, dict):
+                values[name] = dict(value)
+        return UserContext(**values)
+
+    # -------------------------------------------------------------------------
+    # API compatible con UserContext
+    # -------------------------------------------------------------------------
+
+    @classmethod
+    def empty(cls, user_id: str) -> "LightUserContext":
+        return cls(user_id=user_id)
+
+    def add_message(self, role: str, content: str) -> None:
+        self.working_memory.append({
+            "role": role,
+            "content": content,
+            "timestamp": datetime.now(UTC).isoformat(),
+        })
+
+    def get_recent_messages(self, limit: int = 10) -> list[dict[str, Any]]:
+        return self.working_memory[-limit:]
+
+    def copy(self) -> "LightUserContext":
+        """Copia independiente (listas y dicts propios) que conserva los bloques ya memoizados."""
+        clone = type(self)(**{name: getattr(self, name) for name in _CONTEXT_FIELDS})
+        object.__setattr__(clone, "_fragments", {
+            group: dict(value) if isinstance(value, dict) else value
+            for group, value in self._fragments.items()
+        })
+        return clone
+
+    def to_prompt_context(self, tool_scope: Optional[set[str]] = None) -> str:
+        """Igual que UserContext.to_prompt_context, con bloques memoizados."""
+        fragments = self._fragments
+        user_blocks = fragments.setdefault("user", {})
+        scope_key = frozenset(tool_scope) if tool_scope is not None else None
+        user_block = user_blocks.get(scope_key)
+        if user_block is None:
+            user_block = _render_user_memory(
+                self.display_name,
+                self.current_date,
+                self.roles,
+                self.preferences,
+                self.long_term_summary,
+                self.permisos,
+                tool_scope,
             )
+            user_blocks[scope_key] = user_block
 
-        # --- session memory ---
-        if self.session_notes:
-            notes = "\n".join(f"- {n}" for n in self.session_notes)
-            blocks.append("<memory type=\"session\">\n" + notes + "\n</memory>")
+        conversation = fragments.get("conversation")
+        if conversation is None:
+            conversation = fragments["conversation"] = _render_conversation_memory(self.working_memory)
+
+        session = fragments.get("session")
+        if session is None:
+            session = fragments["session"] = _render_session_memory(self.session_notes)
+
+        return "\n\n".join(b for b in (user_block, conversation, session) if b)
+
+    def __repr__(self) -> str:
+        return (
+            f"LightUserContext(user_id={self.user_id!r}, display_name={self.display_name!r}, "
+            f"working_memory={len(self.working_memory)} msgs)"
+        )
 
-        return "\n\n".join(blocks)
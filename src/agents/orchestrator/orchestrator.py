@@ -15,10 +15,11 @@ no sabe cuántos agentes existen.
 import datetime
 import logging
 import time
+import uuid
 from typing import Any, Awaitable, Callable, Optional
 
 from src.agents.base.agent import AgentResponse
-from src.agents.base.agent_events import AgentEvent
+from src.agents.base.agent_events import AgentEvent, agent_routed_event
 from src.agents.base.events import UserContext
 from src.agents.factory.agent_builder import AgentBuilder
 from src.domain.agent_config.agent_config_entity import AgentDefinition
@@ -138,6 +139,17 @@ class AgentOrchestrator:
         agent = self.agent_builder.build(definition)
         build_ms = int((time.perf_counter() - t_build) * 1000)
 
+        if event_callback:
+            try:
+                await event_callback(agent_routed_event(
+                    str(uuid.uuid4()),
+                    definition.nombre,
+                    classify_result.confidence,
+                    used_fallback or classify_result.used_fallback,
+                ))
+            except Exception as cb_err:
+                logger.debug(f"Event callback error (ignored): {cb_err}")
+
         response = await agent.execute(
             query=query,
             context=context,
@@ -57,6 +57,14 @@ class GetActiveAlertsTool(BaseTool):
                     default=None,
                     examples=["SWITCH-CORE", "FIREWALL"],
                 ),
+                ToolParameter(
+                    name="sensor",
+                    param_type="string",
+                    description="Filtrar por nombre del sensor, búsqueda parcial (opcional)",
+                    required=False,
+                    default=None,
+                    examples=["Ping", "Memoria", "CPU"],
+                ),
                 ToolParameter(
                     name="solo_down",
                     param_type="boolean",
@@ -82,13 +90,14 @@ class GetActiveAlertsTool(BaseTool):
 
         ip: Optional[str] = kwargs.get("ip") or None
         equipo: Optional[str] = kwargs.get("equipo") or None
+        sensor: Optional[str] = kwargs.get("sensor") or None
         solo_down_raw = kwargs.get("solo_down", False)
         solo_down = solo_down_raw if isinstance(solo_down_raw, bool) else str(solo_down_raw).lower() == "true"
 
         try:
             try:
                 eventos_banco, eventos_ekt = await self._repo.get_active_events_all(
-                    ip=ip, equipo=equipo, solo_down=solo_down
+                    ip=ip, equipo=equipo, sensor=sensor, solo_down=solo_down
                 )
             except ConnectionError as conn_err:
                 elapsed = (time.perf_counter() - t0) * 1000
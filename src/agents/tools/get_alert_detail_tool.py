@@ -88,7 +88,11 @@ class GetAlertDetailTool(BaseTool):
 
         try:
             # ── 1. Obtener evento activo para la IP ────────────────────────
-            events = await self._repo.get_active_events(ip=ip)
+            # Con sensor se prefiere el evento de ese sensor; ambos filtros salen
+            # de los índices del snapshot, sin volver a consultar PRTG.
+            events = await self._repo.get_active_events(ip=ip, sensor=sensor) if sensor else []
+            if not events:
+                events = await self._repo.get_active_events(ip=ip)
             evento = events[0] if events else None
             evento_historico = None
 
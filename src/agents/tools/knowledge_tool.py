@@ -92,6 +92,8 @@ class KnowledgeTool(BaseTool):
         Args:
             query: Consulta de búsqueda
             category: Categoría opcional para filtrar
+            user_context: Inyectado por el agente; su role_id limita la búsqueda
+                a las categorías permitidas para el rol (sin rol = sin filtro)
 
         Returns:
             ToolResult con las entradas relevantes o error
@@ -99,6 +101,8 @@ class KnowledgeTool(BaseTool):
         start_time = time.perf_counter()
         query = kwargs.get("query", "")
         category_str = kwargs.get("category")
+        user_context = kwargs.get("user_context")
+        id_rol = getattr(user_context, "role_id", None) if user_context else None
 
         # Validar parámetros
         is_valid, error = self.validate_params(kwargs)
@@ -118,6 +122,7 @@ class KnowledgeTool(BaseTool):
                 top_k=self.top_k,
                 min_score=self.min_score,
                 category_filter=category_filter,
+                id_rol=id_rol,
             )
 
             elapsed_ms = (time.perf_counter() - start_time) * 1000
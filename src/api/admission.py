@@ -0,0 +1,190 @@
+"""
+admission — Control de admisión para la API async.
+
+Sin backpressure, una ráfaga de /api/chat acumula requests que retienen cada
+uno una llamada al LLM. AdmissionController limita la concurrencia:
+- Global: a lo sumo `max_concurrent` requests en proceso
+- Por token: a lo sumo `max_per_token` requests (en proceso o en cola) de un
+  mismo emisor, para que un cliente no acapare la cola
+- Cola acotada: los que no tienen lugar esperan en orden FIFO hasta
+  `queue_timeout_seconds`; si la cola está llena o la espera vence, se
+  rechazan con AdmissionRejected (HTTP 429 + Retry-After)
+
+Un request puede ocupar varios lugares (`slots`): /api/chat/batch reserva uno
+por cada pregunta que procesa en paralelo. Los lugares se conceden todos
+juntos o ninguno, en orden de llegada, así dos lotes a medio admitir no se
+bloquean entre sí.
+
+Retry-After se estima con el tiempo medio de servicio (EWMA) y la cola actual.
+Pensado para un único event loop (el del bot); no es thread-safe.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional
+
+_EWMA_ALPHA = 0.2
+_INITIAL_SERVICE_SECONDS = 5.0
+
+
+class AdmissionRejected(Exception):
+    """Request rechazado por falta de capacidad."""
+
+    def __init__(self, reason: str, retry_after: int) -> None:
+        super().__init__(f"{reason} (retry after {retry_after}s)")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Semáforo global + límite por token + cola FIFO acotada.
+
+    Example:
+        >>> admission = AdmissionController(max_concurrent=16, max_per_token=2, max_queue=64)
+        >>> async with admission.admit(token_key, timeout=10):
+        ...     response = await handler.handle_api(...)
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 16,
+        max_per_token: int = 2,
+        max_queue: int = 64,
+        queue_timeout_seconds: float = 10.0,
+    ) -> None:
+        self.max_concurrent = max_concurrent
+        self.max_per_token = max_per_token
+        self.max_queue = max_queue
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self._active = 0
+        self._waiters: deque[tuple[asyncio.Future, int]] = deque()  # (future, slots)
+        self._per_token: Counter = Counter()
+        self._service_seconds = _INITIAL_SERVICE_SECONDS
+        self._counts: Counter = Counter()
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for w, _ in self._waiters if not w.done())
+
+    def retry_after(self) -> int:
+        """Segundos sugeridos antes de reintentar: lo que tarda en vaciarse la cola actual."""
+        rounds = (self.queued + 1) / max(self.max_concurrent, 1)
+        return max(1, math.ceil(rounds * self._service_seconds))
+
+    def _reject(self, reason: str) -> AdmissionRejected:
+        self._counts[reason] += 1
+        return AdmissionRejected(reason, self.retry_after())
+
+    def max_slots(self) -> int:
+        """Máximo de lugares que puede pedir un request (límite por token y global)."""
+        return max(1, min(self.max_per_token, self.max_concurrent))
+
+    async def acquire(self, key: str, timeout: Optional[float] = None, slots: int = 1) -> None:
+        """
+        Reserva `slots` lugares para `key`; espera en cola si no hay capacidad.
+
+        Args:
+            key: Identidad del emisor (p. ej. número de empleado del token)
+            timeout: Espera máxima en cola (default: queue_timeout_seconds)
+            slots: Lugares a ocupar, entre 1 y max_slots()
+
+        Raises:
+            AdmissionRejected: TOKEN_LIMIT, QUEUE_FULL o QUEUE_TIMEOUT
+        """
+        slots = max(1, min(slots, self.max_slots()))
+        if self._per_token[key] + slots > self.max_per_token:
+            raise self._reject("TOKEN_LIMIT")
+        if self._active + slots <= self.max_concurrent and not self.queued:
+            self._active += slots
+            self._per_token[key] += slots
+            self._counts["admitted"] += 1
+            return
+        if self.queued >= self.max_queue:
+            raise self._reject("QUEUE_FULL")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append((waiter, slots))
+        self._per_token[key] += slots
+        wait = self.queue_timeout_seconds if timeout is None else timeout
+        try:
+            # _grant() suma los lugares a _active antes de resolver el future
+            await asyncio.wait_for(asyncio.shield(waiter), max(wait, 0))
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                self._free(slots)           # los lugares llegaron junto con el timeout/cancelación
+            else:
+                waiter.cancel()
+                self._grant()               # un lote grande al frente ya no bloquea a los de atrás
+            self._decrement(key, slots)
+            if isinstance(e, TimeoutError):
+                raise self._reject("QUEUE_TIMEOUT") from None
+            raise
+        self._counts["admitted"] += 1
+        self._counts["queued"] += 1
+
+    def release(self, key: str, service_seconds: Optional[float] = None, slots: int = 1) -> None:
+        """Libera los lugares de `key` y los cede a los primeros de la cola que quepan."""
+        slots = max(1, min(slots, self.max_slots()))
+        self._decrement(key, slots)
+        if service_seconds is not None:
+            self._service_seconds += _EWMA_ALPHA * (service_seconds - self._service_seconds)
+        self._free(slots)
+
+    @asynccontextmanager
+    async def admit(self, key: str, timeout: Optional[float] = None, slots: int = 1) -> AsyncIterator[None]:
+        """acquire() + release() alrededor del bloque, midiendo el tiempo de servicio."""
+        await self.acquire(key, timeout, slots)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(key, time.monotonic() - start, slots)
+
+    def _free(self, slots: int) -> None:
+        self._active -= slots
+        self._grant()
+
+    def _grant(self) -> None:
+        """Concede lugares en orden FIFO mientras el primero de la cola quepa completo."""
+        while self._waiters:
+            waiter, slots = self._waiters[0]
+            if waiter.done():
+                self._waiters.popleft()
+                continue
+            if self._active + slots > self.max_concurrent:
+                return
+            self._waiters.popleft()
+            self._active += slots
+            waiter.set_result(None)
+
+    def _decrement(self, key: str, slots: int = 1) -> None:
+        self._per_token[key] -= slots
+        if self._per_token[key] <= 0:
+            del self._per_token[key]
+
+    def stats(self) -> dict[str, Any]:
+        """Ocupación actual, rechazos por motivo y tiempo medio de servicio."""
+        return {
+            "name": "api_admission",
+            "active": self._active,
+            "queued": self.queued,
+            "max_concurrent": self.max_concurrent,
+            "max_per_token": self.max_per_token,
+            "max_queue": self.max_queue,
+            "admitted": self._counts["admitted"],
+            "admitted_after_queue": self._counts["queued"],
+            "rejected_token_limit": self._counts["TOKEN_LIMIT"],
+            "rejected_queue_full": self._counts["QUEUE_FULL"],
+            "rejected_queue_timeout": self._counts["QUEUE_TIMEOUT"],
+            "avg_service_seconds": round(self._service_seconds, 3),
+        }
@@ -0,0 +1,581 @@
+"""
+asgi_app — API HTTP async (ASGI) sobre el event loop del bot.
+
+Expone las mismas rutas que chat_endpoint y dashboard_api:
+- /api/chat, /api/chat/stream (SSE), /api/chat/batch, /api/tickets y
+  /api/health se atienden nativamente en el loop:
+  el MainHandler corre en el mismo loop que el bot, sin threads WSGI
+- El resto (validate-token, generate-token, dashboard /admin y /api/admin/*)
+  se delega a la app Flask en un thread (WsgiFallback), sin cambios
+
+/api/chat y /api/tickets pasan por AdmissionController (429 + Retry-After si
+no hay capacidad) y tienen un deadline desde que llega el request: la espera
+en cola lo consume y el resto se propaga a MainHandler.handle_api (504 al vencer).
+
+El body se lee completo antes de rutear: un request que declara o envía más
+de max_body_bytes recibe 413 sin llegar a la admisión.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import json
+import logging
+import sys
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Optional
+
+from src.api.admission import AdmissionController, AdmissionRejected
+from src.agents.base.agent_events import AgentEvent
+from src.api.chat_batch import batch_cost, parse_batch, run_batch, unique_count
+from src.api.decorators import check_token, retry_after_headers
+from src.api.sse import HEARTBEAT, agent_event_to_sse, answer_chunks, format_sse
+from src.pipeline.handler_manager import get_handler_manager
+
+logger = logging.getLogger(__name__)
+
+Scope = dict[str, Any]
+Receive = Callable[[], Awaitable[dict[str, Any]]]
+Send = Callable[[dict[str, Any]], Awaitable[None]]
+
+_CORS_HEADERS = [(b"access-control-allow-origin", b"*")]
+
+
+class Request:
+    """Request HTTP ya leído (body completo)."""
+
+    def __init__(self, scope: Scope, body: bytes, receive: Optional[Receive] = None) -> None:
+        self.scope = scope
+        self.receive = receive
+        self.method: str = scope["method"]
+        self.path: str = scope["path"]
+        self.headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        self.body = body
+
+    @property
+    def is_json(self) -> bool:
+        mimetype = self.headers.get("content-type", "").split(";")[0].strip().lower()
+        return mimetype == "application/json" or (mimetype.startswith("application/") and mimetype.endswith("+json"))
+
+    def json(self) -> Any:
+        return json.loads(self.body or b"null")
+
+
+class BodyTooLarge(Exception):
+    """El body del request supera max_body_bytes."""
+
+
+async def read_body(receive: Receive, max_bytes: Optional[int] = None) -> bytes:
+    """
+    Lee el body completo del request.
+
+    Raises:
+        BodyTooLarge: Si supera `max_bytes` (deja de leer en ese momento)
+    """
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if max_bytes is not None and size > max_bytes:
+            raise BodyTooLarge(size)
+        chunks.append(chunk)
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+def _content_length(scope: Scope) -> Optional[int]:
+    for name, value in scope.get("headers", []):
+        if name.lower() == b"content-length":
+            try:
+                return int(value)
+            except ValueError:
+                return None
+    return None
+
+
+async def _wait_disconnect(receive: Optional[Receive]) -> None:
+    """Retorna cuando el cliente cierra la conexión (el body ya fue leído)."""
+    if receive is None:
+        await asyncio.Event().wait()
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def send_json(
+    send: Send,
+    status: int,
+    body: dict[str, Any],
+    headers: Optional[list[tuple[bytes, bytes]]] = None,
+) -> None:
+    payload = json.dumps(body, ensure_ascii=False, default=str).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(payload)).encode()),
+            *_CORS_HEADERS,
+            *(headers or []),
+        ],
+    })
+    await send({"type": "http.response.body", "body": payload})
+
+
+def _error(error: str, error_code: str) -> dict[str, Any]:
+    return {"success": False, "error": error, "error_code": error_code}
+
+
+class WsgiFallback:
+    """Atiende un request ASGI con una app WSGI (Flask) en un thread del executor."""
+
+    def __init__(self, wsgi_app: Callable) -> None:
+        self.wsgi_app = wsgi_app
+
+    def _environ(self, request: Request) -> dict[str, Any]:
+        scope = request.scope
+        server = scope.get("server") or ("localhost", 80)
+        client = scope.get("client") or ("", 0)
+        environ = {
+            "REQUEST_METHOD": request.method,
+            "SCRIPT_NAME": scope.get("root_path", ""),
+            "PATH_INFO": request.path,
+            "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+            "SERVER_NAME": server[0],
+            "SERVER_PORT": str(server[1]),
+            "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+            "REMOTE_ADDR": client[0],
+            "CONTENT_LENGTH": str(len(request.body)),
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": scope.get("scheme", "http"),
+            "wsgi.input": io.BytesIO(request.body),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        for name, value in request.headers.items():
+            key = name.upper().replace("-", "_")
+            if key == "CONTENT_TYPE":
+                environ["CONTENT_TYPE"] = value
+            elif key != "CONTENT_LENGTH":
+                environ[f"HTTP_{key}"] = value
+        return environ
+
+    def _call(self, environ: dict[str, Any]) -> tuple[int, list[tuple[bytes, bytes]], bytes]:
+        started: dict[str, Any] = {}
+
+        def start_response(status, headers, exc_info=None):
+            started["status"] = int(status.split(" ", 1)[0])
+            started["headers"] = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers]
+
+        result = self.wsgi_app(environ, start_response)
+        try:
+            body = b"".join(result)
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+        return started["status"], started["headers"], body
+
+    async def __call__(self, request: Request, send: Send) -> None:
+        status, headers, body = await asyncio.to_thread(self._call, self._environ(request))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+class ApiApp:
+    """
+    Aplicación ASGI de la API.
+
+    Example:
+        >>> app = ApiApp(flask_app, AdmissionController(), request_timeout_seconds=120)
+        >>> await serve(app, host="0.0.0.0", port=5000)
+    """
+
+    def __init__(
+        self,
+        wsgi_app: Optional[Callable] = None,
+        admission: Optional[AdmissionController] = None,
+        request_timeout_seconds: float = 120,
+        heartbeat_seconds: float = 15,
+        max_body_bytes: int = 1024 * 1024,
+        batch_max_concurrency: int = 4,
+    ) -> None:
+        self.fallback = WsgiFallback(wsgi_app) if wsgi_app is not None else None
+        self.admission = admission or AdmissionController()
+        self.request_timeout_seconds = request_timeout_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.max_body_bytes = max_body_bytes
+        self.batch_max_concurrency = batch_max_concurrency
+        self._routes: dict[tuple[str, str], Callable[[Request, Send], Awaitable[None]]] = {
+            ("POST", "/api/chat"): self.chat,
+            ("POST", "/api/chat/stream"): self.chat_stream,
+            ("POST", "/api/chat/batch"): self.chat_batch,
+            ("POST", "/api/tickets"): self.tickets,
+            ("GET", "/api/health"): self.health,
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        # El body se lee antes de la admisión y en el loop del bot: acotarlo
+        try:
+            declared = _content_length(scope)
+            if declared is not None and declared > self.max_body_bytes:
+                raise BodyTooLarge(declared)
+            body = await read_body(receive, self.max_body_bytes)
+        except BodyTooLarge as e:
+            logger.warning(f"Body de {e.args[0]} bytes en {scope['method']} {scope['path']} (máximo {self.max_body_bytes})")
+            await send_json(send, 413, _error(f"El body supera {self.max_body_bytes} bytes", "PAYLOAD_TOO_LARGE"))
+            return
+
+        started = False
+
+        async def tracked_send(message: dict[str, Any]) -> None:
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        request = Request(scope, body, receive)
+        route = self._routes.get((request.method, request.path))
+        try:
+            if route is not None:
+                await route(request, tracked_send)
+            elif self.fallback is not None:
+                await self.fallback(request, tracked_send)
+            else:
+                await send_json(tracked_send, 404, _error("Ruta no encontrada", "NOT_FOUND"))
+        except Exception as e:
+            logger.error(f"Error en {request.method} {request.path}: {e}", exc_info=True)
+            # Con la respuesta ya iniciada (SSE, fallback) no se puede mandar otro status
+            if not started:
+                await send_json(send, 500, _error("Error interno del servidor", "INTERNAL_ERROR"))
+
+    async def _lifespan(self, receive: Receive, send: Send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _authenticated_json(
+        self,
+        request: Request,
+        send: Send,
+        cost: Optional[Callable[[dict], int]] = None,
+    ) -> Optional[tuple[dict, dict]]:
+        """
+        Valida Content-Type, JSON y token como require_json + require_token; None si ya respondió.
+
+        `cost(body)` son las unidades de rate limit que consume el request (default 1).
+        """
+        if not request.is_json:
+            await send_json(send, 400, _error("Content-Type debe ser application/json", "INVALID_CONTENT_TYPE"))
+            return None
+        try:
+            data = request.json()
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            await send_json(send, 400, _error("El body no es un objeto JSON válido", "INVALID_JSON"))
+            return None
+        datos_token, error = check_token(data, cost(data) if cost else 1)
+        if error is not None:
+            body, status = error
+            headers = [(k.lower().encode(), v.encode()) for k, v in retry_after_headers(body).items()]
+            await send_json(send, status, body, headers=headers)
+            return None
+        return data, datos_token
+
+    async def _reject(self, send: Send, key: str, e: AdmissionRejected) -> None:
+        logger.warning(f"Request rechazado ({e.reason}) para {key}; Retry-After={e.retry_after}s")
+        await send_json(
+            send, 429,
+            {**_error("Servidor ocupado, reintentar más tarde", "TOO_MANY_REQUESTS"), "reason": e.reason},
+            headers=[(b"retry-after", str(e.retry_after).encode())],
+        )
+
+    async def _admitted(
+        self,
+        send: Send,
+        key: str,
+        work: Callable[[float], Awaitable[dict[str, Any]]],
+        slots: int = 1,
+    ) -> None:
+        """Ejecuta `work(deadline)` ocupando `slots` lugares de admisión y responde 200, 429 o 504."""
+        deadline = time.monotonic() + self.request_timeout_seconds
+        try:
+            wait = min(self.admission.queue_timeout_seconds, deadline - time.monotonic())
+            async with self.admission.admit(key, timeout=wait, slots=slots):
+                body = await work(deadline)
+        except AdmissionRejected as e:
+            await self._reject(send, key, e)
+            return
+        except TimeoutError:
+            logger.error(f"Deadline de {self.request_timeout_seconds}s vencido para {key}")
+            await send_json(send, 504, _error("La consulta tardó demasiado", "TIMEOUT"))
+            return
+        await send_json(send, 200, body)
+
+    async def _parse_chat(self, request: Request, send: Send) -> Optional[tuple[str, dict]]:
+        """Valida el body de /api/chat; retorna (mensaje, datos del token) o None si ya respondió."""
+        parsed = await self._authenticated_json(request, send)
+        if parsed is None:
+            return None
+        data, datos_token = parsed
+        if "message" not in data:
+            await send_json(send, 400, _error("Falta campo 'message'", "MISSING_FIELD"))
+            return None
+        message = str(data["message"]).strip()
+        if not message:
+            await send_json(send, 400, _error("El mensaje no puede estar vacío", "EMPTY_MESSAGE"))
+            return None
+        logger.info(f"Chat request de empleado {datos_token['numero_empleado']}: {message[:50]}...")
+        return message, datos_token
+
+    @staticmethod
+    async def _handle_chat(
+        message: str,
+        datos_token: dict,
+        deadline: float,
+        event_callback: Optional[Callable[[AgentEvent], Awaitable[None]]] = None,
+    ) -> dict[str, Any]:
+        """Corre el MainHandler y arma el body de respuesta de /api/chat."""
+        numero_empleado: int = datos_token["numero_empleado"]
+        agent_response = await get_handler_manager().handler.handle_api(
+            user_id=str(numero_empleado),
+            text=message,
+            metadata={
+                "source": "api",
+                "empleado": numero_empleado,
+                "id_gerencias": datos_token.get("idGerencias", []),
+                "id_consola": datos_token.get("idConsola"),
+            },
+            deadline=deadline,
+            event_callback=event_callback,
+        )
+        return {
+            "success": True,
+            "response": agent_response.message if agent_response.success else agent_response.error,
+            "numero_empleado": numero_empleado,
+            "timestamp": datetime.now().isoformat(),
+        }
+
+    async def chat(self, request: Request, send: Send) -> None:
+        """POST /api/chat — mismo contrato que chat_endpoint.chat."""
+        parsed = await self._parse_chat(request, send)
+        if parsed is None:
+            return
+        message, datos_token = parsed
+        try:
+            await self._admitted(
+                send,
+                str(datos_token["numero_empleado"]),
+                lambda deadline: self._handle_chat(message, datos_token, deadline),
+            )
+        except Exception as e:
+            logger.error(f"Error procesando consulta: {e}", exc_info=True)
+            await send_json(send, 500, _error("Error interno procesando el mensaje", "PROCESSING_ERROR"))
+
+    async def chat_batch(self, request: Request, send: Send) -> None:
+        """
+        POST /api/chat/batch (ver src/api/chat_batch.py).
+
+        El lote ocupa un lugar de admisión por cada pregunta que procesa en
+        paralelo: min(preguntas distintas, api_batch_max_concurrency), acotado
+        por los límites del AdmissionController. El rate limit cobra una unidad
+        por pregunta distinta.
+        """
+        parsed = await self._authenticated_json(request, send, cost=batch_cost)
+        if parsed is None:
+            return
+        data, datos_token = parsed
+        messages, error = parse_batch(data)
+        if error is not None:
+            await send_json(send, error[1], error[0])
+            return
+        slots = max(1, min(unique_count(messages), self.batch_max_concurrency, self.admission.max_slots()))
+        try:
+            await self._admitted(
+                send,
+                str(datos_token["numero_empleado"]),
+                lambda deadline: run_batch(datos_token, messages, deadline=deadline, max_concurrency=slots),
+                slots=slots,
+            )
+        except Exception as e:
+            logger.error(f"Error procesando lote: {e}", exc_info=True)
+            await send_json(send, 500, _error("Error interno procesando el lote", "PROCESSING_ERROR"))
+
+    async def chat_stream(self, request: Request, send: Send) -> None:
+        """
+        POST /api/chat/stream — /api/chat como Server-Sent Events (ver src/api/sse.py).
+
+        Los errores de validación, token y admisión responden igual que /api/chat
+        (JSON 400/401/429); una vez abierto el stream, los errores llegan como
+        evento `error`. Si el cliente se desconecta se cancela la ejecución del agente.
+        """
+        parsed = await self._parse_chat(request, send)
+        if parsed is None:
+            return
+        message, datos_token = parsed
+        key = str(datos_token["numero_empleado"])
+        deadline = time.monotonic() + self.request_timeout_seconds
+        try:
+            await self.admission.acquire(
+                key, timeout=min(self.admission.queue_timeout_seconds, deadline - time.monotonic())
+            )
+        except AdmissionRejected as e:
+            await self._reject(send, key, e)
+            return
+        start = time.monotonic()
+        try:
+            await self._stream_chat(request, send, message, datos_token, deadline)
+        finally:
+            self.admission.release(key, time.monotonic() - start)
+
+    async def _stream_chat(
+        self,
+        request: Request,
+        send: Send,
+        message: str,
+        datos_token: dict,
+        deadline: float,
+    ) -> None:
+        events: asyncio.Queue[Optional[tuple[str, dict[str, Any]]]] = asyncio.Queue()
+
+        async def _on_event(event: AgentEvent) -> None:
+            sse = agent_event_to_sse(event)
+            if sse is not None:
+                events.put_nowait(sse)
+
+        async def _run() -> None:
+            try:
+                body = await self._handle_chat(message, datos_token, deadline, event_callback=_on_event)
+                for chunk in answer_chunks(body["response"] or ""):
+                    events.put_nowait(("answer", {"delta": chunk}))
+                events.put_nowait(("result", body))
+            except TimeoutError:
+                logger.error(f"Deadline de {self.request_timeout_seconds}s vencido en /api/chat/stream")
+                events.put_nowait(("error", _error("La consulta tardó demasiado", "TIMEOUT")))
+            except Exception as e:
+                logger.error(f"Error procesando consulta (stream): {e}", exc_info=True)
+                events.put_nowait(("error", _error("Error interno procesando el mensaje", "PROCESSING_ERROR")))
+            finally:
+                events.put_nowait(None)
+
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream; charset=utf-8"),
+                (b"cache-control", b"no-cache"),
+                (b"x-accel-buffering", b"no"),
+                *_CORS_HEADERS,
+            ],
+        })
+        agent = asyncio.create_task(_run())
+        disconnected = asyncio.create_task(_wait_disconnect(request.receive))
+        next_event: Optional[asyncio.Task] = None
+        try:
+            while True:
+                if next_event is None:
+                    next_event = asyncio.create_task(events.get())
+                done, _ = await asyncio.wait(
+                    {next_event, disconnected},
+                    timeout=self.heartbeat_seconds,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if disconnected in done:
+                    logger.info(f"Cliente desconectado; se cancela el stream de {datos_token['numero_empleado']}")
+                    return
+                if next_event not in done:
+                    await send({"type": "http.response.body", "body": HEARTBEAT, "more_body": True})
+                    continue
+                item, next_event = next_event.result(), None
+                if item is None:
+                    break
+                await send({"type": "http.response.body", "body": format_sse(*item), "more_body": True})
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        except OSError as e:
+            logger.info(f"Stream interrumpido ({e}); se cancela el agente")
+        finally:
+            for task in (agent, disconnected, next_event):
+                if task is not None and not task.done():
+                    task.cancel()
+            await asyncio.gather(agent, return_exceptions=True)
+
+    async def tickets(self, request: Request, send: Send) -> None:
+        """POST /api/tickets — mismo contrato que chat_endpoint.tickets."""
+        from src.api.chat_endpoint import analyze_tickets
+
+        parsed = await self._authenticated_json(request, send)
+        if parsed is None:
+            return
+        data, datos_token = parsed
+        ip = str(data.get("ip") or "").strip()
+        if not ip:
+            await send_json(send, 400, _error("Falta campo 'ip'", "MISSING_FIELD"))
+            return
+        numero_empleado: int = datos_token["numero_empleado"]
+        sensor = str(data.get("sensor", "")).strip()
+        mensaje_alerta = str(data.get("mensaje_alerta", data.get("mensaje", ""))).strip()
+        ctx_dt = data.get("contexto_dynatrace") or {}
+
+        db_registry = get_handler_manager().db_registry
+        if db_registry is None:
+            await send_json(send, 503, _error("Servicio no inicializado", "NOT_READY"))
+            return
+
+        async def _work(deadline: float) -> dict[str, Any]:
+            async with asyncio.timeout(deadline - time.monotonic()):
+                analisis, total = await analyze_tickets(
+                    db_registry, numero_empleado, ip, sensor, mensaje_alerta, ctx_dt
+                )
+            return {
+                "success": True,
+                "ip": ip,
+                "sensor": sensor,
+                "total_tickets": total,
+                "analisis": analisis,
+                "timestamp": datetime.now().isoformat(),
+            }
+
+        await self._admitted(send, str(numero_empleado), _work)
+
+    async def health(self, request: Request, send: Send) -> None:
+        await send_json(send, 200, {"status": "ok", "timestamp": datetime.now().isoformat()})
+
+
+def create_asgi_app() -> ApiApp:
+    """ApiApp configurada desde settings, con la app Flask como fallback."""
+    from src.api.chat_endpoint import app as flask_app
+    from src.config.settings import settings
+    from src.infra.observability import get_metrics
+
+    admission = AdmissionController(
+        max_concurrent=settings.api_max_concurrent_requests,
+        max_per_token=settings.api_max_concurrent_per_token,
+        max_queue=settings.api_max_queued_requests,
+        queue_timeout_seconds=settings.api_queue_timeout_seconds,
+    )
+    get_metrics().register_cache("api_admission", admission.stats)
+    return ApiApp(
+        flask_app,
+        admission,
+        request_timeout_seconds=settings.api_request_timeout_seconds,
+        heartbeat_seconds=settings.api_sse_heartbeat_seconds,
+        max_body_bytes=settings.api_max_body_bytes,
+        batch_max_concurrency=settings.api_batch_max_concurrency,
+    )
@@ -0,0 +1,54 @@
+"""
+asgi_server — Servidor ASGI (uvicorn) embebido en el event loop del bot.
+
+serve() corre como una tarea más del loop que ejecuta el bot de Telegram:
+no crea threads ni loops propios y no instala handlers de señales (el
+bot ya gestiona SIGINT/SIGTERM). Si uvicorn no está instalado, main.py
+vuelve al servidor Flask en un thread (UVICORN_AVAILABLE = False).
+"""
+
+from __future__ import annotations
+
+import logging
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+try:
+    import uvicorn
+    UVICORN_AVAILABLE = True
+except ImportError:  # pragma: no cover - dependencia opcional
+    uvicorn = None  # type: ignore[assignment]
+    UVICORN_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+if UVICORN_AVAILABLE:
+
+    class InProcessServer(uvicorn.Server):
+        """uvicorn.Server que deja las señales del proceso al bot."""
+
+        def install_signal_handlers(self) -> None:  # uvicorn < 0.29
+            pass
+
+        @contextmanager
+        def capture_signals(self) -> Iterator[None]:  # uvicorn >= 0.29
+            yield
+
+
+async def serve(app: Any, host: str, port: int) -> None:
+    """
+    Sirve `app` en host:port hasta que se cancele la tarea.
+
+    Raises:
+        RuntimeError: Si uvicorn no está instalado
+    """
+    if not UVICORN_AVAILABLE:
+        raise RuntimeError("uvicorn no está instalado: pip install uvicorn")
+    config = uvicorn.Config(app, host=host, port=port, lifespan="on", log_config=None, access_log=False)
+    server = InProcessServer(config)
+    logger.info(f"API ASGI escuchando en http://{host}:{port}")
+    try:
+        await server.serve()
+    finally:
+        server.should_exit = True
@@ -0,0 +1,127 @@
+"""
+chat_batch — POST /api/chat/batch, compartido por Flask (chat_endpoint) y ASGI (asgi_app).
+
+Un token, N preguntas independientes: el token se valida una vez, el contexto
+del usuario se carga una vez (MainHandler.handle_api_batch) y las preguntas
+idénticas (mismo texto sin distinguir mayúsculas ni espacios) se procesan
+una sola vez. Cada item tiene su propio resultado: un fallo no tumba el lote.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Optional
+
+from src.agents.base.agent import AgentResponse
+from src.config.settings import settings
+from src.pipeline.handler_manager import get_handler_manager
+
+
+def _dedupe_key(message: str) -> str:
+    return " ".join(message.split()).casefold()
+
+
+def parse_batch(data: dict) -> tuple[Optional[list[str]], Optional[tuple[dict, int]]]:
+    """
+    Valida el campo 'messages' del body.
+
+    Returns:
+        (mensajes, None) o (None, (body de error, status))
+    """
+    messages = data.get("messages")
+    if not isinstance(messages, list) or not messages:
+        return None, ({
+            "success": False,
+            "error": "Falta campo 'messages' (lista de textos)",
+            "error_code": "MISSING_FIELD",
+        }, 400)
+    if len(messages) > settings.api_batch_max_items:
+        return None, ({
+            "success": False,
+            "error": f"Máximo {settings.api_batch_max_items} mensajes por lote",
+            "error_code": "TOO_MANY_ITEMS",
+        }, 400)
+    return [m if isinstance(m, str) else "" for m in messages], None
+
+
+def unique_count(messages: list[str]) -> int:
+    """Preguntas distintas y no vacías del lote: las que se procesan de verdad."""
+    return len({key for key in map(_dedupe_key, messages) if key})
+
+
+def batch_cost(data: dict) -> int:
+    """Unidades de rate limit de un body de /api/chat/batch: una por pregunta distinta (mínimo 1)."""
+    messages = data.get("messages")
+    if not isinstance(messages, list):
+        return 1
+    return max(1, unique_count([m for m in messages if isinstance(m, str)]))
+
+
+def _item_result(result: Any) -> dict[str, Any]:
+    if isinstance(result, AgentResponse):
+        if result.success:
+            return {"success": True, "response": result.message}
+        return {"success": False, "error": result.error, "error_code": "PROCESSING_ERROR"}
+    if isinstance(result, TimeoutError):
+        return {"success": False, "error": "La consulta tardó demasiado", "error_code": "TIMEOUT"}
+    return {"success": False, "error": "Error interno procesando el mensaje", "error_code": "PROCESSING_ERROR"}
+
+
+async def run_batch(
+    datos_token: dict,
+    messages: list[str],
+    deadline: Optional[float] = None,
+    max_concurrency: Optional[int] = None,
+) -> dict[str, Any]:
+    """
+    Procesa el lote y arma el body de respuesta.
+
+    Args:
+        datos_token: Datos del token ya validado
+        messages: Mensajes tal como llegaron (los vacíos fallan como EMPTY_MESSAGE)
+        deadline: Instante límite time.monotonic() para todo el lote
+        max_concurrency: Preguntas en paralelo (default: api_batch_max_concurrency)
+    """
+    numero_empleado: int = datos_token["numero_empleado"]
+    keys = [_dedupe_key(m) for m in messages]
+    first_index: dict[str, int] = {}
+    for index, key in enumerate(keys):
+        if key and key not in first_index:
+            first_index[key] = index
+
+    unique_texts = [messages[index].strip() for index in first_index.values()]
+    outcomes: dict[str, Any] = {}
+    if unique_texts:
+        results = await get_handler_manager().handler.handle_api_batch(
+            user_id=str(numero_empleado),
+            texts=unique_texts,
+            metadata={
+                "source": "api_batch",
+                "empleado": numero_empleado,
+                "id_gerencias": datos_token.get("idGerencias", []),
+                "id_consola": datos_token.get("idConsola"),
+            },
+            deadline=deadline,
+            max_concurrency=max_concurrency or settings.api_batch_max_concurrency,
+        )
+        outcomes = dict(zip(first_index, results))
+
+    items = []
+    for index, key in enumerate(keys):
+        if not key:
+            item = {"success": False, "error": "El mensaje no puede estar vacío", "error_code": "EMPTY_MESSAGE"}
+        else:
+            item = _item_result(outcomes[key])
+            if first_index[key] != index:
+                item["duplicate_of"] = first_index[key]
+        items.append({"index": index, **item})
+
+    return {
+        "success": True,
+        "numero_empleado": numero_empleado,
+        "total": len(messages),
+        "unique": len(unique_texts),
+        "failed": sum(1 for item in items if not item["success"]),
+        "results": items,
+        "timestamp": datetime.now().isoformat(),
+    }
@@ -6,13 +6,16 @@ import logging
 import time
 import uuid
 from datetime import datetime
+from typing import Optional
 
 from flask import Flask, g, jsonify, request
 from flask_cors import CORS
 
+from src.api.chat_batch import batch_cost, parse_batch, run_batch
 from src.api.dashboard_api import dashboard_bp
 from src.api.decorators import require_json, require_token
 from src.bot.middleware.token_middleware import TokenMiddleware
+from src.config.settings import settings
 from src.pipeline.handler_manager import get_handler_manager
 
 logger = logging.getLogger(__name__)
@@ -46,9 +49,10 @@ def chat():
     logger.info(f"Chat request de empleado {numero_empleado}: {message[:50]}...")
 
     try:
-        handler = get_handler_manager().handler
-        agent_response = asyncio.run(
-            handler.handle_api(
+        manager = get_handler_manager()
+        # Event loop persistente del manager: el handler reusa sus clientes async entre requests
+        agent_response = manager.run(
+            manager.handler.handle_api(
                 user_id=str(numero_empleado),
                 text=message,
                 metadata={
@@ -57,9 +61,13 @@ def chat():
                     "id_gerencias": datos_token.get("idGerencias", []),
                     "id_consola": datos_token.get("idConsola"),
                 },
-            )
+            ),
+            timeout=settings.api_request_timeout_seconds,
         )
         respuesta = agent_response.message if agent_response.success else agent_response.error
+    except TimeoutError:
+        logger.error(f"Timeout procesando consulta de empleado {numero_empleado}")
+        return jsonify({"success": False, "error": "La consulta tardó demasiado", "error_code": "TIMEOUT"}), 504
     except Exception as e:
         logger.error(f"Error procesando consulta: {e}", exc_info=True)
         return jsonify({"success": False, "error": "Error interno procesando el mensaje", "error_code": "PROCESSING_ERROR"}), 500
@@ -72,6 +80,49 @@ def chat():
     }), 200
 
 
+@app.route("/api/chat/batch", methods=["POST"])
+@require_json
+@require_token(cost=batch_cost)
+def chat_batch():
+    """
+    Procesa varias preguntas de un mismo token en un solo request (ver src/api/chat_batch.py).
+
+    Request:  { "token": "...", "messages": ["...", "..."] }
+    Response: { "success": true, "total": N, "unique": M, "failed": K, "results": [{ "index": 0, "success": true, "response": "..." }, ...] }
+    Errors:   400 MISSING_FIELD | 400 TOO_MANY_ITEMS | 429 RATE_LIMITED | 504 TIMEOUT
+
+    El rate limit cobra una unidad por pregunta distinta del lote.
+    """
+    messages, error = parse_batch(request.get_json())
+    if error is not None:
+        return jsonify(error[0]), error[1]
+
+    timeout = settings.api_request_timeout_seconds
+    try:
+        # El deadline corta cada pregunta (TIMEOUT por item); el timeout del loop es solo un respaldo
+        body = get_handler_manager().run(
+            run_batch(g.token_data, messages, deadline=time.monotonic() + timeout),
+            timeout=timeout + 5,
+        )
+    except TimeoutError:
+        logger.error("Timeout procesando lote de /api/chat/batch")
+        return jsonify({"success": False, "error": "La consulta tardó demasiado", "error_code": "TIMEOUT"}), 504
+    except Exception as e:
+        logger.error(f"Error procesando lote: {e}", exc_info=True)
+        return jsonify({"success": False, "error": "Error interno procesando el lote", "error_code": "PROCESSING_ERROR"}), 500
+    return jsonify(body), 200
+
+
+@app.route("/api/chat/stream", methods=["POST"])
+def chat_stream():
+    """Solo disponible con el servidor ASGI (src/api/asgi_app.py): el servidor WSGI no detecta desconexiones."""
+    return jsonify({
+        "success": False,
+        "error": "El streaming SSE requiere API_SERVER=asgi",
+        "error_code": "NOT_IMPLEMENTED",
+    }), 501
+
+
 @app.route("/api/chat/validate-token", methods=["POST"])
 @require_json
 def validate_token():
@@ -110,6 +161,185 @@ def generate_token():
     }), 501
 
 
+def _build_dynatrace_context(ctx_dt: dict) -> str:
+    """Resume el contexto Dynatrace del host para el prompt de análisis."""
+    if not ctx_dt:
+        return ""
+    parts = [
+        "\nContexto Dynatrace del host:",
+        f"- SO: {ctx_dt.get('os', 'N/D')}",
+        f"- Modo de monitoreo: {ctx_dt.get('monitoring_mode', 'N/D')}",
+        f"- Network Zone: {ctx_dt.get('network_zone', 'N/D')}",
+        f"- Versión OneAgent: {ctx_dt.get('agent_version', 'N/D')}",
+        f"- Estado: {ctx_dt.get('state', 'N/D')}",
+        f"- Host Group: {ctx_dt.get('host_group', 'N/D')}",
+    ]
+    servicios = ctx_dt.get("servicios") or []
+    if servicios:
+        parts.append("\nServicios en el host:")
+        for s in servicios:
+            parts.append(f"- {s.get('nombre', '?')} ({s.get('tipo', '?')}) — {s.get('tecnologia', '?')}")
+    eventos = ctx_dt.get("eventos_recientes") or []
+    if eventos:
+        parts.append("\nEventos recientes en Dynatrace:")
+        for e in eventos:
+            parts.append(
+                f"- [{e.get('tipo', '?')}] {e.get('titulo', '?')} "
+                f"| estado: {e.get('estado', '?')} | inicio: {e.get('fecha_inicio', '?')}"
+            )
+    return "\n".join(parts)
+
+
+async def analyze_tickets(
+    db_registry,
+    numero_empleado: int,
+    ip: str,
+    sensor: str,
+    mensaje_alerta: str = "",
+    ctx_dt: Optional[dict] = None,
+) -> tuple[str, int]:
+    """
+    Tickets históricos de `ip` con análisis de causa raíz por LLM (compartido por Flask y ASGI).
+
+    Returns:
+        (análisis o error, total de tickets)
+    """
+    from src.agents.providers.openai_provider import OpenAIProvider
+    from src.agents.tools.get_historical_tickets_tool import GetHistoricalTicketsTool
+    from src.domain.alerts.alert_repository import AlertRepository
+    from src.domain.alerts.ticket_cache_repository import TicketAnalysisCacheRepository
+    from src.domain.interaction.interaction_repository import InteractionRepository
+    from src.infra.database.connection import DatabaseManager
+
+    t0 = time.perf_counter()
+    repo = AlertRepository(db_registry.get("monitoreo"))
+    tool = GetHistoricalTicketsTool(repo=repo)
+    tickets_result = await tool.execute(ip=ip, sensor=sensor)
+
+    analisis_text = tickets_result.data or tickets_result.error
+    total = (tickets_result.metadata or {}).get("total_tickets", 0)
+    error_msg = None
+
+    if tickets_result.success and tickets_result.data:
+        sensor_info = f" (sensor: {sensor})" if sensor else ""
+
+        # Extraer última acción correctiva para clave de caché e inventario del equipo
+        # (los tickets salen del cache del repositorio: la tool acaba de consultarlos)
+        tickets_raw, inventario = await asyncio.gather(
+            repo.get_historical_tickets(ip=ip, sensor=sensor or ""),
+            repo.get_inventory_by_ip(ip),
+        )
+        ultima_accion = tickets_raw[0].accion_correctiva if tickets_raw else ""
+
+        cache_repo = TicketAnalysisCacheRepository(
+            DatabaseManager(), ttl_seconds=settings.ticket_analysis_cache_ttl_seconds
+        )
+
+        async def _analizar() -> str:
+            llm = OpenAIProvider(api_key=settings.openai_api_key, model=settings.openai_data_model)
+            DIV = "───────────────────"
+            alerta_context = (
+                f"\nAlerta activa: {mensaje_alerta}" if mensaje_alerta
+                else "\n(No se proporcionó mensaje de alerta activa)"
+            )
+            dynatrace_context = _build_dynatrace_context(ctx_dt or {})
+            if inventario:
+                inv = inventario
+                inventario_context = (
+                    f"\nEquipo en inventario:"
+                    f"\n- Hostname: {inv.hostname or 'N/D'}"
+                    f"\n- SO: {inv.version_os or 'N/D'}"
+                    f"\n- Tipo: {inv.tipo_equipo or inv.fuente or 'N/D'}"
+                    f"\n- Ambiente: {inv.ambiente or 'N/D'}"
+                    f"\n- Capa: {inv.capa or 'N/D'}"
+                    f"\n- Impacto: {inv.impacto or 'N/D'}"
+                )
+            else:
+                inventario_context = "\n(Equipo no encontrado en inventario)"
+            messages = [
+                {"role": "system", "content": (
+                    "Eres un analista experto en operaciones de TI e infraestructura de red. "
+                    "Analizas tickets históricos de equipos monitoreados y generas diagnósticos estructurados. "
+                    "Usa únicamente la información de los tickets proporcionados — no inventes datos. "
+                    "El resultado DEBE estar en formato Markdown completo: "
+                    "usa ## para títulos de sección, ### para subtítulos, "
+                    "emojis como íconos junto a cada título, "
+                    "viñetas (- o •) para listas, y bloques de código (```) para comandos de terminal.\n\n"
+                    "IMPORTANTE: Antes de recomendar acciones, evalúa si los tickets históricos son "
+                    "relevantes para la alerta activa. Si los tickets corresponden a fallas distintas "
+                    "a la alerta actual, indícalo explícitamente en la sección de Causa Raíz y basa "
+                    "las acciones en conocimiento técnico general, no en esos tickets.\n\n"
+                    f"Genera el análisis con EXACTAMENTE esta estructura:\n\n"
+                    f"# 🖥 Historial de Tickets — {ip}{sensor_info}\n\n"
+                    f"{DIV}\n"
+                    f"## 📊 Resumen\n"
+                    f"- Tickets analizados: [N]\n"
+                    f"- Falla más frecuente en historial: [tipo de falla]\n"
+                    f"- Relevancia para alerta actual: [Alta / Parcial / Baja — una línea de justificación]\n"
+                    f"- Sensor: [nombre del sensor o 'No especificado']\n\n"
+                    f"{DIV}\n"
+                    f"## 🔍 Causa Raíz Probable\n"
+                    f"[1-2 oraciones basadas en la alerta activa y el historial. "
+                    f"Si el historial no es relevante, indicarlo y basar la hipótesis en la alerta activa. "
+                    f"Citar tickets solo si son relevantes: (tickets #ID, #ID)]\n\n"
+                    f"{DIV}\n"
+                    f"## 🛠 Acciones Recomendadas\n"
+                    f"1. [acción concreta; usa ``` para comandos de terminal si aplica]\n"
+                    f"   - Si proviene de un ticket relevante con acción documentada: agregar `(ref: ticket #ID)`\n"
+                    f"   - Si es conocimiento técnico general: agregar `(práctica estándar)`\n"
+                    f"2. [ídem — máximo 5 acciones]\n\n"
+                    f"{DIV}\n"
+                    f"## 📋 Patrón Detectado\n"
+                    f"[Una oración sobre la tendencia del historial y su relación con la alerta actual]\n\n"
+                    f"---\n"
+                    f"⚠️ *Estas sugerencias son orientativas. La decisión de ejecutar cualquier acción "
+                    f"es responsabilidad exclusiva del operador.*"
+                )},
+                {"role": "user", "content": (
+                    f"Equipo: {ip}{sensor_info}{alerta_context}{inventario_context}{dynatrace_context}\n\n"
+                    f"Tickets históricos:\n{tickets_result.data}"
+                )},
+            ]
+            analysis = await llm.generate_messages(messages=messages, max_tokens=1024)
+            return str(analysis)
+
+        # L1 en memoria → L2 SQL → LLM; requests simultáneos por la misma clave comparten el análisis
+        analisis_text, cached = await cache_repo.get_or_generate(
+            ip, sensor, total, ultima_accion, _analizar
+        )
+        if cached:
+            logger.info(f"Cache hit /api/tickets ip={ip} sensor={sensor} total={total}")
+        else:
+            logger.info(f"Cache guardado /api/tickets ip={ip} sensor={sensor} total={total}")
+    else:
+        error_msg = tickets_result.error
+
+    total_ms = int((time.perf_counter() - t0) * 1000)
+
+    handler = get_handler_manager().handler
+    if handler and handler.observability_repo:
+        obs_repo: InteractionRepository = handler.observability_repo
+        await obs_repo.save_interaction(
+            correlation_id=str(uuid.uuid4()),
+            user_id=str(numero_empleado),
+            username=None,
+            query=f"[tickets] ip={ip} sensor={sensor}",
+            respuesta=analisis_text if not error_msg else None,
+            channel="api",
+            memory_ms=0,
+            react_ms=total_ms,
+            save_ms=0,
+            total_ms=total_ms,
+            error_message=error_msg,
+            tools_used=["get_historical_tickets"],
+            steps_count=1,
+            agente_nombre="tickets_api",
+            id_usuario=numero_empleado,
+        )
+
+    return analisis_text, total
+
+
 @app.route("/api/tickets", methods=["POST"])
 @require_json
 @require_token
@@ -137,165 +367,14 @@ def tickets():
     if db_registry is None:
         return jsonify({"success": False, "error": "Servicio no inicializado", "error_code": "NOT_READY"}), 503
 
-    from src.agents.providers.openai_provider import OpenAIProvider
-    from src.agents.tools.get_historical_tickets_tool import GetHistoricalTicketsTool
-    from src.config.settings import settings
-    from src.domain.alerts.alert_repository import AlertRepository
-    from src.domain.alerts.ticket_cache_repository import TicketAnalysisCacheRepository
-    from src.domain.interaction.interaction_repository import InteractionRepository
-    from src.infra.database.connection import DatabaseManager
-
-    def _build_dynatrace_context() -> str:
-        if not ctx_dt:
-            return ""
-        parts = [
-            "\nContexto Dynatrace del host:",
-            f"- SO: {ctx_dt.get('os', 'N/D')}",
-            f"- Modo de monitoreo: {ctx_dt.get('monitoring_mode', 'N/D')}",
-            f"- Network Zone: {ctx_dt.get('network_zone', 'N/D')}",
-            f"- Versión OneAgent: {ctx_dt.get('agent_version', 'N/D')}",
-            f"- Estado: {ctx_dt.get('state', 'N/D')}",
-            f"- Host Group: {ctx_dt.get('host_group', 'N/D')}",
-        ]
-        servicios = ctx_dt.get("servicios") or []
-        if servicios:
-            parts.append("\nServicios en el host:")
-            for s in servicios:
-                parts.append(f"- {s.get('nombre', '?')} ({s.get('tipo', '?')}) — {s.get('tecnologia', '?')}")
-        eventos = ctx_dt.get("eventos_recientes") or []
-        if eventos:
-            parts.append("\nEventos recientes en Dynatrace:")
-            for e in eventos:
-                parts.append(
-                    f"- [{e.get('tipo', '?')}] {e.get('titulo', '?')} "
-                    f"| estado: {e.get('estado', '?')} | inicio: {e.get('fecha_inicio', '?')}"
-                )
-        return "\n".join(parts)
-
-    async def _run():
-        t0 = time.perf_counter()
-        repo = AlertRepository(db_registry.get("monitoreo"))
-        tool = GetHistoricalTicketsTool(repo=repo)
-        tickets_result = await tool.execute(ip=ip, sensor=sensor)
-
-        analisis_text = tickets_result.data or tickets_result.error
-        total = (tickets_result.metadata or {}).get("total_tickets", 0)
-        error_msg = None
-
-        if tickets_result.success and tickets_result.data:
-            sensor_info = f" (sensor: {sensor})" if sensor else ""
-
-            # Extraer última acción correctiva para clave de caché e inventario del equipo
-            tickets_raw, inventario = await asyncio.gather(
-                repo.get_historical_tickets(ip=ip, sensor=sensor or ""),
-                repo.get_inventory_by_ip(ip),
-            )
-            ultima_accion = tickets_raw[0].accion_correctiva if tickets_raw else ""
-
-            cache_repo = TicketAnalysisCacheRepository(DatabaseManager())
-            cached = await cache_repo.lookup(ip, sensor, total, ultima_accion)
-            if cached:
-                analisis_text = cached
-                logger.info(f"Cache hit /api/tickets ip={ip} sensor={sensor} total={total}")
-            else:
-                llm = OpenAIProvider(api_key=settings.openai_api_key, model=settings.openai_data_model)
-                DIV = "───────────────────"
-                alerta_context = (
-                    f"\nAlerta activa: {mensaje_alerta}" if mensaje_alerta
-                    else "\n(No se proporcionó mensaje de alerta activa)"
-                )
-                dynatrace_context = _build_dynatrace_context()
-                if inventario:
-                    inv = inventario
-                    inventario_context = (
-                        f"\nEquipo en inventario:"
-                        f"\n- Hostname: {inv.hostname or 'N/D'}"
-                        f"\n- SO: {inv.version_os or 'N/D'}"
-                        f"\n- Tipo: {inv.tipo_equipo or inv.fuente or 'N/D'}"
-                        f"\n- Ambiente: {inv.ambiente or 'N/D'}"
-                        f"\n- Capa: {inv.capa or 'N/D'}"
-                        f"\n- Impacto: {inv.impacto or 'N/D'}"
-                    )
-                else:
-                    inventario_context = "\n(Equipo no encontrado en inventario)"
-                messages = [
-                    {"role": "system", "content": (
-                        "Eres un analista experto en operaciones de TI e infraestructura de red. "
-                        "Analizas tickets históricos de equipos monitoreados y generas diagnósticos estructurados. "
-                        "Usa únicamente la información de los tickets proporcionados — no inventes datos. "
-                        "El resultado DEBE estar en formato Markdown completo: "
-                        "usa ## para títulos de sección, ### para subtítulos, "
-                        "emojis como íconos junto a cada título, "
-                        "viñetas (- o •) para listas, y bloques de código (```) para comandos de terminal.\n\n"
-                        "IMPORTANTE: Antes de recomendar acciones, evalúa si los tickets históricos son "
-                        "relevantes para la alerta activa. Si los tickets corresponden a fallas distintas "
-                        "a la alerta actual, indícalo explícitamente en la sección de Causa Raíz y basa "
-                        "las acciones en conocimiento técnico general, no en esos tickets.\n\n"
-                        f"Genera el análisis con EXACTAMENTE esta estructura:\n\n"
-                        f"# 🖥 Historial de Tickets — {ip}{sensor_info}\n\n"
-                        f"{DIV}\n"
-                        f"## 📊 Resumen\n"
-                        f"- Tickets analizados: [N]\n"
-                        f"- Falla más frecuente en historial: [tipo de falla]\n"
-                        f"- Relevancia para alerta actual: [Alta / Parcial / Baja — una línea de justificación]\n"
-                        f"- Sensor: [nombre del sensor o 'No especificado']\n\n"
-                        f"{DIV}\n"
-                        f"## 🔍 Causa Raíz Probable\n"
-                        f"[1-2 oraciones basadas en la alerta activa y el historial. "
-                        f"Si el historial no es relevante, indicarlo y basar la hipótesis en la alerta activa. "
-                        f"Citar tickets solo si son relevantes: (tickets #ID, #ID)]\n\n"
-                        f"{DIV}\n"
-                        f"## 🛠 Acciones Recomendadas\n"
-                        f"1. [acción concreta; usa ``` para comandos de terminal si aplica]\n"
-                        f"   - Si proviene de un ticket relevante con acción documentada: agregar `(ref: ticket #ID)`\n"
-                        f"   - Si es conocimiento técnico general: agregar `(práctica estándar)`\n"
-                        f"2. [ídem — máximo 5 acciones]\n\n"
-                        f"{DIV}\n"
-                        f"## 📋 Patrón Detectado\n"
-                        f"[Una oración sobre la tendencia del historial y su relación con la alerta actual]\n\n"
-                        f"---\n"
-                        f"⚠️ *Estas sugerencias son orientativas. La decisión de ejecutar cualquier acción "
-                        f"es responsabilidad exclusiva del operador.*"
-                    )},
-                    {"role": "user", "content": (
-                        f"Equipo: {ip}{sensor_info}{alerta_context}{inventario_context}{dynatrace_context}\n\n"
-                        f"Tickets históricos:\n{tickets_result.data}"
-                    )},
-                ]
-                analysis = await llm.generate_messages(messages=messages, max_tokens=1024)
-                analisis_text = str(analysis)
-                await cache_repo.save(ip, sensor, total, ultima_accion, analisis_text)
-                logger.info(f"Cache guardado /api/tickets ip={ip} sensor={sensor} total={total}")
-        else:
-            error_msg = tickets_result.error
-
-        total_ms = int((time.perf_counter() - t0) * 1000)
-
-        handler = get_handler_manager().handler
-        if handler and handler.observability_repo:
-            obs_repo: InteractionRepository = handler.observability_repo
-            await obs_repo.save_interaction(
-                correlation_id=str(uuid.uuid4()),
-                user_id=str(numero_empleado),
-                username=None,
-                query=f"[tickets] ip={ip} sensor={sensor}",
-                respuesta=analisis_text if not error_msg else None,
-                channel="api",
-                memory_ms=0,
-                react_ms=total_ms,
-                save_ms=0,
-                total_ms=total_ms,
-                error_message=error_msg,
-                tools_used=["get_historical_tickets"],
-                steps_count=1,
-                agente_nombre="tickets_api",
-                id_usuario=numero_empleado,
-            )
-
-        return analisis_text, total
-
     try:
-        analisis, total = asyncio.run(_run())
+        analisis, total = get_handler_manager().run(
+            analyze_tickets(db_registry, numero_empleado, ip, sensor, mensaje_alerta, ctx_dt),
+            timeout=settings.api_request_timeout_seconds,
+        )
+    except TimeoutError:
+        logger.error(f"Timeout en /api/tickets ip={ip} sensor={sensor}")
+        return jsonify({"success": False, "error": "La consulta tardó demasiado", "error_code": "TIMEOUT"}), 504
     except Exception as e:
         logger.error(f"Error en /api/tickets: {e}", exc_info=True)
         return jsonify({"success": False, "error": "Error interno del servidor", "error_code": "INTERNAL_ERROR"}), 500
@@ -320,7 +399,6 @@ if __name__ == "__main__":
         level=logging.INFO,
         format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
     )
-    from src.config.settings import settings
     from src.infra.database.connection import DatabaseManager
     get_handler_manager().initialize(DatabaseManager())
     logger.info("HandlerManager inicializado correctamente")
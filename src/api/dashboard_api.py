@@ -3,6 +3,17 @@ Dashboard API — endpoints de solo lectura para el panel de administración.
 
 Todos los endpoints son síncronos (Flask) excepto alertas que usa asyncio.run().
 No requiere autenticación adicional al estar dentro de la red.
+
+Las consultas independientes de un endpoint (overview, agents, knowledge, chats)
+corren en paralelo en un QueryPool compartido: el endpoint tarda max(consulta)
+en vez de sum(consulta). Si una consulta secundaria falla o vence, la respuesta
+lleva sus nombres en "parcial" (header X-Partial-Results en respuestas que son
+listas) en vez de un 500.
+
+Las respuestas GET llevan ETag fuerte (hash del contenido), 304 con
+If-None-Match, gzip por encima de DASHBOARD_COMPRESS_MIN_BYTES y Cache-Control
+por ruta; los estáticos de /admin se sirven precomprimidos desde memoria
+(ver src/api/http_cache.py).
 """
 import asyncio
 import logging
@@ -11,8 +22,14 @@ from datetime import date, datetime, timedelta
 
 from flask import Blueprint, jsonify, request, send_from_directory
 
+from src.api.http_cache import HttpCache
+from src.config.settings import settings
+from src.domain.interaction.interaction_rollup import latency_percentile, overview_reader_for
 from src.infra.database.connection import DatabaseManager
+from src.infra.database.pagination import InvalidCursorError, Keyset, count_cache
+from src.infra.database.query_pool import ParallelResult, QueryPool
 from src.infra.database.registry import DatabaseRegistry
+from src.infra.observability import get_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +39,14 @@ _WWWROOT = os.path.join(os.path.dirname(__file__), "..", "..", "wwwroot")
 
 _db: DatabaseManager | None = None
 _registry: DatabaseRegistry | None = None
+_pool: QueryPool | None = None
+_http_cache: HttpCache | None = None
+
+# Orden total de cada listado paginado: (timestamp, desempate único)
+_LOGS_KEYSET = Keyset("il.fechaEjecucion", "il.idLog")
+_CHATS_KEYSET = Keyset("MAX(il.fechaEjecucion)", "il.telegramChatId")
+_CHAT_HISTORY_KEYSET = Keyset("il.fechaEjecucion", "il.idLog", descending=False)
+_APP_LOGS_KEYSET = Keyset("createdAt", "id")
 
 
 def _get_db() -> DatabaseManager:
@@ -38,18 +63,105 @@ def _get_registry() -> DatabaseRegistry:
     return _registry
 
 
+def _get_pool() -> QueryPool:
+    global _pool
+    if _pool is None:
+        _pool = QueryPool(
+            max_workers=settings.dashboard_query_workers,
+            timeout_seconds=settings.dashboard_query_timeout_seconds,
+            name="dashboard_queries",
+        )
+        get_metrics().register_cache(_pool.name, _pool.stats)
+    return _pool
+
+
+def _get_http_cache() -> HttpCache:
+    global _http_cache
+    if _http_cache is None:
+        _http_cache = HttpCache(
+            compress_min_bytes=settings.dashboard_compress_min_bytes,
+            static_max_age_seconds=settings.dashboard_static_max_age_seconds,
+        )
+        get_metrics().register_cache(_http_cache.name, _http_cache.stats)
+    return _http_cache
+
+
+@dashboard_bp.after_request
+def _conditional(response):
+    return _get_http_cache().finalize(response, request)
+
+
+def _parallel(db: DatabaseManager, queries: dict[str, tuple], required: tuple[str, ...]) -> ParallelResult:
+    """Ejecuta {nombre: (sql, params)} en paralelo; las consultas fallidas quedan en []."""
+    calls = {
+        name: (lambda sql=sql, params=params: db.execute_query(sql, params))
+        for name, (sql, params) in queries.items()
+    }
+    return _get_pool().run(calls, required=required, default=[])
+
+
+def _limit(default: int, minimum: int, maximum: int) -> int:
+    try:
+        return min(maximum, max(minimum, int(request.args.get("limit", default))))
+    except (ValueError, TypeError):
+        return default
+
+
+def _count_query(queries: dict[str, tuple], key: tuple, sql: str, params: dict | None) -> int | None:
+    """Total cacheado para `key`; si no hay, agrega la consulta "total" a `queries`."""
+    total = count_cache().get(key)
+    if total is None:
+        queries["total"] = (sql, params)
+    return total
+
+
+def _resolve_total(result: ParallelResult, key: tuple, total: int | None, fallback: int) -> int:
+    """Total de _count_query() o, si se consultó, el recién contado (cacheado)."""
+    if total is not None:
+        return total
+    rows = result.results.get("total")
+    if not rows:
+        return fallback
+    total = int(rows[0]["total"] or 0)
+    count_cache().set(key, total)
+    return total
+
+
+def _first_row_isoformat(rows: list[dict] | None) -> dict | None:
+    """Primera fila con fechas serializadas, o None."""
+    if not rows:
+        return None
+    row = dict(rows[0])
+    for k, v in row.items():
+        if hasattr(v, "isoformat"):
+            row[k] = v.isoformat()
+    return row
+
+
+def _bad_cursor(e: InvalidCursorError):
+    return jsonify({"error": str(e)}), 400
+
+
 # ──────────────────────────────────────────────────────────────────────────────
 # Serve dashboard HTML
 # ──────────────────────────────────────────────────────────────────────────────
 
+def _static(filename: str):
+    root = os.path.abspath(_WWWROOT)
+    response = _get_http_cache().static(root, filename, request)
+    if response is None:  # no existe o es demasiado grande para tenerlo en memoria
+        return send_from_directory(root, filename)
+    return response
+
+
 @dashboard_bp.route("/admin")
 def admin():
-    return send_from_directory(os.path.abspath(_WWWROOT), "dashboard-wireframe.html")
+    return _static("dashboard-wireframe.html")
 
 
 @dashboard_bp.route("/admin/<path:filename>")
 def admin_static(filename):
-    return send_from_directory(os.path.abspath(_WWWROOT), filename)
+    return _static(filename)
 
 
 @dashboard_bp.route("/api/docs/download")
@@ -71,89 +183,22 @@ def overview():
         if periodo not in ("hoy", "ayer", "7d", "30d"):
             periodo = "hoy"
 
-        if periodo == "hoy":
-            where     = "CAST(fechaEjecucion AS DATE) = CAST(GETDATE() AS DATE)"
-            where_ar  = "CAST(ar.fechaCreacion AS DATE) = CAST(GETDATE() AS DATE)"
-            where_prev = "CAST(fechaEjecucion AS DATE) = CAST(DATEADD(DAY,-1,GETDATE()) AS DATE)"
-        elif periodo == "ayer":
-            where     = "CAST(fechaEjecucion AS DATE) = CAST(DATEADD(DAY,-1,GETDATE()) AS DATE)"
-            where_ar  = "CAST(ar.fechaCreacion AS DATE) = CAST(DATEADD(DAY,-1,GETDATE()) AS DATE)"
-            where_prev = "CAST(fechaEjecucion AS DATE) = CAST(DATEADD(DAY,-2,GETDATE()) AS DATE)"
-        elif periodo == "7d":
-            where     = "fechaEjecucion >= DATEADD(DAY,-6, CAST(GETDATE() AS DATE))"
-            where_ar  = "ar.fechaCreacion >= DATEADD(DAY,-6, CAST(GETDATE() AS DATE))"
-            where_prev = "fechaEjecucion >= DATEADD(DAY,-13,CAST(GETDATE() AS DATE)) AND fechaEjecucion < DATEADD(DAY,-6,CAST(GETDATE() AS DATE))"
-        else:  # 30d
-            where     = "fechaEjecucion >= DATEADD(DAY,-29,CAST(GETDATE() AS DATE))"
-            where_ar  = "ar.fechaCreacion >= DATEADD(DAY,-29,CAST(GETDATE() AS DATE))"
-            where_prev = "fechaEjecucion >= DATEADD(DAY,-59,CAST(GETDATE() AS DATE)) AND fechaEjecucion < DATEADD(DAY,-29,CAST(GETDATE() AS DATE))"
-
-        stats = db.execute_query(f"""
-            SELECT
-                COUNT(*)                                              AS total_mensajes,
-                COUNT(DISTINCT telegramChatId)                        AS usuarios_activos,
-                SUM(CASE WHEN exitoso = 0 THEN 1 ELSE 0 END)         AS errores,
-                ISNULL(SUM(costUSD), 0)                               AS costo_total
-            FROM abcmasplus..BotIAv2_InteractionLogs
-            WHERE {where}
-        """)
-
-        percentiles = db.execute_query(f"""
-            SELECT TOP 1
-                PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY duracionMs) OVER () AS p50_ms,
-                PERCENTILE_CONT(0.9) WITHIN GROUP (ORDER BY duracionMs) OVER () AS p90_ms
-            FROM abcmasplus..BotIAv2_InteractionLogs
-            WHERE {where}
-        """)
-
-        prev = db.execute_query(f"""
-            SELECT COUNT(*) AS total_prev
-            FROM abcmasplus..BotIAv2_InteractionLogs
-            WHERE {where_prev}
-        """)
-
-        agent_rows = db.execute_query(f"""
-            SELECT
-                ar.agenteSeleccionado,
-                COUNT(*)                                                          AS requests,
-                SUM(CASE WHEN il.exitoso = 1 THEN 1 ELSE 0 END)                  AS exitosos,
-                ISNULL(AVG(il.duracionMs), 0)                                     AS avg_ms,
-                ISNULL(SUM(il.totalInputTokens + il.totalOutputTokens), 0)        AS total_tokens,
-                ISNULL(SUM(il.costUSD), 0)                                        AS costo
-            FROM abcmasplus..BotIAv2_AgentRouting ar
-            LEFT JOIN abcmasplus..BotIAv2_InteractionLogs il
-                ON ar.correlationId = il.correlationId
-            WHERE {where_ar}
-            GROUP BY ar.agenteSeleccionado
-            ORDER BY requests DESC
-        """)
+        result = overview_reader_for(db, settings.dashboard_overview_cache_seconds).rows_parallel(periodo, _get_pool())
+        rows = result.results
+        stats, usuarios, prev, agent_rows = rows["stats"], rows["usuarios"], rows["prev"], rows["agentes"]
 
         # Actividad horaria para hoy/ayer, diaria para 7d/30d.
         # Se rellenan con 0 los slots sin datos para mostrar el período completo.
         dias_es = ["Lun", "Mar", "Mié", "Jue", "Vie", "Sáb", "Dom"]
         if periodo in ("hoy", "ayer"):
-            act_rows = db.execute_query(f"""
-                SELECT DATEPART(HOUR, fechaEjecucion) AS slot, COUNT(*) AS mensajes
-                FROM abcmasplus..BotIAv2_InteractionLogs
-                WHERE {where}
-                GROUP BY DATEPART(HOUR, fechaEjecucion)
-                ORDER BY slot
-            """)
-            data_map = {int(r["slot"]): int(r["mensajes"]) for r in act_rows}
+            data_map = {int(r["slot"]): int(r["mensajes"]) for r in rows["actividad"]}
             hora_fin = datetime.now().hour if periodo == "hoy" else 23
             actividad = [
                 {"label": f"{h}h", "mensajes": data_map.get(h, 0)}
                 for h in range(0, hora_fin + 1)
             ]
         else:
-            act_rows = db.execute_query(f"""
-                SELECT CAST(fechaEjecucion AS DATE) AS slot, COUNT(*) AS mensajes
-                FROM abcmasplus..BotIAv2_InteractionLogs
-                WHERE {where}
-                GROUP BY CAST(fechaEjecucion AS DATE)
-                ORDER BY slot
-            """)
-            data_map = {r["slot"]: int(r["mensajes"]) for r in act_rows}
+            data_map = {r["slot"]: int(r["mensajes"]) for r in rows["actividad"]}
             dias_atras = 6 if periodo == "7d" else 29
             today = date.today()
             all_days = [today - timedelta(days=i) for i in range(dias_atras, -1, -1)]
@@ -163,7 +208,7 @@ def overview():
             ]
 
         s  = stats[0] if stats else {}
-        pc = percentiles[0] if percentiles else {}
+        u  = usuarios[0] if usuarios else {}
         p  = prev[0] if prev else {}
 
         total     = int(s.get("total_mensajes") or 0)
@@ -174,11 +219,11 @@ def overview():
             "periodo": periodo,
             "mensajes": total,
             "mensajes_pct_change": pct,
-            "usuarios_activos": int(s.get("usuarios_activos") or 0),
+            "usuarios_activos": int(u.get("usuarios_activos") or 0),
             "errores": int(s.get("errores") or 0),
             "costo": round(float(s.get("costo_total") or 0), 2),
-            "p50_s": round(float(pc.get("p50_ms") or 0) / 1000, 1),
-            "p90_s": round(float(pc.get("p90_ms") or 0) / 1000, 1),
+            "p50_s": round(latency_percentile(s, 0.5) / 1000, 1),
+            "p90_s": round(latency_percentile(s, 0.9) / 1000, 1),
             "agentes": [
                 {
                     "nombre": r["agenteSeleccionado"],
@@ -191,6 +236,7 @@ def overview():
                 for r in agent_rows
             ],
             "actividad": actividad,
+            "parcial": sorted(result.failed),
         })
     except Exception as e:
         logger.error(f"Dashboard /overview error: {e}")
@@ -205,22 +251,15 @@ def overview():
 def logs():
     try:
         db = _get_db()
-
-        try:
-            page  = max(1, int(request.args.get("page", 1)))
-            limit = min(200, max(10, int(request.args.get("limit", 50))))
-        except (ValueError, TypeError):
-            page, limit = 1, 50
-        offset = (page - 1) * limit
-
-        total_row = db.execute_query(
-            "SELECT COUNT(*) AS total FROM abcmasplus..BotIAv2_InteractionLogs"
-        )
-        total = int((total_row[0]["total"] if total_row else 0) or 0)
-
-        rows = db.execute_query(
-            """
-            SELECT
+        limit = _limit(50, 10, 200)
+        where, params = _LOGS_KEYSET.where(request.args.get("cursor"))
+        where_sql = f"WHERE {where}" if where else ""
+
+        queries = {
+            "items": (
+            f"""
+            SELECT TOP ({limit + 1})
+                il.idLog,
                 il.correlationId,
                 il.idUsuario,
                 il.telegramUsername,
@@ -248,17 +287,25 @@ def logs():
                 ON il.idUsuario = cu.idUsuario AND il.idUsuario IS NOT NULL
             LEFT JOIN dbo.Usuarios bu
                 ON il.idUsuario = bu.idUsuario AND il.idUsuario IS NOT NULL
-            ORDER BY il.fechaEjecucion DESC
-            OFFSET :offset ROWS FETCH NEXT :limit ROWS ONLY
+            {where_sql}
+            ORDER BY {_LOGS_KEYSET.order_by()}
             """,
-            {"offset": offset, "limit": limit},
+            params or None,
+            ),
+        }
+        count_key = ("logs",)
+        total = _count_query(
+            queries, count_key, "SELECT COUNT(*) AS total FROM abcmasplus..BotIAv2_InteractionLogs", None,
         )
+        result = _parallel(db, queries, required=("items",))
+        rows, next_cursor = _LOGS_KEYSET.page(result.results["items"], limit, "fechaEjecucion", "idLog")
 
         return jsonify({
-            "page": page,
             "limit": limit,
-            "total": total,
-            "has_more": (offset + limit) < total,
+            "total": _resolve_total(result, count_key, total, len(rows)),
+            "has_more": next_cursor is not None,
+            "next_cursor": next_cursor,
+            "parcial": sorted(result.failed),
             "items": [
                 {
                     "correlation_id": r["correlationId"],
@@ -283,6 +330,8 @@ def logs():
                 for r in rows
             ],
         })
+    except InvalidCursorError as e:
+        return _bad_cursor(e)
     except Exception as e:
         logger.error(f"Dashboard /logs error: {e}")
         return jsonify({"error": str(e)}), 500
@@ -398,7 +447,8 @@ def log_detail(correlation_id: str):
 def agents():
     try:
         db = _get_db()
-        agent_rows = db.execute_query("""
+        result = _parallel(db, {
+            "agentes": ("""
             SELECT
                 ad.idAgente,
                 ad.nombre,
@@ -417,17 +467,14 @@ def agents():
             FROM abcmasplus..BotIAv2_AgenteDef ad
             WHERE ad.activo = 1
             ORDER BY ad.idAgente
-        """)
-
-        routing_today = db.execute_query("""
+            """, None),
+            "requests_hoy": ("""
             SELECT agenteSeleccionado, COUNT(*) AS requests_hoy
             FROM abcmasplus..BotIAv2_AgentRouting
             WHERE CAST(fechaCreacion AS DATE) = CAST(GETDATE() AS DATE)
             GROUP BY agenteSeleccionado
-        """)
-        req_map = {r["agenteSeleccionado"]: int(r["requests_hoy"]) for r in routing_today}
-
-        version_history = db.execute_query("""
+            """, None),
+            "historial": ("""
             SELECT TOP 15
                 h.idAgente,
                 h.version,
@@ -436,7 +483,12 @@ def agents():
                 h.fechaCreacion
             FROM abcmasplus..BotIAv2_AgentePromptHistorial h
             ORDER BY h.fechaCreacion DESC
-        """)
+            """, None),
+        }, required=("agentes",))
+        agent_rows = result.results["agentes"]
+        req_map = {r["agenteSeleccionado"]: int(r["requests_hoy"]) for r in result.results["requests_hoy"]}
+
+        version_history = result.results["historial"]
         history_map: dict[int, list] = {}
         for h in version_history:
             aid = int(h["idAgente"])
@@ -447,7 +499,7 @@ def agents():
                 "fecha": str(h["fechaCreacion"]),
             })
 
-        return jsonify([
+        response = jsonify([
             {
                 "id": int(r["idAgente"]),
                 "nombre": r["nombre"],
@@ -464,6 +516,9 @@ def agents():
             }
             for r in agent_rows
         ])
+        if result.partial:
+            response.headers["X-Partial-Results"] = ",".join(sorted(result.failed))
+        return response
     except Exception as e:
         logger.error(f"Dashboard /agents error: {e}")
         return jsonify({"error": str(e)}), 500
@@ -516,7 +571,8 @@ def update_agent_prompt(agent_id: int):
 def knowledge():
     try:
         db = _get_db()
-        cat_rows = db.execute_query("""
+        result = _parallel(db, {
+            "categorias": ("""
             SELECT
                 c.id,
                 c.name,
@@ -529,14 +585,15 @@ def knowledge():
             WHERE c.active = 1
             GROUP BY c.id, c.name, c.display_name, c.icon
             ORDER BY c.display_name
-        """)
-
-        searches_today = db.execute_query("""
+            """, None),
+            "busquedas_hoy": ("""
             SELECT COUNT(*) AS total
             FROM abcmasplus..BotIAv2_InteractionLogs
             WHERE agenteNombre LIKE '%conocimiento%'
               AND CAST(fechaEjecucion AS DATE) = CAST(GETDATE() AS DATE)
-        """)
+            """, None),
+        }, required=("categorias",))
+        cat_rows, searches_today = result.results["categorias"], result.results["busquedas_hoy"]
 
         total_entries = sum(int(r["entry_count"] or 0) for r in cat_rows)
         busquedas_hoy = int((searches_today[0]["total"] if searches_today else 0) or 0)
@@ -554,6 +611,7 @@ def knowledge():
                 }
                 for r in cat_rows
             ],
+            "parcial": sorted(result.failed),
         })
     except Exception as e:
         logger.error(f"Dashboard /knowledge error: {e}")
@@ -595,21 +653,14 @@ def users():
 def chats():
     try:
         db = _get_db()
-        try:
-            page  = max(1, int(request.args.get("page", 1)))
-            limit = min(100, max(10, int(request.args.get("limit", 30))))
-        except (ValueError, TypeError):
-            page, limit = 1, 30
-        offset = (page - 1) * limit
-
-        total_row = db.execute_query(
-            "SELECT COUNT(DISTINCT telegramChatId) AS total FROM abcmasplus..BotIAv2_InteractionLogs WHERE telegramChatId IS NOT NULL"
-        )
-        total = int((total_row[0]["total"] if total_row else 0) or 0)
-
-        rows = db.execute_query(
-            """
-            SELECT
+        limit = _limit(30, 10, 100)
+        having, params = _CHATS_KEYSET.where(request.args.get("cursor"))
+        having_sql = f"HAVING {having}" if having else ""
+
+        queries = {
+            "items": (
+            f"""
+            SELECT TOP ({limit + 1})
                 il.telegramChatId,
                 ISNULL(
                     u.alias,
@@ -648,16 +699,25 @@ def chats():
                 u.telegramFirstName,
                 u.telegramLastName,
                 u.telegramUsername
-            ORDER BY MAX(il.fechaEjecucion) DESC
-            OFFSET :offset ROWS FETCH NEXT :limit ROWS ONLY
+            {having_sql}
+            ORDER BY {_CHATS_KEYSET.order_by()}
             """,
-            {"offset": offset, "limit": limit},
+            params or None,
+            ),
+        }
+        count_key = ("chats",)
+        total = _count_query(
+            queries, count_key,
+            "SELECT COUNT(DISTINCT telegramChatId) AS total FROM abcmasplus..BotIAv2_InteractionLogs WHERE telegramChatId IS NOT NULL",
+            None,
         )
+        result = _parallel(db, queries, required=("items",))
+        rows, next_cursor = _CHATS_KEYSET.page(result.results["items"], limit, "ultima_actividad", "telegramChatId")
         return jsonify({
-            "page": page,
             "limit": limit,
-            "total": total,
-            "has_more": (offset + limit) < total,
+            "total": _resolve_total(result, count_key, total, len(rows)),
+            "has_more": next_cursor is not None,
+            "next_cursor": next_cursor,
             "items": [
                 {
                     "chat_id": str(r["telegramChatId"]),
@@ -676,7 +736,10 @@ def chats():
                 }
                 for r in rows
             ],
+            "parcial": sorted(result.failed),
         })
+    except InvalidCursorError as e:
+        return _bad_cursor(e)
     except Exception as e:
         logger.error(f"Dashboard /chats error: {e}")
         return jsonify({"error": str(e)}), 500
@@ -686,11 +749,16 @@ def chats():
 def chat_history(chat_id: str):
     try:
         db = _get_db()
-
-        messages = db.execute_query(
-            """
-            SELECT TOP 300
-                il.correlationId, il.query, il.respuesta, il.agenteNombre,
+        limit = _limit(300, 10, 500)
+        cursor = request.args.get("cursor")
+        where, params = _CHAT_HISTORY_KEYSET.where(cursor)
+        where_sql = f"AND {where}" if where else ""
+
+        queries = {
+            "messages": (
+            f"""
+            SELECT TOP ({limit + 1})
+                il.idLog, il.correlationId, il.query, il.respuesta, il.agenteNombre,
                 il.fechaEjecucion, il.exitoso, il.duracionMs, il.costUSD,
                 il.mensajeError, il.channel, il.stepsTomados,
                 il.totalInputTokens, il.totalOutputTokens, il.memoryMs, il.reactMs,
@@ -701,37 +769,22 @@ def chat_history(chat_id: str):
                     ORDER BY CASE al.level WHEN 'CRITICAL' THEN 3 WHEN 'ERROR' THEN 2 WHEN 'WARNING' THEN 1 ELSE 0 END DESC
                 ) AS app_log_level
             FROM abcmasplus..BotIAv2_InteractionLogs il
-            WHERE il.telegramChatId = :cid
-            ORDER BY il.fechaEjecucion ASC
+            WHERE il.telegramChatId = :cid {where_sql}
+            ORDER BY {_CHAT_HISTORY_KEYSET.order_by()}
             """,
-            {"cid": chat_id},
+            {"cid": chat_id, **params},
+            ),
+        }
+        # Perfil y estadísticas solo en la primera página
+        if not cursor:
+            queries["profile"] = ("EXEC abcmasplus..BotIAv2_sp_GetPerfilMemoria @telegramChatId = :cid", {"cid": chat_id})
+            queries["stats"] = ("EXEC abcmasplus..BotIAv2_sp_GetEstadisticasUsuario @telegramChatId = :cid", {"cid": chat_id})
+        result = _parallel(db, queries, required=("messages",))
+        messages, next_cursor = _CHAT_HISTORY_KEYSET.page(
+            result.results["messages"], limit, "fechaEjecucion", "idLog",
         )
-
-        try:
-            profile_rows = db.execute_query(
-                "EXEC abcmasplus..BotIAv2_sp_GetPerfilMemoria @telegramChatId = :cid",
-                {"cid": chat_id},
-            )
-            profile = dict(profile_rows[0]) if profile_rows else None
-            if profile:
-                for k, v in profile.items():
-                    if hasattr(v, "isoformat"):
-                        profile[k] = v.isoformat()
-        except Exception:
-            profile = None
-
-        try:
-            stats_rows = db.execute_query(
-                "EXEC abcmasplus..BotIAv2_sp_GetEstadisticasUsuario @telegramChatId = :cid",
-                {"cid": chat_id},
-            )
-            stats = dict(stats_rows[0]) if stats_rows else None
-            if stats:
-                for k, v in stats.items():
-                    if hasattr(v, "isoformat"):
-                        stats[k] = v.isoformat()
-        except Exception:
-            stats = None
+        profile = _first_row_isoformat(result.results.get("profile"))
+        stats = _first_row_isoformat(result.results.get("stats"))
 
         return jsonify({
             "messages": [
@@ -758,7 +811,11 @@ def chat_history(chat_id: str):
             ],
             "profile": profile,
             "stats": stats,
+            "has_more": next_cursor is not None,
+            "next_cursor": next_cursor,
         })
+    except InvalidCursorError as e:
+        return _bad_cursor(e)
     except Exception as e:
         logger.error(f"Dashboard /chats/{chat_id} error: {e}")
         return jsonify({"error": str(e)}), 500
@@ -776,10 +833,10 @@ def app_logs():
         module         = request.args.get("module", "")
         search         = request.args.get("search", "")
         correlation_id = request.args.get("correlation_id", "")
-        limit   = min(int(request.args.get("limit", 100)), 500)
-        offset  = int(request.args.get("offset", 0))
+        limit          = _limit(100, 1, 500)
 
-        where = ["1=1"]
+        # createdAt admite NULL: esas filas no tienen lugar en el orden por (createdAt, id)
+        where = ["createdAt IS NOT NULL"]
         params: dict = {}
 
         if level:
@@ -795,10 +852,16 @@ def app_logs():
             where.append("correlationId = :correlation_id")
             params["correlation_id"] = correlation_id
 
+        count_key = ("app_logs", level, module, search, correlation_id)
+        count_where = " AND ".join(where)
+        after, cursor_params = _APP_LOGS_KEYSET.where(request.args.get("cursor"))
+        if after:
+            where.append(after)
         where_sql = " AND ".join(where)
 
-        rows = db.execute_query(f"""
-            SELECT
+        queries = {
+            "logs": (f"""
+            SELECT TOP ({limit + 1})
                 id,
                 correlationId,
                 userId,
@@ -811,22 +874,23 @@ def app_logs():
                 createdAt
             FROM abcmasplus..BotIAv2_ApplicationLogs
             WHERE {where_sql}
-            ORDER BY createdAt DESC
-            OFFSET {offset} ROWS FETCH NEXT {limit} ROWS ONLY
-        """, params if params else None)
-
-        total_row = db.execute_query(f"""
+            ORDER BY {_APP_LOGS_KEYSET.order_by()}
+            """, {**params, **cursor_params} or None),
+        }
+        total = _count_query(queries, count_key, f"""
             SELECT COUNT(*) AS total
             FROM abcmasplus..BotIAv2_ApplicationLogs
-            WHERE {where_sql}
-        """, params if params else None)
-
-        total = int((total_row[0].get("total") or 0)) if total_row else 0
+            WHERE {count_where}
+        """, params or None)
+        result = _parallel(db, queries, required=("logs",))
+        rows, next_cursor = _APP_LOGS_KEYSET.page(result.results["logs"], limit, "createdAt", "id")
 
         return jsonify({
-            "total": total,
-            "offset": offset,
+            "total": _resolve_total(result, count_key, total, len(rows)),
             "limit": limit,
+            "has_more": next_cursor is not None,
+            "next_cursor": next_cursor,
+            "parcial": sorted(result.failed),
             "logs": [
                 {
                     "id":             r.get("id"),
@@ -843,6 +907,8 @@ def app_logs():
                 for r in rows
             ],
         })
+    except InvalidCursorError as e:
+        return _bad_cursor(e)
     except Exception as e:
         logger.error(f"Dashboard /app-logs error: {e}")
         return jsonify({"error": str(e)}), 500
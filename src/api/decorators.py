@@ -1,9 +1,10 @@
 from functools import wraps
-from typing import Callable
+from typing import Callable, Optional
 
 from flask import g, jsonify, request
 
 from src.bot.middleware.token_middleware import TokenMiddleware
+from src.utils.rate_limiter import rate_limiter_for
 
 
 def require_json(f: Callable) -> Callable:
@@ -19,27 +20,77 @@ def require_json(f: Callable) -> Callable:
     return decorated
 
 
-def require_token(f: Callable) -> Callable:
-    """Valida el token y expone los datos decodificados en flask.g.token_data."""
-    @wraps(f)
-    def decorated(*args, **kwargs):
-        data = request.get_json()
-        if "token" not in data:
-            return jsonify({
-                "success": False,
-                "error": "Falta campo 'token'",
-                "error_code": "MISSING_FIELD",
-            }), 400
+def check_token(data: dict, cost: int = 1) -> tuple[Optional[dict], Optional[tuple[dict, int]]]:
+    """
+    Valida el campo 'token' de un body JSON (compartido por Flask y la app ASGI).
 
-        valido, datos_token, error_token = TokenMiddleware.validar_token(data["token"])
-        if not valido:
-            error_code = "EXPIRED_TOKEN" if error_token and "expirado" in error_token.lower() else "INVALID_TOKEN"
-            return jsonify({
-                "success": False,
-                "error": error_token,
-                "error_code": error_code,
-            }), 401
+    Aplica también el rate limit por empleado (ámbito "api"): al excederlo
+    responde 429 con 'retry_after' en el body (ver retry_after_headers).
 
-        g.token_data = datos_token
-        return f(*args, **kwargs)
-    return decorated
+    Args:
+        data: Body JSON del request
+        cost: Unidades de rate limit que consume (un lote: una por pregunta distinta).
+            Si supera el cupo completo de la ventana responde 400 TOO_MANY_ITEMS
+
+    Returns:
+        (datos del token, None) si es válido; (None, (body de error, status)) si no
+    """
+    if "token" not in data:
+        return None, ({
+            "success": False,
+            "error": "Falta campo 'token'",
+            "error_code": "MISSING_FIELD",
+        }, 400)
+
+    valido, datos_token, error_token = TokenMiddleware.validar_token(data["token"])
+    if not valido:
+        error_code = "EXPIRED_TOKEN" if error_token and "expirado" in error_token.lower() else "INVALID_TOKEN"
+        return None, ({
+            "success": False,
+            "error": error_token,
+            "error_code": error_code,
+        }, 401)
+
+    limiter = rate_limiter_for("api")
+    if cost > limiter.max_requests:
+        return None, ({
+            "success": False,
+            "error": f"Máximo {limiter.max_requests} consultas cada {limiter.time_window}s",
+            "error_code": "TOO_MANY_ITEMS",
+        }, 400)
+    limite = limiter.check(datos_token["numero_empleado"], cost=cost)
+    if not limite.allowed:
+        return None, ({
+            "success": False,
+            "error": f"Demasiadas solicitudes, reintentar en {limite.retry_after_seconds}s",
+            "error_code": "RATE_LIMITED",
+            "retry_after": limite.retry_after_seconds,
+        }, 429)
+    return datos_token, None
+
+
+def retry_after_headers(body: dict) -> dict[str, str]:
+    """Header Retry-After para los errores de check_token que lo llevan en el body."""
+    return {"Retry-After": str(body["retry_after"])} if "retry_after" in body else {}
+
+
+def require_token(f: Optional[Callable] = None, *, cost: Optional[Callable[[dict], int]] = None) -> Callable:
+    """
+    Valida el token y expone los datos decodificados en flask.g.token_data.
+
+    Uso: `@require_token`, o `@require_token(cost=batch_cost)` para que el
+    rate limit cobre según el body.
+    """
+    def decorator(view: Callable) -> Callable:
+        @wraps(view)
+        def decorated(*args, **kwargs):
+            data = request.get_json()
+            datos_token, error = check_token(data, cost(data) if cost else 1)
+            if error is not None:
+                body, status = error
+                return jsonify(body), status, retry_after_headers(body)
+
+            g.token_data = datos_token
+            return view(*args, **kwargs)
+        return decorated
+    return decorator(f) if f is not None else decorator
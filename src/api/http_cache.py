@@ -0,0 +1,300 @@
+"""
+http_cache — respuestas condicionales, compresión y Cache-Control del panel web.
+
+El dashboard consulta /api/admin/* cada pocos segundos y recarga /admin/*:
+sin validadores, cada poll vuelve a bajar el mismo JSON. HttpCache:
+
+- ETag fuerte calculado del contenido (blake2b del body sin comprimir) y 304
+  si coincide con If-None-Match: el poll de un overview que no cambió cuesta
+  unos bytes en vez del JSON completo
+- gzip (o br, si el paquete brotli está instalado y el cliente lo acepta)
+  para bodies de al menos `compress_min_bytes`
+- Estáticos de wwwroot leídos, hasheados y precomprimidos una sola vez y
+  servidos desde memoria; se recargan si cambia el mtime o el tamaño del archivo
+- Cache-Control por ruta (ver cache_control())
+
+Cada codificación es una representación distinta y lleva su propio ETag
+("<hash>-gzip"). Por eso un cliente que guardó la versión gzip no recibe un
+304 para la versión sin comprimir.
+
+Uso (Flask):
+    response = http_cache.finalize(response, request)        # after_request
+    return http_cache.static(root, "marked.min.js", request)  # None → 404
+"""
+
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from flask import Request, Response
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:  # pragma: no cover - dependencia opcional
+    brotli = None  # type: ignore[assignment]
+    BROTLI_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+NO_CACHE = "no-cache"  # el navegador guarda la respuesta pero revalida siempre (ETag → 304)
+_GZIP_LEVEL = 6        # respuestas dinámicas: se comprimen en cada request
+_STATIC_GZIP_LEVEL = 9  # estáticos: se comprimen una vez
+_MAX_STATIC_BYTES = 8 * 1024 * 1024
+_COMPRESSIBLE = ("text/", "application/json", "application/javascript", "image/svg+xml")
+
+
+def strong_etag(body: bytes) -> str:
+    """Hash del contenido usado como ETag (sin comillas)."""
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def accepted_encodings(accept_encoding: str) -> set[str]:
+    """Codificaciones con q > 0 en un header Accept-Encoding."""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name and q > 0:
+            accepted.add(name)
+    return accepted
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """"br", "gzip" o None según lo que acepta el cliente (br solo con el paquete instalado)."""
+    accepted = accepted_encodings(accept_encoding)
+    if BROTLI_AVAILABLE and ("br" in accepted or "*" in accepted):
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str, static: bool = False) -> bytes:
+    """Body comprimido con `encoding`; los estáticos usan el nivel máximo (se comprimen una vez)."""
+    if encoding == "br":
+        return brotli.compress(body, quality=11 if static else 5)
+    return gzip.compress(body, compresslevel=_STATIC_GZIP_LEVEL if static else _GZIP_LEVEL, mtime=0)
+
+
+def _compressible(mimetype: Optional[str]) -> bool:
+    return bool(mimetype) and mimetype.startswith(_COMPRESSIBLE)
+
+
+def _tagged(etag: str, encoding: Optional[str]) -> str:
+    return f"{etag}-{encoding}" if encoding else etag
+
+
+@dataclass
+class StaticAsset:
+    """Archivo de wwwroot en memoria con sus versiones comprimidas."""
+
+    path: str
+    mtime_ns: int
+    size: int
+    mimetype: str
+    body: bytes
+    etag: str
+    encoded: dict[str, bytes] = field(default_factory=dict)  # "gzip"/"br" → body comprimido
+
+
+class HttpCache:
+    """
+    ETag + 304, compresión y Cache-Control para las respuestas del dashboard.
+
+    Example:
+        >>> cache = HttpCache(compress_min_bytes=1024, static_max_age_seconds=300)
+        >>> response = cache.finalize(response, request)
+    """
+
+    def __init__(self, compress_min_bytes: int = 1024, static_max_age_seconds: int = 300) -> None:
+        """
+        Args:
+            compress_min_bytes: Bodies más chicos se envían sin comprimir; 0 = comprimir todo
+            static_max_age_seconds: max-age de los estáticos de /admin/<path>
+        """
+        self.compress_min_bytes = compress_min_bytes
+        self.static_max_age_seconds = static_max_age_seconds
+        self.name = "dashboard_http"
+        self._assets: dict[str, StaticAsset] = {}
+        self._lock = threading.Lock()
+        self._responses = 0
+        self._not_modified = 0
+        self._compressed = 0
+        self._bytes_in = 0
+        self._bytes_out = 0
+        self._asset_loads = 0
+
+    def cache_control(self, path: str) -> str:
+        """
+        Política por ruta.
+
+        - /api/admin/*: no-cache. El JSON cambia en cualquier momento; el
+          navegador revalida cada poll y recibe 304 si no cambió
+        - /admin (HTML del panel): no-cache, para que un deploy se vea al recargar
+        - /admin/<path>: public, max-age. Los estáticos no llevan hash en el nombre,
+          así que el max-age es corto y al vencer se revalida por ETag
+        """
+        if path.startswith("/admin/") and not path.endswith(".html"):
+            return f"public, max-age={self.static_max_age_seconds}"
+        return NO_CACHE
+
+    def finalize(self, response: Response, request: Request) -> Response:
+        """
+        ETag, 304 y compresión para una respuesta dinámica (after_request).
+
+        Solo GET/HEAD con status 200 y body en memoria; el resto (errores, PUT,
+        archivos servidos en streaming, respuestas que ya traen ETag) pasa sin cambios.
+        """
+        if (
+            request.method not in ("GET", "HEAD")
+            or response.status_code != 200
+            or response.direct_passthrough
+            or response.headers.get("Content-Encoding")
+            or "ETag" in response.headers
+        ):
+            return response
+
+        response.headers.setdefault("Cache-Control", self.cache_control(request.path))
+        body = response.get_data()
+        encoding = None
+        if _compressible(response.mimetype) and len(body) >= self.compress_min_bytes:
+            encoding = choose_encoding(request.headers.get("Accept-Encoding", ""))
+        response.vary.add("Accept-Encoding")
+        response.set_etag(_tagged(strong_etag(body), encoding))
+
+        if self._not_modified_for(request, response):
+            return self._to_not_modified(response, len(body))
+
+        if encoding is not None:
+            encoded = compress(body, encoding)
+            response.set_data(encoded)
+            response.headers["Content-Encoding"] = encoding
+            self._count(len(body), len(encoded), compressed=True)
+        else:
+            self._count(len(body), len(body))
+        return response
+
+    def static(self, root: str, filename: str, request: Request) -> Optional[Response]:
+        """
+        Respuesta para un archivo de `root` desde memoria.
+
+        Returns:
+            La respuesta (200 o 304), o None si el archivo no existe, queda
+            fuera de `root` o supera el tamaño máximo (el caller responde 404
+            o lo sirve del disco)
+        """
+        asset = self._asset(root, filename)
+        if asset is None:
+            return None
+
+        encoding = None
+        if _compressible(asset.mimetype) and asset.size >= self.compress_min_bytes:
+            encoding = choose_encoding(request.headers.get("Accept-Encoding", ""))
+        if encoding is not None and encoding not in asset.encoded:
+            encoded = compress(asset.body, encoding, static=True)
+            with self._lock:
+                asset.encoded.setdefault(encoding, encoded)
+
+        response = Response(asset.encoded.get(encoding, asset.body) if encoding else asset.body, mimetype=asset.mimetype)
+        response.headers["Cache-Control"] = self.cache_control(request.path)
+        response.vary.add("Accept-Encoding")
+        response.set_etag(_tagged(asset.etag, encoding))
+        response.last_modified = asset.mtime_ns / 1e9
+        if encoding is not None:
+            response.headers["Content-Encoding"] = encoding
+
+        if self._not_modified_for(request, response):
+            return self._to_not_modified(response, asset.size)
+        self._count(asset.size, response.content_length or 0, compressed=encoding is not None)
+        return response
+
+    def _asset(self, root: str, filename: str) -> Optional[StaticAsset]:
+        path = safe_join(root, filename)
+        if path is None:
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if not os.path.isfile(path) or st.st_size > _MAX_STATIC_BYTES:
+            return None
+
+        asset = self._assets.get(path)
+        if asset is not None and asset.mtime_ns == st.st_mtime_ns and asset.size == st.st_size:
+            return asset
+        try:
+            with open(path, "rb") as f:
+                body = f.read()
+        except OSError as e:
+            logger.warning(f"No se pudo leer {path}: {e}")
+            return None
+        asset = StaticAsset(
+            path=path,
+            mtime_ns=st.st_mtime_ns,
+            size=len(body),
+            mimetype=mimetypes.guess_type(path)[0] or "application/octet-stream",
+            body=body,
+            etag=strong_etag(body),
+        )
+        with self._lock:
+            self._assets[path] = asset
+            self._asset_loads += 1
+        return asset
+
+    @staticmethod
+    def _not_modified_for(request: Request, response: Response) -> bool:
+        if_none_match = request.if_none_match
+        if if_none_match:
+            # If-None-Match manda sobre If-Modified-Since (RFC 9110 §13.2.2)
+            etag, _ = response.get_etag()
+            return if_none_match.contains_weak(etag)
+        since = request.if_modified_since
+        return bool(since and response.last_modified and response.last_modified <= since)
+
+    def _to_not_modified(self, response: Response, size: int) -> Response:
+        response.status_code = 304
+        response.set_data(b"")
+        for header in ("Content-Type", "Content-Length", "Content-Encoding"):
+            response.headers.pop(header, None)
+        with self._lock:
+            self._responses += 1
+            self._not_modified += 1
+            self._bytes_in += size
+        return response
+
+    def _count(self, size: int, sent: int, compressed: bool = False) -> None:
+        with self._lock:
+            self._responses += 1
+            self._compressed += int(compressed)
+            self._bytes_in += size
+            self._bytes_out += sent
+
+    def stats(self) -> dict[str, Any]:
+        """Contadores para métricas."""
+        with self._lock:
+            return {
+                "name": self.name,
+                "responses": self._responses,
+                "not_modified": self._not_modified,
+                "compressed": self._compressed,
+                "bytes_in": self._bytes_in,
+                "bytes_out": self._bytes_out,
+                "static_assets": len(self._assets),
+                "static_bytes": sum(a.size + sum(map(len, a.encoded.values())) for a in self._assets.values()),
+                "static_loads": self._asset_loads,
+                "brotli": BROTLI_AVAILABLE,
+            }
@@ -0,0 +1,61 @@
+"""
+sse — Formato Server-Sent Events para /api/chat/stream.
+
+Eventos emitidos (campo `event:`; `data:` siempre es JSON):
+- routing     especialista elegido por el orquestador
+- tool_start  el agente llama a una tool
+- tool_end    la tool respondió
+- status      otras fases del agente (razonando, redactando...)
+- answer      fragmento del texto de la respuesta final ({"delta": "..."})
+- result      respuesta completa, mismo body que POST /api/chat
+- error       fallo del request ({"error", "error_code"})
+
+Líneas que empiezan con ':' son comentarios de heartbeat (el cliente las ignora).
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Iterator, Optional
+
+from src.agents.base.agent_events import AgentEvent, AgentEventType
+
+HEARTBEAT = b": ping\n\n"
+
+_ANSWER_CHUNK_CHARS = 200
+
+
+def format_sse(event: str, data: dict[str, Any]) -> bytes:
+    """Serializa un evento SSE."""
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event}\ndata: {payload}\n\n".encode("utf-8")
+
+
+def agent_event_to_sse(event: AgentEvent) -> Optional[tuple[str, dict[str, Any]]]:
+    """Traduce un AgentEvent del event_callback a (nombre, data) SSE."""
+    meta = event.metadata
+    if event.event_type == AgentEventType.AGENT_ROUTED:
+        return "routing", {
+            "agent": meta.get("agent_name"),
+            "confidence": meta.get("confidence"),
+            "used_fallback": meta.get("used_fallback", False),
+        }
+    if event.event_type == AgentEventType.TOOL_CALLED:
+        return "tool_start", {"tool": meta.get("tool_name"), "step": meta.get("step"), "status": event.status_text}
+    if event.event_type == AgentEventType.OBSERVATION_RECEIVED:
+        return "tool_end", {"tool": meta.get("tool_name"), "success": meta.get("success"), "status": event.status_text}
+    return "status", {"phase": event.event_type.value, "status": event.status_text}
+
+
+def answer_chunks(text: str, size: int = _ANSWER_CHUNK_CHARS) -> Iterator[str]:
+    """Parte la respuesta final en fragmentos, cortando en saltos de línea o espacios cuando se puede."""
+    while text:
+        if len(text) <= size:
+            yield text
+            return
+        cut = text.rfind("\n", 0, size)
+        if cut <= 0:
+            cut = text.rfind(" ", 0, size)
+        cut = cut + 1 if cut > 0 else size
+        yield text[:cut]
+        text = text[cut:]
@@ -13,14 +13,19 @@ from typing import Any, Optional
 
 from src.infra.database.registry import DatabaseRegistry
 from src.domain.knowledge import KnowledgeService
+from src.domain.alerts.active_events_snapshot import snapshot_for
+from src.domain.alerts.alert_caches import AlertCaches, EscalationCaches, caches_for
+from src.domain.alerts.alert_repository import AlertRepository
+from src.domain.alerts.hedging import hedge_policy_for
 from src.domain.auth.permission_repository import PermissionRepository
 from src.domain.interaction.interaction_repository import InteractionRepository
+from src.domain.interaction.interaction_rollup import rollup_for
 from src.domain.cost.cost_repository import CostRepository
 from src.domain.auth.user_query_repository import UserQueryRepository
 from src.agents.providers.openai_provider import OpenAIProvider
 from src.infra.observability.logging_config import get_sql_handler
 from src.infra.notifications.admin_notifier import fire_admin_notify
-from src.config.settings import settings
+from src.config.settings import PROJECT_ROOT, settings
 
 from src.pipeline.handler import MainHandler
 from .service_factory import create_permission_service, create_memory_service
@@ -40,12 +45,56 @@ def create_main_handler(
     db_registry = DatabaseRegistry.from_settings()
 
     try:
-        knowledge_manager = KnowledgeService(db_manager=db)
+        vector_path = settings.knowledge_vector_index_path
+        knowledge_manager = KnowledgeService(
+            db_manager=db,
+            vector_index_path=PROJECT_ROOT / vector_path if vector_path else None,
+        )
         logger.info(f"KnowledgeService created: {len(knowledge_manager.knowledge_base)} entries loaded")
+        if settings.knowledge_refresh_interval_seconds > 0:
+            knowledge_manager.start_auto_refresh(settings.knowledge_refresh_interval_seconds)
     except Exception as e:
         logger.warning(f"KnowledgeService creation failed, knowledge search disabled: {e}")
         knowledge_manager = None
 
+    if settings.dashboard_rollup_interval_seconds > 0:
+        rollup_for(db).start_background_refresh(settings.dashboard_rollup_interval_seconds)
+
+    if db_registry.is_configured("monitoreo"):
+        try:
+            db_monitoreo = db_registry.get("monitoreo")
+            hedge_policy_for(
+                db_monitoreo,
+                percentile=settings.alerts_hedge_percentile,
+                min_delay_seconds=settings.alerts_hedge_min_delay_ms / 1000,
+                max_delay_seconds=settings.alerts_hedge_max_delay_ms / 1000,
+            )
+            warmup_path = settings.alerts_escalation_warmup_path
+            alert_caches = caches_for(db_monitoreo, AlertCaches(
+                inventory_ttl_seconds=settings.alerts_inventory_cache_ttl_seconds,
+                inventory_negative_ttl_seconds=settings.alerts_inventory_negative_ttl_seconds,
+                tickets_ttl_seconds=settings.alerts_tickets_cache_ttl_seconds,
+                escalation=EscalationCaches(
+                    ttl_seconds=settings.alerts_escalation_cache_ttl_seconds,
+                    version_query=settings.alerts_escalation_version_query,
+                    warmup_top=settings.alerts_escalation_warmup_top,
+                    warmup_path=PROJECT_ROOT / warmup_path if warmup_path else None,
+                ),
+            ))
+            if settings.alerts_escalation_refresh_interval_seconds > 0:
+                alert_caches.escalation.start_background_refresh(
+                    settings.alerts_escalation_refresh_interval_seconds,
+                    AlertRepository(db_monitoreo).refresh_escalation_cache,
+                )
+            alerts_snapshot = snapshot_for(
+                db_monitoreo,
+                max_staleness_seconds=settings.alerts_snapshot_max_staleness_seconds,
+            )
+            if settings.alerts_snapshot_refresh_interval_seconds > 0:
+                alerts_snapshot.start_background_refresh(settings.alerts_snapshot_refresh_interval_seconds)
+        except Exception as e:
+            logger.warning(f"Caches de alertas sin recarga en background: {e}")
+
     permission_service = create_permission_service(db_manager=db)
     memory_service = create_memory_service(db_manager=db, permission_service=permission_service)
 
@@ -36,7 +36,8 @@ def create_memory_service(
         repository=repository,
         permission_service=permission_service,
         cache_ttl_seconds=300,
-        max_cache_size=1000,
+        max_cache_size=20000,
+        max_cache_bytes=256 * 1024 * 1024,
         max_working_memory=10,
     )
     logger.info("MemoryService created")
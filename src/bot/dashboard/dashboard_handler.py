@@ -27,6 +27,8 @@ from .views import (
 
 logger = logging.getLogger(__name__)
 
+_LOGS_CURSORS = "dash_logs_cursors"
+
 
 class DashboardHandler:
 
@@ -67,7 +69,7 @@ class DashboardHandler:
         service = DashboardService(db_manager, db_registry)
 
         try:
-            text, keyboard = await _dispatch(section, parts, service)
+            text, keyboard = await _dispatch(section, parts, service, context.user_data)
         except Exception as e:
             logger.error(f"DashboardHandler [{data}]: {e}", exc_info=True)
             await _edit(query, "❌ Error al cargar datos. Intenta de nuevo.")
@@ -77,7 +79,7 @@ class DashboardHandler:
         await _edit(query, text, keyboard, parse_mode="HTML")
 
 
-async def _dispatch(section: str, parts: list[str], service: DashboardService):
+async def _dispatch(section: str, parts: list[str], service: DashboardService, user_data: dict):
     if section == "menu":
         return render_menu()
 
@@ -91,8 +93,14 @@ async def _dispatch(section: str, parts: list[str], service: DashboardService):
         return render_alerts(data)
 
     if section == "logs":
+        # callback_data no admite cursores (64 bytes): se guardan por página en user_data
         page = int(parts[2]) if len(parts) > 2 and parts[2].isdigit() else 1
-        data = await service.get_logs(page)
+        if page == 1:
+            user_data[_LOGS_CURSORS] = {}
+        cursors = user_data.setdefault(_LOGS_CURSORS, {})
+        data = await service.get_logs(page, cursor=cursors.get(page))
+        if data["next_cursor"]:
+            cursors[data["page"] + 1] = data["next_cursor"]
         return render_logs(data)
 
     if section == "agents":
@@ -9,37 +9,15 @@ import logging
 from datetime import date, datetime, timedelta
 from typing import Any, Optional
 
+from src.config.settings import settings
+from src.domain.interaction.interaction_rollup import latency_percentile, overview_reader_for
+from src.infra.database.pagination import Keyset, count_cache
+
 logger = logging.getLogger(__name__)
 
 _DIAS_ES = ["Lun", "Mar", "Mié", "Jue", "Vie", "Sáb", "Dom"]
 
-
-def _build_where(periodo: str) -> tuple[str, str, str]:
-    """Retorna (where, where_ar, where_prev) según el período."""
-    if periodo == "hoy":
-        return (
-            "CAST(fechaEjecucion AS DATE) = CAST(GETDATE() AS DATE)",
-            "CAST(ar.fechaCreacion AS DATE) = CAST(GETDATE() AS DATE)",
-            "CAST(fechaEjecucion AS DATE) = CAST(DATEADD(DAY,-1,GETDATE()) AS DATE)",
-        )
-    if periodo == "ayer":
-        return (
-            "CAST(fechaEjecucion AS DATE) = CAST(DATEADD(DAY,-1,GETDATE()) AS DATE)",
-            "CAST(ar.fechaCreacion AS DATE) = CAST(DATEADD(DAY,-1,GETDATE()) AS DATE)",
-            "CAST(fechaEjecucion AS DATE) = CAST(DATEADD(DAY,-2,GETDATE()) AS DATE)",
-        )
-    if periodo == "7d":
-        return (
-            "fechaEjecucion >= DATEADD(DAY,-6, CAST(GETDATE() AS DATE))",
-            "ar.fechaCreacion >= DATEADD(DAY,-6, CAST(GETDATE() AS DATE))",
-            "fechaEjecucion >= DATEADD(DAY,-13,CAST(GETDATE() AS DATE)) AND fechaEjecucion < DATEADD(DAY,-6,CAST(GETDATE() AS DATE))",
-        )
-    # 30d
-    return (
-        "fechaEjecucion >= DATEADD(DAY,-29,CAST(GETDATE() AS DATE))",
-        "ar.fechaCreacion >= DATEADD(DAY,-29,CAST(GETDATE() AS DATE))",
-        "fechaEjecucion >= DATEADD(DAY,-59,CAST(GETDATE() AS DATE)) AND fechaEjecucion < DATEADD(DAY,-29,CAST(GETDATE() AS DATE))",
-    )
+_LOGS_KEYSET = Keyset("il.fechaEjecucion", "il.idLog")
 
 
 class DashboardService:
@@ -56,44 +34,11 @@ class DashboardService:
         if periodo not in ("hoy", "ayer", "7d", "30d"):
             periodo = "hoy"
 
-        where, where_ar, where_prev = _build_where(periodo)
-
-        stats, percentiles, prev, agent_rows = await _gather(
-            self._db.execute_query_async(f"""
-                SELECT
-                    COUNT(*)                                            AS total_mensajes,
-                    COUNT(DISTINCT telegramChatId)                      AS usuarios_activos,
-                    SUM(CASE WHEN exitoso = 0 THEN 1 ELSE 0 END)       AS errores,
-                    ISNULL(SUM(costUSD), 0)                             AS costo_total
-                FROM abcmasplus..BotIAv2_InteractionLogs WHERE {where}
-            """),
-            self._db.execute_query_async(f"""
-                SELECT TOP 1
-                    PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY duracionMs) OVER () AS p50_ms,
-                    PERCENTILE_CONT(0.9) WITHIN GROUP (ORDER BY duracionMs) OVER () AS p90_ms
-                FROM abcmasplus..BotIAv2_InteractionLogs WHERE {where}
-            """),
-            self._db.execute_query_async(f"""
-                SELECT COUNT(*) AS total_prev
-                FROM abcmasplus..BotIAv2_InteractionLogs WHERE {where_prev}
-            """),
-            self._db.execute_query_async(f"""
-                SELECT
-                    ar.agenteSeleccionado,
-                    COUNT(*) AS requests,
-                    SUM(CASE WHEN il.exitoso = 1 THEN 1 ELSE 0 END) AS exitosos,
-                    ISNULL(SUM(il.costUSD), 0) AS costo
-                FROM abcmasplus..BotIAv2_AgentRouting ar
-                LEFT JOIN abcmasplus..BotIAv2_InteractionLogs il
-                    ON ar.correlationId = il.correlationId
-                WHERE {where_ar}
-                GROUP BY ar.agenteSeleccionado
-                ORDER BY requests DESC
-            """),
-        )
+        rows = await overview_reader_for(self._db, settings.dashboard_overview_cache_seconds).rows_async(periodo)
+        stats, usuarios, prev, agent_rows = rows["stats"], rows["usuarios"], rows["prev"], rows["agentes"]
 
         s  = stats[0] if stats else {}
-        pc = percentiles[0] if percentiles else {}
+        u  = usuarios[0] if usuarios else {}
         p  = prev[0] if prev else {}
 
         total      = int(s.get("total_mensajes") or 0)
@@ -104,11 +49,11 @@ class DashboardService:
             "periodo": periodo,
             "mensajes": total,
             "mensajes_pct_change": pct,
-            "usuarios_activos": int(s.get("usuarios_activos") or 0),
+            "usuarios_activos": int(u.get("usuarios_activos") or 0),
             "errores": int(s.get("errores") or 0),
             "costo": round(float(s.get("costo_total") or 0), 4),
-            "p50_s": round(float(pc.get("p50_ms") or 0) / 1000, 1),
-            "p90_s": round(float(pc.get("p90_ms") or 0) / 1000, 1),
+            "p50_s": round(latency_percentile(s, 0.5) / 1000, 1),
+            "p90_s": round(latency_percentile(s, 0.9) / 1000, 1),
             "agentes": [
                 {
                     "nombre": r["agenteSeleccionado"],
@@ -162,25 +107,53 @@ class DashboardService:
     # Logs
     # ──────────────────────────────────────────────────────────────────────────
 
-    async def get_logs(self, page: int = 1, page_size: int = 8) -> dict:
-        rows = await self._db.execute_query_async("""
-            SELECT TOP 50
-                il.telegramUsername,
-                il.query,
-                il.agenteNombre,
-                il.duracionMs,
-                il.exitoso,
-                il.fechaEjecucion,
-                il.costUSD
-            FROM abcmasplus..BotIAv2_InteractionLogs il
-            ORDER BY il.fechaEjecucion DESC
-        """)
-
-        total = len(rows)
-        total_pages = max(1, (total + page_size - 1) // page_size)
-        page = max(1, min(page, total_pages))
-        start = (page - 1) * page_size
-        slice_ = rows[start: start + page_size]
+    async def get_logs(self, page: int = 1, page_size: int = 8, cursor: Optional[str] = None) -> dict:
+        """
+        Página `page` de logs, paginada por keyset.
+
+        Args:
+            page: Número de página a mostrar (solo para la vista)
+            page_size: Logs por página
+            cursor: next_cursor de la página anterior (None = primera página)
+        """
+        where, params = _LOGS_KEYSET.where(cursor)
+        where_sql = f"WHERE {where}" if where else ""
+        if not cursor:
+            page = 1
+
+        count_key = ("logs",)
+        total = count_cache().get(count_key)
+        queries = [
+            self._db.execute_query_async(f"""
+                SELECT TOP ({page_size + 1})
+                    il.idLog,
+                    il.telegramUsername,
+                    il.query,
+                    il.agenteNombre,
+                    il.duracionMs,
+                    il.exitoso,
+                    il.fechaEjecucion,
+                    il.costUSD
+                FROM abcmasplus..BotIAv2_InteractionLogs il
+                {where_sql}
+                ORDER BY {_LOGS_KEYSET.order_by()}
+            """, params or None),
+        ]
+        if total is None:
+            queries.append(self._db.execute_query_async(
+                "SELECT COUNT(*) AS total FROM abcmasplus..BotIAv2_InteractionLogs"
+            ))
+        results = await _gather(*queries)
+        slice_, next_cursor = _LOGS_KEYSET.page(results[0], page_size, "fechaEjecucion", "idLog")
+        if total is None:
+            total = int((results[1][0]["total"] if results[1] else 0) or 0)
+            count_cache().set(count_key, total)
+
+        # El total es aproximado (cacheado): la última página la define next_cursor
+        if next_cursor:
+            total_pages = max(page + 1, (total + page_size - 1) // page_size)
+        else:
+            total_pages = page
 
         return {
             "logs": [
@@ -198,6 +171,7 @@ class DashboardService:
             "page": page,
             "total_pages": total_pages,
             "total": total,
+            "next_cursor": next_cursor,
         }
 
     # ──────────────────────────────────────────────────────────────────────────
@@ -4,9 +4,11 @@ from .auth_middleware import (
     setup_auth_middleware,
     require_auth,
 )
+from .rate_limit_middleware import setup_rate_limit_middleware
 
 __all__ = [
     'setup_logging_middleware',
     'setup_auth_middleware',
     'require_auth',
+    'setup_rate_limit_middleware',
 ]
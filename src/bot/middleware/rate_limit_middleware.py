@@ -0,0 +1,56 @@
+"""
+Middleware de rate limiting para el bot de Telegram.
+
+Se registra como TypeHandler en el grupo -1: corre antes que cualquier handler
+y, si el usuario excedió su cupo (rate_limiter_for("telegram")), corta la
+propagación con ApplicationHandlerStop. Mismo limitador y configuración que
+la API (ver src/api/decorators.check_token).
+"""
+import logging
+import time
+
+from telegram import Update
+from telegram.ext import Application, ApplicationHandlerStop, ContextTypes, TypeHandler
+
+from src.utils.rate_limiter import rate_limiter_for
+
+logger = logging.getLogger(__name__)
+
+# Grupo previo a todos los handlers registrados en telegram_bot._setup_handlers
+RATE_LIMIT_GROUP = -1
+
+_AVISADO_HASTA = "rate_limit_avisado_hasta"
+
+
+async def enforce_rate_limit(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Consume un request del usuario; si no hay cupo avisa y detiene el update."""
+    user = update.effective_user
+    if user is None or not (update.message or update.callback_query):
+        return
+
+    limite = rate_limiter_for("telegram").check(user.id)
+    if limite.allowed:
+        return
+
+    aviso = f"⏳ Demasiadas solicitudes. Intenta de nuevo en {limite.retry_after_seconds}s."
+    try:
+        if update.callback_query:
+            await update.callback_query.answer(aviso, show_alert=False)
+        elif time.monotonic() >= context.user_data.get(_AVISADO_HASTA, 0):
+            # Un solo aviso por espera: el resto de mensajes se descarta en silencio
+            context.user_data[_AVISADO_HASTA] = time.monotonic() + limite.retry_after
+            await update.message.reply_text(aviso)
+    except Exception as e:
+        logger.debug(f"No se pudo avisar rate limit a {user.id}: {e}")
+    raise ApplicationHandlerStop
+
+
+def setup_rate_limit_middleware(application: Application) -> None:
+    """
+    Registrar el rate limit por usuario en la aplicación.
+
+    Args:
+        application: Aplicación de Telegram
+    """
+    application.add_handler(TypeHandler(Update, enforce_rate_limit), group=RATE_LIMIT_GROUP)
+    logger.info("Middleware de rate limiting configurado")
@@ -5,22 +5,166 @@ Valida tokens que contienen JSON con número de empleado y timestamp.
 El token es válido si:
 1. Se puede desencriptar correctamente
 2. La fecha no tiene más de 3 minutos de antigüedad
+
+El cliente web presenta el mismo token en cada request de la sesión, así que
+las validaciones se cachean en memoria (TokenValidationCache): un token ya
+validado cuesta un HMAC y una búsqueda en el LRU en vez de AES + JSON.
 """
+import hashlib
+import hmac
 import json
 import logging
+import secrets
+import threading
+from collections import Counter
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, Tuple
 
+from src.infra.observability import get_metrics
 from src.utils.encryption_util import desencriptar
+from src.utils.ttl_cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
+_CACHE_MAX_ENTRIES = 10000       # tokens válidos recordados (LRU)
+_CACHE_MAX_TTL_SECONDS = 3600    # tope para tokens con fechaExpiracion lejana
+_NEGATIVE_MAX_ENTRIES = 2000     # tokens malformados recordados (LRU aparte)
+_NEGATIVE_TTL_SECONDS = 30
+
+_KEY_BYTES = 16
+
 
 class TokenValidationError(Exception):
     """Excepción para errores de validación de token."""
     pass
 
 
+class TokenValidationCache:
+    """
+    Cache de validaciones de token: HMAC(token) → claims validados.
+
+    - Positivo: el TTL de cada entrada es la vigencia restante del token
+      (fechaExpiracion, o timestamp + MAX_TOKEN_AGE_MINUTES) con tope de
+      _CACHE_MAX_TTL_SECONDS; en cada hit se vuelve a comparar contra el reloj
+      de pared, así un token nunca se acepta después de expirar.
+    - Negativo: tokens malformados (no desencriptan, JSON o campos inválidos)
+      se recuerdan _NEGATIVE_TTL_SECONDS en un LRU separado, para que una
+      ráfaga de basura no desaloje los tokens válidos.
+
+    Los tokens no se guardan en claro: la clave es un HMAC-SHA256 con una
+    llave aleatoria del proceso. El dict se indexa con un prefijo del digest y
+    el digest completo se compara con hmac.compare_digest, de modo que el
+    tiempo de la búsqueda no revela nada sobre los tokens cacheados.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = _CACHE_MAX_ENTRIES,
+        negative_ttl_seconds: float = _NEGATIVE_TTL_SECONDS,
+    ) -> None:
+        self._key = secrets.token_bytes(32)
+        self.valid: TTLCache[bytes, tuple] = TTLCache(
+            max_entries=max_entries,
+            ttl_seconds=_CACHE_MAX_TTL_SECONDS,
+            name="token_validation",
+        )
+        self.invalid: TTLCache[bytes, tuple] = TTLCache(
+            max_entries=_NEGATIVE_MAX_ENTRIES,
+            ttl_seconds=negative_ttl_seconds,
+            name="token_validation_negative",
+        )
+        self._lock = threading.Lock()
+        self._counts: Counter = Counter()
+
+    def _digest(self, token: str) -> bytes:
+        return hmac.new(self._key, token.encode("utf-8", "surrogatepass"), hashlib.sha256).digest()
+
+    def lookup(self, token: str) -> Optional[Tuple[bool, Optional[Dict[str, Any]], Optional[str]]]:
+        """Resultado cacheado de validar_token, o None si hay que validar."""
+        digest = self._digest(token)
+        key = digest[:_KEY_BYTES]
+
+        entry = self.valid.get(key)
+        if entry is not None:
+            stored, datos, expira = entry
+            if hmac.compare_digest(stored, digest):
+                if datetime.now() <= expira:
+                    self._record("hits")
+                    return True, dict(datos), None
+                # Expiró antes que el TTL monotónico (ajuste de reloj): revalidar
+                self.valid.pop(key)
+
+        entry = self.invalid.get(key)
+        if entry is not None:
+            stored, error = entry
+            if hmac.compare_digest(stored, digest):
+                self._record("negative_hits")
+                return False, None, error
+
+        self._record("misses")
+        return None
+
+    def store_valid(self, token: str, datos: Dict[str, Any], expira: datetime) -> None:
+        """Recuerda un token válido hasta su expiración."""
+        restante = (expira - datetime.now()).total_seconds()
+        if restante <= 0:
+            return
+        digest = self._digest(token)
+        self.valid.set(
+            digest[:_KEY_BYTES],
+            (digest, dict(datos), expira),
+            ttl_seconds=min(restante, _CACHE_MAX_TTL_SECONDS),
+        )
+
+    def store_invalid(self, token: str, error: str) -> None:
+        """Recuerda por un rato corto que el token está malformado."""
+        digest = self._digest(token)
+        self.invalid.set(digest[:_KEY_BYTES], (digest, error))
+
+    def clear(self) -> None:
+        self.valid.clear()
+        self.invalid.clear()
+
+    def _record(self, outcome: str) -> None:
+        with self._lock:
+            self._counts[outcome] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Hits, misses y tamaño de ambos LRU para métricas."""
+        with self._lock:
+            hits = self._counts["hits"]
+            negative_hits = self._counts["negative_hits"]
+            misses = self._counts["misses"]
+        lookups = hits + negative_hits + misses
+        valid = self.valid.stats()
+        return {
+            "name": "token_validation",
+            "entries": valid["entries"],
+            "negative_entries": len(self.invalid),
+            "max_entries": valid["max_entries"],
+            "hits": hits,
+            "negative_hits": negative_hits,
+            "misses": misses,
+            "evictions": valid["evictions"],
+            "hit_rate": round((hits + negative_hits) / lookups, 3) if lookups else 0.0,
+            "decryptions_avoided": hits + negative_hits,
+        }
+
+
+_cache: Optional[TokenValidationCache] = None
+_cache_lock = threading.Lock()
+
+
+def token_cache() -> TokenValidationCache:
+    """Cache de validaciones compartido por el proceso (Flask y ASGI)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = TokenValidationCache()
+            get_metrics().register_cache("token_validation", _cache.stats)
+        return _cache
+
+
 class TokenMiddleware:
     """
     Middleware para validar tokens encriptados.
@@ -49,6 +193,10 @@ class TokenMiddleware:
             - datos: Diccionario con numero_empleado y timestamp si es válido, None si no
             - mensaje_error: Mensaje de error si no es válido, None si es válido
 
+        Los resultados se cachean (token_cache()): los válidos hasta su
+        expiración, los malformados _NEGATIVE_TTL_SECONDS. Los datos
+        retornados son una copia: el caller puede modificarlos.
+
         Example:
             >>> valido, datos, error = TokenMiddleware.validar_token(token)
             >>> if valido:
@@ -56,90 +204,116 @@ class TokenMiddleware:
             ... else:
             ...     print(f"Error: {error}")
         """
+        cache = token_cache()
+        cacheado = cache.lookup(token_encriptado)
+        if cacheado is not None:
+            return cacheado
+
         try:
-            # 1. Desencriptar el token
-            token_json = desencriptar(token_encriptado)
+            datos = cls._decodificar(token_encriptado)
+        except TokenValidationError as e:
+            # Malformado: no va a volverse válido, se recuerda un rato
+            cache.store_invalid(token_encriptado, str(e))
+            return False, None, str(e)
+        except Exception as e:
+            logger.error(f"Error inesperado validando token: {e}", exc_info=True)
+            return False, None, f"Error interno validando token: {str(e)}"
 
-            if token_json is None:
-                return False, None, "Token inválido: no se pudo desencriptar"
+        # 6. Validar vigencia
+        ahora = datetime.now()
+        timestamp = datos["timestamp_parsed"]
+
+        if datos.get("_usa_expiracion"):
+            # fechaExpiracion: el token es válido si aún no expiró
+            if ahora > timestamp:
+                return False, None, "Token expirado: la fecha de expiración ya pasó"
+            expira = timestamp
+        else:
+            # timestamp de creación: válido solo si tiene menos de MAX_TOKEN_AGE_MINUTES
+            edad_token = ahora - timestamp
+            if edad_token.total_seconds() < 0:
+                return False, None, "Token inválido: timestamp es del futuro"
+            max_edad = timedelta(minutes=cls.MAX_TOKEN_AGE_MINUTES)
+            if edad_token > max_edad:
+                minutos_transcurridos = int(edad_token.total_seconds() / 60)
+                return False, None, f"Token expirado: han pasado {minutos_transcurridos} minutos (máximo {cls.MAX_TOKEN_AGE_MINUTES})"
+            expira = timestamp + max_edad
+
+        # 7. Token válido
+        logger.debug(f"Token válido para empleado {datos['numero_empleado']}")
+        cache.store_valid(token_encriptado, datos, expira)
+        return True, datos, None
 
-            # 2. Parsear JSON
-            try:
-                datos = json.loads(token_json)
-            except json.JSONDecodeError as e:
-                logger.warning(f"Token con JSON inválido: {e}")
-                return False, None, f"Token inválido: JSON malformado ({e})"
-
-            # 3. Normalizar campos: soporta formato nuevo (UserId/fechaExpiracion)
-            #    y formato original (numero_empleado/timestamp)
-            if "UserId" in datos and "numero_empleado" not in datos:
-                datos["numero_empleado"] = datos["UserId"]
-            if "fechaExpiracion" in datos and "timestamp" not in datos:
-                datos["timestamp"] = datos["fechaExpiracion"]
-                datos["_usa_expiracion"] = True  # indica que el campo es fecha de expiración, no de creación
-
-            if "numero_empleado" not in datos:
-                return False, None, "Token inválido: falta 'numero_empleado' o 'UserId'"
-
-            if "timestamp" not in datos:
-                return False, None, "Token inválido: falta 'timestamp' o 'fechaExpiracion'"
-
-            # 4. Validar tipo de numero_empleado
-            if not isinstance(datos["numero_empleado"], (int, str)):
-                return False, None, "Token inválido: 'numero_empleado' debe ser int o string"
-
-            # Convertir a int si es string numérico
-            try:
-                numero_empleado = int(datos["numero_empleado"])
-                datos["numero_empleado"] = numero_empleado
-            except (ValueError, TypeError):
-                return False, None, f"Token inválido: 'numero_empleado' no es un número válido"
+    @classmethod
+    def _decodificar(cls, token_encriptado: str) -> Dict[str, Any]:
+        """
+        Desencriptar, parsear y normalizar los claims del token (sin validar vigencia).
+
+        Raises:
+            TokenValidationError: Si el token está malformado
+        """
+        # 1. Desencriptar el token
+        token_json = desencriptar(token_encriptado)
+
+        if token_json is None:
+            raise TokenValidationError("Token inválido: no se pudo desencriptar")
+
+        # 2. Parsear JSON
+        try:
+            datos = json.loads(token_json)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Token con JSON inválido: {e}")
+            raise TokenValidationError(f"Token inválido: JSON malformado ({e})")
+
+        if not isinstance(datos, dict):
+            raise TokenValidationError("Token inválido: el JSON no es un objeto")
+
+        # 3. Normalizar campos: soporta formato nuevo (UserId/fechaExpiracion)
+        #    y formato original (numero_empleado/timestamp)
+        if "UserId" in datos and "numero_empleado" not in datos:
+            datos["numero_empleado"] = datos["UserId"]
+        if "fechaExpiracion" in datos and "timestamp" not in datos:
+            datos["timestamp"] = datos["fechaExpiracion"]
+            datos["_usa_expiracion"] = True  # indica que el campo es fecha de expiración, no de creación
+
+        if "numero_empleado" not in datos:
+            raise TokenValidationError("Token inválido: falta 'numero_empleado' o 'UserId'")
+
+        if "timestamp" not in datos:
+            raise TokenValidationError("Token inválido: falta 'timestamp' o 'fechaExpiracion'")
 
-            # 5. Parsear fecha
+        # 4. Validar tipo de numero_empleado
+        if not isinstance(datos["numero_empleado"], (int, str)):
+            raise TokenValidationError("Token inválido: 'numero_empleado' debe ser int o string")
+
+        # Convertir a int si es string numérico
+        try:
+            datos["numero_empleado"] = int(datos["numero_empleado"])
+        except (ValueError, TypeError):
+            raise TokenValidationError("Token inválido: 'numero_empleado' no es un número válido")
+
+        # 5. Parsear fecha
+        try:
+            timestamp_str = datos["timestamp"]
             try:
-                timestamp_str = datos["timestamp"]
+                timestamp = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
+            except ValueError:
                 try:
-                    timestamp = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
+                    timestamp = datetime.strptime(timestamp_str, "%Y-%m-%dT%H:%M:%S.%f")
                 except ValueError:
-                    try:
-                        timestamp = datetime.strptime(timestamp_str, "%Y-%m-%dT%H:%M:%S.%f")
-                    except ValueError:
-                        timestamp = datetime.strptime(timestamp_str, "%Y-%m-%dT%H:%M:%S")
-
-                # Quitar tzinfo para comparar con datetime.now() naive
-                if timestamp.tzinfo is not None:
-                    timestamp = timestamp.replace(tzinfo=None)
-
-                datos["timestamp_parsed"] = timestamp
-
-            except (ValueError, TypeError) as e:
-                logger.warning(f"Timestamp inválido: {e}")
-                return False, None, f"Token inválido: timestamp mal formado ({e})"
-
-            # 6. Validar vigencia
-            ahora = datetime.now()
-
-            if datos.get("_usa_expiracion"):
-                # fechaExpiracion: el token es válido si aún no expiró
-                if ahora > timestamp:
-                    return False, None, "Token expirado: la fecha de expiración ya pasó"
-            else:
-                # timestamp de creación: válido solo si tiene menos de MAX_TOKEN_AGE_MINUTES
-                edad_token = ahora - timestamp
-                if edad_token.total_seconds() < 0:
-                    return False, None, "Token inválido: timestamp es del futuro"
-                max_edad = timedelta(minutes=cls.MAX_TOKEN_AGE_MINUTES)
-                if edad_token > max_edad:
-                    minutos_transcurridos = int(edad_token.total_seconds() / 60)
-                    return False, None, f"Token expirado: han pasado {minutos_transcurridos} minutos (máximo {cls.MAX_TOKEN_AGE_MINUTES})"
-
-            # 7. Token válido
-            logger.debug(f"Token válido para empleado {numero_empleado}")
-            return True, datos, None
+                    timestamp = datetime.strptime(timestamp_str, "%Y-%m-%dT%H:%M:%S")
 
-        except Exception as e:
-            logger.error(f"Error inesperado validando token: {e}", exc_info=True)
-            return False, None, f"Error interno validando token: {str(e)}"
+            # Quitar tzinfo para comparar con datetime.now() naive
+            if timestamp.tzinfo is not None:
+                timestamp = timestamp.replace(tzinfo=None)
+
+            datos["timestamp_parsed"] = timestamp
+
+        except (ValueError, TypeError, AttributeError) as e:
+            logger.warning(f"Timestamp inválido: {e}")
+            raise TokenValidationError(f"Token inválido: timestamp mal formado ({e})")
+
+        return datos
 
     @classmethod
     def generar_token(cls, numero_empleado: int) -> str:
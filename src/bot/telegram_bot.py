@@ -20,7 +20,7 @@ from .handlers import (
     register_tools_handlers
 )
 from .dashboard import register_dashboard_handlers
-from .middleware import setup_logging_middleware, setup_auth_middleware
+from .middleware import setup_logging_middleware, setup_auth_middleware, setup_rate_limit_middleware
 
 logger = logging.getLogger(__name__)
 
@@ -86,6 +86,9 @@ class TelegramBot:
         # Middleware de autenticación
         setup_auth_middleware(self.application, self.db_manager)
 
+        # Rate limiting por usuario (grupo -1, antes de todos los handlers)
+        setup_rate_limit_middleware(self.application)
+
         logger.info("Middleware configurado exitosamente")
 
     def _setup_error_handler(self):
@@ -101,6 +101,31 @@ class Settings(BaseSettings):
     log_level: str = "INFO"
     environment: str = "development"
     api_port: int = 5000
+    api_request_timeout_seconds: int = 120  # deadline de /api/chat y /api/tickets (incluye la espera en cola)
+    api_server: str = "asgi"                # "asgi" (uvicorn en el loop del bot) o "flask" (thread WSGI)
+    api_max_concurrent_requests: int = 16   # /api/chat + /api/tickets en proceso a la vez (ASGI)
+    api_max_concurrent_per_token: int = 2   # en proceso o en cola por empleado
+    api_max_queued_requests: int = 64       # cola de espera; al llenarse → 429 + Retry-After
+    api_queue_timeout_seconds: float = 10   # espera máxima en cola antes de 429
+    api_sse_heartbeat_seconds: float = 15   # comentario ": ping" en /api/chat/stream si no hay eventos
+    api_batch_max_items: int = 50           # mensajes por request en /api/chat/batch
+    api_batch_max_concurrency: int = 4      # mensajes de un lote procesándose a la vez
+    api_max_body_bytes: int = 1048576       # body máximo de un request (ASGI); más grande → 413
+
+    # Rate limiting por usuario (GCRA): ráfaga de N requests, luego 1 cada window/N segundos.
+    # Se aplica igual a Telegram (chat_id) y a la API (numero_empleado del token).
+    rate_limit_max_requests: int = 20
+    rate_limit_window_seconds: int = 60
+    rate_limit_store_path: str = ""  # SQLite compartido entre procesos, relativo a la raíz; "" = memoria
+
+    # Dashboard (overview de /api/admin/overview y /dashboard)
+    dashboard_overview_cache_seconds: int = 15     # vida del overview por período en memoria; 0 = sin cache
+    dashboard_rollup_interval_seconds: int = 300   # rollup horario de InteractionLogs en background; 0 = deshabilitado
+    dashboard_query_workers: int = 8               # consultas del panel web (Flask) ejecutándose a la vez
+    dashboard_query_timeout_seconds: float = 10    # por consulta; al vencer el endpoint responde con datos parciales
+    dashboard_count_cache_seconds: int = 60        # totales aproximados de los listados paginados; 0 = contar siempre
+    dashboard_compress_min_bytes: int = 1024       # respuestas y estáticos más chicos van sin gzip; 0 = comprimir todo
+    dashboard_static_max_age_seconds: int = 300    # Cache-Control max-age de /admin/<archivo>; al vencer se revalida por ETag
 
     # Retry Configuration
     retry_llm_max_attempts: int = 3
@@ -110,6 +135,26 @@ class Settings(BaseSettings):
     retry_db_min_wait: int = 1        # segundos
     retry_db_max_wait: int = 15       # segundos
 
+    # Knowledge
+    knowledge_vector_index_path: str = ".cache/knowledge_vectors.npz"  # relativo a la raíz; "" = solo memoria
+    knowledge_refresh_interval_seconds: int = 60  # recarga incremental en background; 0 = deshabilitada
+
+    # Alertas PRTG
+    alerts_snapshot_max_staleness_seconds: int = 30  # antigüedad máxima del snapshot de eventos activos; 0 = sin cache
+    alerts_snapshot_refresh_interval_seconds: int = 20  # recarga en background; 0 = solo recarga al vencer
+    alerts_hedge_percentile: float = 0.95  # percentil de latencia de BAZ_CDMX que dispara el fallback EKT en paralelo
+    alerts_hedge_min_delay_ms: int = 50
+    alerts_hedge_max_delay_ms: int = 2000
+    alerts_inventory_cache_ttl_seconds: int = 900  # IP → equipo de inventario
+    alerts_inventory_negative_ttl_seconds: int = 120  # IP sin equipo en ningún inventario
+    alerts_tickets_cache_ttl_seconds: int = 60  # tickets históricos por (ip, sensor)
+    ticket_analysis_cache_ttl_seconds: int = 0  # vida de un análisis LLM de tickets en BD y en memoria; 0 = no vence
+    alerts_escalation_cache_ttl_seconds: int = 21600  # templates, matrices y contactos de escalamiento
+    alerts_escalation_version_query: str = ""  # consulta barata de versión del catálogo; "" = solo TTL
+    alerts_escalation_refresh_interval_seconds: int = 300  # sonda de versión + precalentamiento; 0 = deshabilitada
+    alerts_escalation_warmup_top: int = 20  # templates más pedidos que se precalientan
+    alerts_escalation_warmup_path: str = ".cache/escalation_templates.json"  # relativo a la raíz; "" = solo memoria
+
     @property
     def database_url(self) -> str:
         """Construir URL de conexión a la base de datos principal (delega a DbConnectionConfig)."""
@@ -4,6 +4,10 @@ Dominio de Alertas — Entidades y repositorio para análisis de alertas PRTG.
 Módulos:
 - alert_entity: Modelos Pydantic (AlertEvent, HistoricalTicket, Template, etc.)
 - alert_repository: Acceso a BD con fallback automático BAZ_CDMX → EKT
+- active_events_snapshot: Snapshot compartido de eventos activos con antigüedad acotada
+- active_events_index: Índices por IP, status y trigramas sobre un snapshot
+- hedging: Cobertura BAZ_CDMX/EKT guiada por histogramas de latencia
+- alert_caches: Caches de consultas compartidos por conexión
 - alert_prompt_builder: Construcción del prompt enriquecido para el LLM
 """
 
@@ -15,6 +19,8 @@ from .alert_entity import (
     HistoricalTicket,
     Template,
 )
+from .active_events_index import ActiveEventsIndex
+from .active_events_snapshot import ActiveEventsSnapshot
 from .alert_repository import AlertRepository
 from .alert_prompt_builder import AlertPromptBuilder
 
@@ -26,5 +32,7 @@ __all__ = [
     "AreaContacto",
     "AlertContext",
     "AlertRepository",
+    "ActiveEventsSnapshot",
+    "ActiveEventsIndex",
     "AlertPromptBuilder",
 ]
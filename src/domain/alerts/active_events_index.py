@@ -0,0 +1,162 @@
+"""
+Índices secundarios sobre un snapshot de eventos activos PRTG.
+
+Se construyen una vez por recarga del snapshot (active_events_snapshot) y
+permiten responder los filtros de get_active_events sin recorrer todos
+los eventos:
+- Hash por IP exacta
+- Buckets por status (en minúsculas: "down", "warning", ...)
+- Índice de trigramas sobre los valores distintos de equipo y sensor para
+  búsquedas parciales case-insensitive; los candidatos se verifican con
+  `in`, así que el resultado es idéntico al filtro lineal
+
+Con varios filtros se parte del conjunto de candidatos más chico y el resto
+se verifica evento por evento. Las posiciones siguen el orden del snapshot
+(prioridad descendente), así que los resultados salen ya ordenados.
+
+El índice es inmutable: una recarga construye uno nuevo.
+"""
+from collections import defaultdict
+from itertools import chain
+from typing import Callable, Iterable, Optional, Sequence
+
+from src.domain.alerts.alert_entity import AlertEvent
+
+_EMPTY: frozenset = frozenset()
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class _SubstringIndex:
+    """Búsqueda parcial sobre los valores distintos de un campo de texto."""
+
+    __slots__ = ("_values", "_positions", "_trigrams", "value_of")
+
+    def __init__(self, texts: Iterable[str]) -> None:
+        value_ids: dict[str, int] = {}
+        positions: list[list[int]] = []
+        value_of: list[int] = []
+        for pos, text in enumerate(texts):
+            key = text.lower()
+            vid = value_ids.get(key)
+            if vid is None:
+                vid = value_ids[key] = len(positions)
+                positions.append([])
+            positions[vid].append(pos)
+            value_of.append(vid)
+
+        self._values: list[str] = list(value_ids)
+        self._positions: list[tuple[int, ...]] = [tuple(p) for p in positions]
+        # Posición del evento → id de su valor, para verificar candidatos de otro filtro
+        self.value_of: list[int] = value_of
+        trigrams: dict[str, set[int]] = defaultdict(set)
+        for vid, value in enumerate(self._values):
+            for gram in _trigrams(value):
+                trigrams[gram].add(vid)
+        self._trigrams: dict[str, frozenset] = {g: frozenset(v) for g, v in trigrams.items()}
+
+    def matching_values(self, needle: str) -> tuple[frozenset, int]:
+        """(ids de valores que contienen `needle`, total de eventos con esos valores)."""
+        needle = needle.lower()
+        if len(needle) < 3:
+            # Sin trigramas: se recorren solo los valores distintos, no los eventos
+            vids: Iterable[int] = range(len(self._values))
+        else:
+            postings = sorted(
+                (self._trigrams.get(g, _EMPTY) for g in _trigrams(needle)), key=len
+            )
+            if not postings[0]:
+                return _EMPTY, 0
+            vids = postings[0].intersection(*postings[1:])
+
+        matched = frozenset(vid for vid in vids if needle in self._values[vid])
+        return matched, sum(len(self._positions[vid]) for vid in matched)
+
+    def positions(self, vids: frozenset) -> Sequence[int]:
+        """Posiciones (ordenadas) de los eventos con alguno de los valores dados."""
+        if len(vids) == 1:
+            return self._positions[next(iter(vids))]
+        return sorted(chain.from_iterable(self._positions[vid] for vid in vids))
+
+
+class ActiveEventsIndex:
+    """
+    Eventos activos de una instancia con índices por IP, status, equipo y sensor.
+
+    Example:
+        >>> index = ActiveEventsIndex(events)          # events ordenados por prioridad desc
+        >>> index.filter(equipo="switch", solo_down=True)
+        [AlertEvent(...), ...]
+    """
+
+    __slots__ = ("events", "_by_ip", "_by_status", "_status_of", "_equipo", "_sensor")
+
+    def __init__(self, events: Iterable[AlertEvent]) -> None:
+        self.events: tuple[AlertEvent, ...] = tuple(events)
+        by_ip: dict[str, list[int]] = defaultdict(list)
+        by_status: dict[str, list[int]] = defaultdict(list)
+        self._status_of: list[str] = []
+        for pos, event in enumerate(self.events):
+            status = event.status.lower()
+            by_ip[event.ip].append(pos)
+            by_status[status].append(pos)
+            self._status_of.append(status)
+        self._by_ip = {k: tuple(v) for k, v in by_ip.items()}
+        self._by_status = {k: tuple(v) for k, v in by_status.items()}
+        self._equipo = _SubstringIndex(e.equipo for e in self.events)
+        self._sensor = _SubstringIndex(e.sensor for e in self.events)
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def filter(
+        self,
+        ip: Optional[str] = None,
+        equipo: Optional[str] = None,
+        sensor: Optional[str] = None,
+        solo_down: bool = False,
+    ) -> list[AlertEvent]:
+        """
+        Eventos que cumplen todos los filtros, en el orden del snapshot.
+
+        Args:
+            ip: IP exacta
+            equipo: Subcadena del nombre del equipo (case-insensitive)
+            sensor: Subcadena del nombre del sensor (case-insensitive)
+            solo_down: Solo eventos con status "down"
+        """
+        # (cantidad de candidatos, candidatos, verificación por posición) de cada filtro;
+        # los candidatos de búsquedas parciales se materializan solo si se eligen
+        filters: list[tuple[int, Callable[[], Sequence[int]], Callable[[int], bool]]] = []
+        if ip:
+            by_ip = self._by_ip.get(ip, ())
+            events = self.events
+            filters.append((len(by_ip), lambda: by_ip, lambda pos: events[pos].ip == ip))
+        if solo_down:
+            down = self._by_status.get("down", ())
+            status_of = self._status_of
+            filters.append((len(down), lambda: down, lambda pos: status_of[pos] == "down"))
+        for text, field_index in ((equipo, self._equipo), (sensor, self._sensor)):
+            if text:
+                filters.append(self._substring_filter(field_index, text))
+
+        if not filters:
+            return list(self.events)
+
+        filters.sort(key=lambda f: f[0])
+        size, candidates, _ = filters[0]
+        if not size:
+            return []
+        positions: Iterable[int] = candidates()
+        for _, _, check in filters[1:]:
+            positions = filter(check, positions)
+        events = self.events
+        return [events[pos] for pos in positions]
+
+    @staticmethod
+    def _substring_filter(field_index: _SubstringIndex, text: str):
+        vids, size = field_index.matching_values(text)
+        value_of = field_index.value_of
+        return size, lambda: field_index.positions(vids), lambda pos: value_of[pos] in vids
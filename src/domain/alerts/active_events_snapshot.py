@@ -0,0 +1,250 @@
+"""
+Snapshot compartido de eventos activos PRTG.
+
+Varias tools de una misma conversación (get_active_alerts, get_alert_detail,
+alert_analysis) piden el mismo listado con segundos de diferencia. El
+snapshot se comparte entre todos los AlertRepository de una misma conexión
+de monitoreo:
+- Lecturas desde memoria mientras la antigüedad no supere max_staleness_seconds
+- Snapshot vencido → recarga síncrona single-flight: una sola consulta a PRTG
+  aunque lleguen varias lecturas a la vez, desde cualquier event loop o thread
+- Thread daemon opcional que recarga periódicamente los snapshots que ya se
+  leyeron alguna vez, para que las lecturas casi nunca esperen a PRTG
+- fresh=True fuerza una recarga (AlertRepository.get_active_events(fresh=True))
+
+Los eventos se guardan sin filtrar (con sus índices, ver active_events_index);
+los filtros se aplican al leer.
+Si una recarga falla, el error se propaga a quienes la esperaban y el
+snapshot anterior se conserva (pero no se sirve más allá de max_staleness).
+"""
+import asyncio
+import concurrent.futures
+import logging
+import threading
+import time
+import weakref
+from typing import Any, Awaitable, Callable, Optional
+
+from src.infra.observability import get_metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_STALENESS_SECONDS = 30.0
+
+Loader = Callable[[], Awaitable[Any]]
+
+
+class _Slot:
+    __slots__ = ("loader", "value", "loaded_at", "inflight")
+
+    def __init__(self, loader: Loader) -> None:
+        self.loader = loader
+        self.value: Any = None
+        self.loaded_at = 0.0
+        self.inflight: Optional[concurrent.futures.Future] = None
+
+
+class ActiveEventsSnapshot:
+    """
+    Valores de carga costosa (listados de eventos activos) con antigüedad acotada.
+
+    Cada tipo de listado ("fallback", "all") ocupa un slot con su propia
+    función de carga. El valor se reemplaza completo en cada recarga, así que
+    los lectores nunca ven un listado a medio construir.
+
+    Example:
+        >>> snapshot = snapshot_for(db_manager)
+        >>> events = await snapshot.get("fallback", repo._load_active_events)
+    """
+
+    def __init__(
+        self,
+        max_staleness_seconds: float = DEFAULT_MAX_STALENESS_SECONDS,
+        name: str = "alerts_snapshot",
+    ) -> None:
+        """
+        Args:
+            max_staleness_seconds: Antigüedad máxima servida desde memoria (0 = siempre recargar)
+            name: Nombre para logs y métricas
+        """
+        self.max_staleness_seconds = max_staleness_seconds
+        self.name = name
+        self._slots: dict[str, _Slot] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._refreshes = 0
+        self._failures = 0
+        self._refresh_stop = threading.Event()
+        self._refresh_thread: Optional[threading.Thread] = None
+
+    async def get(self, kind: str, loader: Loader, fresh: bool = False) -> Any:
+        """
+        Retorna el valor del slot `kind`, recargándolo si venció o si fresh=True.
+
+        Args:
+            kind: Nombre del listado
+            loader: Corrutina sin argumentos que consulta la BD
+            fresh: Ignora el valor en memoria y espera una recarga
+
+        Raises:
+            La excepción de `loader` si la recarga falla
+        """
+        with self._lock:
+            slot = self._slots.get(kind)
+            if slot is None:
+                slot = self._slots[kind] = _Slot(loader)
+            else:
+                slot.loader = loader
+            if (
+                not fresh
+                and slot.value is not None
+                and time.monotonic() - slot.loaded_at <= self.max_staleness_seconds
+            ):
+                self._hits += 1
+                return slot.value
+            self._misses += 1
+        return await self._refresh(slot)
+
+    def invalidate(self, kind: Optional[str] = None) -> None:
+        """Descarta el valor de un slot (o de todos); la siguiente lectura recarga."""
+        with self._lock:
+            for name, slot in self._slots.items():
+                if kind is None or name == kind:
+                    slot.value = None
+
+    def age_seconds(self, kind: str) -> Optional[float]:
+        """Antigüedad del valor en memoria, o None si no hay."""
+        with self._lock:
+            slot = self._slots.get(kind)
+            if slot is None or slot.value is None:
+                return None
+            return time.monotonic() - slot.loaded_at
+
+    async def _refresh(self, slot: _Slot) -> Any:
+        with self._lock:
+            future = slot.inflight
+            owner = future is None
+            if owner:
+                future = slot.inflight = concurrent.futures.Future()
+                # RUNNING: un lector cancelado no puede cancelar la recarga compartida
+                future.set_running_or_notify_cancel()
+
+        if not owner:
+            try:
+                return await asyncio.wrap_future(future)
+            except asyncio.CancelledError:
+                # Se canceló la tarea que recargaba (no este lector): se toma la recarga
+                if future.done() and isinstance(future.exception(), asyncio.CancelledError):
+                    return await self._refresh(slot)
+                raise
+
+        try:
+            value = await slot.loader()
+        except BaseException as e:
+            with self._lock:
+                slot.inflight = None
+                self._failures += 1
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            slot.value = value
+            slot.loaded_at = time.monotonic()
+            slot.inflight = None
+            self._refreshes += 1
+        future.set_result(value)
+        return value
+
+    # ------------------------------------------------------------------
+    # Recarga en background
+    # ------------------------------------------------------------------
+
+    def start_background_refresh(self, interval_seconds: float) -> None:
+        """
+        Inicia un thread daemon que recarga cada `interval_seconds` los slots ya leídos.
+
+        Conviene un intervalo menor que max_staleness_seconds: así las
+        lecturas encuentran siempre un valor vigente.
+        """
+        if self._refresh_thread is not None and self._refresh_thread.is_alive():
+            return
+        self._refresh_stop.clear()
+        self._refresh_thread = threading.Thread(
+            target=self._refresh_loop,
+            args=(interval_seconds,),
+            name=f"{self.name}-refresh",
+            daemon=True,
+        )
+        self._refresh_thread.start()
+        logger.info(f"Recarga periódica de {self.name} cada {interval_seconds}s")
+
+    def stop_background_refresh(self, timeout: float = 5.0) -> None:
+        """Detiene el thread de recarga periódica."""
+        self._refresh_stop.set()
+        if self._refresh_thread is not None:
+            self._refresh_thread.join(timeout)
+            self._refresh_thread = None
+
+    def _refresh_loop(self, interval_seconds: float) -> None:
+        while not self._refresh_stop.wait(interval_seconds):
+            asyncio.run(self.refresh_all())
+
+    async def refresh_all(self) -> None:
+        """Recarga en paralelo los slots que tienen valor; los errores solo se registran."""
+        with self._lock:
+            slots = [(k, s) for k, s in self._slots.items() if s.value is not None]
+
+        async def _one(kind: str, slot: _Slot) -> None:
+            try:
+                await self._refresh(slot)
+            except Exception as e:
+                logger.warning(f"{self.name}: recarga en background de '{kind}' falló: {e}")
+
+        await asyncio.gather(*(_one(k, s) for k, s in slots))
+
+    def stats(self) -> dict[str, Any]:
+        """Estadísticas para métricas."""
+        now = time.monotonic()
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "name": self.name,
+                "entries": sum(1 for s in self._slots.values() if s.value is not None),
+                "max_staleness_seconds": self.max_staleness_seconds,
+                "background_refresh": self._refresh_thread is not None,
+                "hits": self._hits,
+                "misses": self._misses,
+                "refreshes": self._refreshes,
+                "failures": self._failures,
+                "hit_rate": round(self._hits / total, 3) if total else 0.0,
+                "age_seconds": {
+                    k: round(now - s.loaded_at, 1)
+                    for k, s in self._slots.items() if s.value is not None
+                },
+            }
+
+
+_snapshots: "weakref.WeakKeyDictionary[Any, ActiveEventsSnapshot]" = weakref.WeakKeyDictionary()
+_snapshots_lock = threading.Lock()
+
+
+def snapshot_for(
+    db_manager: Any,
+    max_staleness_seconds: Optional[float] = None,
+) -> ActiveEventsSnapshot:
+    """
+    Snapshot compartido por todos los repositorios de una misma conexión.
+
+    Args:
+        db_manager: DatabaseManager de monitoreo (clave del snapshot)
+        max_staleness_seconds: Si se indica, actualiza la antigüedad máxima del snapshot
+    """
+    with _snapshots_lock:
+        snapshot = _snapshots.get(db_manager)
+        if snapshot is None:
+            snapshot = _snapshots[db_manager] = ActiveEventsSnapshot()
+            get_metrics().register_cache(snapshot.name, snapshot.stats)
+    if max_staleness_seconds is not None:
+        snapshot.max_staleness_seconds = max_staleness_seconds
+    return snapshot
@@ -0,0 +1,276 @@
+"""
+Caches de consultas de AlertRepository compartidos por conexión de monitoreo.
+
+Los repositorios se crean por tool y por request; los caches viven aquí,
+uno por DatabaseManager, para que todas esas instancias los compartan.
+Cada cache es un TTLCache (LRU acotado con TTL) registrado en métricas.
+
+- inventory: IP → InventoryItem, con cache negativo (NOT_FOUND) de TTL
+  más corto para IPs que ningún inventario conoce
+- tickets: (ip, sensor) → tickets históricos, TTL corto: evita repetir la
+  búsqueda multi-sensor dentro de un request o una conversación
+- escalation: templates, matrices de escalamiento y contactos de gerencia
+  (ver EscalationCaches), con TTL largo e invalidación por versión
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import weakref
+from collections import Counter
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional, Union
+
+from src.infra.observability import get_metrics
+from src.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Marca de "consultado y no encontrado" (distinto de "no está en cache")
+NOT_FOUND = object()
+
+
+class EscalationCaches:
+    """
+    Caches del flujo de escalamiento: cambian poco y se consultan en cada matriz.
+
+    - template_ids: ("ip", ip) | ("url", url) → {"idTemplate", "instancia"}
+    - templates / matrices: (template_id, instancia) → Template / niveles
+    - contacts: (id_gerencia, instancia) → AreaContacto
+
+    El TTL es largo; para invalidar antes, `version_query` (opcional) es una
+    consulta barata (p. ej. la fecha máxima de modificación del catálogo) que
+    la recarga periódica compara contra el valor anterior: si cambió, se
+    vacían los caches y se recargan los templates más pedidos. El conteo de
+    templates pedidos se persiste en `warmup_path` para precalentar al arrancar.
+
+    Example:
+        >>> escalation = caches_for(db_manager).escalation
+        >>> escalation.start_background_refresh(300, repo.refresh_escalation_cache)
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 6 * 3600,
+        negative_ttl_seconds: float = 120,
+        max_entries: int = 2000,
+        version_query: str = "",
+        warmup_top: int = 20,
+        warmup_path: Optional[Union[str, Path]] = None,
+    ) -> None:
+        """
+        Args:
+            ttl_seconds: TTL de templates, matrices y contactos
+            negative_ttl_seconds: TTL de una IP sin template o una gerencia sin contacto
+            max_entries: Máximo de entradas por cache (LRU)
+            version_query: Consulta de versión del catálogo ("" = solo TTL)
+            warmup_top: Templates más pedidos que se precalientan
+            warmup_path: Archivo JSON con el conteo de templates pedidos (None = solo memoria)
+        """
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.version_query = version_query
+        self.warmup_top = warmup_top
+        self.warmup_path = Path(warmup_path) if warmup_path else None
+        self.template_ids: TTLCache[tuple[str, str], Any] = TTLCache(
+            max_entries=max_entries, ttl_seconds=ttl_seconds, name="alerts_template_ids",
+        )
+        self.templates: TTLCache[tuple[str, str], Any] = TTLCache(
+            max_entries=max_entries, ttl_seconds=ttl_seconds, name="alerts_templates",
+        )
+        self.matrices: TTLCache[tuple[str, str], tuple] = TTLCache(
+            max_entries=max_entries, ttl_seconds=ttl_seconds, name="alerts_matrices",
+        )
+        self.contacts: TTLCache[tuple[str, str], Any] = TTLCache(
+            max_entries=max_entries, ttl_seconds=ttl_seconds, name="alerts_contacts",
+        )
+        self._version: Any = None
+        self._requested: Counter = Counter(self._load_requested())
+        self._lock = threading.Lock()
+        self._invalidations = 0
+        self._refresh_stop = threading.Event()
+        self._refresh_thread: Optional[threading.Thread] = None
+
+    @property
+    def caches(self) -> dict[str, TTLCache]:
+        return {
+            "alerts_template_ids": self.template_ids,
+            "alerts_templates": self.templates,
+            "alerts_matrices": self.matrices,
+            "alerts_contacts": self.contacts,
+        }
+
+    def clear(self) -> None:
+        for cache in self.caches.values():
+            cache.clear()
+
+    def update_version(self, version: Any) -> bool:
+        """
+        Registra la versión observada del catálogo; True si cambió (y se vaciaron los caches).
+
+        La primera versión observada solo se guarda como referencia.
+        """
+        with self._lock:
+            previous, self._version = self._version, version
+            changed = previous is not None and version != previous
+            if changed:
+                self._invalidations += 1
+        if changed:
+            self.clear()
+            logger.info(f"Catálogo de escalamiento cambió ({previous} → {version}): caches vaciados")
+        return changed
+
+    def record_request(self, template_key: tuple[str, str]) -> None:
+        """Cuenta una consulta de matriz para elegir qué templates precalentar."""
+        with self._lock:
+            self._requested[template_key] += 1
+
+    def most_requested(self, n: Optional[int] = None) -> list[tuple[str, str]]:
+        with self._lock:
+            return [key for key, _ in self._requested.most_common(n or self.warmup_top)]
+
+    # ------------------------------------------------------------------
+    # Persistencia del conteo de templates pedidos
+    # ------------------------------------------------------------------
+
+    def save_requested(self) -> None:
+        """Persiste el conteo (solo los más pedidos) de forma atómica (tmp + rename)."""
+        if self.warmup_path is None:
+            return
+        with self._lock:
+            top = self._requested.most_common(self.warmup_top * 5)
+        try:
+            self.warmup_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.warmup_path.with_name(self.warmup_path.name + ".tmp")
+            tmp.write_text(json.dumps([[tid, inst, count] for (tid, inst), count in top]))
+            os.replace(tmp, self.warmup_path)
+        except OSError as e:
+            logger.warning(f"No se pudo persistir el conteo de templates en {self.warmup_path}: {e}")
+
+    def _load_requested(self) -> dict[tuple[str, str], int]:
+        if self.warmup_path is None or not self.warmup_path.exists():
+            return {}
+        try:
+            return {(str(tid), str(inst)): int(count) for tid, inst, count in json.loads(self.warmup_path.read_text())}
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Conteo de templates en disco ilegible ({self.warmup_path}): {e}")
+            return {}
+
+    # ------------------------------------------------------------------
+    # Recarga en background
+    # ------------------------------------------------------------------
+
+    def start_background_refresh(
+        self, interval_seconds: float, refresh: Callable[[], Awaitable[None]]
+    ) -> None:
+        """
+        Inicia un thread daemon que ejecuta `refresh` al arrancar y cada `interval_seconds`.
+
+        `refresh` es la recarga del repositorio (AlertRepository.refresh_escalation_cache):
+        prueba la versión del catálogo y precalienta los templates más pedidos.
+        """
+        if self._refresh_thread is not None and self._refresh_thread.is_alive():
+            return
+        self._refresh_stop.clear()
+        self._refresh_thread = threading.Thread(
+            target=self._refresh_loop,
+            args=(interval_seconds, refresh),
+            name="alerts-escalation-refresh",
+            daemon=True,
+        )
+        self._refresh_thread.start()
+        logger.info(f"Recarga periódica de caches de escalamiento cada {interval_seconds}s")
+
+    def stop_background_refresh(self, timeout: float = 5.0) -> None:
+        """Detiene el thread de recarga periódica."""
+        self._refresh_stop.set()
+        if self._refresh_thread is not None:
+            self._refresh_thread.join(timeout)
+            self._refresh_thread = None
+
+    def _refresh_loop(self, interval_seconds: float, refresh: Callable[[], Awaitable[None]]) -> None:
+        while True:
+            try:
+                asyncio.run(refresh())
+            except Exception as e:
+                logger.warning(f"Recarga de caches de escalamiento falló: {e}")
+            self.save_requested()
+            if self._refresh_stop.wait(interval_seconds):
+                return
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "version": str(self._version) if self._version is not None else None,
+                "invalidations": self._invalidations,
+                "tracked_templates": len(self._requested),
+            }
+
+
+class AlertCaches:
+    """
+    Caches de un AlertRepository compartidos por conexión.
+
+    Example:
+        >>> caches = caches_for(db_manager)
+        >>> caches.inventory.get("10.1.2.3")   # InventoryItem, NOT_FOUND o None
+    """
+
+    def __init__(
+        self,
+        inventory_ttl_seconds: float = 900,
+        inventory_negative_ttl_seconds: float = 120,
+        inventory_max_entries: int = 5000,
+        tickets_ttl_seconds: float = 60,
+        tickets_max_entries: int = 1000,
+        escalation: Optional[EscalationCaches] = None,
+    ) -> None:
+        """
+        Args:
+            inventory_ttl_seconds: TTL de un equipo encontrado en inventario
+            inventory_negative_ttl_seconds: TTL de una IP que no está en ningún inventario
+            inventory_max_entries: Máximo de IPs en cache (LRU)
+            tickets_ttl_seconds: TTL de los tickets históricos de un (ip, sensor)
+            tickets_max_entries: Máximo de (ip, sensor) en cache (LRU)
+            escalation: Caches de escalamiento (default: sin sonda de versión)
+        """
+        self.inventory_negative_ttl_seconds = inventory_negative_ttl_seconds
+        self.inventory: TTLCache[str, Any] = TTLCache(
+            max_entries=inventory_max_entries,
+            ttl_seconds=inventory_ttl_seconds,
+            name="alerts_inventory",
+        )
+        self.tickets: TTLCache[tuple[str, str], tuple] = TTLCache(
+            max_entries=tickets_max_entries,
+            ttl_seconds=tickets_ttl_seconds,
+            name="alerts_tickets",
+        )
+        self.escalation = escalation if escalation is not None else EscalationCaches()
+
+    def register_metrics(self) -> None:
+        metrics = get_metrics()
+        metrics.register_cache("alerts_inventory", self.inventory.stats)
+        metrics.register_cache("alerts_tickets", self.tickets.stats)
+        for name, cache in self.escalation.caches.items():
+            metrics.register_cache(name, cache.stats)
+        metrics.register_cache("alerts_escalation", self.escalation.stats)
+
+
+_caches: "weakref.WeakKeyDictionary[Any, AlertCaches]" = weakref.WeakKeyDictionary()
+_caches_lock = threading.Lock()
+
+
+def caches_for(db_manager: Any, caches: Optional[AlertCaches] = None) -> AlertCaches:
+    """
+    Caches compartidos por todos los repositorios de una misma conexión.
+
+    Args:
+        db_manager: DatabaseManager de monitoreo (clave de los caches)
+        caches: Si se indica, reemplaza los caches de la conexión (configuración al arranque)
+    """
+    with _caches_lock:
+        current = _caches.get(db_manager)
+        if caches is not None or current is None:
+            current = _caches[db_manager] = caches or AlertCaches()
+            current.register_metrics()
+        return current
@@ -4,11 +4,18 @@ Alert Repository — Acceso a datos de alertas PRTG con fallback BAZ_CDMX → EK
 Estrategia:
   1. Intenta SP estándar contra la instancia BAZ_CDMX (alias "monitoreo")
   2. Si retorna vacío → reintenta con SP versión _EKT (OPENDATASOURCE)
+     Si BAZ tarda más que su p95 histórico, el SP _EKT se lanza en paralelo
+     como cobertura (ver hedging.HedgePolicy)
   3. Marca cada AlertEvent con _origen: "BAZ_CDMX" | "EKT"
 
 Los SPs _EKT usan OPENDATASOURCE internamente y requieren AUTOCOMMIT,
 que ya está configurado globalmente en DatabaseManager.
 
+Los eventos activos se sirven desde un snapshot compartido por conexión
+(ver active_events_snapshot) con antigüedad acotada; el inventario por IP
+los tickets históricos y el flujo de escalamiento (templates, matrices y
+contactos) se cachean en los caches de la conexión (ver alert_caches).
+
 Nunca lanza excepciones al llamador — retorna [] o None en caso de error.
 """
 
@@ -16,6 +23,10 @@ import asyncio
 import logging
 from typing import Optional
 
+from src.domain.alerts.active_events_index import ActiveEventsIndex
+from src.domain.alerts.active_events_snapshot import ActiveEventsSnapshot, snapshot_for
+from src.domain.alerts.alert_caches import NOT_FOUND, AlertCaches, caches_for
+from src.domain.alerts.hedging import HedgePolicy, hedge_policy_for, histogram_key
 from src.domain.alerts.alert_entity import (
     AlertContext,
     AlertEvent,
@@ -29,6 +40,84 @@ from src.domain.alerts.alert_entity import (
 
 logger = logging.getLogger(__name__)
 
+_ACTIVE_SPS_BAZ = [
+    "EXEC Monitoreos.dbo.PrtgObtenerEventosEnriquecidos",
+    "EXEC Monitoreos.dbo.PrtgObtenerEventosEnriquecidosPerformance",
+]
+_ACTIVE_SPS_EKT = [
+    "EXEC Monitoreos.dbo.PrtgObtenerEventosEnriquecidos_EKT",
+    "EXEC Monitoreos.dbo.PrtgObtenerEventosEnriquecidosPerformance_EKT",
+]
+
+
+_SP_TICKETS_BAZ = "EXEC Monitoreos.dbo.IABOT_ObtenerTicketsByAlerta @ip = :ip, @sensor = :sensor"
+_SP_TICKETS_EKT = "EXEC Monitoreos.dbo.IABOT_ObtenerTicketsByAlerta_EKT @ip = :ip, @sensor = :sensor"
+_TICKETS_LIMIT = 15                 # el SP retorna TOP 15 por sensor; se respeta al combinar
+_TICKETS_HISTORIC_SENSORS = 5
+_TICKETS_MAX_CONCURRENCY = 3        # sensores históricos consultados a la vez
+_WARMUP_MAX_CONCURRENCY = 3         # templates de escalamiento precalentados a la vez
+
+_INVENTORY_SPS = [
+    ("EXEC ABCMASplus.dbo.EquiposFisicos_GetByIp @ip = :ip",        "Fisico"),
+    ("EXEC ABCMASplus.dbo.MaquinasVirtuales_GetByIp @ip = :ip",     "Virtual"),
+    ("EXEC ABCMASplus.dbo.EquiposFisicos_GetByIp_Ekt @ip = :ip",    "Fisico"),
+    ("EXEC ABCMASplus.dbo.MaquinasVirtuales_GetByIp_Ekt @ip = :ip", "Virtual"),
+]
+
+
+def _discard(tasks: list[asyncio.Future]) -> None:
+    """Cancela las tareas pendientes y consume el resultado de las terminadas que no se esperaron."""
+    for task in tasks:
+        if not task.done():
+            task.cancel()
+        elif not task.cancelled():
+            task.exception()
+
+
+def _merge_tickets(groups) -> list[HistoricalTicket]:
+    """Concatena listas de tickets en orden, sin repetir id de ticket, hasta _TICKETS_LIMIT."""
+    merged: list[HistoricalTicket] = []
+    seen: set = set()
+    for tickets in groups:
+        for ticket in tickets:
+            key = ticket.ticket or (ticket.alerta, ticket.detalle, ticket.accion_correctiva)
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append(ticket)
+            if len(merged) >= _TICKETS_LIMIT:
+                return merged
+    return merged
+
+
+def _template_key(key_id, usar_ekt: bool) -> tuple[str, str]:
+    """Clave de cache por id (template o gerencia) e instancia consultada primero."""
+    return str(key_id), "EKT" if usar_ekt else "BAZ_CDMX"
+
+
+def _instance_of(sql: str) -> str:
+    """Instancia a la que apunta un SP o consulta: las variantes EKT usan sufijo _EKT u OPENDATASOURCE."""
+    lowered = sql.lower()
+    return "EKT" if "_ekt " in lowered + " " or "opendatasource" in lowered else "BAZ_CDMX"
+
+
+def _parse_events(rows: list[dict], origen: str) -> tuple[AlertEvent, ...]:
+    """Filas de PRTG → AlertEvent deduplicados por (IP, Sensor), ordenados por prioridad desc."""
+    events = []
+    seen = set()
+    for row in rows:
+        key = (row.get("IP", ""), row.get("Sensor", ""))
+        if key in seen:
+            continue
+        seen.add(key)
+        try:
+            row["_origen"] = origen
+            events.append(AlertEvent.model_validate(row))
+        except Exception as e:
+            logger.debug(f"AlertRepository: fila inválida ignorada: {e}")
+    events.sort(key=lambda e: e.prioridad, reverse=True)
+    return tuple(events)
+
 
 class AlertRepository:
     """
@@ -42,14 +131,34 @@ class AlertRepository:
         >>> events = await repo.get_active_events(solo_down=True)
     """
 
-    def __init__(self, db_manager) -> None:
+    def __init__(
+        self,
+        db_manager,
+        snapshot: Optional[ActiveEventsSnapshot] = None,
+        hedge: Optional[HedgePolicy] = None,
+        caches: Optional[AlertCaches] = None,
+    ) -> None:
+        """
+        Args:
+            db_manager: DatabaseManager del alias "monitoreo"
+            snapshot: Snapshot de eventos activos (default: el compartido por
+                todos los repositorios de la misma conexión)
+            hedge: Política de cobertura BAZ_CDMX/EKT (default: la compartida
+                por la conexión, con sus histogramas de latencia)
+            caches: Caches de consultas (default: los compartidos por la conexión)
+        """
         self._db = db_manager
+        self._snapshot = snapshot if snapshot is not None else snapshot_for(db_manager)
+        self._hedge = hedge if hedge is not None else hedge_policy_for(db_manager)
+        self._caches = caches if caches is not None else caches_for(db_manager)
 
     async def get_active_events(
         self,
         ip: Optional[str] = None,
         equipo: Optional[str] = None,
         solo_down: bool = False,
+        sensor: Optional[str] = None,
+        fresh: bool = False,
     ) -> list[AlertEvent]:
         """
         Obtiene eventos activos de monitoreo PRTG.
@@ -58,48 +167,24 @@ class AlertRepository:
         PrtgObtenerEventosEnriquecidosPerformance. Intenta BAZ_CDMX primero;
         si no hay resultados, reintenta con versiones _EKT.
 
+        El listado sale del snapshot compartido mientras no supere su
+        antigüedad máxima; los filtros se resuelven con los índices del
+        snapshot (ActiveEventsIndex) sin recorrer todos los eventos.
+
         Args:
             ip: Filtrar por IP exacta (opcional)
             equipo: Filtrar por nombre de equipo (case-insensitive, parcial)
             solo_down: Si True, solo retorna eventos con Status "down"
+            sensor: Filtrar por nombre de sensor (case-insensitive, parcial)
+            fresh: Si True, consulta PRTG aunque el snapshot esté vigente
 
         Returns:
             Lista de AlertEvent ordenada por Prioridad desc
         """
-        sps_baz = [
-            "EXEC Monitoreos.dbo.PrtgObtenerEventosEnriquecidos",
-            "EXEC Monitoreos.dbo.PrtgObtenerEventosEnriquecidosPerformance",
-        ]
-        sps_ekt = [
-            "EXEC Monitoreos.dbo.PrtgObtenerEventosEnriquecidos_EKT",
-            "EXEC Monitoreos.dbo.PrtgObtenerEventosEnriquecidosPerformance_EKT",
-        ]
-
-        rows, origen = await self._run_sps_with_fallback(sps_baz, sps_ekt)
-
-        events = []
-        seen = set()  # deduplicar por (IP, Sensor)
-        for row in rows:
-            key = (row.get("IP", ""), row.get("Sensor", ""))
-            if key in seen:
-                continue
-            seen.add(key)
-            try:
-                row["_origen"] = origen
-                events.append(AlertEvent.model_validate(row))
-            except Exception as e:
-                logger.debug(f"AlertRepository: fila inválida ignorada: {e}")
-
-        # Filtrar
-        if ip:
-            events = [e for e in events if e.ip == ip]
-        if equipo:
-            equipo_lower = equipo.lower()
-            events = [e for e in events if equipo_lower in e.equipo.lower()]
-        if solo_down:
-            events = [e for e in events if e.status.lower() == "down"]
-
-        events.sort(key=lambda e: e.prioridad, reverse=True)
+        index, origen = await self._snapshot.get(
+            "fallback", self._load_active_events, fresh=fresh
+        )
+        events = index.filter(ip=ip, equipo=equipo, sensor=sensor, solo_down=solo_down)
         logger.debug(f"AlertRepository: {len(events)} eventos activos (origen={origen})")
         return events
 
@@ -108,70 +193,66 @@ class AlertRepository:
         ip: Optional[str] = None,
         equipo: Optional[str] = None,
         solo_down: bool = False,
+        sensor: Optional[str] = None,
+        fresh: bool = False,
     ) -> tuple[list[AlertEvent], list[AlertEvent]]:
         """
         Obtiene eventos activos de AMBAS instancias (BAZ_CDMX y EKT) en paralelo.
 
         A diferencia de get_active_events (que usa fallback), este método
         consulta ambas instancias siempre para poder mostrar totales por división.
+        Usa el snapshot compartido igual que get_active_events.
 
         Returns:
             (eventos_banco, eventos_ekt) — cada lista ordenada por prioridad desc
         """
-        import asyncio
-
-        sps_baz = [
-            "EXEC Monitoreos.dbo.PrtgObtenerEventosEnriquecidos",
-            "EXEC Monitoreos.dbo.PrtgObtenerEventosEnriquecidosPerformance",
-        ]
-        sps_ekt = [
-            "EXEC Monitoreos.dbo.PrtgObtenerEventosEnriquecidos_EKT",
-            "EXEC Monitoreos.dbo.PrtgObtenerEventosEnriquecidosPerformance_EKT",
-        ]
-
-        async def _query_instance(sps: list[str], origen: str) -> list[AlertEvent]:
-            rows: list[dict] = []
-            for sp in sps:
-                try:
-                    result = await self._db.execute_query_async(sp, None)
-                    rows.extend(result or [])
-                except Exception as e:
-                    logger.warning(f"AlertRepository.get_active_events_all SP '{sp}': {e}")
-
-            events: list[AlertEvent] = []
-            seen: set = set()
-            for row in rows:
-                key = (row.get("IP", ""), row.get("Sensor", ""))
-                if key in seen:
-                    continue
-                seen.add(key)
-                try:
-                    row["_origen"] = origen
-                    events.append(AlertEvent.model_validate(row))
-                except Exception as e:
-                    logger.debug(f"AlertRepository: fila inválida ignorada: {e}")
-
-            if ip:
-                events = [e for e in events if e.ip == ip]
-            if equipo:
-                equipo_lower = equipo.lower()
-                events = [e for e in events if equipo_lower in e.equipo.lower()]
-            if solo_down:
-                events = [e for e in events if e.status.lower() == "down"]
-
-            events.sort(key=lambda e: e.prioridad, reverse=True)
-            return events
-
-        eventos_banco, eventos_ekt = await asyncio.gather(
-            _query_instance(sps_baz, "BAZ_CDMX"),
-            _query_instance(sps_ekt, "EKT"),
+        banco, ekt = await self._snapshot.get(
+            "all", self._load_active_events_all, fresh=fresh
         )
+        eventos_banco = banco.filter(ip=ip, equipo=equipo, sensor=sensor, solo_down=solo_down)
+        eventos_ekt = ekt.filter(ip=ip, equipo=equipo, sensor=sensor, solo_down=solo_down)
         logger.debug(
             f"AlertRepository.get_active_events_all: "
             f"Banco={len(eventos_banco)}, EKT={len(eventos_ekt)}"
         )
         return eventos_banco, eventos_ekt
 
+    async def _load_active_events(self) -> tuple[ActiveEventsIndex, str]:
+        """Consulta PRTG con fallback BAZ_CDMX → EKT y arma el índice del snapshot."""
+        rows, origen = await self._run_sps_with_fallback(
+            _ACTIVE_SPS_BAZ, _ACTIVE_SPS_EKT, operation="eventos_activos"
+        )
+        index = ActiveEventsIndex(_parse_events(rows, origen))
+        logger.debug(f"AlertRepository: snapshot de {len(index)} eventos activos (origen={origen})")
+        return index, origen
+
+    async def _load_active_events_all(self) -> tuple[ActiveEventsIndex, ActiveEventsIndex]:
+        """Consulta PRTG en ambas instancias en paralelo y arma un índice por instancia."""
+
+        async def _query_instance(sps: list[str], origen: str) -> ActiveEventsIndex:
+            results = await self._hedge.timed(
+                histogram_key(origen, "eventos_activos"),
+                lambda: asyncio.gather(
+                    *(self._db.execute_query_async(sp, None) for sp in sps),
+                    return_exceptions=True,
+                ),
+            )
+            rows: list[dict] = []
+            for sp, result in zip(sps, results):
+                if isinstance(result, Exception):
+                    logger.warning(f"AlertRepository.get_active_events_all SP '{sp}': {result}")
+                elif isinstance(result, BaseException):
+                    raise result
+                else:
+                    rows.extend(result or [])
+            return ActiveEventsIndex(_parse_events(rows, origen))
+
+        banco, ekt = await asyncio.gather(
+            _query_instance(_ACTIVE_SPS_BAZ, "BAZ_CDMX"),
+            _query_instance(_ACTIVE_SPS_EKT, "EKT"),
+        )
+        return banco, ekt
+
     async def get_historical_tickets(
         self, ip: str, sensor: str
     ) -> list[HistoricalTicket]:
@@ -183,36 +264,67 @@ class AlertRepository:
         2. Sensores reales de EventosPRTG_Historico (el nombre en la tabla de eventos
            históricos coincide con el que el SP usa para filtrar tickets)
         Fallback automático a versión EKT si BAZ no retorna resultados.
+
+        La búsqueda de sensores históricos arranca junto con la del sensor
+        exacto; si este no tiene tickets, los sensores históricos se consultan
+        en paralelo (máximo _TICKETS_MAX_CONCURRENCY a la vez) y sus tickets se
+        combinan en orden de recencia del sensor, sin repetir ticket.
+        Los resultados no vacíos se cachean por (ip, sensor) con TTL corto.
         """
-        sp_baz = "EXEC Monitoreos.dbo.IABOT_ObtenerTicketsByAlerta @ip = :ip, @sensor = :sensor"
-        sp_ekt = "EXEC Monitoreos.dbo.IABOT_ObtenerTicketsByAlerta_EKT @ip = :ip, @sensor = :sensor"
-
-        # Intento 1: sensor exacto
-        rows, _ = await self._run_sp_with_fallback(sp_baz, sp_ekt, {"ip": ip, "sensor": sensor})
-        if rows:
-            logger.debug(f"AlertRepository: {len(rows)} tickets para {ip} con sensor='{sensor}'")
-            return self._parse_tickets(rows)
-
-        # Intento 2: sensores reales desde EventosPRTG_Historico
-        # El sensor del evento activo puede no coincidir exactamente con el almacenado en tickets.
-        sensores_historicos = await self.get_recent_sensors_by_ip(ip=ip, limit=5)
-        for entry in sensores_historicos:
-            s = entry.get("sensor", "")
-            if not s or s == sensor:
-                continue
-            rows, _ = await self._run_sp_with_fallback(sp_baz, sp_ekt, {"ip": ip, "sensor": s})
+        cache_key = (ip, sensor)
+        cached = self._caches.tickets.get(cache_key)
+        if cached is not None:
+            return list(cached)
+
+        exact = asyncio.ensure_future(self._fetch_tickets(ip, sensor))
+        recent = asyncio.ensure_future(
+            self.get_recent_sensors_by_ip(ip=ip, limit=_TICKETS_HISTORIC_SENSORS)
+        )
+        try:
+            # Intento 1: sensor exacto
+            rows = await exact
             if rows:
-                logger.info(
-                    f"AlertRepository: {len(rows)} tickets para {ip} con sensor histórico "
-                    f"'{s}' (sensor original: '{sensor}')"
-                )
-                return self._parse_tickets(rows)
+                logger.debug(f"AlertRepository: {len(rows)} tickets para {ip} con sensor='{sensor}'")
+                tickets = self._parse_tickets(rows)
+            else:
+                # Intento 2: sensores reales desde EventosPRTG_Historico
+                # El sensor del evento activo puede no coincidir exactamente con el almacenado en tickets.
+                sensores_historicos = await recent
+                sensores = [
+                    s for s in dict.fromkeys(e.get("sensor", "") for e in sensores_historicos)
+                    if s and s != sensor
+                ]
+                semaphore = asyncio.Semaphore(_TICKETS_MAX_CONCURRENCY)
+
+                async def _bounded(s: str) -> list[dict]:
+                    async with semaphore:
+                        return await self._fetch_tickets(ip, s)
+
+                por_sensor = await asyncio.gather(*(_bounded(s) for s in sensores))
+                tickets = _merge_tickets(self._parse_tickets(r) for r in por_sensor)
+                if tickets:
+                    con_tickets = [s for s, r in zip(sensores, por_sensor) if r]
+                    logger.info(
+                        f"AlertRepository: {len(tickets)} tickets para {ip} con sensores históricos "
+                        f"{con_tickets} (sensor original: '{sensor}')"
+                    )
+                else:
+                    logger.debug(
+                        f"AlertRepository: sin tickets para {ip} "
+                        f"(sensor='{sensor}', sensores históricos probados: {len(sensores)})"
+                    )
+        finally:
+            _discard([exact, recent])
+
+        if tickets:
+            self._caches.tickets.set(cache_key, tuple(tickets))
+        return tickets
 
-        logger.debug(
-            f"AlertRepository: sin tickets para {ip} "
-            f"(sensor='{sensor}', sensores históricos probados: {len(sensores_historicos)})"
+    async def _fetch_tickets(self, ip: str, sensor: str) -> list[dict]:
+        rows, _ = await self._run_sp_with_fallback(
+            _SP_TICKETS_BAZ, _SP_TICKETS_EKT, {"ip": ip, "sensor": sensor}, operation="tickets"
         )
-        return []
+        return rows
 
     def _parse_tickets(self, rows: list[dict]) -> list[HistoricalTicket]:
         """Convierte filas de BD a lista de HistoricalTicket ignorando filas inválidas."""
@@ -248,7 +360,9 @@ class AlertRepository:
         )
         params = {"ip": ip}
 
-        rows, origen = await self._run_sp_with_fallback(query_baz, query_ekt, params)
+        rows, origen = await self._run_sp_with_fallback(
+            query_baz, query_ekt, params, operation="ultimo_evento_historico"
+        )
         if not rows:
             logger.debug(f"AlertRepository.get_last_historical_event({ip}): sin historial")
             return None
@@ -295,7 +409,9 @@ class AlertRepository:
         )
         params = {"ip": ip}
 
-        rows, origen = await self._run_sp_with_fallback(query_baz, query_ekt, params)
+        rows, origen = await self._run_sp_with_fallback(
+            query_baz, query_ekt, params, operation="sensores_recientes"
+        )
 
         result = []
         for row in rows:
@@ -314,17 +430,28 @@ class AlertRepository:
         Obtiene el idTemplate y la instancia para el IP o URL dado.
 
         La columna 'instancia' puede venir sin nombre en algunos SPs — se normaliza.
+        Se sirve desde el cache de escalamiento (la asignación IP → template cambia poco).
         """
         if url:
             sp = "EXEC ABCMASplus.dbo.IDTemplateByUrl @url = :url"
             params = {"url": url}
+            cache_key = ("url", url)
         else:
             sp = "EXEC ABCMASplus.dbo.IDTemplateByIp @ip = :ip"
             params = {"ip": ip}
+            cache_key = ("ip", ip)
+
+        escalation = self._caches.escalation
+        cached = escalation.template_ids.get(cache_key)
+        if cached is not None:
+            return None if cached is NOT_FOUND else dict(cached)
 
         try:
             rows = await self._db.execute_query_async(sp, params)
             if not rows:
+                escalation.template_ids.set(
+                    cache_key, NOT_FOUND, ttl_seconds=escalation.negative_ttl_seconds
+                )
                 return None
             row = dict(rows[0])
             # Normalizar columna 'instancia' si viene sin nombre
@@ -334,6 +461,7 @@ class AlertRepository:
                     "idTemplate": row.get("idTemplate"),
                     "instancia": str(unnamed).strip(),
                 }
+            escalation.template_ids.set(cache_key, dict(row))
             return row
         except Exception as e:
             logger.warning(f"AlertRepository.get_template_id({ip}): {e}")
@@ -354,23 +482,33 @@ class AlertRepository:
         Usa Template_GetById que retorna todos los campos incluyendo
         Atendedor_idGerencia y GerenciaAtendedora.
         Fallback automático a versión EKT si BAZ no retorna resultados.
+        Se sirve desde cache por (template_id, instancia).
         """
+        cache_key = _template_key(template_id, usar_ekt)
+        cached = self._caches.escalation.templates.get(cache_key)
+        if cached is not None:
+            return cached
+
         params = {"id": template_id}
         sp_baz = "EXEC ABCMASplus.dbo.Template_GetById @id = :id"
         sp_ekt = "EXEC ABCMASplus.dbo.Template_GetById_EKT @id = :id"
 
+        # Los ids de template se repiten entre instancias: manda la preferida
         if usar_ekt:
-            rows, _ = await self._run_sp_with_fallback(sp_ekt, sp_baz, params)
+            rows, _ = await self._run_sp_with_fallback(sp_ekt, sp_baz, params, operation="template", ordered=True)
         else:
-            rows, _ = await self._run_sp_with_fallback(sp_baz, sp_ekt, params)
+            rows, _ = await self._run_sp_with_fallback(sp_baz, sp_ekt, params, operation="template", ordered=True)
 
+        # Sin filas puede ser un error de conexión (el fallback lo absorbe): no se cachea
         if not rows:
             return None
         try:
-            return Template.model_validate(rows[0])
+            template = Template.model_validate(rows[0])
         except Exception as e:
             logger.warning(f"AlertRepository.get_template_by_id({template_id}): {e}")
             return None
+        self._caches.escalation.templates.set(cache_key, template)
+        return template
 
     async def get_templates_by_nombre(self, nombre: str) -> list[Template]:
         """
@@ -409,7 +547,19 @@ class AlertRepository:
         Obtiene la matriz de escalamiento del template, ordenada por nivel.
 
         Fallback automático a versión EKT si BAZ no retorna resultados.
+        Se sirve desde cache por (template_id, instancia); cada consulta cuenta
+        para elegir los templates que se precalientan.
         """
+        self._caches.escalation.record_request(_template_key(template_id, usar_ekt))
+        return await self._fetch_escalation_matrix(template_id, usar_ekt)
+
+    async def _fetch_escalation_matrix(self, template_id, usar_ekt: bool) -> list[EscalationLevel]:
+        cache_key = _template_key(template_id, usar_ekt)
+        escalation = self._caches.escalation
+        cached = escalation.matrices.get(cache_key)
+        if cached is not None:
+            return list(cached)
+
         params = {"idTemplate": template_id}
         sp_baz = "EXEC ABCMASplus.dbo.ObtenerMatriz @idTemplate = :idTemplate"
         sp_ekt = "EXEC ABCMASplus.dbo.ObtenerMatriz_EKT @idTemplate = :idTemplate"
@@ -417,9 +567,13 @@ class AlertRepository:
         logger.info(f"get_escalation_matrix: template_id={template_id!r} (type={type(template_id).__name__}), usar_ekt={usar_ekt}")
 
         if usar_ekt:
-            rows, _ = await self._run_sp_with_fallback(sp_ekt, sp_baz, params)
+            rows, _ = await self._run_sp_with_fallback(
+                sp_ekt, sp_baz, params, operation="matriz_escalamiento", ordered=True
+            )
         else:
-            rows, _ = await self._run_sp_with_fallback(sp_baz, sp_ekt, params)
+            rows, _ = await self._run_sp_with_fallback(
+                sp_baz, sp_ekt, params, operation="matriz_escalamiento", ordered=True
+            )
 
         logger.info(f"get_escalation_matrix: {len(rows)} filas retornadas para template_id={template_id!r}")
 
@@ -430,6 +584,8 @@ class AlertRepository:
             except Exception as e:
                 logger.debug(f"AlertRepository: nivel de escalamiento inválido ignorado: {e}")
         levels.sort(key=lambda l: l.nivel)
+        if levels:
+            escalation.matrices.set(cache_key, tuple(levels))
         return levels
 
     async def get_contacto_gerencia(
@@ -441,7 +597,15 @@ class AlertRepository:
         Args:
             id_gerencia: ID de la gerencia en ABCMASplus
             usar_ekt: Si True, usa la versión EKT del SP
+
+        Se sirve desde cache por (id_gerencia, instancia).
         """
+        cache_key = _template_key(id_gerencia, usar_ekt)
+        escalation = self._caches.escalation
+        cached = escalation.contacts.get(cache_key)
+        if cached is not None:
+            return None if cached is NOT_FOUND else cached
+
         params = {"idGerencia": id_gerencia}
         if usar_ekt:
             sp = "EXEC ABCMASplus.dbo.Contacto_GetByIdGerencia_EKT @idGerencia = :idGerencia"
@@ -451,12 +615,69 @@ class AlertRepository:
         try:
             rows = await self._db.execute_query_async(sp, params)
             if not rows:
+                escalation.contacts.set(cache_key, NOT_FOUND, ttl_seconds=escalation.negative_ttl_seconds)
                 return None
-            return AreaContacto.model_validate(rows[0])
+            contacto = AreaContacto.model_validate(rows[0])
+            escalation.contacts.set(cache_key, contacto)
+            return contacto
         except Exception as e:
             logger.warning(f"AlertRepository.get_contacto_gerencia({id_gerencia}): {e}")
             return None
 
+    async def refresh_escalation_cache(self) -> None:
+        """
+        Prueba la versión del catálogo de escalamiento y precalienta los templates más pedidos.
+
+        La ejecuta periódicamente EscalationCaches.start_background_refresh.
+        """
+        escalation = self._caches.escalation
+        if escalation.version_query:
+            try:
+                rows = await self._db.execute_query_async(escalation.version_query)
+                escalation.update_version(tuple(rows[0].values()) if rows else ())
+            except Exception as e:
+                logger.warning(f"AlertRepository: sonda de versión de escalamiento falló: {e}")
+        await self.warm_up_escalation()
+
+    async def warm_up_escalation(
+        self, template_keys: Optional[list[tuple[str, str]]] = None
+    ) -> int:
+        """
+        Carga en cache template, matriz y contactos de los templates indicados.
+
+        Args:
+            template_keys: (template_id, instancia) a precalentar
+                (default: los más pedidos según EscalationCaches)
+
+        Returns:
+            Cantidad de templates cargados (los que ya estaban en cache se omiten)
+        """
+        escalation = self._caches.escalation
+        keys = template_keys if template_keys is not None else escalation.most_requested()
+        pending = [k for k in keys if k not in escalation.matrices or k not in escalation.templates]
+        semaphore = asyncio.Semaphore(_WARMUP_MAX_CONCURRENCY)
+
+        async def _one(template_id: str, instancia: str) -> None:
+            usar_ekt = instancia == "EKT"
+            tid = int(template_id) if template_id.isdigit() else template_id
+            async with semaphore:
+                template, _ = await asyncio.gather(
+                    self.get_template_by_id(tid, usar_ekt=usar_ekt),
+                    self._fetch_escalation_matrix(tid, usar_ekt),
+                )
+                gerencias = {
+                    g for g in (
+                        template.atendedor_id_gerencia if template else None,
+                        template.id_gerencia_desarrollo if template else None,
+                    ) if g
+                }
+                await asyncio.gather(*(self.get_contacto_gerencia(g, usar_ekt=usar_ekt) for g in gerencias))
+
+        await asyncio.gather(*(_one(*k) for k in pending))
+        if pending:
+            logger.info(f"AlertRepository: {len(pending)} templates de escalamiento precalentados")
+        return len(pending)
+
     # ─────────────────────────────────────────────────────────────────────────
     # Inventario
     # ─────────────────────────────────────────────────────────────────────────
@@ -465,78 +686,54 @@ class AlertRepository:
         """
         Busca un equipo por IP en el inventario.
 
-        Orden de búsqueda:
+        Orden de prioridad:
           1. EquiposFisicos_GetByIp       (BAZ)
           2. MaquinasVirtuales_GetByIp    (BAZ)
           3. EquiposFisicos_GetByIp_Ekt   (EKT)
           4. MaquinasVirtuales_GetByIp_Ekt (EKT)
 
+        Los 4 SPs se consultan en paralelo y gana el primero con resultado,
+        pero un SP solo gana cuando todos los de mayor prioridad terminaron
+        sin resultado (ante hits en conflicto se respeta el orden). El
+        resultado se cachea por IP; una IP que ningún inventario conoce se
+        cachea como ausente con TTL corto (no si algún SP falló).
+
         Retorna el primer resultado encontrado o None.
         """
+        cached = self._caches.inventory.get(ip)
+        if cached is not None:
+            return None if cached is NOT_FOUND else cached
+
         params = {"ip": ip}
 
-        candidates = [
-            ("EXEC ABCMASplus.dbo.EquiposFisicos_GetByIp @ip = :ip",    "Fisico"),
-            ("EXEC ABCMASplus.dbo.MaquinasVirtuales_GetByIp @ip = :ip", "Virtual"),
-            ("EXEC ABCMASplus.dbo.EquiposFisicos_GetByIp_Ekt @ip = :ip",    "Fisico"),
-            ("EXEC ABCMASplus.dbo.MaquinasVirtuales_GetByIp_Ekt @ip = :ip", "Virtual"),
-        ]
+        async def _probe(sp: str, fuente: str) -> Optional[InventoryItem]:
+            rows = await self._db.execute_query_async(sp, params)
+            if not rows:
+                return None
+            return self._normalize_inventory_row(rows[0], fuente)
 
-        for sp, fuente in candidates:
-            try:
-                rows = await self._db.execute_query_async(sp, params)
-                if not rows:
+        tasks = [asyncio.ensure_future(_probe(sp, fuente)) for sp, fuente in _INVENTORY_SPS]
+        failed = False
+        try:
+            # Se espera en orden de prioridad; los demás SPs avanzan en paralelo
+            for (sp, _), task in zip(_INVENTORY_SPS, tasks):
+                try:
+                    item = await task
+                except Exception as e:
+                    failed = True
+                    logger.warning(f"AlertRepository.get_inventory_by_ip({ip}) [{sp.split()[1]}]: {e}")
                     continue
-                row = rows[0]
-                # Normalizar nombres de columnas según tabla de origen
-                if fuente == "Fisico":
-                    normalized = {
-                        "ip":                    row.get("ip", ""),
-                        "hostname":              row.get("hostname", ""),
-                        # SP debe retornar A.AreaAtendedora as idAreaAtendedora
-                        "id_area_atendedora":    row.get("idAreaAtendedora"),
-                        "id_area_administradora": row.get("idAreaAdministradora"),
-                        "area_atendedora":       row.get("AreaAtendedora", ""),
-                        "area_administradora":   row.get("AreaAdministradora", ""),
-                        "fuente":                fuente,
-                        "tipo_equipo":           row.get("TipoEquipoFisico", ""),
-                        "version_os":            row.get("VersionOS", ""),
-                        "status":                row.get("Status", ""),
-                        "capa":                  row.get("Capa", ""),
-                        "ambiente":              row.get("Ambiente", ""),
-                        "impacto":               row.get("Impacto", ""),
-                        "urgencia":              row.get("Urgencia", ""),
-                        "prioridad":             row.get("prioridad", ""),
-                        "negocio":               row.get("Negocio", ""),
-                        "grupo_correo":          row.get("GrupoDeCorreo", ""),
-                    }
-                else:
-                    normalized = {
-                        "ip":                    row.get("IPMaquinaVirtual", ""),
-                        "hostname":              row.get("Hostname", ""),
-                        # MaquinasVirtuales retorna IdAreaAdmin / IdAreaAtiende
-                        "id_area_atendedora":    row.get("IdAreaAtiende"),
-                        "id_area_administradora": row.get("IdAreaAdmin"),
-                        "area_atendedora":       row.get("AreaAtiende", ""),
-                        "area_administradora":   row.get("AreaAdmin", ""),
-                        "fuente":                fuente,
-                        "tipo_equipo":           "",
-                        "version_os":            row.get("VersionOS", ""),
-                        "status":                row.get("Status", ""),
-                        "capa":                  row.get("Capa", ""),
-                        "ambiente":              row.get("Ambiente", ""),
-                        "impacto":               row.get("Impacto", ""),
-                        "urgencia":              row.get("Urgencia", ""),
-                        "prioridad":             row.get("Prioridad", ""),
-                        "negocio":               "",
-                        "grupo_correo":          "",
-                    }
-                logger.info(f"AlertRepository.get_inventory_by_ip({ip}): encontrado en {sp.split()[1]}")
-                return InventoryItem.model_validate(normalized)
-            except Exception as e:
-                logger.warning(f"AlertRepository.get_inventory_by_ip({ip}) [{sp.split()[1]}]: {e}")
-                continue
-
+                if item is not None:
+                    logger.info(f"AlertRepository.get_inventory_by_ip({ip}): encontrado en {sp.split()[1]}")
+                    self._caches.inventory.set(ip, item)
+                    return item
+        finally:
+            _discard(tasks)
+
+        if not failed:
+            self._caches.inventory.set(
+                ip, NOT_FOUND, ttl_seconds=self._caches.inventory_negative_ttl_seconds
+            )
         logger.warning(f"AlertRepository.get_inventory_by_ip({ip}): no encontrado en ningún inventario")
         return None
 
@@ -590,6 +787,9 @@ class AlertRepository:
         """
         Busca múltiples equipos por IP usando los SPs de lista.
 
+        Las IPs en cache (encontradas o ausentes) no se consultan; solo las
+        faltantes pasan por los SPs, y sus resultados se cachean.
+
         Orden de búsqueda por prioridad (primero encontrado gana):
           1. EquiposFisicos_GetByIpList       (BAZ)
           2. MaquinasVirtuales_GetByIpList    (BAZ)
@@ -599,6 +799,19 @@ class AlertRepository:
         if not ips:
             return []
 
+        found: dict[str, InventoryItem] = {}
+        missing: list[str] = []
+        for ip in dict.fromkeys(ips):
+            cached = self._caches.inventory.get(ip)
+            if cached is None:
+                missing.append(ip)
+            elif cached is not NOT_FOUND:
+                found[ip] = cached
+        if len(missing) < len(ips):
+            logger.debug(
+                f"AlertRepository.get_inventory_by_ip_list: {len(ips) - len(missing)} IPs desde cache"
+            )
+
         candidates = [
             ("EXEC ABCMASplus.dbo.EquiposFisicos_GetByIpList @ips = :ips",        "Fisico"),
             ("EXEC ABCMASplus.dbo.MaquinasVirtuales_GetByIpList @ips = :ips",     "Virtual"),
@@ -606,10 +819,9 @@ class AlertRepository:
             ("EXEC ABCMASplus.dbo.MaquinasVirtuales_GetByIpList_Ekt @ips = :ips", "Virtual"),
         ]
 
-        found: dict[str, InventoryItem] = {}
-
+        failed = False
         for sp, fuente in candidates:
-            remaining = [ip for ip in ips if ip not in found]
+            remaining = [ip for ip in missing if ip not in found]
             if not remaining:
                 break
             try:
@@ -618,15 +830,22 @@ class AlertRepository:
                     item = self._normalize_inventory_row(row, fuente)
                     if item and item.ip and item.ip not in found:
                         found[item.ip] = item
+                        self._caches.inventory.set(item.ip, item)
                 logger.info(
                     f"AlertRepository.get_inventory_by_ip_list: {sp.split()[1]} → {len(rows)} filas"
                 )
             except Exception as e:
+                failed = True
                 logger.warning(f"AlertRepository.get_inventory_by_ip_list [{sp.split()[1]}]: {e}")
 
-        not_found = [ip for ip in ips if ip not in found]
+        not_found = [ip for ip in missing if ip not in found]
         if not_found:
             logger.warning(f"AlertRepository.get_inventory_by_ip_list: sin resultado para {not_found}")
+            if not failed:
+                for ip in not_found:
+                    self._caches.inventory.set(
+                        ip, NOT_FOUND, ttl_seconds=self._caches.inventory_negative_ttl_seconds
+                    )
 
         return list(found.values())
 
@@ -639,37 +858,54 @@ class AlertRepository:
         sp_principal: str,
         sp_fallback: str,
         params: Optional[dict] = None,
+        operation: str = "",
+        ordered: bool = False,
     ) -> tuple[list[dict], str]:
         """
-        Ejecuta sp_principal; si retorna vacío, ejecuta sp_fallback.
+        Ejecuta sp_principal y, con cobertura, sp_fallback (ver hedging.HedgePolicy).
+
+        El fallback arranca si el principal retorna vacío o falla, o antes si el
+        principal supera el p95 de su latencia histórica para `operation`.
+
+        Args:
+            operation: Nombre de la consulta para el histograma de latencias
+            ordered: Si True, un resultado no vacío del principal tiene prioridad
+                sobre el del fallback (datos que difieren por instancia);
+                si False, gana el primero no vacío
 
         Returns:
-            (filas, origen) donde origen es "principal" o "fallback"
+            (filas, origen) donde origen es la instancia que respondió
         """
-        try:
-            rows = await self._db.execute_query_async(sp_principal, params)
-            if rows:
-                return list(rows), "BAZ_CDMX"
-        except Exception as e:
-            logger.warning(f"AlertRepository SP principal falló ({sp_principal}): {e}")
-
-        try:
-            rows = await self._db.execute_query_async(sp_fallback, params)
-            if rows:
-                return list(rows), "EKT"
-        except Exception as e:
-            logger.warning(f"AlertRepository SP fallback falló ({sp_fallback}): {e}")
+        async def _call(sp: str) -> list[dict]:
+            try:
+                return list(await self._db.execute_query_async(sp, params) or [])
+            except Exception as e:
+                logger.warning(f"AlertRepository SP falló ({sp}): {e}")
+                return []
 
-        return [], "BAZ_CDMX"
+        instances = (_instance_of(sp_principal), _instance_of(sp_fallback))
+        rows, origen, _ = await self._hedge.run(
+            lambda: _call(sp_principal),
+            lambda: _call(sp_fallback),
+            instances,
+            operation=operation,
+            ordered=ordered,
+        )
+        if rows is None:
+            return [], instances[0]
+        return rows, origen
 
     async def _run_sps_with_fallback(
         self,
         sps_principal: list[str],
         sps_fallback: list[str],
+        operation: str = "",
     ) -> tuple[list[dict], str]:
         """
-        Ejecuta múltiples SPs principales y combina resultados.
-        Si el total es vacío, reintenta con los SPs de fallback.
+        Ejecuta en paralelo los SPs principales y combina resultados.
+        Si el total es vacío (o el principal supera su p95), ejecuta los SPs
+        de fallback con cobertura. Un resultado no vacío del principal
+        siempre tiene prioridad.
 
         Returns:
             (filas_combinadas, origen)
@@ -678,36 +914,42 @@ class AlertRepository:
             ConnectionError: Si todos los SPs fallaron con excepción
                 (indica problema de conectividad, no ausencia de datos)
         """
-        rows_baz: list[dict] = []
-        errors_baz: list[Exception] = []
-        for sp in sps_principal:
-            try:
-                result = await self._db.execute_query_async(sp, None)
-                rows_baz.extend(result or [])
-            except Exception as e:
-                logger.warning(f"AlertRepository SP '{sp}' falló: {e}")
-                errors_baz.append(e)
+        errors: dict[str, list[Exception]] = {"principal": [], "fallback": []}
 
-        if rows_baz:
-            return rows_baz, "BAZ_CDMX"
-
-        # Fallback a EKT
-        rows_ekt: list[dict] = []
-        errors_ekt: list[Exception] = []
-        for sp in sps_fallback:
-            try:
-                result = await self._db.execute_query_async(sp, None)
-                rows_ekt.extend(result or [])
-            except Exception as e:
-                logger.warning(f"AlertRepository SP EKT '{sp}' falló: {e}")
-                errors_ekt.append(e)
+        async def _call_all(sps: list[str], kind: str) -> list[dict]:
+            results = await asyncio.gather(
+                *(self._db.execute_query_async(sp, None) for sp in sps),
+                return_exceptions=True,
+            )
+            rows: list[dict] = []
+            for sp, result in zip(sps, results):
+                if isinstance(result, Exception):
+                    logger.warning(f"AlertRepository SP '{sp}' falló: {result}")
+                    errors[kind].append(result)
+                elif isinstance(result, BaseException):
+                    raise result
+                else:
+                    rows.extend(result or [])
+            return rows
+
+        instances = (_instance_of(sps_principal[0]), _instance_of(sps_fallback[0]))
+        rows, origen, _ = await self._hedge.run(
+            lambda: _call_all(sps_principal, "principal"),
+            lambda: _call_all(sps_fallback, "fallback"),
+            instances,
+            operation=operation,
+            ordered=True,
+        )
+        if rows is not None:
+            return rows, origen
 
         # Si todos fallaron con excepción → problema de conectividad
+        errors_baz, errors_ekt = errors["principal"], errors["fallback"]
         all_failed = len(errors_baz) == len(sps_principal) and len(errors_ekt) == len(sps_fallback)
-        if all_failed and not rows_ekt:
+        if all_failed:
             raise ConnectionError(
                 f"No se pudo conectar a la instancia de monitoreo. "
                 f"Último error: {errors_baz[-1] if errors_baz else errors_ekt[-1]}"
             )
 
-        return rows_ekt, "EKT"
+        return [], instances[1]
@@ -0,0 +1,279 @@
+"""
+Consultas con cobertura (hedging) entre las instancias BAZ_CDMX y EKT.
+
+Antes, el SP de fallback solo se lanzaba cuando el principal terminaba
+vacío o con error: una instancia lenta sumaba su latencia completa a cada
+llamada. Con la política de hedging:
+- El principal arranca de inmediato
+- El fallback arranca cuando el principal termina sin resultado aceptable
+  o, como cobertura, cuando el principal supera el percentil configurado
+  (p95 por defecto) de su propia latencia histórica
+- Modo "race": gana el primer resultado aceptable y el otro se cancela.
+  Para consultas por IP, que solo existen en una de las dos instancias
+- Modo "ordered": el fallback corre especulativamente, pero un resultado
+  aceptable del principal siempre tiene prioridad. Para consultas cuyo
+  resultado difiere por instancia (listado de eventos, ids de template)
+
+La latencia de cada instancia se acumula, por tipo de consulta, en un
+histograma logarítmico con decaimiento (las muestras viejas pierden peso),
+compartido por todos los repositorios de la misma conexión.
+
+Cancelar una consulta deja de esperarla; el SP puede terminar en su
+thread, pero su resultado se descarta.
+"""
+import asyncio
+import bisect
+import logging
+import threading
+import time
+import weakref
+from collections import Counter
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Límites superiores de los buckets: 5 ms · 1.25^i, hasta ~3 minutos
+_BUCKETS: tuple[float, ...] = tuple(0.005 * 1.25 ** i for i in range(48))
+
+
+class LatencyHistogram:
+    """
+    Histograma logarítmico de latencias (segundos) con decaimiento.
+
+    Cuando el peso acumulado supera `window`, todos los conteos se dividen
+    a la mitad: el percentil sigue la latencia reciente sin guardar muestras.
+    """
+
+    def __init__(self, window: int = 500) -> None:
+        self.window = window
+        self._counts = [0.0] * (len(_BUCKETS) + 1)
+        self._total = 0.0
+        self._samples = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._counts[bisect.bisect_left(_BUCKETS, seconds)] += 1.0
+            self._total += 1.0
+            self._samples += 1
+            if self._total > self.window:
+                self._counts = [c / 2.0 for c in self._counts]
+                self._total /= 2.0
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Límite superior del bucket que contiene el percentil q (0..1); None sin muestras."""
+        with self._lock:
+            if not self._total:
+                return None
+            target = q * self._total
+            acc = 0.0
+            for i, count in enumerate(self._counts):
+                acc += count
+                if acc >= target and count:
+                    return _BUCKETS[i] if i < len(_BUCKETS) else _BUCKETS[-1]
+            return _BUCKETS[-1]
+
+    @property
+    def samples(self) -> int:
+        return self._samples
+
+
+class HedgePolicy:
+    """
+    Decide cuándo lanzar el fallback y registra la latencia por instancia.
+
+    Example:
+        >>> policy = hedge_policy_for(db_manager)
+        >>> rows, origen, errores = await policy.run(
+        ...     lambda: db.execute_query_async(sp_baz, params),
+        ...     lambda: db.execute_query_async(sp_ekt, params),
+        ...     ("BAZ_CDMX", "EKT"),
+        ... )
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        min_delay_seconds: float = 0.05,
+        max_delay_seconds: float = 2.0,
+        default_delay_seconds: float = 0.5,
+        min_samples: int = 20,
+    ) -> None:
+        """
+        Args:
+            percentile: Percentil de la latencia del principal que dispara la cobertura
+            min_delay_seconds: Espera mínima antes de cubrir (evita duplicar consultas rápidas)
+            max_delay_seconds: Espera máxima antes de cubrir
+            default_delay_seconds: Espera mientras el histograma tiene pocas muestras
+            min_samples: Muestras necesarias para usar el percentil
+        """
+        self.percentile = percentile
+        self.min_delay_seconds = min_delay_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.default_delay_seconds = default_delay_seconds
+        self.min_samples = min_samples
+        self._histograms: dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+        self._hedged = 0
+        self._fallback_wins = 0
+        self._cancelled: Counter = Counter()
+
+    def histogram(self, instance: str) -> LatencyHistogram:
+        with self._lock:
+            hist = self._histograms.get(instance)
+            if hist is None:
+                hist = self._histograms[instance] = LatencyHistogram()
+            return hist
+
+    def hedge_delay(self, instance: str) -> float:
+        """Segundos a esperar al principal (clave de histograma) antes de lanzar el fallback."""
+        hist = self.histogram(instance)
+        value = hist.percentile(self.percentile) if hist.samples >= self.min_samples else None
+        if value is None:
+            value = self.default_delay_seconds
+        return min(max(value, self.min_delay_seconds), self.max_delay_seconds)
+
+    async def timed(self, instance: str, call: Callable[[], Awaitable[T]]) -> T:
+        """
+        Ejecuta `call` registrando su latencia si terminó (con resultado o con error).
+
+        Las cancelaciones no se registran, solo se cuentan: la duración de una
+        consulta cancelada es la latencia de quien le ganó, no la suya. Medirla
+        bajaría el percentil, acortaría la espera, habría más coberturas y más
+        cancelaciones, hasta cubrir todas las llamadas en min_delay_seconds.
+        """
+        start = time.monotonic()
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            with self._lock:
+                self._cancelled[instance] += 1
+            raise
+        except BaseException:
+            self.histogram(instance).observe(time.monotonic() - start)
+            raise
+        self.histogram(instance).observe(time.monotonic() - start)
+        return result
+
+    async def run(
+        self,
+        primary: Callable[[], Awaitable[T]],
+        fallback: Callable[[], Awaitable[T]],
+        instances: tuple[str, str],
+        accept: Callable[[T], bool] = bool,
+        ordered: bool = False,
+        operation: str = "",
+    ) -> tuple[Optional[T], Optional[str], list[BaseException]]:
+        """
+        Ejecuta principal y fallback con cobertura.
+
+        Args:
+            primary: Corrutina del principal
+            fallback: Corrutina del fallback
+            instances: (instancia del principal, instancia del fallback)
+            accept: Si el resultado sirve (default: no vacío)
+            ordered: Si True, un resultado aceptable del principal tiene prioridad
+            operation: Tipo de consulta; cada (instancia, operación) tiene su histograma
+
+        Returns:
+            (resultado, instancia, errores). Resultado e instancia son None si
+            ninguno fue aceptable; errores son las excepciones de cada intento.
+        """
+        primary_name, fallback_name = instances
+        primary_key, fallback_key = (histogram_key(name, operation) for name in instances)
+        primary_task = asyncio.ensure_future(self.timed(primary_key, primary))
+        fallback_task: Optional[asyncio.Future] = None
+        errors: list[BaseException] = []
+        results: dict[asyncio.Future, Any] = {}
+
+        def _outcome(task: asyncio.Future) -> None:
+            exc = task.exception()
+            if exc is not None:
+                errors.append(exc)
+            else:
+                results[task] = task.result()
+
+        try:
+            done, _ = await asyncio.wait({primary_task}, timeout=self.hedge_delay(primary_key))
+            if done:
+                _outcome(primary_task)
+                if primary_task in results and accept(results[primary_task]):
+                    return results[primary_task], primary_name, errors
+            else:
+                with self._lock:
+                    self._hedged += 1
+            fallback_task = asyncio.ensure_future(self.timed(fallback_key, fallback))
+
+            pending = {t for t in (primary_task, fallback_task) if not t.done()}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    _outcome(task)
+                if primary_task in results and accept(results[primary_task]):
+                    return results[primary_task], primary_name, errors
+                if fallback_task in results and accept(results[fallback_task]):
+                    if ordered and not primary_task.done():
+                        continue  # el principal aún puede responder y tiene prioridad
+                    with self._lock:
+                        self._fallback_wins += 1
+                    return results[fallback_task], fallback_name, errors
+            return None, None, errors
+        finally:
+            for task in (primary_task, fallback_task):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    def stats(self) -> dict[str, Any]:
+        """Percentiles por instancia y conteo de coberturas."""
+        with self._lock:
+            instances = dict(self._histograms)
+            hedged, fallback_wins = self._hedged, self._fallback_wins
+            cancelled = dict(self._cancelled)
+        return {
+            "hedged": hedged,
+            "fallback_wins": fallback_wins,
+            "instances": {
+                name: {
+                    "samples": hist.samples,
+                    "cancelled": cancelled.get(name, 0),
+                    "p50_ms": _ms(hist.percentile(0.5)),
+                    "p95_ms": _ms(hist.percentile(0.95)),
+                    "hedge_delay_ms": _ms(self.hedge_delay(name)),
+                }
+                for name, hist in instances.items()
+            },
+        }
+
+
+def histogram_key(instance: str, operation: str = "") -> str:
+    """Clave del histograma de una instancia para un tipo de consulta."""
+    return f"{instance}/{operation}" if operation else instance
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+_policies: "weakref.WeakKeyDictionary[Any, HedgePolicy]" = weakref.WeakKeyDictionary()
+_policies_lock = threading.Lock()
+
+
+def hedge_policy_for(db_manager: Any, **overrides: Any) -> HedgePolicy:
+    """
+    Política compartida por todos los repositorios de una misma conexión.
+
+    Args:
+        db_manager: DatabaseManager de monitoreo (clave de la política)
+        **overrides: Atributos de HedgePolicy a actualizar (percentile, min_delay_seconds, ...)
+    """
+    with _policies_lock:
+        policy = _policies.get(db_manager)
+        if policy is None:
+            policy = _policies[db_manager] = HedgePolicy()
+    for name, value in overrides.items():
+        if not hasattr(policy, name):
+            raise AttributeError(f"HedgePolicy no tiene el parámetro '{name}'")
+        setattr(policy, name, value)
+    return policy
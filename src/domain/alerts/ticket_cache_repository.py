@@ -3,38 +3,208 @@ TicketAnalysisCacheRepository — Caché de análisis LLM de tickets históricos
 
 Evita llamadas redundantes al LLM cuando los datos no han cambiado.
 Invalidación: si cambia total_tickets o la accionCorrectiva del último ticket.
+
+Dos niveles:
+- L1: TTLCache en memoria compartido por el proceso (TicketAnalysisL1). El
+  TTL de cada entrada es la vida restante de la fila SQL (o _L1_TTL_SECONDS
+  si las filas no vencen): L1 nunca sirve un análisis que L2 ya descartó
+- L2: tabla BotIAv2_TicketAnalysisCache, escrita en cada análisis nuevo
+  (write-through)
+
+get_or_generate() agrega single-flight: requests concurrentes por la misma
+clave (desde cualquier event loop o thread) esperan un único análisis LLM.
 """
 
+import asyncio
+import concurrent.futures
 import logging
-from typing import Optional
+import threading
+from collections import Counter
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from src.infra.observability import get_metrics
+from src.utils.ttl_cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
+_L1_TTL_SECONDS = 3600          # TTL de L1 cuando las filas SQL no vencen
+_L1_MAX_ENTRIES = 2000
+
+CacheKey = tuple[str, str, int, str]
+T = TypeVar("T")
+
+
+class TicketAnalysisL1:
+    """
+    Cache L1 de análisis con single-flight y contadores de L1, L2 y LLM.
+
+    Example:
+        >>> l1 = analysis_l1()
+        >>> l1.stats()["llm_calls_avoided"]
+    """
+
+    def __init__(self, max_entries: int = _L1_MAX_ENTRIES) -> None:
+        self.cache: TTLCache[CacheKey, str] = TTLCache(
+            max_entries=max_entries,
+            ttl_seconds=_L1_TTL_SECONDS,
+            name="ticket_analysis_l1",
+        )
+        self._inflight: dict[CacheKey, concurrent.futures.Future] = {}
+        self._lock = threading.Lock()
+        self._counts: Counter = Counter()
+
+    def record(self, outcome: str) -> None:
+        """Cuenta un resultado: 'l1_hits', 'l2_hits', 'l2_misses', 'joined' o 'llm_calls'."""
+        with self._lock:
+            self._counts[outcome] += 1
+
+    async def single_flight(self, key: CacheKey, load: Callable[[], Awaitable[T]]) -> tuple[T, bool]:
+        """
+        Ejecuta `load` una sola vez por clave aunque la pidan varios requests a la vez.
+
+        Returns:
+            (resultado, True si se esperó la carga de otro request)
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = concurrent.futures.Future()
+                # RUNNING: un request cancelado no puede cancelar la carga compartida
+                future.set_running_or_notify_cancel()
+
+        if not owner:
+            self.record("joined")
+            try:
+                return await asyncio.wrap_future(future), True
+            except asyncio.CancelledError:
+                # Se canceló el request que cargaba (no este): se toma la carga
+                if future.done() and isinstance(future.exception(), asyncio.CancelledError):
+                    return await self.single_flight(key, load)
+                raise
+
+        try:
+            value = await load()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._inflight.pop(key, None)
+        future.set_result(value)
+        return value, False
+
+    def stats(self) -> dict[str, Any]:
+        """Tasas de acierto por nivel y llamadas al LLM evitadas."""
+        with self._lock:
+            counts = dict(self._counts)
+            inflight = len(self._inflight)
+        l1_hits, l2_hits, l2_misses = (counts.get(k, 0) for k in ("l1_hits", "l2_hits", "l2_misses"))
+        joined, llm_calls = counts.get("joined", 0), counts.get("llm_calls", 0)
+        requests = l1_hits + l2_hits + l2_misses + joined
+        l2_lookups = l2_hits + l2_misses
+        return {
+            "name": "ticket_analysis",
+            "entries": len(self.cache),
+            "l1_hits": l1_hits,
+            "l2_hits": l2_hits,
+            "l2_misses": l2_misses,
+            "joined": joined,
+            "inflight": inflight,
+            "l1_hit_rate": round(l1_hits / requests, 3) if requests else 0.0,
+            "l2_hit_rate": round(l2_hits / l2_lookups, 3) if l2_lookups else 0.0,
+            "llm_calls": llm_calls,
+            "llm_calls_avoided": l1_hits + l2_hits + joined,
+        }
+
+
+_l1: Optional[TicketAnalysisL1] = None
+_l1_lock = threading.Lock()
+
+
+def analysis_l1() -> TicketAnalysisL1:
+    """L1 compartido por todos los repositorios del proceso (se crean por request)."""
+    global _l1
+    with _l1_lock:
+        if _l1 is None:
+            _l1 = TicketAnalysisL1()
+            get_metrics().register_cache("ticket_analysis", _l1.stats)
+        return _l1
+
 
 class TicketAnalysisCacheRepository:
     """Repositorio de caché de análisis de tickets en BotIAv2_TicketAnalysisCache."""
 
-    def __init__(self, db_manager) -> None:
+    def __init__(
+        self,
+        db_manager,
+        ttl_seconds: float = 0,
+        l1: Optional[TicketAnalysisL1] = None,
+    ) -> None:
+        """
+        Args:
+            db_manager: DatabaseManager de abcmasplus
+            ttl_seconds: Vida de una fila SQL desde fechaCreacion (0 = no vence)
+            l1: Cache en memoria (default: el compartido por el proceso)
+        """
         self._db = db_manager
+        self._ttl_seconds = ttl_seconds
+        self._l1 = l1 if l1 is not None else analysis_l1()
+
+    @staticmethod
+    def _key(ip: str, sensor: str, total_tickets: int, ultima_accion: str) -> CacheKey:
+        return ip, sensor, total_tickets, ultima_accion[:500]
 
     async def lookup(self, ip: str, sensor: str, total_tickets: int, ultima_accion: str) -> Optional[str]:
-        """Retorna el análisis cacheado si la clave coincide, None si hay cache miss."""
+        """Retorna el análisis cacheado (L1, luego L2) si la clave coincide, None si hay cache miss."""
+        key = self._key(ip, sensor, total_tickets, ultima_accion)
+        cached = self._l1.cache.get(key)
+        if cached is not None:
+            self._l1.record("l1_hits")
+            return cached
+        return await self._lookup_l2(key)
+
+    async def _lookup_l2(self, key: CacheKey) -> Optional[str]:
+        ip, sensor, total_tickets, ultima_accion = key
         try:
             rows = await self._db.execute_query_async(
                 """
-                SELECT analisis FROM abcmasplus..BotIAv2_TicketAnalysisCache
+                SELECT analisis, DATEDIFF(second, fechaCreacion, GETDATE()) AS edad_segundos
+                FROM abcmasplus..BotIAv2_TicketAnalysisCache
                 WHERE ip = :ip AND sensor = :sensor
                   AND total_tickets = :total AND ultima_accion = :ultima_accion
+                  AND (:ttl = 0 OR fechaCreacion >= DATEADD(second, -:ttl, GETDATE()))
                 """,
-                {"ip": ip, "sensor": sensor, "total": total_tickets, "ultima_accion": ultima_accion[:500]},
+                {
+                    "ip": ip, "sensor": sensor, "total": total_tickets,
+                    "ultima_accion": ultima_accion, "ttl": int(self._ttl_seconds),
+                },
             )
-            return rows[0]["analisis"] if rows else None
         except Exception as e:
             logger.warning(f"TicketAnalysisCache lookup error: {e}")
             return None
+        if not rows:
+            self._l1.record("l2_misses")
+            return None
+        self._l1.record("l2_hits")
+        analisis = rows[0]["analisis"]
+        self._fill_l1(key, analisis, rows[0].get("edad_segundos") or 0)
+        return analisis
+
+    def _fill_l1(self, key: CacheKey, analisis: str, edad_segundos: float = 0) -> None:
+        if self._ttl_seconds:
+            remaining = self._ttl_seconds - edad_segundos
+            if remaining <= 0:
+                return
+            self._l1.cache.set(key, analisis, ttl_seconds=remaining)
+        else:
+            self._l1.cache.set(key, analisis)
 
     async def save(self, ip: str, sensor: str, total_tickets: int, ultima_accion: str, analisis: str) -> None:
-        """Guarda o actualiza el análisis en caché para la clave dada."""
+        """Guarda o actualiza el análisis en caché (L2 y L1) para la clave dada."""
+        key = self._key(ip, sensor, total_tickets, ultima_accion)
+        self._fill_l1(key, analisis)
         try:
             await self._db.execute_non_query_async(
                 """
@@ -53,7 +223,46 @@ class TicketAnalysisCacheRepository:
                     INSERT (ip, sensor, total_tickets, ultima_accion, analisis)
                     VALUES (:ip, :sensor, :total, :ultima_accion, :analisis);
                 """,
-                {"ip": ip, "sensor": sensor, "total": total_tickets, "ultima_accion": ultima_accion[:500], "analisis": analisis},
+                {"ip": ip, "sensor": sensor, "total": total_tickets, "ultima_accion": key[3], "analisis": analisis},
             )
         except Exception as e:
             logger.warning(f"TicketAnalysisCache save error: {e}")
+
+    async def get_or_generate(
+        self,
+        ip: str,
+        sensor: str,
+        total_tickets: int,
+        ultima_accion: str,
+        generate: Callable[[], Awaitable[str]],
+    ) -> tuple[str, bool]:
+        """
+        Retorna el análisis cacheado o lo genera una sola vez para todos los requests concurrentes.
+
+        Args:
+            generate: Corrutina que llama al LLM; solo la ejecuta el primer request
+                de la clave, los demás esperan su resultado
+
+        Returns:
+            (análisis, True si no hizo falta llamar al LLM en este request)
+
+        Raises:
+            La excepción de `generate` (a quien la ejecutó y a quienes la esperaban)
+        """
+        key = self._key(ip, sensor, total_tickets, ultima_accion)
+        cached = self._l1.cache.get(key)
+        if cached is not None:
+            self._l1.record("l1_hits")
+            return cached, True
+
+        async def _load() -> tuple[str, bool]:
+            analisis = await self._lookup_l2(key)
+            if analisis is not None:
+                return analisis, True
+            self._l1.record("llm_calls")
+            analisis = await generate()
+            await self.save(ip, sensor, total_tickets, ultima_accion, analisis)
+            return analisis, False
+
+        (analisis, from_cache), joined = await self._l1.single_flight(key, _load)
+        return analisis, from_cache or joined
@@ -1,3 +1,4 @@
 from .interaction_repository import InteractionRepository
+from .interaction_rollup import InteractionRollup, OverviewReader, overview_reader_for, rollup_for
 
-__all__ = ["InteractionRepository"]
+__all__ = ["InteractionRepository", "InteractionRollup", "OverviewReader", "overview_reader_for", "rollup_for"]
@@ -12,6 +12,8 @@ import json
 import logging
 from typing import Any, Optional
 
+from src.domain.interaction.interaction_rollup import rollup_for
+
 logger = logging.getLogger(__name__)
 
 
@@ -101,6 +103,7 @@ class InteractionRepository:
                 "cost_usd": cost_usd,
                 "id_usuario": id_usuario,
             })
+            rollup_for(self.db_manager).notify_write()
             return True
         except Exception as e:
             logger.error(f"Error saving interaction: {e}")
@@ -0,0 +1,512 @@
+"""
+Rollups horarios de BotIAv2_InteractionLogs para el overview del dashboard.
+
+El overview (/api/admin/overview y el dashboard de Telegram) agregaba el rango
+completo de InteractionLogs en cada refresco, PERCENTILE_CONT incluido. Ahora:
+
+- InteractionRollup: job en background que agrega cada hora cerrada en
+  BotIAv2_InteractionHourly (por agente: mensajes, errores, latencia, tokens,
+  costo e histograma de latencia) y BotIAv2_InteractionHourlyUsers (por
+  usuario: mensajes y costo). Avanza una marca de agua (rolledUntil) en
+  BotIAv2_InteractionRollupState; cada hora se re-agrega completa (DELETE +
+  INSERT, en la misma transacción que la marca de agua), así correr dos veces
+  es idempotente. El write path
+  (InteractionRepository.save_interaction) lo despierta con notify_write().
+- OverviewReader: las consultas del overview leen rollups hasta la marca de
+  agua y InteractionLogs solo desde ahí (la hora en curso), con un cache corto
+  por período. Si las tablas de rollup no existen (migración 026 sin aplicar)
+  lee InteractionLogs como antes.
+
+Los percentiles salen del histograma (LATENCY_BUCKETS_MS), que se puede sumar
+entre horas: son aproximados dentro de cada bucket.
+Tablas: scripts/migrations/026_interaction_hourly_rollup.sql
+"""
+
+import asyncio
+import logging
+import threading
+import time
+import weakref
+from datetime import datetime, timedelta
+from typing import Any, Mapping, Optional
+
+from src.infra.database.query_pool import TIMEOUT, ParallelResult, QueryPool
+from src.infra.observability import get_metrics
+from src.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+_LOGS = "abcmasplus..BotIAv2_InteractionLogs"
+_HOURLY = "abcmasplus..BotIAv2_InteractionHourly"
+_HOURLY_USERS = "abcmasplus..BotIAv2_InteractionHourlyUsers"
+_STATE = "abcmasplus..BotIAv2_InteractionRollupState"
+_ROLLUP_NAME = "interaction_hourly"
+
+# Límites superiores (ms) de los buckets del histograma; el último bucket no tiene tope.
+# Cambiarlos invalida las horas ya agregadas (re-agregar borrando rolledUntil).
+LATENCY_BUCKETS_MS = (250, 500, 1000, 2000, 3000, 5000, 7500, 10000, 15000, 20000, 30000, 45000, 60000, 90000, 120000)
+LATENCY_COLUMNS = tuple(f"lat{i:02d}" for i in range(len(LATENCY_BUCKETS_MS) + 1))
+
+PERIODOS = ("hoy", "ayer", "7d", "30d")
+
+_BACKFILL_HOURS = 60 * 24       # cubre 30d + el período previo de comparación
+_CHUNK_HOURS = 7 * 24           # horas por transacción al agregar
+_GRACE_MINUTES = 2              # una hora se agrega 2 min después de cerrar
+_ROLLUP_RETRY_SECONDS = 300     # reintento de rollups tras caer a InteractionLogs
+
+# Días relativos a hoy (inicio, fin) del período y del período previo
+_RANGOS = {
+    "hoy": ((0, 1), (-1, 0)),
+    "ayer": ((-1, 0), (-2, -1)),
+    "7d": ((-6, 1), (-13, -6)),
+    "30d": ((-29, 1), (-59, -29)),
+}
+
+_HOY = "CAST(CAST(GETDATE() AS DATE) AS DATETIME)"
+_CORTE = f"(SELECT ISNULL(MAX(rolledUntil), '19000101') FROM {_STATE} WHERE nombre = '{_ROLLUP_NAME}')"
+_HORA = "DATEADD(HOUR, DATEDIFF(HOUR, 0, il.fechaEjecucion), 0)"
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Histograma de latencia
+# ──────────────────────────────────────────────────────────────────────────────
+
+def _bucket_exprs(column: str) -> list[str]:
+    """Una expresión 0/1 por bucket del histograma para la columna de duración."""
+    exprs = []
+    lower: Optional[int] = None
+    for upper in LATENCY_BUCKETS_MS + (None,):
+        conds = []
+        if lower is not None:
+            conds.append(f"{column} >= {lower}")
+        if upper is not None:
+            conds.append(f"{column} < {upper}")
+        exprs.append(f"CASE WHEN {' AND '.join(conds)} THEN 1 ELSE 0 END")
+        lower = upper
+    return exprs
+
+
+def latency_percentile(row: Mapping[str, Any], q: float) -> float:
+    """
+    Percentil q (0-1) en ms a partir de las columnas lat00..latNN de una fila.
+
+    Interpola linealmente dentro del bucket; el último bucket (sin tope)
+    retorna su límite inferior.
+    """
+    counts = [int(row.get(c) or 0) for c in LATENCY_COLUMNS]
+    total = sum(counts)
+    if not total:
+        return 0.0
+    target = q * total
+    acumulado = 0
+    for i, count in enumerate(counts):
+        if count and acumulado + count >= target:
+            lower = LATENCY_BUCKETS_MS[i - 1] if i > 0 else 0
+            if i == len(LATENCY_BUCKETS_MS):
+                return float(lower)
+            upper = LATENCY_BUCKETS_MS[i]
+            return lower + (upper - lower) * (target - acumulado) / count
+        acumulado += count
+    return float(LATENCY_BUCKETS_MS[-1])
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Consultas del overview
+# ──────────────────────────────────────────────────────────────────────────────
+
+def _dia(offset: int) -> str:
+    return f"DATEADD(DAY, {offset}, {_HOY})" if offset else _HOY
+
+
+def _interacciones(desde: str, hasta: str, use_rollup: bool) -> str:
+    """
+    Filas de interacción del rango [desde, hasta): rollups antes de la marca de
+    agua + InteractionLogs desde la marca de agua, con las mismas columnas.
+    """
+    buckets = ", ".join(f"{expr} AS {col}" for expr, col in zip(_bucket_exprs("il.duracionMs"), LATENCY_COLUMNS))
+    live = f"""
+        SELECT il.fechaEjecucion AS ts, ISNULL(il.agenteNombre, '') AS agente, 1 AS mensajes,
+               CASE WHEN il.exitoso = 0 THEN 1 ELSE 0 END AS errores,
+               CAST(ISNULL(il.duracionMs, 0) AS BIGINT) AS duracionMs,
+               ISNULL(il.costUSD, 0) AS costo,
+               CAST(ISNULL(il.totalInputTokens, 0) + ISNULL(il.totalOutputTokens, 0) AS BIGINT) AS tokens,
+               {buckets}
+        FROM {_LOGS} il
+        WHERE il.fechaEjecucion >= {desde} AND il.fechaEjecucion < {hasta}"""
+    if not use_rollup:
+        return live
+    lat = ", ".join(f"h.{col}" for col in LATENCY_COLUMNS)
+    return f"""
+        SELECT h.hora AS ts, h.agenteNombre AS agente, h.mensajes, h.errores,
+               h.duracionMsSum AS duracionMs, h.costUSD AS costo, h.tokens, {lat}
+        FROM {_HOURLY} h
+        WHERE h.hora >= {desde} AND h.hora < {hasta} AND h.hora < {_CORTE}
+        UNION ALL{live}
+          AND il.fechaEjecucion >= {_CORTE}"""
+
+
+def _usuarios(desde: str, hasta: str, use_rollup: bool) -> str:
+    live = f"""
+        SELECT il.telegramChatId
+        FROM {_LOGS} il
+        WHERE il.fechaEjecucion >= {desde} AND il.fechaEjecucion < {hasta}"""
+    if not use_rollup:
+        return live
+    return f"""
+        SELECT hu.telegramChatId
+        FROM {_HOURLY_USERS} hu
+        WHERE hu.hora >= {desde} AND hu.hora < {hasta} AND hu.hora < {_CORTE}
+        UNION ALL{live}
+          AND il.fechaEjecucion >= {_CORTE}"""
+
+
+def overview_queries(periodo: str, use_rollup: bool = True) -> dict[str, str]:
+    """
+    Consultas independientes del overview, por nombre.
+
+    Returns:
+        {"stats", "usuarios", "prev", "agentes", "actividad"} → SQL. "stats"
+        trae total_mensajes, errores, costo_total y las columnas lat00..latNN.
+    """
+    (ini, fin), (prev_ini, prev_fin) = _RANGOS[periodo if periodo in _RANGOS else "hoy"]
+    desde, hasta = _dia(ini), _dia(fin)
+    filas = _interacciones(desde, hasta, use_rollup)
+    lat = ", ".join(f"ISNULL(SUM(r.{col}), 0) AS {col}" for col in LATENCY_COLUMNS)
+    slot = "DATEPART(HOUR, r.ts)" if periodo in ("hoy", "ayer") else "CAST(r.ts AS DATE)"
+    return {
+        "stats": f"""
+            SELECT
+                ISNULL(SUM(r.mensajes), 0)  AS total_mensajes,
+                ISNULL(SUM(r.errores), 0)   AS errores,
+                ISNULL(SUM(r.costo), 0)     AS costo_total,
+                {lat}
+            FROM ({filas}) r
+        """,
+        "usuarios": f"""
+            SELECT COUNT(DISTINCT u.telegramChatId) AS usuarios_activos
+            FROM ({_usuarios(desde, hasta, use_rollup)}) u
+        """,
+        "prev": f"""
+            SELECT ISNULL(SUM(r.mensajes), 0) AS total_prev
+            FROM ({_interacciones(_dia(prev_ini), _dia(prev_fin), use_rollup)}) r
+        """,
+        "agentes": f"""
+            SELECT
+                r.agente                                        AS agenteSeleccionado,
+                SUM(r.mensajes)                                 AS requests,
+                SUM(r.mensajes) - SUM(r.errores)                AS exitosos,
+                SUM(r.duracionMs) / NULLIF(SUM(r.mensajes), 0)  AS avg_ms,
+                SUM(r.tokens)                                   AS total_tokens,
+                SUM(r.costo)                                    AS costo
+            FROM ({filas}) r
+            WHERE r.agente <> ''
+            GROUP BY r.agente
+            ORDER BY requests DESC
+        """,
+        "actividad": f"""
+            SELECT {slot} AS slot, SUM(r.mensajes) AS mensajes
+            FROM ({filas}) r
+            GROUP BY {slot}
+            ORDER BY slot
+        """,
+    }
+
+
+class OverviewReader:
+    """
+    Filas del overview por período, desde rollups + hora en curso, con cache corto.
+
+    Example:
+        >>> rows = overview_reader_for(db).rows("7d")
+        >>> rows["stats"][0]["total_mensajes"]
+    """
+
+    def __init__(self, db_manager: Any, cache_ttl_seconds: float = 15) -> None:
+        self._db = db_manager
+        self.cache: TTLCache[str, dict[str, list[dict]]] = TTLCache(
+            max_entries=len(PERIODOS),
+            ttl_seconds=cache_ttl_seconds,
+            name="dashboard_overview",
+        )
+        self._rollup_retry_at = 0.0
+
+    def _use_rollup(self) -> bool:
+        return time.monotonic() >= self._rollup_retry_at
+
+    def _rollup_failed(self, e: Exception) -> None:
+        logger.warning(
+            f"Overview: rollups no disponibles ({e}); leyendo InteractionLogs "
+            f"durante {_ROLLUP_RETRY_SECONDS}s"
+        )
+        self._rollup_retry_at = time.monotonic() + _ROLLUP_RETRY_SECONDS
+
+    def rows(self, periodo: str) -> dict[str, list[dict]]:
+        """Resultado de overview_queries(periodo) (síncrono, para Flask)."""
+        cached = self.cache.get(periodo)
+        if cached is not None:
+            return cached
+        use_rollup = self._use_rollup()
+        try:
+            result = self._run(overview_queries(periodo, use_rollup))
+        except Exception as e:
+            if not use_rollup:
+                raise
+            self._rollup_failed(e)
+            result = self._run(overview_queries(periodo, use_rollup=False))
+        self.cache.set(periodo, result)
+        return result
+
+    async def rows_async(self, periodo: str) -> dict[str, list[dict]]:
+        """Como rows(), con las consultas en paralelo (dashboard de Telegram)."""
+        cached = self.cache.get(periodo)
+        if cached is not None:
+            return cached
+        use_rollup = self._use_rollup()
+        try:
+            result = await self._run_async(overview_queries(periodo, use_rollup))
+        except Exception as e:
+            if not use_rollup:
+                raise
+            self._rollup_failed(e)
+            result = await self._run_async(overview_queries(periodo, use_rollup=False))
+        self.cache.set(periodo, result)
+        return result
+
+    def rows_parallel(self, periodo: str, pool: QueryPool) -> ParallelResult:
+        """
+        Como rows(), con las consultas en paralelo en `pool` (Flask).
+
+        Las consultas que fallan o vencen quedan vacías y listadas en `failed`;
+        un resultado parcial no se cachea. "stats" es requerida.
+        """
+        cached = self.cache.get(periodo)
+        if cached is not None:
+            return ParallelResult(results=cached)
+        use_rollup = self._use_rollup()
+        result = self._run_pool(pool, overview_queries(periodo, use_rollup))
+        errores = [e for e in result.failed.values() if e != TIMEOUT]
+        if use_rollup and errores:
+            self._rollup_failed(RuntimeError(errores[0]))
+            result = self._run_pool(pool, overview_queries(periodo, use_rollup=False))
+        if not result.partial:
+            self.cache.set(periodo, result.results)
+        return result
+
+    def _run_pool(self, pool: QueryPool, queries: dict[str, str]) -> ParallelResult:
+        calls = {name: (lambda sql=sql: self._db.execute_query(sql)) for name, sql in queries.items()}
+        return pool.run(calls, required=("stats",), default=[])
+
+    def _run(self, queries: dict[str, str]) -> dict[str, list[dict]]:
+        return {name: self._db.execute_query(sql) for name, sql in queries.items()}
+
+    async def _run_async(self, queries: dict[str, str]) -> dict[str, list[dict]]:
+        results = await asyncio.gather(*(self._db.execute_query_async(sql) for sql in queries.values()))
+        return dict(zip(queries, results))
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Job de rollup
+# ──────────────────────────────────────────────────────────────────────────────
+
+def _rollup_statements(desde: datetime, hasta: datetime) -> list[tuple[str, dict]]:
+    """
+    Sentencias de una transacción de rollup: re-agregar [desde, hasta) y mover la marca de agua.
+
+    La marca de agua va última: solo queda confirmada si ambos INSERT lo hicieron.
+    """
+    buckets = ", ".join(f"SUM({expr})" for expr in _bucket_exprs("il.duracionMs"))
+    lat = ", ".join(LATENCY_COLUMNS)
+    rango = {"desde": desde, "hasta": hasta}
+    return [
+        (f"DELETE FROM {_HOURLY} WHERE hora >= :desde AND hora < :hasta", rango),
+        (f"""
+        INSERT INTO {_HOURLY} (hora, agenteNombre, mensajes, errores, duracionMsSum, costUSD, tokens, {lat})
+        SELECT
+            {_HORA},
+            ISNULL(il.agenteNombre, ''),
+            COUNT(*),
+            SUM(CASE WHEN il.exitoso = 0 THEN 1 ELSE 0 END),
+            SUM(CAST(ISNULL(il.duracionMs, 0) AS BIGINT)),
+            ISNULL(SUM(il.costUSD), 0),
+            SUM(CAST(ISNULL(il.totalInputTokens, 0) + ISNULL(il.totalOutputTokens, 0) AS BIGINT)),
+            {buckets}
+        FROM {_LOGS} il
+        WHERE il.fechaEjecucion >= :desde AND il.fechaEjecucion < :hasta
+        GROUP BY {_HORA}, ISNULL(il.agenteNombre, '')
+        """, rango),
+        (f"DELETE FROM {_HOURLY_USERS} WHERE hora >= :desde AND hora < :hasta", rango),
+        (f"""
+        INSERT INTO {_HOURLY_USERS} (hora, usuario, telegramChatId, mensajes, costUSD)
+        SELECT u.hora, u.usuario, MAX(u.telegramChatId), COUNT(*), ISNULL(SUM(u.costUSD), 0)
+        FROM (
+            SELECT
+                {_HORA} AS hora,
+                CASE WHEN il.telegramChatId IS NOT NULL
+                     THEN CONCAT('tg:', il.telegramChatId)
+                     ELSE CONCAT('emp:', il.idUsuario) END AS usuario,
+                il.telegramChatId,
+                il.costUSD
+            FROM {_LOGS} il
+            WHERE il.fechaEjecucion >= :desde AND il.fechaEjecucion < :hasta
+              AND (il.telegramChatId IS NOT NULL OR il.idUsuario IS NOT NULL)
+        ) u
+        GROUP BY u.hora, u.usuario
+        """, rango),
+        (f"""
+        UPDATE {_STATE} SET rolledUntil = :hasta, fechaActualizacion = GETDATE() WHERE nombre = '{_ROLLUP_NAME}';
+        IF @@ROWCOUNT = 0
+            INSERT INTO {_STATE} (nombre, rolledUntil) VALUES ('{_ROLLUP_NAME}', :hasta);
+        """, {"hasta": hasta}),
+    ]
+
+
+class InteractionRollup:
+    """
+    Agrega las horas cerradas de InteractionLogs en las tablas de rollup.
+
+    roll_up() agrega desde la marca de agua hasta la última hora cerrada (según
+    el reloj de SQL Server, el mismo que usa fechaEjecucion), en transacciones
+    de _CHUNK_HOURS horas (DatabaseManager.execute_transaction: DELETE + INSERT
+    de ambas tablas y la marca de agua se confirman juntos o no se confirman). El thread de start_background_refresh solo consulta
+    la BD si hubo escrituras (notify_write) que todavía no quedaron agregadas.
+    """
+
+    def __init__(
+        self,
+        db_manager: Any,
+        backfill_hours: int = _BACKFILL_HOURS,
+        chunk_hours: int = _CHUNK_HOURS,
+    ) -> None:
+        self._db = db_manager
+        self.backfill_hours = backfill_hours
+        self.chunk_hours = chunk_hours
+        self.name = "interaction_rollup"
+        self.rolled_until: Optional[datetime] = None
+        self._last_write: Optional[datetime] = None
+        self._pending = threading.Event()
+        self._pending.set()  # al arrancar: ponerse al día
+        self._lock = threading.Lock()
+        self._hours_rolled = 0
+        self._runs = 0
+        self._errors = 0
+        self._refresh_stop = threading.Event()
+        self._refresh_thread: Optional[threading.Thread] = None
+
+    def notify_write(self) -> None:
+        """Marca que hay interacciones nuevas para agregar (llamar desde el write path)."""
+        self._last_write = datetime.now()
+        self._pending.set()
+
+    def roll_up(self) -> int:
+        """
+        Agrega las horas cerradas pendientes. Nunca lanza excepciones.
+
+        Returns:
+            Horas agregadas (0 si ya estaba al día o si falló)
+        """
+        with self._lock:
+            self._pending.clear()
+            self._runs += 1
+            try:
+                rows = self._db.execute_query(f"""
+                    SELECT
+                        (SELECT MAX(rolledUntil) FROM {_STATE} WHERE nombre = '{_ROLLUP_NAME}') AS rolled_until,
+                        DATEADD(HOUR, DATEDIFF(HOUR, 0, DATEADD(MINUTE, -{_GRACE_MINUTES}, GETDATE())), 0) AS hasta
+                """)
+                hasta: datetime = rows[0]["hasta"]
+                rolled_until: Optional[datetime] = rows[0]["rolled_until"]
+                minimo = hasta - timedelta(hours=self.backfill_hours)
+                desde = minimo if rolled_until is None else max(rolled_until, minimo)
+
+                horas = 0
+                while desde < hasta:
+                    fin = min(hasta, desde + timedelta(hours=self.chunk_hours))
+                    self._db.execute_transaction(_rollup_statements(desde, fin))
+                    horas += int((fin - desde).total_seconds() // 3600)
+                    desde = fin
+                self.rolled_until = hasta
+                self._hours_rolled += horas
+                if horas:
+                    logger.info(f"Rollup de interacciones: {horas} horas agregadas hasta {hasta}")
+            except Exception as e:
+                self._errors += 1
+                self._pending.set()
+                logger.warning(f"Rollup de interacciones falló: {e}")
+                return 0
+
+            # Escrituras de la hora en curso: quedan pendientes hasta que cierre
+            if self._last_write is not None and self._last_write >= hasta:
+                self._pending.set()
+            return horas
+
+    def start_background_refresh(self, interval_seconds: float) -> None:
+        """Inicia un thread daemon que agrega cada `interval_seconds` si hay pendientes."""
+        if self._refresh_thread is not None and self._refresh_thread.is_alive():
+            return
+        self._refresh_stop.clear()
+        self._refresh_thread = threading.Thread(
+            target=self._refresh_loop,
+            args=(interval_seconds,),
+            name=f"{self.name}-refresh",
+            daemon=True,
+        )
+        self._refresh_thread.start()
+        logger.info(f"Rollup de interacciones cada {interval_seconds}s")
+
+    def stop_background_refresh(self, timeout: float = 5.0) -> None:
+        """Detiene el thread de rollup."""
+        self._refresh_stop.set()
+        if self._refresh_thread is not None:
+            self._refresh_thread.join(timeout)
+            self._refresh_thread = None
+
+    def _refresh_loop(self, interval_seconds: float) -> None:
+        while not self._refresh_stop.wait(interval_seconds):
+            if self._pending.is_set():
+                self.roll_up()
+
+    def stats(self) -> dict[str, Any]:
+        """Estado del job para métricas."""
+        return {
+            "name": self.name,
+            "rolled_until": self.rolled_until.isoformat() if self.rolled_until else None,
+            "pending": self._pending.is_set(),
+            "runs": self._runs,
+            "hours_rolled": self._hours_rolled,
+            "errors": self._errors,
+        }
+
+
+_rollups: "weakref.WeakKeyDictionary[Any, InteractionRollup]" = weakref.WeakKeyDictionary()
+_readers: "weakref.WeakKeyDictionary[Any, OverviewReader]" = weakref.WeakKeyDictionary()
+_registry_lock = threading.Lock()
+
+
+def rollup_for(db_manager: Any) -> InteractionRollup:
+    """Job de rollup compartido por todos los repositorios de una misma conexión."""
+    with _registry_lock:
+        rollup = _rollups.get(db_manager)
+        if rollup is None:
+            rollup = _rollups[db_manager] = InteractionRollup(db_manager)
+            get_metrics().register_cache(rollup.name, rollup.stats)
+        return rollup
+
+
+def overview_reader_for(db_manager: Any, cache_ttl_seconds: Optional[float] = None) -> OverviewReader:
+    """
+    Lector del overview compartido por una misma conexión (cache incluido).
+
+    Args:
+        db_manager: DatabaseManager de abcmasplus (clave del lector)
+        cache_ttl_seconds: Si se indica al crearlo, vida de cada período en cache
+    """
+    with _registry_lock:
+        reader = _readers.get(db_manager)
+        if reader is None:
+            if cache_ttl_seconds is None:
+                reader = OverviewReader(db_manager)
+            else:
+                reader = OverviewReader(db_manager, cache_ttl_seconds=cache_ttl_seconds)
+            _readers[db_manager] = reader
+            get_metrics().register_cache(reader.cache.name, reader.cache.stats)
+        return reader
@@ -5,8 +5,9 @@ Define los modelos de datos para categorías y entradas de conocimiento.
 """
 
 from dataclasses import dataclass, field
+from datetime import datetime
 from enum import Enum
-from typing import List
+from typing import List, Optional
 
 
 class KnowledgeCategory(Enum):
@@ -64,6 +65,8 @@ class KnowledgeEntry:
     keywords: List[str]
     related_commands: List[str] = field(default_factory=list)
     priority: int = 1  # 1=normal, 2=high, 3=critical
+    id: Optional[int] = None  # id en BD (recarga incremental)
+    updated_at: Optional[datetime] = None  # marca de cambio en BD (high-water mark)
 
     def __repr__(self) -> str:
         return f"KnowledgeEntry(category={self.category.value}, question='{self.question[:50]}...')"
@@ -0,0 +1,288 @@
+"""
+Índice invertido en memoria para la base de conocimiento.
+
+Se construye una vez por carga (init y reload_from_database) y evita
+re-tokenizar y re-stemmizar cada entrada en cada búsqueda:
+- Tokenización única con limpieza, stopwords y stemming en español
+- Postings por stem con el impacto BM25F ya calculado (campos con boost:
+  pregunta, keywords y respuesta)
+- Particiones por categoría para filtrar por rol durante el recorrido
+  de postings y para get_entries_by_category
+- Mapa de keyword exacta → entradas para find_by_keywords
+
+El índice es inmutable: una recarga construye uno nuevo y lo reemplaza
+con una sola asignación, así las búsquedas concurrentes nunca ven un
+índice a medio construir.
+"""
+import heapq
+import math
+import re
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .knowledge_entity import KnowledgeCategory, KnowledgeEntry
+
+_PUNCTUATION = re.compile(r'[¿?¡!.,;:\-\'"(){}[\]]')
+
+STOPWORDS = frozenset({
+    'qué', 'cómo', 'cuál', 'dónde', 'cuándo', 'cuántos',
+    'por', 'para', 'el', 'la', 'los', 'las', 'de', 'del',
+    'en', 'a', 'un', 'una', 'es', 'son', 'se', 'si', 'no',
+    'que', 'como', 'cual', 'donde', 'cuando', 'hay', 'mi',
+    'su', 'al', 'con', 'sin', 'sobre', 'entre', 'más', 'o',
+    'y', 'e', 'ni', 'pero',
+})
+
+_SUFFIXES = (
+    "aciones", "iciones", "amiento", "imiento",
+    "acion", "icion", "ando", "endo", "iendo",
+    "ador", "edor", "idor",
+    "ante", "ente", "iente",
+    "able", "ible",
+    "ción", "sión",
+    "idad", "edad",
+    "mente",
+    "amos", "emos", "imos",
+    "aron", "eron", "ieron",
+    "ando", "endo",
+    "ado", "ido",
+    "aba", "ían",
+    "ar", "er", "ir",
+    "as", "es", "os",
+    "an", "en",
+    "ón", "or", "al",
+    "o", "a",
+)
+
+# Boost por campo (BM25F): la pregunta funciona como título
+FIELD_BOOSTS: Dict[str, float] = {"question": 2.0, "keywords": 3.0, "answer": 1.0}
+PRIORITY_MULTIPLIERS: Dict[int, float] = {1: 1.0, 2: 1.2, 3: 1.5}
+CATEGORY_BOOST = 0.3
+
+_K1 = 1.2
+_B = 0.75
+
+
+def clean_text(text: str) -> str:
+    """Elimina signos de puntuación."""
+    return _PUNCTUATION.sub('', text).strip()
+
+
+@lru_cache(maxsize=65536)
+def stem_es(word: str) -> str:
+    """Stemmer mínimo para español: recorta el primer sufijo conocido."""
+    if len(word) <= 4:
+        return word
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[: -len(suffix)]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """Texto → stems sin stopwords, en orden de aparición (con repetidos)."""
+    return [stem_es(w) for w in clean_text(text.lower()).split() if w not in STOPWORDS]
+
+
+def _analyze(entry: KnowledgeEntry) -> Tuple[Tuple[Dict[str, int], int], ...]:
+    """({stem: tf}, longitud) de cada campo de una entrada, en el orden de FIELD_BOOSTS."""
+    texts = {
+        "question": entry.question or "",
+        "keywords": " ".join(entry.keywords or ()),
+        "answer": entry.answer or "",
+    }
+    analysis = []
+    for field_name in FIELD_BOOSTS:
+        tokens = tokenize(texts[field_name])
+        tf: Dict[str, int] = {}
+        for token in tokens:
+            tf[token] = tf.get(token, 0) + 1
+        analysis.append((tf, len(tokens)))
+    return tuple(analysis)
+
+
+class KnowledgeIndex:
+    """
+    Índice invertido BM25F sobre una lista de KnowledgeEntry.
+
+    Los doc ids son las posiciones en la lista original, de modo que los
+    empates se resuelven por orden de carga (prioridad DESC, id en BD).
+
+    Example:
+        >>> index = KnowledgeIndex(entries)
+        >>> index.search("¿cómo pido vacaciones?", top_k=3)
+        [(4.12, KnowledgeEntry(...)), ...]
+    """
+
+    __slots__ = (
+        "entries", "_postings", "_idf", "_doc_category", "_doc_multiplier",
+        "_category_docs", "_keyword_docs", "_analysis",
+    )
+
+    def __init__(
+        self,
+        entries: Iterable[KnowledgeEntry],
+        previous: Optional["KnowledgeIndex"] = None,
+    ) -> None:
+        """
+        Args:
+            entries: Entradas en orden de carga
+            previous: Índice anterior; las entradas que siguen siendo el mismo
+                objeto reutilizan su tokenización (recarga incremental)
+        """
+        self.entries: List[KnowledgeEntry] = list(entries)
+        n_docs = len(self.entries)
+
+        reusable: Dict[int, Tuple[Tuple[Dict[str, int], int], ...]] = {}
+        if previous is not None:
+            reusable = {
+                id(entry): analysis
+                for entry, analysis in zip(previous.entries, previous._analysis)
+            }
+
+        # Por doc: ({stem: tf}, longitud) para cada campo, en el orden de FIELD_BOOSTS
+        self._analysis: List[Tuple[Tuple[Dict[str, int], int], ...]] = []
+        self._doc_category: List[KnowledgeCategory] = []
+        self._doc_multiplier: List[float] = []
+        self._category_docs: Dict[KnowledgeCategory, List[int]] = defaultdict(list)
+        self._keyword_docs: Dict[str, List[int]] = defaultdict(list)
+
+        for doc_id, entry in enumerate(self.entries):
+            analysis = reusable.get(id(entry))
+            if analysis is None:
+                analysis = _analyze(entry)
+            self._analysis.append(analysis)
+
+            self._doc_category.append(entry.category)
+            self._doc_multiplier.append(PRIORITY_MULTIPLIERS.get(entry.priority, 1.0))
+            self._category_docs[entry.category].append(doc_id)
+            for keyword in {k.lower() for k in entry.keywords or ()}:
+                self._keyword_docs[keyword].append(doc_id)
+
+        # tf ponderado por campo y normalizado por longitud; el impacto
+        # BM25 (saturación k1) se precalcula, en query solo se multiplica por idf.
+        # idf y longitudes promedio son globales: las postings se re-ensamblan
+        # completas en cada construcción, solo la tokenización se reutiliza.
+        weighted: Dict[str, Dict[int, float]] = defaultdict(dict)
+        for field_pos, boost in enumerate(FIELD_BOOSTS.values()):
+            avg = (sum(a[field_pos][1] for a in self._analysis) / n_docs if n_docs else 0.0) or 1.0
+            for doc_id, analysis in enumerate(self._analysis):
+                tf, length = analysis[field_pos]
+                norm = 1.0 - _B + _B * length / avg
+                for term, count in tf.items():
+                    acc = weighted[term]
+                    acc[doc_id] = acc.get(doc_id, 0.0) + boost * count / norm
+
+        self._postings: Dict[str, Tuple[Tuple[int, ...], Tuple[float, ...]]] = {}
+        self._idf: Dict[str, float] = {}
+        for term, docs in weighted.items():
+            doc_ids = tuple(sorted(docs))
+            impacts = tuple(docs[d] * (_K1 + 1.0) / (docs[d] + _K1) for d in doc_ids)
+            self._postings[term] = (doc_ids, impacts)
+            df = len(doc_ids)
+            self._idf[term] = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+
+        # Particiones ordenadas por prioridad para get_entries_by_category
+        for docs in self._category_docs.values():
+            docs.sort(key=lambda d: -self.entries[d].priority)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @property
+    def vocabulary_size(self) -> int:
+        return len(self._postings)
+
+    def score_terms(
+        self,
+        terms: Iterable[str],
+        allowed_categories: Optional[frozenset] = None,
+    ) -> Dict[int, float]:
+        """
+        Acumula el score BM25F de los stems dados sobre las postings.
+
+        Args:
+            terms: Stems de la consulta (se ignoran repetidos)
+            allowed_categories: Si se indica, solo se puntúan entradas de estas categorías
+
+        Returns:
+            {doc_id: score} de las entradas con al menos un término en común
+        """
+        scores: Dict[int, float] = {}
+        doc_category = self._doc_category
+        for term in set(terms):
+            posting = self._postings.get(term)
+            if posting is None:
+                continue
+            idf = self._idf[term]
+            doc_ids, impacts = posting
+            if allowed_categories is None:
+                for doc_id, impact in zip(doc_ids, impacts):
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * impact
+            else:
+                for doc_id, impact in zip(doc_ids, impacts):
+                    if doc_category[doc_id] in allowed_categories:
+                        scores[doc_id] = scores.get(doc_id, 0.0) + idf * impact
+        return scores
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 3,
+        min_score: float = 0.1,
+        category_filter: Optional[KnowledgeCategory] = None,
+        allowed_categories: Optional[frozenset] = None,
+        boosts: Optional[Dict[int, float]] = None,
+    ) -> List[Tuple[float, KnowledgeEntry]]:
+        """
+        Busca las entradas más relevantes para una consulta.
+
+        Args:
+            query: Texto libre de la consulta
+            top_k: Máximo de resultados
+            min_score: Score mínimo (después de prioridad y boost de categoría)
+            category_filter: Categoría a favorecer con CATEGORY_BOOST
+            allowed_categories: Categorías visibles (filtro por rol); None = todas
+            boosts: Score adicional por doc_id (fusión híbrida con el índice vectorial);
+                quien lo calcula ya debe haber aplicado el filtro por rol
+
+        Returns:
+            Lista de (score, entry) ordenada por score descendente
+        """
+        scores = self.score_terms(tokenize(query), allowed_categories)
+
+        multiplier = self._doc_multiplier
+        for doc_id, score in scores.items():
+            scores[doc_id] = score * multiplier[doc_id]
+
+        if boosts:
+            for doc_id, boost in boosts.items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + boost
+
+        if category_filter is not None and (
+            allowed_categories is None or category_filter in allowed_categories
+        ):
+            for doc_id in self._category_docs.get(category_filter, ()):
+                scores[doc_id] = scores.get(doc_id, 0.0) + CATEGORY_BOOST
+
+        candidates = [(s, d) for d, s in scores.items() if s >= min_score]
+        best = heapq.nsmallest(top_k, candidates, key=lambda sd: (-sd[0], sd[1]))
+        return [(score, self.entries[doc_id]) for score, doc_id in best]
+
+    def entries_by_category(
+        self,
+        category: KnowledgeCategory,
+        allowed_categories: Optional[frozenset] = None,
+    ) -> List[KnowledgeEntry]:
+        """Entradas de una categoría ordenadas por prioridad descendente."""
+        if allowed_categories is not None and category not in allowed_categories:
+            return []
+        return [self.entries[d] for d in self._category_docs.get(category, ())]
+
+    def find_by_keywords(self, keywords: Iterable[str]) -> List[KnowledgeEntry]:
+        """Entradas con alguna keyword exacta (sin distinguir mayúsculas), en orden de carga."""
+        doc_ids: set = set()
+        for keyword in keywords:
+            doc_ids.update(self._keyword_docs.get(keyword.lower(), ()))
+        return [self.entries[d] for d in sorted(doc_ids)]
@@ -6,7 +6,8 @@ con fallback automático al código si hay errores de conexión.
 """
 import json
 import logging
-from typing import List, Optional, Dict, Any
+from datetime import datetime
+from typing import Iterable, List, Optional, Dict, Any, Set
 from src.infra.database.connection import DatabaseManager
 from .knowledge_entity import KnowledgeCategory, KnowledgeEntry
 
@@ -54,6 +55,7 @@ class KnowledgeRepository:
             e.keywords,
             e.related_commands,
             e.priority,
+            e.updated_at,
             c.name as category_name
         FROM abcmasplus.dbo.BotIAv2_knowledge_entries e
         INNER JOIN abcmasplus.dbo.BotIAv2_knowledge_categories c ON e.category_id = c.id
@@ -99,6 +101,7 @@ class KnowledgeRepository:
             e.keywords,
             e.related_commands,
             e.priority,
+            e.updated_at,
             c.name as category_name
         FROM abcmasplus.dbo.BotIAv2_knowledge_entries e
         INNER JOIN abcmasplus.dbo.BotIAv2_knowledge_categories c ON e.category_id = c.id
@@ -238,7 +241,9 @@ class KnowledgeRepository:
                 answer=row.get('answer', ''),
                 keywords=keywords,
                 related_commands=related_commands,
-                priority=row.get('priority', 1)
+                priority=row.get('priority', 1),
+                id=row.get('id'),
+                updated_at=row.get('updated_at'),
             )
 
         except Exception as e:
@@ -440,6 +445,10 @@ class KnowledgeRepository:
             # En caso de error, retornar lista vacía (acceso denegado)
             return []
 
+    def clear_role_permissions_cache(self) -> None:
+        """Olvidar los permisos por rol cacheados (se vuelven a consultar al pedirlos)."""
+        self._role_permissions_cache.clear()
+
     def get_all_entries_by_role(self, id_rol: Optional[int] = None) -> List[KnowledgeEntry]:
         """
         Obtener entradas de conocimiento filtradas por permisos de rol.
@@ -467,6 +476,7 @@ class KnowledgeRepository:
             e.keywords,
             e.related_commands,
             e.priority,
+            e.updated_at,
             c.name as category_name
         FROM abcmasplus.dbo.BotIAv2_knowledge_entries e
         INNER JOIN abcmasplus.dbo.BotIAv2_knowledge_categories c ON e.category_id = c.id
@@ -497,3 +507,118 @@ class KnowledgeRepository:
         except Exception as e:
             logger.error(f"Error al cargar entradas filtradas por rol {id_rol}: {e}")
             raise
+
+    # ------------------------------------------------------------------
+    # Recarga incremental (change tracking por updated_at)
+    # ------------------------------------------------------------------
+
+    _ENTRY_COLUMNS = """
+            e.id,
+            e.category_id,
+            e.question,
+            e.answer,
+            e.keywords,
+            e.related_commands,
+            e.priority,
+            e.updated_at,
+            c.name as category_name"""
+
+    _ROLE_JOIN = """
+        INNER JOIN abcmasplus.dbo.BotIAv2_RolesCategoriesKnowledge rc
+            ON c.id = rc.idCategoria
+            AND rc.idRol = ?
+            AND rc.permitido = 1
+            AND rc.activo = 1"""
+
+    _IDS_CHUNK = 1000  # SQL Server admite hasta 2100 parámetros por consulta
+
+    def get_entries_changed_since(
+        self,
+        since: datetime,
+        id_rol: Optional[int] = None,
+    ) -> List[KnowledgeEntry]:
+        """
+        Obtener entradas activas modificadas desde un high-water mark.
+
+        Usa `>=` para no perder filas con el mismo timestamp que la marca;
+        re-aplicar una entrada ya conocida es idempotente.
+
+        Args:
+            since: updated_at máximo de la carga anterior
+            id_rol: ID del rol del usuario (None = sin filtro de permisos)
+
+        Returns:
+            Entradas nuevas o modificadas (con id y updated_at)
+        """
+        role_join = self._ROLE_JOIN if id_rol is not None else ""
+        query = f"""
+        SELECT {self._ENTRY_COLUMNS}
+        FROM abcmasplus.dbo.BotIAv2_knowledge_entries e
+        INNER JOIN abcmasplus.dbo.BotIAv2_knowledge_categories c ON e.category_id = c.id
+        {role_join}
+        WHERE e.active = 1
+            AND c.active = 1
+            AND e.updated_at >= ?
+        """
+        params = (id_rol, since) if id_rol is not None else (since,)
+
+        try:
+            results = self.db_manager.execute_query(query, params)
+            return [entry for entry in map(self._row_to_entry, results) if entry]
+        except Exception as e:
+            logger.error(f"Error al cargar cambios de conocimiento desde {since}: {e}")
+            raise
+
+    def get_active_entry_ids(self, id_rol: Optional[int] = None) -> Set[int]:
+        """
+        Obtener los ids de todas las entradas visibles (activas, categoría activa y,
+        si se indica, permitidas para el rol).
+
+        Detecta bajas que el high-water mark no ve: DELETE físico, categoría
+        desactivada o permiso de rol revocado.
+        """
+        role_join = self._ROLE_JOIN if id_rol is not None else ""
+        query = f"""
+        SELECT e.id
+        FROM abcmasplus.dbo.BotIAv2_knowledge_entries e
+        INNER JOIN abcmasplus.dbo.BotIAv2_knowledge_categories c ON e.category_id = c.id
+        {role_join}
+        WHERE e.active = 1 AND c.active = 1
+        """
+        params = (id_rol,) if id_rol is not None else None
+
+        try:
+            results = self.db_manager.execute_query(query, params)
+            return {row['id'] for row in results}
+        except Exception as e:
+            logger.error(f"Error al obtener ids de conocimiento activos: {e}")
+            raise
+
+    def get_entries_by_ids(self, ids: Iterable[int]) -> List[KnowledgeEntry]:
+        """
+        Obtener entradas por id (p. ej. categoría reactivada sin cambio en updated_at).
+
+        Args:
+            ids: IDs a cargar; se consultan en bloques de _IDS_CHUNK
+
+        Returns:
+            Entradas encontradas
+        """
+        ids = sorted(ids)
+        entries: List[KnowledgeEntry] = []
+        for start in range(0, len(ids), self._IDS_CHUNK):
+            chunk = ids[start:start + self._IDS_CHUNK]
+            placeholders = ", ".join("?" for _ in chunk)
+            query = f"""
+            SELECT {self._ENTRY_COLUMNS}
+            FROM abcmasplus.dbo.BotIAv2_knowledge_entries e
+            INNER JOIN abcmasplus.dbo.BotIAv2_knowledge_categories c ON e.category_id = c.id
+            WHERE e.id IN ({placeholders})
+            """
+            try:
+                results = self.db_manager.execute_query(query, tuple(chunk))
+            except Exception as e:
+                logger.error(f"Error al cargar entradas por id: {e}")
+                raise
+            entries.extend(entry for entry in map(self._row_to_entry, results) if entry)
+        return entries
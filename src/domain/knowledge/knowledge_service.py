@@ -2,24 +2,76 @@
 Servicio de conocimiento empresarial.
 
 Proporciona búsqueda inteligente en la base de conocimiento
-usando keywords y scoring. Utiliza KnowledgeRepository para
-todo acceso a base de datos.
+usando un índice invertido BM25 (KnowledgeIndex) fusionado con un
+índice vectorial local de n-gramas (KnowledgeVectorIndex). Utiliza
+KnowledgeRepository para todo acceso a base de datos.
 """
 import logging
-from typing import List, Optional, Dict, Any
+import sys
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Dict, Any, Union
 from .knowledge_entity import KnowledgeEntry, KnowledgeCategory
+from .knowledge_index import (
+    PRIORITY_MULTIPLIERS,
+    STOPWORDS,
+    KnowledgeIndex,
+    clean_text,
+    stem_es,
+)
 from .knowledge_repository import KnowledgeRepository
+from .knowledge_vectors import NUMPY_AVAILABLE, KnowledgeVectorIndex
 from src.infra.database.connection import DatabaseManager
+from src.infra.observability import get_metrics
+from src.utils.ttl_cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
+_ROLE_PARTITIONS_MAX = 256
+_ROLE_PARTITIONS_TTL_SECONDS = 300
+
+
+class _KnowledgeSnapshot:
+    """
+    Estado inmutable de la base cargada.
+
+    Índice léxico, índice vectorial y high-water mark viajan juntos: una
+    recarga construye un snapshot nuevo y lo publica con una sola asignación,
+    así una búsqueda concurrente siempre ve los tres consistentes.
+    """
+
+    __slots__ = ("index", "vectors", "high_water_mark", "version", "by_id")
+
+    def __init__(
+        self,
+        index: KnowledgeIndex,
+        vectors: Optional[KnowledgeVectorIndex] = None,
+        version: int = 0,
+    ) -> None:
+        self.index = index
+        self.vectors = vectors
+        self.version = version
+        self.by_id: Dict[int, KnowledgeEntry] = {
+            e.id: e for e in index.entries if e.id is not None
+        }
+        stamps = [e.updated_at for e in index.entries if e.updated_at is not None]
+        # Sin ids o sin updated_at no hay forma de pedir solo los cambios
+        self.high_water_mark: Optional[datetime] = (
+            max(stamps)
+            if stamps and len(self.by_id) == len(index.entries) == len(stamps)
+            else None
+        )
+
 
 class KnowledgeService:
     """
     Servicio de conocimiento empresarial.
 
     Lee desde base de datos (abcmasplus) a través de KnowledgeRepository.
-    Proporciona búsqueda por keywords y scoring inteligente.
+    Las entradas se indexan al cargar (y en cada recarga); las búsquedas
+    recorren solo las postings de los términos de la consulta y suman la
+    similitud vectorial de las entradas más cercanas (fusión híbrida).
 
     Examples:
         >>> service = KnowledgeService()
@@ -27,9 +79,52 @@ class KnowledgeService:
         >>> print(results[0].answer)
     """
 
-    def __init__(self, db_manager: Optional[DatabaseManager] = None, id_rol: Optional[int] = None):
+    def __init__(
+        self,
+        db_manager: Optional[DatabaseManager] = None,
+        id_rol: Optional[int] = None,
+        vector_index_path: Optional[Union[str, Path]] = None,
+        enable_vectors: bool = True,
+        vector_weight: float = 4.0,
+        min_similarity: float = 0.3,
+        search_cache_size: int = 2048,
+        search_cache_ttl_seconds: float = 3600,
+    ):
+        """
+        Args:
+            db_manager: Gestor de base de datos
+            id_rol: Si se indica, solo se cargan entradas permitidas para el rol
+            vector_index_path: Archivo .npz del índice vectorial (None = solo en memoria)
+            enable_vectors: Usar fusión híbrida léxico + vectorial (requiere NumPy)
+            vector_weight: Peso de la similitud coseno al sumarla al score BM25
+            min_similarity: Similitud mínima para que una entrada reciba aporte vectorial
+            search_cache_size: Máximo de resultados de búsqueda cacheados
+            search_cache_ttl_seconds: TTL de cada resultado (el versionado ya invalida en recargas)
+        """
         self.repository = KnowledgeRepository(db_manager)
-        self.knowledge_base = []
+        self.vector_index_path = vector_index_path
+        self.enable_vectors = enable_vectors and NUMPY_AVAILABLE
+        self.vector_weight = vector_weight
+        self.min_similarity = min_similarity
+        self._snapshot = _KnowledgeSnapshot(KnowledgeIndex([]))
+        self._reload_lock = threading.Lock()
+        self._refresh_stop = threading.Event()
+        self._refresh_thread: Optional[threading.Thread] = None
+        # Partición de categorías por rol: acotada y con vida propia para que un cambio
+        # de permisos se vea aunque no haya recarga periódica (cada recarga la vacía)
+        self._role_categories: TTLCache[int, frozenset] = TTLCache(
+            max_entries=_ROLE_PARTITIONS_MAX,
+            ttl_seconds=_ROLE_PARTITIONS_TTL_SECONDS,
+            name="knowledge_role_categories",
+        )
+        # Las entradas cacheadas son las del snapshot (compartidas): solo la tupla es propia
+        self._search_cache: TTLCache[tuple, tuple] = TTLCache(
+            max_entries=search_cache_size,
+            ttl_seconds=search_cache_ttl_seconds,
+            sizer=sys.getsizeof,
+            name="knowledge_search",
+        )
+        get_metrics().register_cache("knowledge_search", self._search_cache.stats)
         self.source = "unknown"
         self.id_rol = id_rol
 
@@ -58,40 +153,54 @@ class KnowledgeService:
             self.source = "none"
             raise RuntimeError(f"Base de datos no disponible y fallback deshabilitado: {e}")
 
-    @staticmethod
-    def _clean_text(text: str) -> str:
-        import re
-        return re.sub(r'[¿?¡!.,;:\-\'"(){}[\]]', '', text).strip()
-
-    @staticmethod
-    def _stem_es(word: str) -> str:
-        if len(word) <= 4:
-            return word
-        for suffix in (
-            "aciones", "iciones", "amiento", "imiento",
-            "acion", "icion", "ando", "endo", "iendo",
-            "ador", "edor", "idor",
-            "ante", "ente", "iente",
-            "able", "ible",
-            "ción", "sión",
-            "idad", "edad",
-            "mente",
-            "amos", "emos", "imos",
-            "aron", "eron", "ieron",
-            "ando", "endo",
-            "ado", "ido",
-            "aba", "ían",
-            "ar", "er", "ir",
-            "as", "es", "os",
-            "an", "en",
-            "ón", "or", "al",
-            "o", "a",
-        ):
-            if word.endswith(suffix) and len(word) - len(suffix) >= 3:
-                return word[: -len(suffix)]
-        return word
+    @property
+    def knowledge_base(self) -> List[KnowledgeEntry]:
+        return self._snapshot.index.entries
+
+    @knowledge_base.setter
+    def knowledge_base(self, entries: List[KnowledgeEntry]) -> None:
+        with self._reload_lock:
+            self._publish(entries)
+
+    @property
+    def _index(self) -> KnowledgeIndex:
+        return self._snapshot.index
+
+    @property
+    def _vectors(self) -> Optional[KnowledgeVectorIndex]:
+        return self._snapshot.vectors
+
+    def _publish(self, entries: List[KnowledgeEntry]) -> None:
+        """
+        Construye un snapshot nuevo a partir del anterior y lo publica.
+
+        La construcción ocurre fuera de la vista de las búsquedas: siguen usando
+        el snapshot anterior hasta la asignación final. Las entradas que no
+        cambiaron (mismo objeto / mismo contenido) reutilizan tokenización y vector.
+        """
+        previous = self._snapshot
+        index = KnowledgeIndex(entries, previous=previous.index)
+        vectors = None
+        if self.enable_vectors:
+            try:
+                vectors = KnowledgeVectorIndex.build(
+                    index.entries, previous=previous.vectors, cache_path=self.vector_index_path
+                )
+            except Exception as e:
+                logger.warning(f"Índice vectorial no disponible, se usa solo búsqueda léxica: {e}")
+        self._snapshot = _KnowledgeSnapshot(index, vectors, version=previous.version + 1)
+        # Las claves incluyen la versión: esto solo libera memoria antes que el LRU
+        self._search_cache.clear()
+
+    _clean_text = staticmethod(clean_text)
+    _stem_es = staticmethod(stem_es)
 
     def _calculate_score(self, query: str, entry: KnowledgeEntry) -> float:
+        """
+        Score lineal de una entrada (referencia para comparar con el índice).
+
+        Re-stemmiza la entrada en cada llamada; search() usa KnowledgeIndex.
+        """
         score = 0.0
         query_words = set(query.split())
         query_stems = {self._stem_es(w) for w in query_words}
@@ -106,17 +215,8 @@ class KnowledgeService:
         clean_question = self._clean_text(entry.question.lower())
         question_words = set(clean_question.split())
 
-        stopwords = {
-            'qué', 'cómo', 'cuál', 'dónde', 'cuándo', 'cuántos',
-            'por', 'para', 'el', 'la', 'los', 'las', 'de', 'del',
-            'en', 'a', 'un', 'una', 'es', 'son', 'se', 'si', 'no',
-            'que', 'como', 'cual', 'donde', 'cuando', 'hay', 'mi',
-            'su', 'al', 'con', 'sin', 'sobre', 'entre', 'más', 'o',
-            'y', 'e', 'ni', 'pero',
-        }
-
-        meaningful_query = query_words - stopwords
-        meaningful_question = question_words - stopwords
+        meaningful_query = query_words - STOPWORDS
+        meaningful_question = question_words - STOPWORDS
         common_words = meaningful_query & meaningful_question
         score += len(common_words) * 0.3
 
@@ -124,8 +224,7 @@ class KnowledgeService:
         remaining_question_stems = {self._stem_es(w) for w in meaningful_question - common_words}
         score += len(remaining_query_stems & remaining_question_stems) * 0.3
 
-        priority_multipliers = {1: 1.0, 2: 1.2, 3: 1.5}
-        score *= priority_multipliers.get(entry.priority, 1.0)
+        score *= PRIORITY_MULTIPLIERS.get(entry.priority, 1.0)
 
         return score
 
@@ -158,29 +257,99 @@ class KnowledgeService:
         query: str,
         top_k: int = 3,
         min_score: float = 0.1,
-        category_filter: Optional[KnowledgeCategory] = None
+        category_filter: Optional[KnowledgeCategory] = None,
+        id_rol: Optional[int] = None,
     ) -> List[KnowledgeEntry]:
+        """
+        Buscar entradas relevantes con el índice BM25.
+
+        Args:
+            query: Consulta en lenguaje natural
+            top_k: Máximo de resultados
+            min_score: Score mínimo de relevancia
+            category_filter: Categoría a favorecer (+0.3)
+            id_rol: Si se indica, solo entradas de categorías permitidas para el rol
+
+        Returns:
+            Entradas ordenadas por relevancia
+        """
         query_lower = self._clean_text(query.lower())
+        allowed = self._allowed_categories(id_rol)
+        snapshot = self._snapshot
 
         category_from_query = self._detect_category_in_query(query_lower)
         if category_from_query and not category_filter:
             logger.info(f"Detectada pregunta sobre categoría: {category_from_query.value}")
-            return self.get_entries_by_category(category_from_query, top_k=top_k)
-
-        scored_entries = []
-        for entry in self.knowledge_base:
-            score = self._calculate_score(query_lower, entry)
-            if category_filter and entry.category == category_filter:
-                score += 0.3
-            if score >= min_score:
-                scored_entries.append((score, entry))
-
-        scored_entries.sort(reverse=True, key=lambda x: x[0])
-        results = [entry for _, entry in scored_entries[:top_k]]
+            return snapshot.index.entries_by_category(category_from_query, allowed)[:top_k]
+
+        cache_key = (
+            snapshot.version,
+            self._normalized_terms(query_lower),
+            allowed,
+            top_k,
+            min_score,
+            category_filter,
+        )
+        cached = self._search_cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
+
+        scored = snapshot.index.search(
+            query_lower,
+            top_k=top_k,
+            min_score=min_score,
+            category_filter=category_filter,
+            allowed_categories=allowed,
+            boosts=self._vector_boosts(snapshot.vectors, query_lower, top_k, allowed),
+        )
+        results = [entry for _, entry in scored]
+        self._search_cache.set(cache_key, tuple(results))
 
         logger.debug(f"Búsqueda: '{query_lower[:50]}' → {len(results)} resultados")
         return results
 
+    @staticmethod
+    def _normalized_terms(query_lower: str) -> tuple:
+        """
+        Clave de cache de una consulta: palabras sin stopwords, ordenadas.
+
+        Ambos índices tratan la consulta como bolsa de palabras (el léxico por
+        stems, el vectorial por n-gramas de cada palabra), así que el orden y
+        las stopwords no cambian el resultado; las repeticiones sí se conservan.
+        """
+        return tuple(sorted(w for w in query_lower.split() if w not in STOPWORDS))
+
+    def _vector_boosts(
+        self,
+        vectors: Optional[KnowledgeVectorIndex],
+        query: str,
+        top_k: int,
+        allowed: Optional[frozenset],
+    ) -> Optional[Dict[int, float]]:
+        """Aporte vectorial por doc_id de las entradas más similares a la consulta."""
+        if vectors is None:
+            return None
+        return {
+            doc_id: self.vector_weight * similarity
+            for doc_id, similarity in vectors.search(query, top_k=max(top_k * 4, 10), allowed_categories=allowed)
+            if similarity >= self.min_similarity
+        }
+
+    def _allowed_categories(self, id_rol: Optional[int]) -> Optional[frozenset]:
+        """Partición de categorías visibles para un rol (None = sin filtro)."""
+        if id_rol is None:
+            return None
+        allowed = self._role_categories.get(id_rol)
+        if allowed is None:
+            categories = self.repository.get_categories()
+            allowed = frozenset(
+                categories[cid]
+                for cid in self.repository.get_allowed_categories_by_role(id_rol)
+                if cid in categories
+            )
+            self._role_categories.set(id_rol, allowed)
+        return allowed
+
     def get_context_for_llm(self, query: str, top_k: int = 2, include_metadata: bool = True) -> str:
         relevant = self.search(query, top_k=top_k)
         if not relevant:
@@ -201,19 +370,13 @@ class KnowledgeService:
         return context
 
     def get_entries_by_category(self, category: KnowledgeCategory, top_k: int = 5) -> List[KnowledgeEntry]:
-        entries = [e for e in self.knowledge_base if e.category == category]
-        entries.sort(key=lambda e: e.priority, reverse=True)
-        return entries[:top_k]
+        return self._index.entries_by_category(category)[:top_k]
 
     def get_all_categories(self) -> List[KnowledgeCategory]:
         return KnowledgeCategory.get_all()
 
     def find_by_keywords(self, keywords: List[str]) -> List[KnowledgeEntry]:
-        matching = []
-        for entry in self.knowledge_base:
-            if any(kw.lower() in [k.lower() for k in entry.keywords] for kw in keywords):
-                matching.append(entry)
-        return matching
+        return self._index.find_by_keywords(keywords)
 
     def get_high_priority_entries(self) -> List[KnowledgeEntry]:
         return [e for e in self.knowledge_base if e.priority >= 2]
@@ -229,22 +392,124 @@ class KnowledgeService:
             stats['priority_distribution'][entry.priority] += 1
         return stats
 
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Hits, misses y tamaño del cache de resultados de búsqueda."""
+        return {**self._search_cache.stats(), "version": self._snapshot.version}
+
     def get_source(self) -> str:
         return self.source
 
-    def reload_from_database(self) -> bool:
-        try:
-            if self.repository.health_check():
-                entries = self.repository.get_all_entries()
-                if entries:
-                    self.knowledge_base = entries
-                    self.source = "database"
-                    logger.info(f"✅ Conocimiento recargado desde BD: {len(entries)} entradas")
-                    return True
-            return False
-        except Exception as e:
-            logger.error(f"Error al recargar desde BD: {e}")
-            return False
+    def reload_from_database(self, full: bool = False) -> bool:
+        """
+        Recargar la base de conocimiento desde BD.
+
+        Si el snapshot actual tiene high-water mark, solo pide las entradas
+        modificadas desde entonces y los ids vigentes (para detectar bajas),
+        y aplica el delta sobre las entradas en memoria. Sin marca (entradas
+        sin id/updated_at) o con full=True, recarga todo.
+
+        Args:
+            full: Forzar recarga completa
+
+        Returns:
+            True si la base quedó actualizada (con o sin cambios)
+        """
+        with self._reload_lock:
+            try:
+                if not self.repository.health_check():
+                    return False
+
+                # Permisos de rol: pueden cambiar sin que cambie ninguna entrada
+                self.repository.clear_role_permissions_cache()
+                self._role_categories.clear()
+
+                snapshot = self._snapshot
+                if not full and snapshot.high_water_mark is not None:
+                    # Los métodos de delta lanzan si fallan: [] es "se borró todo", no un error
+                    entries = self._load_delta(snapshot)
+                    if entries is None:
+                        logger.debug("Conocimiento sin cambios desde la última recarga")
+                        return True
+                else:
+                    if self.id_rol is not None:
+                        entries = self.repository.get_all_entries_by_role(self.id_rol)
+                    else:
+                        entries = self.repository.get_all_entries()
+                    # La carga completa devuelve [] también si falla: conservar el snapshot
+                    if not entries:
+                        return False
+
+                self._publish(entries)
+                self.source = "database"
+                logger.info(f"✅ Conocimiento recargado desde BD: {len(entries)} entradas")
+                return True
+            except Exception as e:
+                logger.error(f"Error al recargar desde BD: {e}")
+                return False
+
+    def _load_delta(self, snapshot: _KnowledgeSnapshot) -> Optional[List[KnowledgeEntry]]:
+        """
+        Aplica los cambios en BD sobre las entradas del snapshot.
+
+        Returns:
+            Lista completa de entradas resultante, o None si no hubo cambios
+        """
+        changed = self.repository.get_entries_changed_since(snapshot.high_water_mark, self.id_rol)
+        current_ids = self.repository.get_active_entry_ids(self.id_rol)
+
+        by_id = dict(snapshot.by_id)
+        removed = by_id.keys() - current_ids
+        # `>=` sobre la marca re-trae las filas del borde: ignorar las que no cambiaron
+        updated = {
+            e.id: e for e in changed
+            if e.id in current_ids and by_id.get(e.id) != e
+        }
+        # Visibles sin cambio en updated_at: categoría reactivada o permiso de rol otorgado
+        missing = current_ids - by_id.keys() - updated.keys()
+        if missing:
+            updated.update((e.id, e) for e in self.repository.get_entries_by_ids(missing))
+
+        if not removed and not updated:
+            return None
+
+        for entry_id in removed:
+            del by_id[entry_id]
+        by_id.update(updated)
+        logger.info(
+            f"Delta de conocimiento: {len(updated)} nuevas/modificadas, {len(removed)} eliminadas"
+        )
+        # Mismo orden que la carga completa: prioridad DESC, id
+        return sorted(by_id.values(), key=lambda e: (-e.priority, e.id))
+
+    def start_auto_refresh(self, interval_seconds: float = 60.0) -> None:
+        """
+        Inicia un thread daemon que aplica reload_from_database() periódicamente.
+
+        Las búsquedas nunca esperan a la recarga: el snapshot nuevo se publica
+        al terminar de construirse.
+        """
+        if self._refresh_thread is not None and self._refresh_thread.is_alive():
+            return
+        self._refresh_stop.clear()
+        self._refresh_thread = threading.Thread(
+            target=self._refresh_loop,
+            args=(interval_seconds,),
+            name="knowledge-refresh",
+            daemon=True,
+        )
+        self._refresh_thread.start()
+        logger.info(f"Recarga periódica de conocimiento cada {interval_seconds}s")
+
+    def stop_auto_refresh(self, timeout: float = 5.0) -> None:
+        """Detiene el thread de recarga periódica."""
+        self._refresh_stop.set()
+        if self._refresh_thread is not None:
+            self._refresh_thread.join(timeout)
+            self._refresh_thread = None
+
+    def _refresh_loop(self, interval_seconds: float) -> None:
+        while not self._refresh_stop.wait(interval_seconds):
+            self.reload_from_database()
 
     def __repr__(self) -> str:
         role_info = f", role={self.id_rol}" if self.id_rol is not None else ""
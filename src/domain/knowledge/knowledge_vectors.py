@@ -0,0 +1,291 @@
+"""
+Índice vectorial local (sin modelo) para la base de conocimiento.
+
+Complementa al índice léxico BM25 con similitud por n-gramas de caracteres,
+que tolera variaciones que el stemmer no cubre: acentos omitidos
+("nomina"), errores de tipeo ("contrasena", "vacasiones") y flexiones
+("reembolsar" vs "reembolso").
+
+Embedding:
+- Texto normalizado (minúsculas, sin acentos ni puntuación, sin stopwords)
+- n-gramas de caracteres 3..5 por palabra, hasheados con signo (crc32)
+  a N_FEATURES buckets
+- Proyección aleatoria gaussiana fija (semilla) a DIM dimensiones y
+  normalización L2, así la similitud coseno es un producto punto
+
+La búsqueda es un producto matriz-vector en NumPy más argpartition para
+el top-k. Los vectores se persisten en disco (.npz) indexados por hash del
+contenido de cada entrada: el arranque solo embebe entradas nuevas o
+modificadas, y una recarga reutiliza los vectores del índice anterior.
+
+NumPy es opcional: si no está instalado, KnowledgeService usa solo el
+índice léxico.
+"""
+import hashlib
+import json
+import logging
+import os
+import unicodedata
+import zlib
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .knowledge_entity import KnowledgeCategory, KnowledgeEntry
+from .knowledge_index import STOPWORDS, clean_text
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:  # pragma: no cover - numpy llega como dependencia de langchain
+    np = None  # type: ignore[assignment]
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+N_FEATURES = 4096
+DIM = 256
+NGRAM_RANGE = (3, 5)
+SEED = 20240601
+ANSWER_CHARS = 300      # la respuesta aporta contexto, pero sin diluir pregunta y keywords
+ANSWER_WEIGHT = 0.5
+_FORMAT_VERSION = 1
+_CHUNK = 2048
+_CATEGORIES: List[KnowledgeCategory] = list(KnowledgeCategory)
+
+
+# Tabla de traducción para quitar acentos (á→a, ñ→n, ü→u) sin recorrer carácter por carácter
+_FOLD_ACCENTS = {
+    ord(c): unicodedata.normalize("NFKD", c)[0]
+    for c in map(chr, range(0xC0, 0x250))
+    if unicodedata.normalize("NFKD", c)[0] != c
+}
+_STOPWORDS_FOLDED = frozenset(w.translate(_FOLD_ACCENTS) for w in STOPWORDS)
+
+
+def _normalize(text: str) -> List[str]:
+    text = clean_text(text.lower()).translate(_FOLD_ACCENTS)
+    return [w for w in text.split() if w not in _STOPWORDS_FOLDED]
+
+
+@lru_cache(maxsize=65536)
+def _word_features(word: str) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Buckets y signos de los n-gramas de una palabra; el vocabulario se repite mucho."""
+    lo, hi = NGRAM_RANGE
+    padded = f" {word} "
+    hashes = [
+        zlib.crc32(padded[i:i + n].encode("utf-8"))
+        for n in range(lo, hi + 1)
+        for i in range(len(padded) - n + 1)
+    ]
+    buckets = np.array([h % N_FEATURES for h in hashes], dtype=np.int64)
+    signs = np.array([1.0 if h & 0x80000000 else -1.0 for h in hashes], dtype=np.float32)
+    return buckets, signs
+
+
+_Features = Tuple["np.ndarray", "np.ndarray"]
+
+
+def _text_features(text: str, weight: float) -> List[_Features]:
+    parts = []
+    for word in _normalize(text):
+        buckets, signs = _word_features(word)
+        parts.append((buckets, signs * weight if weight != 1.0 else signs))
+    return parts
+
+
+def _entry_features(entry: KnowledgeEntry) -> List[_Features]:
+    return (
+        _text_features(f"{entry.question} {' '.join(entry.keywords or ())}", 1.0)
+        + _text_features((entry.answer or "")[:ANSWER_CHARS], ANSWER_WEIGHT)
+    )
+
+
+def entry_key(entry: KnowledgeEntry) -> str:
+    """Hash del contenido que determina el vector de una entrada."""
+    payload = "\x1f".join((
+        entry.question or "",
+        "|".join(entry.keywords or ()),
+        (entry.answer or "")[:ANSWER_CHARS],
+    ))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _params() -> str:
+    return json.dumps({
+        "version": _FORMAT_VERSION, "n_features": N_FEATURES, "dim": DIM,
+        "ngram_range": list(NGRAM_RANGE), "seed": SEED,
+        "answer_chars": ANSWER_CHARS, "answer_weight": ANSWER_WEIGHT,
+    }, sort_keys=True)
+
+
+_projection_cache: list = []
+
+
+def _projection() -> "np.ndarray":
+    if not _projection_cache:
+        rng = np.random.default_rng(SEED)
+        matrix = rng.standard_normal((N_FEATURES, DIM), dtype=np.float32) / np.sqrt(DIM)
+        _projection_cache.append(matrix.astype(np.float32))
+    return _projection_cache[0]
+
+
+def _embed_features(rows: Sequence[List[_Features]]) -> "np.ndarray":
+    projection = _projection()
+    out = np.empty((len(rows), DIM), dtype=np.float32)
+    for start in range(0, len(rows), _CHUNK):
+        chunk = rows[start:start + _CHUNK]
+        # Índice plano fila*N_FEATURES + bucket: un solo bincount arma la matriz hasheada
+        flat_idx, flat_val = [], []
+        for i, parts in enumerate(chunk):
+            offset = i * N_FEATURES
+            for buckets, values in parts:
+                flat_idx.append(buckets + offset)
+                flat_val.append(values)
+        hashed = np.zeros(len(chunk) * N_FEATURES, dtype=np.float32)
+        if flat_idx:
+            hashed = np.bincount(
+                np.concatenate(flat_idx), weights=np.concatenate(flat_val),
+                minlength=len(chunk) * N_FEATURES,
+            ).astype(np.float32)
+        out[start:start + len(chunk)] = hashed.reshape(len(chunk), N_FEATURES) @ projection
+    norms = np.linalg.norm(out, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return out / norms
+
+
+def embed_query(query: str) -> "np.ndarray":
+    """Vector normalizado de una consulta."""
+    return _embed_features([_text_features(query, 1.0)])[0]
+
+
+class KnowledgeVectorIndex:
+    """
+    Matriz de embeddings alineada con KnowledgeIndex (mismo doc_id = misma posición).
+
+    Example:
+        >>> vectors = KnowledgeVectorIndex.build(entries, cache_path=".cache/knowledge_vectors.npz")
+        >>> vectors.search("contrasena del erp", top_k=5)
+        [(3, 0.71), (6, 0.22), ...]
+    """
+
+    __slots__ = ("keys", "matrix", "_category_codes", "embedded", "reused")
+
+    def __init__(
+        self,
+        keys: List[str],
+        matrix: "np.ndarray",
+        categories: Sequence[KnowledgeCategory],
+        embedded: int = 0,
+        reused: int = 0,
+    ) -> None:
+        self.keys = keys
+        self.matrix = matrix
+        self._category_codes = np.array(
+            [_CATEGORIES.index(c) for c in categories], dtype=np.int16
+        )
+        self.embedded = embedded
+        self.reused = reused
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @classmethod
+    def build(
+        cls,
+        entries: Sequence[KnowledgeEntry],
+        previous: Optional["KnowledgeVectorIndex"] = None,
+        cache_path: Optional[Union[str, Path]] = None,
+    ) -> "KnowledgeVectorIndex":
+        """
+        Construye el índice reutilizando vectores ya calculados.
+
+        Args:
+            entries: Entradas en el mismo orden que KnowledgeIndex
+            previous: Índice anterior en memoria (recarga incremental)
+            cache_path: Archivo .npz para cargar/persistir vectores (None = sin disco)
+
+        Returns:
+            Índice nuevo; solo se embeben las entradas cuyo contenido no se conocía
+        """
+        known: Dict[str, "np.ndarray"] = {}
+        if previous is not None:
+            known.update(zip(previous.keys, previous.matrix))
+        elif cache_path:
+            known.update(_load(cache_path))
+
+        keys = [entry_key(e) for e in entries]
+        missing = [i for i, k in enumerate(keys) if k not in known]
+        matrix = np.empty((len(entries), DIM), dtype=np.float32)
+        if missing:
+            matrix[missing] = _embed_features([_entry_features(entries[i]) for i in missing])
+        for i, key in enumerate(keys):
+            if key in known:
+                matrix[i] = known[key]
+
+        index = cls(
+            keys, matrix, [e.category for e in entries],
+            embedded=len(missing), reused=len(entries) - len(missing),
+        )
+        if cache_path and (missing or len(known) != len(set(keys))):
+            index.save(cache_path)
+        logger.info(
+            f"Índice vectorial de conocimiento: {len(entries)} entradas "
+            f"({index.embedded} embebidas, {index.reused} reutilizadas)"
+        )
+        return index
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 10,
+        allowed_categories: Optional[Iterable[KnowledgeCategory]] = None,
+    ) -> List[Tuple[int, float]]:
+        """
+        Top-k por similitud coseno.
+
+        Args:
+            query: Texto de la consulta
+            top_k: Máximo de resultados
+            allowed_categories: Categorías visibles (filtro por rol); None = todas
+
+        Returns:
+            Lista de (doc_id, similitud) ordenada de mayor a menor
+        """
+        if not len(self.keys) or top_k <= 0:
+            return []
+        sims = self.matrix @ embed_query(query)
+        if allowed_categories is not None:
+            codes = [_CATEGORIES.index(c) for c in allowed_categories]
+            sims = np.where(np.isin(self._category_codes, codes), sims, -np.inf)
+        k = min(top_k, len(sims))
+        top = np.argpartition(-sims, k - 1)[:k]
+        top = top[np.argsort(-sims[top], kind="stable")]
+        return [(int(i), float(sims[i])) for i in top if np.isfinite(sims[i])]
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Persiste keys y vectores de forma atómica (tmp + rename)."""
+        path = Path(path)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(path.name + ".tmp")
+            with open(tmp, "wb") as f:
+                np.savez(f, keys=np.array(self.keys), vectors=self.matrix, params=np.array(_params()))
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"No se pudo persistir el índice vectorial en {path}: {e}")
+
+
+def _load(path: Union[str, Path]) -> Dict[str, "np.ndarray"]:
+    path = Path(path)
+    if not path.exists():
+        return {}
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            if str(data["params"]) != _params():
+                logger.info("Índice vectorial en disco con otros parámetros, se reconstruye")
+                return {}
+            return dict(zip(data["keys"].tolist(), data["vectors"]))
+    except (OSError, KeyError, ValueError) as e:
+        logger.warning(f"Índice vectorial en disco ilegible ({path}): {e}")
+        return {}
@@ -9,6 +9,8 @@ from datetime import UTC, datetime
 from typing import Any, Optional
 
 from src.domain.memory.memory_entity import DatabaseManager, UserProfile
+from src.infra.observability import get_metrics
+from src.utils.ttl_cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
@@ -16,14 +18,32 @@ logger = logging.getLogger(__name__)
 class MemoryRepository:
     """Repository para acceso a memoria de usuarios."""
 
-    def __init__(self, db_manager: Optional[DatabaseManager] = None):
+    def __init__(
+        self,
+        db_manager: Optional[DatabaseManager] = None,
+        profile_cache_size: int = 5000,
+        profile_cache_ttl_seconds: int = 300,
+        profile_cache_max_bytes: Optional[int] = 16 * 1024 * 1024,
+    ):
         self.db_manager = db_manager
-        self._profiles_cache: dict[str, UserProfile] = {}
-        logger.info("MemoryRepository inicializado")
+        # LRU acotado con TTL: los perfiles que otros procesos actualizan
+        # se recargan al vencer el TTL y la memoria no crece con cada usuario visto.
+        self._profiles_cache: TTLCache[str, UserProfile] = TTLCache(
+            max_entries=profile_cache_size,
+            ttl_seconds=profile_cache_ttl_seconds,
+            max_bytes=profile_cache_max_bytes,
+            name="memory_profiles",
+        )
+        get_metrics().register_cache("memory_profiles", self._profiles_cache.stats)
+        logger.info(
+            f"MemoryRepository inicializado (profile_cache={profile_cache_size}, "
+            f"ttl={profile_cache_ttl_seconds}s)"
+        )
 
     async def get_profile(self, user_id: str) -> Optional[UserProfile]:
-        if user_id in self._profiles_cache:
-            return self._profiles_cache[user_id]
+        cached = self._profiles_cache.get(user_id)
+        if cached is not None:
+            return cached
 
         if not self.db_manager:
             return None
@@ -74,7 +94,7 @@ class MemoryRepository:
                 direccion_ids=direccion_ids,
             )
 
-            self._profiles_cache[user_id] = profile
+            self._profiles_cache.set(user_id, profile)
             return profile
 
         except Exception as e:
@@ -83,7 +103,7 @@ class MemoryRepository:
 
     async def save_profile(self, profile: UserProfile) -> bool:
         if not self.db_manager:
-            self._profiles_cache[profile.user_id] = profile
+            self._profiles_cache.set(profile.user_id, profile)
             return True
 
         try:
@@ -105,7 +125,7 @@ class MemoryRepository:
                 "summary": profile.long_term_summary,
                 "count": profile.interaction_count,
             })
-            self._profiles_cache[profile.user_id] = profile
+            self._profiles_cache.set(profile.user_id, profile)
             return True
 
         except Exception as e:
@@ -179,7 +199,11 @@ class MemoryRepository:
         return profile.interaction_count
 
     def invalidate_cache(self, user_id: str) -> None:
-        self._profiles_cache.pop(user_id, None)
+        self._profiles_cache.pop(user_id)
 
     def clear_cache(self) -> None:
         self._profiles_cache.clear()
+
+    def get_cache_stats(self) -> dict[str, Any]:
+        """Hits, misses, evicciones y tamaño del cache de perfiles."""
+        return self._profiles_cache.stats()
@@ -5,15 +5,15 @@ Coordina MemoryRepository y construcción de contexto con caching.
 Absorbe la lógica de ContextBuilder.
 """
 
-import asyncio
 import logging
-from collections import OrderedDict
 from datetime import UTC, datetime
 from typing import Any, Optional
 
-from src.agents.base.events import UserContext
-from src.domain.memory.memory_entity import CacheEntry, UserProfile
+from src.agents.base.events import LightUserContext, UserContext
+from src.domain.memory.memory_entity import UserProfile
 from src.domain.memory.memory_repository import MemoryRepository
+from src.infra.observability import get_metrics
+from src.utils.ttl_cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
@@ -26,7 +26,10 @@ class MemoryService:
     - Obtener contexto de usuario con caching
     - Registrar interacciones
     - Actualizar resúmenes de memoria a largo plazo
-    - Construir UserContext (absorbe ContextBuilder)
+    - Construir el contexto del request (absorbe ContextBuilder)
+
+    El contexto del hot path es un LightUserContext (slotted, bloques de prompt
+    memoizados); usar to_model() si se necesita el UserContext pydantic.
     """
 
     def __init__(
@@ -36,16 +39,24 @@ class MemoryService:
         cache_ttl_seconds: int = 300,
         max_cache_size: int = 1000,
         max_working_memory: int = 10,
+        max_cache_bytes: Optional[int] = None,
     ):
         self.repository = repository or MemoryRepository()
         self._permission_service = permission_service
         self.cache_ttl_seconds = cache_ttl_seconds
         self.max_cache_size = max_cache_size
+        self.max_cache_bytes = max_cache_bytes
         self.max_working_memory = max_working_memory
-        self._cache: OrderedDict[str, CacheEntry] = OrderedDict()
-        self._lock = asyncio.Lock()
-        self._cache_hits = 0
-        self._cache_misses = 0
+        # Expiración por heap (O(log n)) y LRU O(1) — ver src/utils/ttl_cache.py
+        self._cache: TTLCache[str, LightUserContext] = TTLCache(
+            max_entries=max_cache_size,
+            ttl_seconds=cache_ttl_seconds,
+            max_bytes=max_cache_bytes,
+            name="memory_context",
+        )
+        get_metrics().register_cache("memory_context", self._cache.stats)
+        self._wm_appends = 0
+        self._wm_gaps = 0
         logger.info(f"MemoryService inicializado (cache_ttl={cache_ttl_seconds}s, max_cache={max_cache_size})")
 
     # -------------------------------------------------------------------------
@@ -57,7 +68,7 @@ class MemoryService:
         user_id: str,
         include_working_memory: bool = True,
         include_long_term: bool = True,
-    ) -> UserContext:
+    ) -> LightUserContext:
         profile = await self.repository.get_profile(user_id)
 
         working_memory = []
@@ -67,7 +78,7 @@ class MemoryService:
                 limit=self.max_working_memory,
             )
 
-        return UserContext(
+        return LightUserContext(
             user_id=user_id,
             display_name=profile.display_name if profile else "Usuario",
             roles=profile.roles if profile else [],
@@ -80,16 +91,20 @@ class MemoryService:
             direccion_ids=profile.direccion_ids if profile else [],
         )
 
-    async def build_minimal_context(self, user_id: str) -> UserContext:
+    async def build_minimal_context(self, user_id: str) -> LightUserContext:
         profile = await self.repository.get_profile(user_id)
-        return UserContext(
+        return LightUserContext(
             user_id=user_id,
             display_name=profile.display_name if profile else "Usuario",
             roles=profile.roles if profile else [],
         )
 
-    async def enrich_context(self, context: UserContext, additional_data: dict[str, Any]) -> UserContext:
-        return UserContext(
+    async def enrich_context(
+        self,
+        context: UserContext | LightUserContext,
+        additional_data: dict[str, Any],
+    ) -> LightUserContext:
+        return LightUserContext(
             user_id=context.user_id,
             display_name=context.display_name,
             roles=context.roles,
@@ -125,8 +140,8 @@ class MemoryService:
         include_working_memory: bool = True,
         include_long_term: bool = True,
         force_refresh: bool = False,
-    ) -> UserContext:
-        cache_key = f"{user_id}:{include_working_memory}:{include_long_term}"
+    ) -> LightUserContext:
+        cache_key = self._cache_key(user_id, include_working_memory, include_long_term)
 
         if not force_refresh:
             cached = self._get_from_cache(cache_key)
@@ -151,7 +166,7 @@ class MemoryService:
                 f"working_memory={len(context.working_memory)} msgs, "
                 f"has_summary={context.long_term_summary is not None}"
             )
-            await self._add_to_cache(cache_key, context)
+            self._cache.set(cache_key, context)
 
         # Permisos siempre frescos — TTL propio de 60s en PermissionService,
         # independiente del cache de contexto (300s).
@@ -169,9 +184,61 @@ class MemoryService:
 
         return context
 
-    async def get_minimal_context(self, user_id: str) -> UserContext:
+    async def get_minimal_context(self, user_id: str) -> LightUserContext:
         return await self.build_minimal_context(user_id)
 
+    def append_exchange(
+        self,
+        context: LightUserContext,
+        query: Optional[str],
+        response: Optional[str],
+    ) -> bool:
+        """
+        Agrega el intercambio recién completado a la working memory cacheada.
+
+        Evita que el siguiente mensaje vuelva a ejecutar BotIAv2_sp_GetMensajesRecientes
+        para leer lo que este mismo proceso acaba de escribir. Solo se actualiza la
+        entrada que sirvió el turno (misma instancia de UserContext). Si la entrada
+        fue reconstruida mientras el agente corría se considera un hueco: se invalida
+        y el siguiente get_context recarga desde BD.
+
+        Args:
+            context: Contexto usado en el turno (retornado por get_context)
+            query: Mensaje del usuario
+            response: Respuesta del agente (None si falló)
+
+        Returns:
+            True si la working memory cacheada quedó actualizada
+        """
+        appended = False
+        for include_long_term in (True, False):
+            key = self._cache_key(context.user_id, True, include_long_term)
+            cached = self._cache.peek(key)
+            if cached is None:
+                continue
+            if cached is not context:
+                self._cache.pop(key)
+                self._wm_gaps += 1
+                logger.debug(f"Working memory gap for user {context.user_id}, entry invalidated")
+                continue
+
+            # Mismo truncado que InteractionRepository.save_interaction, para que
+            # la ventana sea idéntica a la que devolvería el SP.
+            if query:
+                context.add_message("user", query[:500])
+            if response:
+                context.add_message("assistant", response)
+            # El SP limita por interacción (hasta 2 mensajes cada una)
+            window = self.max_working_memory * 2
+            if len(context.working_memory) > window:
+                del context.working_memory[:-window]
+            self._cache.refresh_size(key)
+            appended = True
+
+        if appended:
+            self._wm_appends += 1
+        return appended
+
     async def update_summary(self, user_id: str, new_summary: str) -> bool:
         try:
             profile = await self.repository.get_profile(user_id)
@@ -194,72 +261,44 @@ class MemoryService:
     # Cache management
     # -------------------------------------------------------------------------
 
-    def _get_from_cache(self, key: str) -> Optional[UserContext]:
-        entry = self._cache.get(key)
-        if entry and not entry.is_expired():
-            self._cache.move_to_end(key)
-            self._cache_hits += 1
-            return entry.context
-        elif entry:
-            del self._cache[key]
-        self._cache_misses += 1
-        return None
-
-    async def _add_to_cache(self, key: str, context: UserContext) -> None:
-        async with self._lock:
-            self._evict_if_needed()
-            self._cache[key] = CacheEntry(context=context, ttl_seconds=self.cache_ttl_seconds)
-            self._cache.move_to_end(key)
+    @staticmethod
+    def _cache_key(user_id: str, include_working_memory: bool, include_long_term: bool) -> str:
+        return f"{user_id}:{include_working_memory}:{include_long_term}"
+
+    def _get_from_cache(self, key: str) -> Optional[LightUserContext]:
+        return self._cache.get(key)
 
     def _invalidate_user_cache(self, user_id: str) -> None:
-        keys_to_delete = [k for k in self._cache if k.startswith(f"{user_id}:")]
-        for key in keys_to_delete:
-            del self._cache[key]
+        for include_working_memory in (True, False):
+            for include_long_term in (True, False):
+                self._cache.pop(self._cache_key(user_id, include_working_memory, include_long_term))
         self.repository.invalidate_cache(user_id)
 
-    def _evict_if_needed(self) -> None:
-        """
-        Evictar entradas del cache cuando está lleno.
-
-        Estrategia:
-        1. Primero eliminar entradas expiradas (TTL vencido)
-        2. Si sigue lleno, eliminar las entradas menos recientemente usadas (LRU)
-           hasta quedar en el 75% de capacidad
-        """
-        # Paso 1: eliminar expiradas
-        expired_keys = [k for k, v in self._cache.items() if v.is_expired()]
-        for key in expired_keys:
-            del self._cache[key]
-
-        # Paso 2: si sigue lleno, eliminar LRU (primeros en OrderedDict = menos usados)
-        if len(self._cache) >= self.max_cache_size:
-            target_size = max(0, int(self.max_cache_size * 0.75))
-            while len(self._cache) > target_size:
-                self._cache.popitem(last=False)  # Elimina el menos recientemente usado
-            logger.debug(
-                f"Cache eviction: {len(expired_keys)} expiradas + LRU hasta {target_size} entradas"
-            )
-
     def clear_cache(self) -> None:
         self._cache.clear()
-        self._cache_hits = 0
-        self._cache_misses = 0
+        self._cache.reset_stats()
+        self._wm_appends = 0
+        self._wm_gaps = 0
         self.repository.clear_cache()
         logger.info("Memory cache cleared")
 
     def get_cache_stats(self) -> dict[str, Any]:
-        expired = sum(1 for v in self._cache.values() if v.is_expired())
-        total_requests = self._cache_hits + self._cache_misses
-        hit_rate = round(self._cache_hits / total_requests, 3) if total_requests > 0 else 0.0
+        expired = self._cache.purge_expired()
+        stats = self._cache.stats()
         return {
-            "total_entries": len(self._cache),
-            "active_entries": len(self._cache) - expired,
+            "total_entries": stats["entries"] + expired,
+            "active_entries": stats["entries"],
             "expired_entries": expired,
             "max_size": self.max_cache_size,
+            "max_bytes": self.max_cache_bytes,
+            "size_bytes": stats["bytes"],
             "ttl_seconds": self.cache_ttl_seconds,
-            "cache_hits": self._cache_hits,
-            "cache_misses": self._cache_misses,
-            "hit_rate": hit_rate,
+            "cache_hits": stats["hits"],
+            "cache_misses": stats["misses"],
+            "evictions": stats["evictions"],
+            "hit_rate": stats["hit_rate"],
+            "working_memory_appends": self._wm_appends,
+            "working_memory_gaps": self._wm_gaps,
         }
 
     async def health_check(self) -> bool:
@@ -1,4 +1,17 @@
 from .connection import DatabaseManager
+from .pagination import InvalidCursorError, Keyset, count_cache, decode_cursor, encode_cursor
+from .query_pool import ParallelResult, QueryPool, QueryTimeoutError
 from .registry import DatabaseRegistry
 
-__all__ = ["DatabaseManager", "DatabaseRegistry"]
+__all__ = [
+    "DatabaseManager",
+    "DatabaseRegistry",
+    "InvalidCursorError",
+    "Keyset",
+    "ParallelResult",
+    "QueryPool",
+    "QueryTimeoutError",
+    "count_cache",
+    "decode_cursor",
+    "encode_cursor",
+]
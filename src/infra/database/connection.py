@@ -3,7 +3,7 @@ Gestión de conexiones a la base de datos.
 """
 import asyncio
 import logging
-from typing import TYPE_CHECKING, List, Dict, Any, Generator, Optional
+from typing import TYPE_CHECKING, List, Dict, Any, Generator, Optional, Tuple
 from contextlib import contextmanager
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker, Session
@@ -197,6 +197,55 @@ class DatabaseManager:
             logger.error(f"Error inesperado ejecutando escritura: {e}", exc_info=True)
             raise
 
+    @db_retry(
+        max_attempts=settings.retry_db_max_attempts,
+        min_wait=settings.retry_db_min_wait,
+        max_wait=settings.retry_db_max_wait,
+    )
+    def execute_transaction(self, statements: List[Tuple[str, Optional[dict]]]) -> int:
+        """
+        Ejecutar varias escrituras en una sola transacción: todas o ninguna.
+
+        El engine es AUTOCOMMIT (cada sentencia confirma sola), así que esta
+        conexión vuelve al nivel por defecto del motor (READ COMMITTED en SQL
+        Server) y la transacción es explícita.
+        En SQL Server se activa XACT_ABORT: un error en cualquier sentencia
+        revierte la transacción completa también del lado del servidor. Los
+        lectores concurrentes no ven estados intermedios (p. ej. entre un
+        DELETE y su INSERT).
+
+        No usar con OPENDATASOURCE: la transacción requeriría DTC.
+
+        Args:
+            statements: Lista de (sql, params) de escritura, en orden
+
+        Returns:
+            Filas afectadas en total
+
+        Raises:
+            OperationalError: Si hay error de conexión (tras agotar retries)
+            RuntimeError: Si falla una sentencia (la transacción se revierte)
+        """
+        try:
+            with self.engine.connect() as conn:
+                # Nivel por defecto del motor (READ COMMITTED en SQL Server) en lugar de AUTOCOMMIT
+                conn.execution_options(isolation_level=conn.default_isolation_level)
+                with conn.begin():
+                    if self._db_type in ("mssql", "sqlserver"):
+                        conn.execute(text("SET XACT_ABORT ON"))
+                    total = 0
+                    for sql_query, params in statements:
+                        result = conn.execute(text(sql_query), params or {})
+                        total += max(result.rowcount, 0)
+                    return total
+
+        except (OperationalError, SQLTimeoutError):
+            raise
+
+        except SQLAlchemyError as e:
+            logger.error(f"Error SQL en transacción (revertida): {e}")
+            raise RuntimeError(f"Error ejecutando transacción SQL: {str(e)}") from e
+
     async def execute_query_async(self, sql_query: str, params=None) -> List[Dict[str, Any]]:
         """
         Versión async de execute_query.
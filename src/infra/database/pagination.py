@@ -0,0 +1,160 @@
+"""
+Paginación keyset (seek) con cursores opacos y conteos aproximados cacheados.
+
+OFFSET n obliga a la BD a leer y descartar n filas (las páginas profundas son
+cada vez más lentas) y, con inserts concurrentes, una fila nueva corre todas
+las páginas siguientes: se repiten o se saltan filas. Keyset pagina por la
+última clave vista:
+
+    WHERE (ts < CAST(:c_ts AS DATETIME) OR (ts = CAST(:c_ts AS DATETIME) AND id < :c_id))
+    ORDER BY ts DESC, id DESC
+
+- (ts, id) es un orden total: filas con el mismo timestamp no se pierden. id
+  tiene que ser único y NOT NULL (la PK); ts, NOT NULL (filtrar los NULL en
+  la consulta): un NULL no es ni mayor ni menor que el cursor
+- El parámetro se castea al tipo de la columna: pyodbc envía los datetime
+  como DATETIME2 y, contra una columna DATETIME (precisión de 1/300 s),
+  `ts = :c_ts` falla para milisegundos .003/.007
+- Una fila nueva (ts mayor) cae antes del cursor y no altera las páginas siguientes
+- Con un índice sobre ts cada página cuesta lo mismo sin importar su profundidad
+
+El cursor viaja al cliente como string opaco (base64 de [ts, id]); los totales
+de la UI salen de count_cache() (COUNT cacheado unos segundos) en vez de un
+COUNT(*) por página.
+
+Uso:
+    keyset = Keyset("il.fechaEjecucion", "il.idLog")
+    where, params = keyset.where(request.args.get("cursor"))
+    rows = db.execute_query(f"SELECT TOP ({limit + 1}) ... {where and 'WHERE ' + where} ORDER BY {keyset.order_by()}", params)
+    rows, next_cursor = keyset.page(rows, limit, "fechaEjecucion", "idLog")
+"""
+
+import base64
+import binascii
+import json
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Hashable, Optional, Sequence
+
+from src.utils.ttl_cache import TTLCache
+
+_CURSOR_TS = "c_ts"
+_CURSOR_ID = "c_id"
+_COUNT_CACHE_MAX_ENTRIES = 256
+
+
+class InvalidCursorError(ValueError):
+    """El cursor recibido no fue generado por encode_cursor()."""
+
+
+def encode_cursor(ts: datetime, row_id: Any) -> str:
+    """Cursor opaco para la fila (ts, row_id)."""
+    if isinstance(row_id, (bytes, bytearray)):
+        row_id = row_id.decode()
+    raw = json.dumps([ts.isoformat(), row_id if isinstance(row_id, (int, str)) else str(row_id)])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, Any]:
+    """
+    Inverso de encode_cursor().
+
+    Raises:
+        InvalidCursorError: Cursor malformado
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        ts, row_id = json.loads(raw)
+        if not isinstance(row_id, (int, str)):
+            raise TypeError(row_id)
+        return datetime.fromisoformat(ts), row_id
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError) as e:
+        raise InvalidCursorError(f"Cursor inválido: {cursor[:40]}") from e
+
+
+@dataclass(frozen=True)
+class Keyset:
+    """
+    Orden (ts_column, id_column) y el predicado para seguir después de un cursor.
+
+    Las columnas pueden ser expresiones (p. ej. MAX(il.fechaEjecucion) para
+    usar el predicado en un HAVING). `ts_type` es el tipo SQL de ts_column
+    al que se castea el parámetro del cursor (None = sin CAST).
+    """
+
+    ts_column: str
+    id_column: str
+    descending: bool = True
+    ts_type: Optional[str] = "DATETIME"
+
+    def order_by(self) -> str:
+        direction = "DESC" if self.descending else "ASC"
+        return f"{self.ts_column} {direction}, {self.id_column} {direction}"
+
+    def where(self, cursor: Optional[str]) -> tuple[str, dict[str, Any]]:
+        """
+        Predicado de las filas posteriores al cursor ("" sin cursor).
+
+        Raises:
+            InvalidCursorError: Cursor malformado
+        """
+        if not cursor:
+            return "", {}
+        ts, row_id = decode_cursor(cursor)
+        op = "<" if self.descending else ">"
+        ts_param = f"CAST(:{_CURSOR_TS} AS {self.ts_type})" if self.ts_type else f":{_CURSOR_TS}"
+        sql = (
+            f"({self.ts_column} {op} {ts_param} "
+            f"OR ({self.ts_column} = {ts_param} AND {self.id_column} {op} :{_CURSOR_ID}))"
+        )
+        return sql, {_CURSOR_TS: ts, _CURSOR_ID: row_id}
+
+    def page(
+        self,
+        rows: Sequence[dict],
+        limit: int,
+        ts_key: str,
+        id_key: str,
+    ) -> tuple[list[dict], Optional[str]]:
+        """
+        Recorta una consulta de `limit + 1` filas a la página y arma el siguiente cursor.
+
+        Returns:
+            (filas de la página, cursor de la siguiente o None si no hay más)
+        """
+        rows = list(rows)
+        if len(rows) <= limit:
+            return rows, None
+        last = rows[limit - 1]
+        return rows[:limit], encode_cursor(_as_datetime(last[ts_key]), last[id_key])
+
+
+def _as_datetime(value: Any) -> datetime:
+    return value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+
+
+_counts: Optional[TTLCache[Hashable, int]] = None
+_counts_lock = threading.Lock()
+
+
+def count_cache() -> TTLCache[Hashable, int]:
+    """
+    Conteos aproximados por (consulta, filtros), compartidos por el proceso.
+
+    Vida: settings.dashboard_count_cache_seconds. El total que ve la UI puede
+    atrasarse ese tiempo respecto de la tabla; las páginas no dependen de él.
+    """
+    global _counts
+    with _counts_lock:
+        if _counts is None:
+            from src.config.settings import settings
+            from src.infra.observability import get_metrics
+
+            _counts = TTLCache(
+                max_entries=_COUNT_CACHE_MAX_ENTRIES,
+                ttl_seconds=settings.dashboard_count_cache_seconds,
+                name="dashboard_counts",
+            )
+            get_metrics().register_cache(_counts.name, _counts.stats)
+        return _counts
@@ -0,0 +1,143 @@
+"""
+QueryPool — consultas independientes en paralelo para código síncrono (Flask).
+
+El equivalente de asyncio.gather() para endpoints que corren en un thread de
+request: las consultas se envían a un ThreadPoolExecutor acotado y el endpoint
+tarda max(consulta) en vez de sum(consulta).
+
+Cada run() tiene un deadline común (timeout_seconds desde el envío). Las
+consultas que fallan o no terminan a tiempo quedan en `failed` y su resultado
+es el default: el endpoint responde con datos parciales en vez de un 500. Si
+falla una consulta marcada como requerida, run() relanza su excepción.
+
+Una consulta vencida no se puede cancelar (el driver está bloqueado en el
+socket): sigue ocupando su worker hasta que termine. Por eso el pool es
+acotado y compartido, y no crece con los requests.
+
+Uso:
+    resultado = pool.run(
+        {"stats": lambda: db.execute_query(SQL_STATS), "prev": lambda: db.execute_query(SQL_PREV)},
+        required=("stats",),
+    )
+    resultado.results["prev"]   # [] si falló o venció
+    resultado.failed            # {"prev": "timeout"}
+"""
+
+import concurrent.futures
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Mapping
+
+logger = logging.getLogger(__name__)
+
+TIMEOUT = "timeout"
+
+
+class QueryTimeoutError(TimeoutError):
+    """Una consulta requerida no terminó dentro del timeout."""
+
+
+@dataclass
+class ParallelResult:
+    """Resultado de QueryPool.run()."""
+
+    results: dict[str, Any]
+    failed: dict[str, str] = field(default_factory=dict)  # nombre → "timeout" o mensaje de error
+
+    @property
+    def partial(self) -> bool:
+        return bool(self.failed)
+
+
+class QueryPool:
+    """ThreadPoolExecutor acotado con timeout por consulta y resultados parciales."""
+
+    def __init__(self, max_workers: int = 8, timeout_seconds: float = 10, name: str = "query_pool") -> None:
+        """
+        Args:
+            max_workers: Consultas ejecutándose a la vez (entre todos los requests)
+            timeout_seconds: Tiempo máximo de cada consulta, contado desde el envío
+            name: Nombre para threads y métricas
+        """
+        self.max_workers = max_workers
+        self.timeout_seconds = timeout_seconds
+        self.name = name
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._runs = 0
+        self._queries = 0
+        self._timeouts = 0
+        self._errors = 0
+
+    def run(
+        self,
+        calls: Mapping[str, Callable[[], Any]],
+        required: Iterable[str] = (),
+        default: Any = None,
+        timeout_seconds: float | None = None,
+    ) -> ParallelResult:
+        """
+        Ejecutar `calls` en paralelo y esperar hasta el deadline.
+
+        Args:
+            calls: nombre → función sin argumentos
+            required: Nombres cuyo fallo hace fallar el run completo
+            default: Resultado de las consultas fallidas o vencidas (una lista vacía se copia)
+            timeout_seconds: Override del timeout del pool
+
+        Returns:
+            ParallelResult con results (todas las claves de `calls`) y failed
+
+        Raises:
+            La excepción de una consulta requerida, o QueryTimeoutError si venció
+        """
+        required = set(required)
+        timeout = self.timeout_seconds if timeout_seconds is None else timeout_seconds
+        futures = {name: self._executor.submit(fn) for name, fn in calls.items()}
+        deadline = time.monotonic() + timeout
+
+        result = ParallelResult(results={})
+        error: BaseException | None = None
+        for name, future in futures.items():
+            try:
+                result.results[name] = future.result(max(0.0, deadline - time.monotonic()))
+                continue
+            except concurrent.futures.TimeoutError:
+                future.cancel()
+                result.failed[name] = TIMEOUT
+                if name in required and error is None:
+                    error = QueryTimeoutError(f"Consulta '{name}' excedió {timeout}s")
+            except Exception as e:
+                result.failed[name] = str(e)
+                if name in required and error is None:
+                    error = e
+            result.results[name] = list(default) if isinstance(default, list) else default
+
+        with self._lock:
+            self._runs += 1
+            self._queries += len(futures)
+            self._timeouts += sum(1 for v in result.failed.values() if v == TIMEOUT)
+            self._errors += sum(1 for v in result.failed.values() if v != TIMEOUT)
+        if result.failed:
+            logger.warning(f"{self.name}: consultas sin resultado {result.failed}")
+        if error is not None:
+            raise error
+        return result
+
+    def stats(self) -> dict[str, Any]:
+        """Contadores para métricas."""
+        with self._lock:
+            return {
+                "name": self.name,
+                "max_workers": self.max_workers,
+                "timeout_seconds": self.timeout_seconds,
+                "runs": self._runs,
+                "queries": self._queries,
+                "timeouts": self._timeouts,
+                "errors": self._errors,
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
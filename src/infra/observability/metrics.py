@@ -14,7 +14,7 @@ import threading
 from collections import defaultdict
 from dataclasses import dataclass, field
 from datetime import UTC, datetime
-from typing import Any, Optional
+from typing import Any, Callable, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -197,6 +197,7 @@ class MetricsCollector:
         self._requests = _RequestMetrics()
         self._tools = _ToolMetrics()
         self._cache = _CacheMetrics()
+        self._cache_providers: dict[str, Callable[[], dict[str, Any]]] = {}
         self._start_time = datetime.now(UTC)
 
         logger.info("MetricsCollector initialized")
@@ -249,6 +250,17 @@ class MetricsCollector:
         with self._lock:
             self._cache.miss()
 
+    def register_cache(self, name: str, provider: Callable[[], dict[str, Any]]) -> None:
+        """
+        Registra un cache con estadísticas propias (hits, misses, evicciones, tamaño).
+
+        Args:
+            name: Nombre del cache en get_stats()["caches"]
+            provider: Callable que retorna las estadísticas actuales del cache
+        """
+        with self._lock:
+            self._cache_providers[name] = provider
+
     def get_stats(self) -> dict[str, Any]:
         """
         Obtiene todas las estadísticas.
@@ -269,6 +281,7 @@ class MetricsCollector:
                 else 0
             )
 
+            providers = dict(self._cache_providers)
             cache_total = self._cache.hits.value + self._cache.misses.value
             cache_hit_rate = (
                 self._cache.hits.value / cache_total * 100
@@ -276,7 +289,7 @@ class MetricsCollector:
                 else 0
             )
 
-            return {
+            stats = {
                 "uptime_seconds": round(uptime, 0),
                 "requests": {
                     "total": self._requests.total.value,
@@ -302,6 +315,15 @@ class MetricsCollector:
                 },
             }
 
+        # Fuera del lock: los providers toman sus propios locks
+        stats["caches"] = {}
+        for name, provider in providers.items():
+            try:
+                stats["caches"][name] = provider()
+            except Exception as e:
+                logger.debug(f"Cache stats provider '{name}' failed: {e}")
+        return stats
+
     def get_summary(self) -> str:
         """
         Obtiene un resumen en texto de las métricas.
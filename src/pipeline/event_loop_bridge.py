@@ -0,0 +1,131 @@
+"""
+event_loop_bridge — Event loop persistente para ejecutar corrutinas desde threads síncronos.
+
+Los endpoints Flask corren en threads del servidor WSGI. Con asyncio.run()
+por request, cada llamada creaba y destruía un event loop: los clientes
+async, pools y caches del MainHandler quedaban atados a un loop muerto
+("attached to a different loop", "Event loop is closed") y no se reusaban.
+
+EventLoopBridge mantiene un único loop en un thread daemon:
+- run(coro, timeout) lo envía con run_coroutine_threadsafe y espera el
+  resultado en el thread llamador; si vence el timeout la corrutina se cancela
+- shutdown() deja terminar (con un plazo) las tareas pendientes, cierra
+  generadores async y el executor por defecto, y detiene el thread
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from typing import Any, Coroutine, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class EventLoopBridge:
+    """
+    Event loop de larga vida en un thread propio.
+
+    Example:
+        >>> bridge = EventLoopBridge()
+        >>> result = bridge.run(handler.handle_api(...), timeout=120)
+        >>> bridge.shutdown()
+    """
+
+    def __init__(self, name: str = "api-event-loop") -> None:
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """Loop del bridge; lo inicia en el primer uso."""
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                self._start()
+            return self._loop
+
+    def is_running(self) -> bool:
+        return self._loop is not None and self._loop.is_running()
+
+    def _start(self) -> None:
+        loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        def _run() -> None:
+            asyncio.set_event_loop(loop)
+            loop.call_soon(started.set)
+            loop.run_forever()
+
+        self._thread = threading.Thread(target=_run, name=self.name, daemon=True)
+        self._thread.start()
+        started.wait()
+        self._loop = loop
+        logger.info(f"{self.name}: event loop iniciado")
+
+    def run(self, coro: Coroutine[Any, Any, T], timeout: Optional[float] = None) -> T:
+        """
+        Ejecuta `coro` en el loop del bridge y espera su resultado.
+
+        Args:
+            coro: Corrutina a ejecutar
+            timeout: Segundos máximos de espera (None = sin límite)
+
+        Raises:
+            TimeoutError: Si vence el timeout (la corrutina se cancela)
+            RuntimeError: Si se llama desde el propio thread del loop (bloquearía el loop)
+            La excepción de la corrutina
+        """
+        loop = self.loop
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError(f"{self.name}: run() llamado desde el thread del loop; usar await")
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise TimeoutError(f"{self.name}: la corrutina superó {timeout}s") from None
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """
+        Detiene el loop: espera hasta `timeout` a las tareas pendientes y cancela las demás.
+
+        Idempotente; después de shutdown() el siguiente run() inicia un loop nuevo.
+        """
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None or loop.is_closed():
+            return
+
+        async def _drain() -> None:
+            pending = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            if pending:
+                _, still_pending = await asyncio.wait(pending, timeout=timeout)
+                for task in still_pending:
+                    task.cancel()
+                if still_pending:
+                    logger.warning(f"{self.name}: {len(still_pending)} tareas canceladas al cerrar")
+                    await asyncio.gather(*still_pending, return_exceptions=True)
+            await loop.shutdown_asyncgens()
+            await loop.shutdown_default_executor()
+
+        if loop.is_running():
+            try:
+                asyncio.run_coroutine_threadsafe(_drain(), loop).result(timeout + 5)
+            except Exception as e:
+                logger.warning(f"{self.name}: cierre incompleto: {e}")
+            loop.call_soon_threadsafe(loop.stop)
+            if thread is not None:
+                thread.join(timeout)
+        if loop.is_running():
+            logger.warning(f"{self.name}: el loop no se detuvo en {timeout}s")
+            return
+        loop.close()
+        logger.info(f"{self.name}: event loop detenido")
@@ -11,14 +11,14 @@ import asyncio
 import datetime
 import logging
 import time
-from typing import Any, Awaitable, Callable, Optional, Protocol
+from typing import Any, Awaitable, Callable, Optional, Protocol, Union
 
 from telegram import Update
 from telegram.ext import ContextTypes
 
 from src.agents.base.agent import AgentResponse
 from src.agents.base.agent_events import AgentEvent
-from src.agents.base.events import ConversationEvent, UserContext
+from src.agents.base.events import ConversationEvent, LightUserContext, UserContext
 from src.agents.react.agent import ReActAgent
 from src.agents.base.agent import BaseAgent
 from src.domain.cost.cost_entity import CostSession
@@ -210,6 +210,8 @@ class MainHandler:
         text: str,
         session_id: Optional[str] = None,
         metadata: Optional[dict[str, Any]] = None,
+        deadline: Optional[float] = None,
+        event_callback: Optional[Callable[[AgentEvent], Awaitable[None]]] = None,
     ) -> AgentResponse:
         """
         Procesa una solicitud de API.
@@ -219,9 +221,15 @@ class MainHandler:
             text: Texto del mensaje
             session_id: ID de sesión opcional
             metadata: Metadata adicional
+            deadline: Instante límite en reloj time.monotonic() (None = sin límite);
+                al vencer se cancela el procesamiento
+            event_callback: Callback para eventos del agente (streaming SSE)
 
         Returns:
             AgentResponse con el resultado
+
+        Raises:
+            TimeoutError: Si se alcanza `deadline` antes de terminar
         """
         start_time = time.perf_counter()
 
@@ -235,7 +243,11 @@ class MainHandler:
             )
 
             # Procesar
-            response = await self._process_event(event)
+            if deadline is None:
+                response = await self._process_event(event, event_callback=event_callback)
+            else:
+                async with asyncio.timeout(deadline - time.monotonic()):
+                    response = await self._process_event(event, event_callback=event_callback)
 
             elapsed = (time.perf_counter() - start_time) * 1000
             logger.info(
@@ -245,6 +257,11 @@ class MainHandler:
 
             return response
 
+        except TimeoutError:
+            elapsed = (time.perf_counter() - start_time) * 1000
+            logger.warning(f"API request timeout: user={user_id}, time={elapsed:.0f}ms")
+            raise
+
         except Exception as e:
             elapsed = (time.perf_counter() - start_time) * 1000
             logger.error(
@@ -257,17 +274,73 @@ class MainHandler:
                 execution_time_ms=elapsed,
             )
 
+    async def handle_api_batch(
+        self,
+        user_id: str,
+        texts: list[str],
+        metadata: Optional[dict[str, Any]] = None,
+        deadline: Optional[float] = None,
+        max_concurrency: int = 4,
+    ) -> list[Union[AgentResponse, Exception]]:
+        """
+        Procesa varias preguntas independientes de un mismo usuario.
+
+        El contexto (MemoryService) se carga una sola vez; cada pregunta corre
+        con su propia copia, hasta `max_concurrency` a la vez. Al terminar, los
+        intercambios se agregan en orden a la working memory cacheada.
+
+        Args:
+            user_id: ID del usuario
+            texts: Preguntas (el llamador ya las deduplicó)
+            metadata: Metadata común a todas
+            deadline: Instante límite en reloj time.monotonic() para todo el lote
+            max_concurrency: Preguntas procesándose a la vez
+
+        Returns:
+            Un resultado por texto, en el mismo orden: AgentResponse, o la excepción
+            de esa pregunta (TimeoutError si venció el deadline) sin afectar a las demás
+        """
+        start_time = time.perf_counter()
+        context = await self.memory.get_context(user_id)
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def _one(text: str) -> AgentResponse:
+            async with semaphore:
+                event = self.gateway.from_api(user_id=user_id, text=text, metadata=metadata)
+                if deadline is None:
+                    return await self._process_event(event, user_context=context.copy())
+                async with asyncio.timeout(deadline - time.monotonic()):
+                    return await self._process_event(event, user_context=context.copy())
+
+        results = await asyncio.gather(*(_one(text) for text in texts), return_exceptions=True)
+        for text, result in zip(texts, results):
+            if isinstance(result, AgentResponse):
+                self.memory.append_exchange(context, text, result.message)
+            elif not isinstance(result, Exception):
+                raise result  # CancelledError y similares no son fallos parciales
+
+        elapsed = (time.perf_counter() - start_time) * 1000
+        failed = sum(1 for r in results if not isinstance(r, AgentResponse) or not r.success)
+        logger.info(
+            f"API batch processed: user={user_id}, items={len(texts)}, "
+            f"failed={failed}, time={elapsed:.0f}ms"
+        )
+        return results
+
     async def _process_event(
         self,
         event: ConversationEvent,
         event_callback: Optional[Callable[[AgentEvent], Awaitable[None]]] = None,
         session_notes: Optional[list[str]] = None,
+        user_context: Optional[LightUserContext] = None,
     ) -> AgentResponse:
         """
         Procesa un evento normalizado midiendo cada etapa del pipeline.
 
         Args:
             event: Evento a procesar
+            user_context: Contexto ya cargado (batch); quien lo pasa se encarga
+                de reflejar el intercambio en la working memory
 
         Returns:
             AgentResponse con el resultado
@@ -276,7 +349,9 @@ class MainHandler:
         t_start_dt = datetime.datetime.utcnow()
 
         # 1. Obtener contexto del usuario
-        user_context = await self.memory.get_context(event.user_id)
+        owns_context = user_context is None
+        if owns_context:
+            user_context = await self.memory.get_context(event.user_id)
         if session_notes:
             user_context.session_notes.extend(session_notes)
         memory_ms = int((time.perf_counter() - t_start) * 1000)
@@ -321,14 +396,21 @@ class MainHandler:
                 step["stepNum"] = i
             response.data["step_traces"] = all_steps
 
+        # 3. Reflejar el intercambio en la working memory cacheada — el siguiente
+        # mensaje no necesita releer de BD lo que este turno acaba de escribir
+        if owns_context:
+            self.memory.append_exchange(user_context, event.text, response.message)
+
         total_ms = int((time.perf_counter() - t_start) * 1000)
         save_ms = 0  # save ocurre en background, no bloquea el pipeline
 
-        # 3. Log de consola
+        # 4. Log de consola
         self._log_transaction(event, response, memory_ms, react_ms, save_ms, total_ms)
 
-        # 4. Persistir interacción completa
-        # API: await directo porque asyncio.run() cierra el loop al terminar (mata tasks en background)
+        # 5. Persistir interacción completa
+        # API: corre en el loop persistente del bot (EventLoopBridge.run desde Flask, o ASGI);
+        # se espera el guardado para que la interacción ya esté persistida al responder y
+        # para que los guardados no se acumulen sin límite bajo carga de la API
         # Telegram: create_task para no bloquear el pipeline
         if self.observability_repo:
             if event.channel == "api":
@@ -3,15 +3,23 @@ handler_manager — Singleton para gestionar el ciclo de vida del MainHandler.
 
 Responsabilidad única: garantizar que create_main_handler se llama
 una sola vez y exponer el handler inicializado al resto del sistema.
+
+También es dueño del event loop persistente (EventLoopBridge) en el que
+los endpoints Flask ejecutan las corrutinas del handler: los clientes
+async y pools del MainHandler quedan atados a un único loop de larga vida.
 """
 
 from __future__ import annotations
 
+import atexit
 import logging
-from typing import Any, Optional
+from typing import Any, Coroutine, Optional, TypeVar
 
+from .event_loop_bridge import EventLoopBridge
 from .handler import MainHandler
 
+T = TypeVar("T")
+
 logger = logging.getLogger(__name__)
 
 
@@ -21,6 +29,7 @@ class HandlerManager:
     _instance: Optional["HandlerManager"] = None
     _handler: Optional[MainHandler] = None
     _db_registry: Any = None
+    _bridge: Optional[EventLoopBridge] = None
 
     def __new__(cls) -> "HandlerManager":
         if cls._instance is None:
@@ -45,11 +54,37 @@ class HandlerManager:
     def is_initialized(self) -> bool:
         return self._handler is not None
 
+    @property
+    def bridge(self) -> EventLoopBridge:
+        """Event loop persistente compartido por los endpoints; se crea en el primer uso."""
+        cls = type(self)
+        if cls._bridge is None:
+            cls._bridge = EventLoopBridge()
+            atexit.register(cls._bridge.shutdown)
+        return cls._bridge
+
+    def run(self, coro: Coroutine[Any, Any, T], timeout: Optional[float] = None) -> T:
+        """
+        Ejecuta una corrutina en el event loop persistente desde un thread síncrono (Flask).
+
+        Raises:
+            TimeoutError: Si vence el timeout (la corrutina se cancela)
+        """
+        return self.bridge.run(coro, timeout=timeout)
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """Detiene el event loop persistente (las tareas pendientes tienen `timeout` para terminar)."""
+        if self._bridge is not None:
+            self._bridge.shutdown(timeout)
+
     @classmethod
     def reset(cls) -> None:
+        if cls._bridge is not None:
+            cls._bridge.shutdown()
         cls._instance = None
         cls._handler = None
         cls._db_registry = None
+        cls._bridge = None
 
 
 def get_handler_manager() -> HandlerManager:
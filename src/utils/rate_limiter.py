@@ -1,68 +1,273 @@
 """
-Rate limiter simple para prevenir abuso.
+Rate limiter por usuario para prevenir abuso.
 
-Implementa un rate limiter basado en ventanas de tiempo por usuario.
+Implementa GCRA (Generic Cell Rate Algorithm, equivalente a un token bucket):
+por cada clave se guarda un único float, el TAT (theoretical arrival time).
+Cada request avanza el TAT en `time_window / max_requests`; se rechaza si el
+TAT quedaría más de `time_window` en el futuro. Así se permite una ráfaga de
+`max_requests` y después un request cada `time_window / max_requests`.
+
+- Estado O(1) por clave y operaciones O(1) (sin listas de timestamps)
+- Una clave cuyo TAT ya pasó equivale a una clave nueva: se descarta sola
+  (TTL en memoria, barrido periódico en SQLite)
+- Store enchufable: en memoria (por proceso) o SQLite (compartido entre
+  procesos que apunten al mismo archivo)
+
+Uso:
+    limiter = rate_limiter_for("api")
+    resultado = limiter.check(numero_empleado)
+    if not resultado.allowed:
+        ...  # 429 / mensaje con resultado.retry_after
 """
 import logging
-from collections import defaultdict
-from datetime import datetime, timedelta
-from typing import Dict, List
+import math
+import sqlite3
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional, Protocol, Tuple, TypeVar, Union
+
+from src.utils.ttl_cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# fn(tat_actual) -> (tat_nuevo o None para no escribir, resultado)
+UpdateFn = Callable[[Optional[float]], Tuple[Optional[float], T]]
+
+_MEMORY_MAX_KEYS = 100_000
+_SQLITE_SWEEP_EVERY = 1000      # escrituras entre barridos de claves inactivas
+_SQLITE_TIMEOUT_SECONDS = 5.0
+_EPSILON = 1e-9
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    """Resultado de RateLimiter.check()."""
+
+    allowed: bool
+    remaining: int
+    retry_after: float  # segundos hasta que se permita el próximo request (0 si ya se puede)
+
+    @property
+    def retry_after_seconds(self) -> int:
+        """retry_after redondeado hacia arriba, para Retry-After y mensajes."""
+        return math.ceil(self.retry_after)
+
+
+class RateLimitStore(Protocol):
+    """Almacén de TATs por clave. `update` debe ser atómico por clave."""
+
+    def update(self, key: str, now: float, fn: UpdateFn) -> T: ...
+
+    def __len__(self) -> int: ...
+
+
+class MemoryRateLimitStore:
+    """
+    TATs en un TTLCache del proceso.
+
+    El TTL de cada clave es `tat - now`: al vencer, la clave ya no limita nada
+    y se evicta sin costo. Con más de `max_keys` claves activas se descarta la
+    menos usada (ese usuario recupera su cupo completo).
+    """
+
+    def __init__(self, max_keys: int = _MEMORY_MAX_KEYS) -> None:
+        self._tats: TTLCache[str, float] = TTLCache(
+            max_entries=max_keys,
+            ttl_seconds=3600,
+            name="rate_limiter",
+        )
+        self._lock = threading.Lock()
+
+    def update(self, key: str, now: float, fn: UpdateFn) -> T:
+        with self._lock:
+            tat, result = fn(self._tats.peek(key))
+            if tat is not None and tat > now:
+                self._tats.set(key, tat, ttl_seconds=tat - now)
+            return result
+
+    def __len__(self) -> int:
+        """Claves activas (las inactivas se purgan al contar)."""
+        self._tats.purge_expired()
+        return len(self._tats)
+
+
+class SQLiteRateLimitStore:
+    """
+    TATs en una tabla SQLite compartida por todos los procesos que usen el archivo.
+
+    Cada update es un BEGIN IMMEDIATE → SELECT → UPSERT: SQLite serializa los
+    writers entre procesos, así N workers aplican un único límite. Usa reloj de
+    pared (time.time) porque el monotónico no es comparable entre procesos.
+
+    Si SQLite falla (archivo bloqueado más de _SQLITE_TIMEOUT_SECONDS, disco)
+    el request se evalúa como si la clave fuera nueva y no se escribe: el
+    limitador falla abierto en vez de tumbar el bot o la API.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = str(path)
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            self.path,
+            timeout=_SQLITE_TIMEOUT_SECONDS,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self._lock = threading.Lock()
+        self._writes = 0
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, tat REAL NOT NULL)"
+            )
+
+    def update(self, key: str, now: float, fn: UpdateFn) -> T:
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    row = self._conn.execute("SELECT tat FROM rate_limits WHERE key = ?", (key,)).fetchone()
+                    tat, result = fn(row[0] if row else None)
+                    if tat is not None:
+                        self._conn.execute(
+                            "INSERT INTO rate_limits (key, tat) VALUES (?, ?) "
+                            "ON CONFLICT(key) DO UPDATE SET tat = excluded.tat",
+                            (key, tat),
+                        )
+                        self._writes += 1
+                        if self._writes % _SQLITE_SWEEP_EVERY == 0:
+                            self._conn.execute("DELETE FROM rate_limits WHERE tat <= ?", (now,))
+                    self._conn.execute("COMMIT")
+                except BaseException:
+                    self._conn.execute("ROLLBACK")
+                    raise
+                return result
+            except sqlite3.Error as e:
+                logger.warning(f"Rate limiter SQLite no disponible ({self.path}): {e}")
+                return fn(None)[1]
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Borra claves inactivas (TAT vencido); retorna cuántas."""
+        with self._lock:
+            try:
+                cursor = self._conn.execute(
+                    "DELETE FROM rate_limits WHERE tat <= ?", (time.time() if now is None else now,)
+                )
+                return cursor.rowcount
+            except sqlite3.Error as e:
+                logger.warning(f"No se pudo barrer rate limiter SQLite: {e}")
+                return 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            try:
+                return self._conn.execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0]
+            except sqlite3.Error:
+                return 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
 
 class RateLimiter:
-    """Rate limiter simple basado en usuario."""
+    """Rate limiter GCRA basado en usuario."""
 
     def __init__(
         self,
         max_requests: int = 10,
-        time_window: int = 60  # segundos
+        time_window: int = 60,  # segundos
+        store: Optional[RateLimitStore] = None,
+        name: str = "default",
+        clock: Optional[Callable[[], float]] = None,
     ):
         """
         Inicializar rate limiter.
 
         Args:
-            max_requests: Número máximo de requests en la ventana
+            max_requests: Número máximo de requests en la ventana (tamaño de la ráfaga)
             time_window: Ventana de tiempo en segundos
+            store: Dónde guardar el estado (default: MemoryRateLimitStore)
+            name: Prefijo de las claves; separa limitadores que comparten store
+            clock: Fuente de tiempo en segundos (default: time.time)
         """
         self.max_requests = max_requests
         self.time_window = time_window
-        self.requests: Dict[int, List[datetime]] = defaultdict(list)
+        self.name = name
+        self.store: RateLimitStore = store if store is not None else MemoryRateLimitStore()
+        self._clock = clock or time.time
+        self._interval = time_window / max_requests
+        self._lock = threading.Lock()
+        self._counts: Counter = Counter()
         logger.info(
-            f"RateLimiter inicializado: {max_requests} requests/{time_window}s"
+            f"RateLimiter '{name}' inicializado: {max_requests} requests/{time_window}s "
+            f"({type(self.store).__name__})"
         )
 
-    def is_allowed(self, user_id: int) -> bool:
+    def _key(self, user_id: Hashable) -> str:
+        return f"{self.name}:{user_id}"
+
+    def _remaining(self, tat: float, now: float) -> int:
+        restante = int((now + self.time_window - tat) / self._interval + _EPSILON)
+        return max(0, min(self.max_requests, restante))
+
+    def _retry_after(self, tat: float, now: float, cost: int = 1) -> float:
+        return max(0.0, tat + cost * self._interval - self.time_window - now)
+
+    def check(self, user_id: Hashable, cost: int = 1) -> RateLimitResult:
         """
-        Verificar si el usuario puede hacer request.
+        Consumir `cost` requests si el usuario tiene cupo para todos.
 
         Args:
-            user_id: ID del usuario
+            user_id: ID del usuario (chat_id de Telegram, número de empleado...)
+            cost: Unidades a consumir (p. ej. preguntas de un lote). Un costo
+                mayor que max_requests no se permite nunca
 
         Returns:
-            True si está permitido, False si alcanzó el límite
+            RateLimitResult con allowed, remaining y retry_after
         """
-        now = datetime.now()
-        cutoff = now - timedelta(seconds=self.time_window)
+        now = self._clock()
+        cost = max(1, cost)
 
-        # Limpiar requests antiguos
-        self.requests[user_id] = [
-            req_time for req_time in self.requests[user_id]
-            if req_time > cutoff
-        ]
+        def consume(stored: Optional[float]) -> Tuple[Optional[float], RateLimitResult]:
+            tat = max(stored or now, now)
+            new_tat = tat + cost * self._interval
+            if new_tat - now > self.time_window + _EPSILON:
+                return None, RateLimitResult(False, self._remaining(tat, now), self._retry_after(tat, now, cost))
+            return new_tat, RateLimitResult(True, self._remaining(new_tat, now), 0.0)
 
-        # Verificar límite
-        if len(self.requests[user_id]) >= self.max_requests:
+        result = self.store.update(self._key(user_id), now, consume)
+        with self._lock:
+            self._counts["allowed" if result.allowed else "limited"] += 1
+        if not result.allowed:
             logger.warning(
-                f"Rate limit excedido para usuario {user_id}: "
-                f"{len(self.requests[user_id])} requests en {self.time_window}s"
+                f"Rate limit '{self.name}' excedido para usuario {user_id}: "
+                f"reintentar en {result.retry_after_seconds}s"
             )
-            return False
+        return result
 
-        # Agregar nuevo request
-        self.requests[user_id].append(now)
-        return True
+    def _peek(self, user_id: Hashable) -> Tuple[float, float]:
+        now = self._clock()
+        tat = self.store.update(self._key(user_id), now, lambda stored: (None, stored))
+        return max(tat or now, now), now
+
+    def is_allowed(self, user_id: int) -> bool:
+        """
+        Verificar si el usuario puede hacer request (y consumirlo).
+
+        Args:
+            user_id: ID del usuario
+
+        Returns:
+            True si está permitido, False si alcanzó el límite
+        """
+        return self.check(user_id).allowed
 
     def get_retry_after(self, user_id: int) -> int:
         """
@@ -72,18 +277,14 @@ class RateLimiter:
             user_id: ID del usuario
 
         Returns:
-            Segundos hasta el siguiente request permitido
+            Segundos hasta el siguiente request permitido (0 si ya puede)
         """
-        if not self.requests[user_id]:
-            return 0
-
-        oldest_request = min(self.requests[user_id])
-        retry_after = self.time_window - (datetime.now() - oldest_request).seconds
-        return max(0, retry_after)
+        tat, now = self._peek(user_id)
+        return math.ceil(self._retry_after(tat, now) - _EPSILON)
 
     def get_remaining_requests(self, user_id: int) -> int:
         """
-        Obtener número de requests restantes en la ventana actual.
+        Obtener número de requests que puede hacer ahora mismo.
 
         Args:
             user_id: ID del usuario
@@ -91,13 +292,60 @@ class RateLimiter:
         Returns:
             Número de requests restantes
         """
-        now = datetime.now()
-        cutoff = now - timedelta(seconds=self.time_window)
+        tat, now = self._peek(user_id)
+        return self._remaining(tat, now)
 
-        # Limpiar requests antiguos
-        self.requests[user_id] = [
-            req_time for req_time in self.requests[user_id]
-            if req_time > cutoff
-        ]
+    def stats(self) -> Dict[str, Any]:
+        """Contadores para métricas."""
+        with self._lock:
+            allowed = self._counts["allowed"]
+            limited = self._counts["limited"]
+        return {
+            "name": f"rate_limiter_{self.name}",
+            "max_requests": self.max_requests,
+            "time_window": self.time_window,
+            "store": type(self.store).__name__,
+            "entries": len(self.store),
+            "allowed": allowed,
+            "limited": limited,
+        }
 
-        return max(0, self.max_requests - len(self.requests[user_id]))
+
+_limiters: Dict[str, RateLimiter] = {}
+_shared_store: Optional[RateLimitStore] = None
+_limiters_lock = threading.Lock()
+
+
+def rate_limiter_for(name: str) -> RateLimiter:
+    """
+    Limitador compartido por el proceso para un ámbito ("telegram", "api").
+
+    Configurado desde settings: rate_limit_max_requests / rate_limit_window_seconds.
+    Con rate_limit_store_path todos los ámbitos usan el mismo archivo SQLite
+    (claves con prefijo del ámbito); sin él, un store en memoria por ámbito.
+    """
+    global _shared_store
+    from src.config.settings import PROJECT_ROOT, settings
+    from src.infra.observability import get_metrics
+
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            store: Optional[RateLimitStore] = None
+            if settings.rate_limit_store_path:
+                if _shared_store is None:
+                    try:
+                        _shared_store = SQLiteRateLimitStore(PROJECT_ROOT / settings.rate_limit_store_path)
+                    except sqlite3.Error as e:
+                        logger.error(f"No se pudo abrir el store SQLite del rate limiter, se usa memoria: {e}")
+                        _shared_store = MemoryRateLimitStore()
+                store = _shared_store
+            limiter = RateLimiter(
+                max_requests=settings.rate_limit_max_requests,
+                time_window=settings.rate_limit_window_seconds,
+                store=store,
+                name=name,
+            )
+            _limiters[name] = limiter
+            get_metrics().register_cache(f"rate_limiter_{name}", limiter.stats)
+        return limiter
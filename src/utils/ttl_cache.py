@@ -0,0 +1,275 @@
+"""
+Cache LRU acotado con TTL y contabilidad de memoria.
+
+Reemplaza los dicts sin límite usados como cache en repositorios de larga vida:
+- Máximo de entradas y, opcionalmente, máximo de bytes estimados
+- TTL por cache o por entrada (monotonic)
+- Expiración con heap de vencimientos: purgar cuesta O(log n) por entrada vencida,
+  sin recorrer el cache completo
+- Evicción LRU O(1) cuando se supera cualquiera de los dos límites
+- Estadísticas de hits, misses, evicciones, expiraciones y tamaño
+
+Thread-safe: se usa desde el event loop de asyncio y desde threads de Flask.
+"""
+import heapq
+import itertools
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import fields, is_dataclass
+from typing import Any, Callable, Generic, Hashable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+_SCALARS = (str, bytes, int, float, bool, type(None))
+
+
+def estimate_size(obj: Any, _depth: int = 0) -> int:
+    """
+    Estima los bytes que ocupa un objeto siguiendo contenedores, dataclasses y __slots__.
+
+    No es exacto (no deduplica referencias compartidas ni sigue más de 4
+    niveles), pero es estable y barato para acotar el tamaño de un cache.
+    """
+    size = sys.getsizeof(obj)
+    if _depth >= 4 or isinstance(obj, _SCALARS):
+        return size
+    if isinstance(obj, dict):
+        return size + sum(
+            estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1)
+            for k, v in obj.items()
+        )
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return size + sum(estimate_size(item, _depth + 1) for item in obj)
+    if is_dataclass(obj) and not isinstance(obj, type):
+        return size + sum(
+            estimate_size(getattr(obj, f.name, None), _depth + 1) for f in fields(obj)
+        )
+    if hasattr(obj, "__dict__"):
+        return size + estimate_size(vars(obj), _depth + 1)
+    slots = getattr(type(obj), "__slots__", None)
+    if slots:
+        return size + sum(
+            estimate_size(getattr(obj, name, None), _depth + 1)
+            for name in ((slots,) if isinstance(slots, str) else slots)
+        )
+    return size
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "size", "seq")
+
+    def __init__(self, value: Any, expires_at: float, size: int, seq: int) -> None:
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+        self.seq = seq  # identifica la versión vigente en el heap de vencimientos
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Cache LRU con TTL, límite de entradas y límite opcional de bytes.
+
+    Example:
+        ```python
+        cache: TTLCache[str, UserProfile] = TTLCache(max_entries=5000, ttl_seconds=300)
+        cache.set("123", profile)
+        profile = cache.get("123")  # None si no existe o expiró
+        cache.stats()  # {"hits": 1, "misses": 0, "evictions": 0, ...}
+        ```
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        ttl_seconds: float = 300,
+        max_bytes: Optional[int] = None,
+        sizer: Optional[Callable[[Any], int]] = None,
+        name: str = "cache",
+    ) -> None:
+        """
+        Args:
+            max_entries: Máximo de entradas antes de evictar por LRU
+            ttl_seconds: Vida de cada entrada desde su último set()
+            max_bytes: Máximo de bytes estimados (None = sin límite de bytes)
+            sizer: Función que estima el tamaño de un valor (default: estimate_size)
+            name: Nombre para logs y métricas
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.name = name
+        self._sizer = sizer or estimate_size
+        self._data: OrderedDict[K, _Entry] = OrderedDict()
+        # (expires_at, seq, key); las tuplas de entradas reemplazadas o evictadas
+        # quedan obsoletas y se descartan al salir del heap o al compactarlo.
+        self._heap: list[tuple[float, int, K]] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        """Retorna el valor cacheado o `default` si no existe o expiró."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._misses += 1
+                return default
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self._expirations += 1
+                self._misses += 1
+                return default
+            self._data.move_to_end(key)
+            self._hits += 1
+            return entry.value
+
+    def peek(self, key: K) -> Optional[V]:
+        """Como get() pero sin afectar el orden LRU ni las estadísticas."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry.expires_at <= time.monotonic():
+                return None
+            return entry.value
+
+    def set(self, key: K, value: V, ttl_seconds: Optional[float] = None) -> None:
+        """
+        Inserta o reemplaza un valor, reiniciando su TTL.
+
+        Args:
+            key: Clave
+            value: Valor a cachear
+            ttl_seconds: TTL de esta entrada (default: el TTL del cache)
+        """
+        size = self._sizer(value)
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            now = time.monotonic()
+            if key in self._data:
+                self._remove(key)
+            seq = next(self._seq)
+            self._data[key] = _Entry(value, now + ttl, size, seq)
+            heapq.heappush(self._heap, (now + ttl, seq, key))
+            self._bytes += size
+            self._purge_expired(now)
+            self._evict_if_needed()
+            self._compact_heap()
+
+    def refresh_size(self, key: K) -> None:
+        """Recalcula el tamaño de un valor mutado in-place, sin tocar su TTL."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return
+            size = self._sizer(entry.value)
+            self._bytes += size - entry.size
+            entry.size = size
+            self._evict_if_needed()
+
+    def purge_expired(self) -> int:
+        """Elimina todas las entradas vencidas. Retorna cuántas se eliminaron."""
+        with self._lock:
+            return self._purge_expired(time.monotonic())
+
+    def pop(self, key: K) -> Optional[V]:
+        """Elimina una entrada y retorna su valor (o None si no existía)."""
+        with self._lock:
+            entry = self._remove(key)
+            return entry.value if entry else None
+
+    def clear(self) -> None:
+        """Vacía el cache sin resetear estadísticas."""
+        with self._lock:
+            self._data.clear()
+            self._heap.clear()
+            self._bytes = 0
+
+    def reset_stats(self) -> None:
+        """Pone en cero hits, misses, evicciones y expiraciones."""
+        with self._lock:
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+            self._expirations = 0
+
+    def keys(self) -> list[K]:
+        """Snapshot de las claves, de la menos a la más recientemente usada."""
+        with self._lock:
+            return list(self._data)
+
+    def __contains__(self, key: object) -> bool:
+        with self._lock:
+            entry = self._data.get(key)  # type: ignore[arg-type]
+            return entry is not None and entry.expires_at > time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def stats(self) -> dict[str, Any]:
+        """Estadísticas del cache para métricas."""
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "name": self.name,
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "hit_rate": round(self._hits / total, 3) if total else 0.0,
+            }
+
+    # ------------------------------------------------------------------
+    # Internos (llamar con el lock tomado)
+    # ------------------------------------------------------------------
+
+    def _remove(self, key: K) -> Optional[_Entry]:
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+        return entry
+
+    def _purge_expired(self, now: float) -> int:
+        removed = 0
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            _, seq, key = heapq.heappop(heap)
+            entry = self._data.get(key)
+            if entry is not None and entry.seq == seq:
+                self._remove(key)
+                self._expirations += 1
+                removed += 1
+        return removed
+
+    def _compact_heap(self) -> None:
+        # Las tuplas obsoletas se acumulan con reemplazos y evicciones LRU;
+        # reconstruir cuando superan al doble de las vigentes mantiene O(log n) amortizado.
+        if len(self._heap) > 2 * len(self._data) + 64:
+            self._heap = [(e.expires_at, e.seq, k) for k, e in self._data.items()]
+            heapq.heapify(self._heap)
+
+    def _evict_if_needed(self) -> None:
+        while self._data and (
+            len(self._data) > self.max_entries
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            _, entry = self._data.popitem(last=False)
+            self._bytes -= entry.size
+            self._evictions += 1
@@ -0,0 +1,136 @@
+"""
+Tests para LightUserContext.
+
+Cobertura:
+- Paridad de to_prompt_context con UserContext
+- Memoización de bloques y su invalidación por mutación
+- Conversión from_model / to_model
+- copy(): copias independientes para requests concurrentes (batch)
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from src.agents.base.events import LightUserContext, UserContext
+from src.agents.tools.save_memory_tool import SaveMemoryTool
+
+
+@pytest.fixture
+def model():
+    context = UserContext(
+        user_id="123",
+        display_name="Juan",
+        roles=["admin"],
+        preferences={"alias": "J", "formato": "tabla"},
+        long_term_summary="Consulta alertas de sucursales",
+        permisos={"tool:knowledge_search": True, "tool:database_query": False},
+    )
+    context.add_message("user", "hola")
+    context.add_message("assistant", "¿En qué te ayudo?")
+    return context
+
+
+class TestParity:
+
+    def test_prompt_igual_a_user_context(self, model):
+        light = LightUserContext.from_model(model)
+
+        assert light.to_prompt_context() == model.to_prompt_context()
+        scope = {"knowledge_search"}
+        assert light.to_prompt_context(tool_scope=scope) == model.to_prompt_context(tool_scope=scope)
+
+    def test_roundtrip_model(self, model):
+        light = LightUserContext.from_model(model)
+        back = light.to_model()
+
+        assert isinstance(back, UserContext)
+        assert back.model_dump() == model.model_dump()
+
+    def test_from_model_no_comparte_listas(self, model):
+        light = LightUserContext.from_model(model)
+        light.session_notes.append("nota")
+
+        assert model.session_notes == []
+
+
+class TestMemoization:
+
+    def test_bloques_se_reusan(self, model):
+        light = LightUserContext.from_model(model)
+        light.to_prompt_context()
+
+        with patch("src.agents.base.events._render_user_memory") as render:
+            light.to_prompt_context()
+            render.assert_not_called()
+
+    def test_append_session_note_invalida(self, model):
+        light = LightUserContext.from_model(model)
+        light.to_prompt_context()
+
+        light.session_notes.append("El usuario adjuntó un PDF")
+
+        assert "El usuario adjuntó un PDF" in light.to_prompt_context()
+
+    def test_mutacion_in_place_de_preferencias_invalida(self, model):
+        light = LightUserContext.from_model(model)
+        light.to_prompt_context()
+
+        light.preferences["idioma"] = "inglés"
+
+        assert "idioma: inglés" in light.to_prompt_context()
+
+    def test_working_memory_recortada_invalida(self, model):
+        light = LightUserContext.from_model(model)
+        light.to_prompt_context()
+
+        del light.working_memory[:1]
+
+        assert "[user]: hola" not in light.to_prompt_context()
+
+    def test_reasignar_permisos_iguales_no_invalida(self, model):
+        light = LightUserContext.from_model(model)
+        light.to_prompt_context()
+
+        light.permisos = dict(model.permisos)
+
+        with patch("src.agents.base.events._render_user_memory") as render:
+            light.to_prompt_context()
+            render.assert_not_called()
+
+    def test_reasignar_atributo_invalida(self, model):
+        light = LightUserContext.from_model(model)
+        light.to_prompt_context()
+
+        light.long_term_summary = "Prefiere reportes semanales"
+
+        assert "Prefiere reportes semanales" in light.to_prompt_context()
+
+    @pytest.mark.asyncio
+    async def test_save_memory_tool_session(self, model):
+        """SaveMemoryTool muta session_notes in-place; el prompt debe reflejarlo."""
+        light = LightUserContext.from_model(model)
+        light.to_prompt_context()
+
+        result = await SaveMemoryTool().execute(scope="session", fact="Sucursal 123", user_context=light)
+
+        assert result.success
+        assert "- Sucursal 123" in light.to_prompt_context()
+
+
+class TestCopy:
+
+    def test_copia_independiente_con_bloques_memoizados(self, model):
+        light = LightUserContext.from_model(model)
+        prompt = light.to_prompt_context()
+
+        clone = light.copy()
+        with patch("src.agents.base.events._render_user_memory") as render:
+            assert clone.to_prompt_context() == prompt
+            render.assert_not_called()
+
+        clone.session_notes.append("solo en la copia")
+        clone.preferences["idioma"] = "inglés"
+        assert "solo en la copia" in clone.to_prompt_context()
+        assert light.session_notes == [] and "idioma" not in light.preferences
+        assert light.to_prompt_context() == prompt
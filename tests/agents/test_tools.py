@@ -8,6 +8,7 @@ Cobertura:
 - ToolRegistry: Registro y búsqueda de tools
 - CalculateTool: Evaluación matemática segura
 - DateTimeTool: Operaciones con fechas
+- KnowledgeTool: Búsqueda filtrada por el rol del usuario
 """
 
 import pytest
@@ -25,6 +26,7 @@ from src.agents.tools.base import (
 from src.agents.tools.registry import ToolRegistry, get_tool_registry
 from src.agents.tools.calculate_tool import CalculateTool, SafeMathEvaluator
 from src.agents.tools.datetime_tool import DateTimeTool
+from src.agents.tools.knowledge_tool import KnowledgeTool
 
 
 class TestToolParameter:
@@ -634,3 +636,29 @@ class TestDateTimeTool:
         )
 
         assert result.success is False
+
+
+class TestKnowledgeTool:
+    """Tests para KnowledgeTool."""
+
+    @pytest.mark.asyncio
+    async def test_busca_con_el_rol_del_usuario(self):
+        """El role_id del user_context inyectado filtra la búsqueda."""
+        manager = MagicMock()
+        manager.search.return_value = []
+        tool = KnowledgeTool(manager)
+
+        await tool.execute(query="vacaciones", user_context=MagicMock(role_id=7))
+
+        assert manager.search.call_args.kwargs["id_rol"] == 7
+
+    @pytest.mark.asyncio
+    async def test_sin_contexto_no_filtra(self):
+        """Sin user_context (o sin rol) la búsqueda no se filtra."""
+        manager = MagicMock()
+        manager.search.return_value = []
+        tool = KnowledgeTool(manager)
+
+        await tool.execute(query="vacaciones")
+
+        assert manager.search.call_args.kwargs["id_rol"] is None
@@ -0,0 +1,17 @@
+"""
+Fixtures compartidas de los tests de la API.
+
+Cada test arranca con limitadores nuevos: los requests de un test no consumen
+el cupo de rate limit (por número de empleado) de los siguientes.
+"""
+from unittest.mock import patch
+
+import pytest
+
+from src.utils import rate_limiter
+
+
+@pytest.fixture(autouse=True)
+def fresh_rate_limiters():
+    with patch.dict(rate_limiter._limiters, clear=True):
+        yield
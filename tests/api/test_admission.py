@@ -0,0 +1,141 @@
+"""
+Tests para AdmissionController.
+
+Cobertura:
+- Límite global: el excedente espera en cola FIFO y entra al liberarse un lugar
+- Límite por token (cuenta requests en proceso y en cola)
+- Cola llena y espera vencida → AdmissionRejected con Retry-After
+- Cancelar un request en cola no pierde lugares
+- Requests de varios lugares (lotes): todo o nada, en orden FIFO
+"""
+import asyncio
+
+import pytest
+
+from src.api.admission import AdmissionController, AdmissionRejected
+
+
+async def _hold(admission, key, release: asyncio.Event, order: list):
+    async with admission.admit(key):
+        order.append(key)
+        await release.wait()
+
+
+class TestAdmissionController:
+
+    async def test_excedente_espera_en_orden_fifo(self):
+        admission = AdmissionController(max_concurrent=1, max_per_token=5, max_queue=5)
+        release = asyncio.Event()
+        order = []
+        tasks = [asyncio.create_task(_hold(admission, k, release, order)) for k in ("a", "b", "c")]
+        await asyncio.sleep(0.01)
+        assert order == ["a"]
+        assert admission.active == 1 and admission.queued == 2
+        release.set()
+        await asyncio.gather(*tasks)
+        assert order == ["a", "b", "c"]
+        assert admission.active == 0 and admission.queued == 0
+        assert admission.stats()["admitted_after_queue"] == 2
+
+    async def test_limite_por_token(self):
+        admission = AdmissionController(max_concurrent=10, max_per_token=1, max_queue=5)
+        release = asyncio.Event()
+        task = asyncio.create_task(_hold(admission, "a", release, []))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as exc:
+            await admission.acquire("a")
+        assert exc.value.reason == "TOKEN_LIMIT"
+        await admission.acquire("b")
+        admission.release("b")
+        release.set()
+        await task
+
+    async def test_cola_llena_rechaza_con_retry_after(self):
+        admission = AdmissionController(max_concurrent=1, max_per_token=5, max_queue=1)
+        release = asyncio.Event()
+        tasks = [asyncio.create_task(_hold(admission, k, release, [])) for k in ("a", "b")]
+        await asyncio.sleep(0.01)
+        with pytest.raises(AdmissionRejected) as exc:
+            await admission.acquire("c")
+        assert exc.value.reason == "QUEUE_FULL"
+        assert exc.value.retry_after >= 1
+        release.set()
+        await asyncio.gather(*tasks)
+
+    async def test_espera_vencida(self):
+        admission = AdmissionController(max_concurrent=1, max_per_token=5, max_queue=5)
+        release = asyncio.Event()
+        task = asyncio.create_task(_hold(admission, "a", release, []))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as exc:
+            await admission.acquire("b", timeout=0.02)
+        assert exc.value.reason == "QUEUE_TIMEOUT"
+        assert admission.queued == 0
+        release.set()
+        await task
+        assert admission.active == 0
+        assert admission.stats()["rejected_queue_timeout"] == 1
+
+    async def test_cancelar_en_cola_no_pierde_lugares(self):
+        admission = AdmissionController(max_concurrent=1, max_per_token=5, max_queue=5)
+        release = asyncio.Event()
+        order = []
+        first = asyncio.create_task(_hold(admission, "a", release, order))
+        queued = asyncio.create_task(_hold(admission, "b", release, order))
+        await asyncio.sleep(0.01)
+        queued.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        await first
+        assert admission.active == 0
+        await admission.acquire("c", timeout=0.1)
+        assert admission.active == 1 and order == ["a"]
+
+    async def test_retry_after_usa_el_tiempo_de_servicio(self):
+        admission = AdmissionController(max_concurrent=2, max_per_token=5, max_queue=10)
+        for _ in range(30):
+            await admission.acquire("a")
+            admission.release("a", service_seconds=20)
+        assert admission.retry_after() >= 10
+
+    async def test_varios_lugares_todo_o_nada(self):
+        admission = AdmissionController(max_concurrent=4, max_per_token=4, max_queue=5)
+        await admission.acquire("a", slots=3)
+        assert admission.active == 3
+        lote = asyncio.create_task(admission.acquire("b", slots=3))
+        await asyncio.sleep(0.01)
+        # no toma el único lugar libre a medias, y el de 1 lugar no se le adelanta
+        assert admission.active == 3 and admission.queued == 1
+        simple = asyncio.create_task(admission.acquire("c"))
+        await asyncio.sleep(0.01)
+        assert admission.queued == 2
+        admission.release("a", slots=3)
+        await asyncio.gather(lote, simple)
+        assert admission.active == 4 and admission.queued == 0
+        admission.release("b", slots=3)
+        admission.release("c")
+        assert admission.active == 0
+
+    async def test_varios_lugares_cuentan_para_el_token(self):
+        admission = AdmissionController(max_concurrent=10, max_per_token=3, max_queue=5)
+        await admission.acquire("a", slots=2)
+        with pytest.raises(AdmissionRejected) as exc:
+            await admission.acquire("a", slots=2)
+        assert exc.value.reason == "TOKEN_LIMIT"
+        # un pedido mayor que los límites se recorta a max_slots()
+        await admission.acquire("b", slots=50)
+        assert admission.active == 5
+        admission.release("b", slots=50)
+        admission.release("a", slots=2)
+        assert admission.active == 0
+
+    async def test_lote_que_vence_en_cola_libera_el_frente(self):
+        admission = AdmissionController(max_concurrent=2, max_per_token=5, max_queue=5)
+        await admission.acquire("a")
+        lote = asyncio.create_task(admission.acquire("b", slots=2, timeout=0.02))
+        await asyncio.sleep(0.005)
+        simple = asyncio.create_task(admission.acquire("c", timeout=1))
+        with pytest.raises(AdmissionRejected):
+            await lote
+        await asyncio.wait_for(simple, 0.1)
+        assert admission.active == 2
@@ -0,0 +1,333 @@
+"""
+Tests para src/api/asgi_app.py
+
+Cobertura:
+- /api/chat nativo: validación, token, deadline propagado a handle_api, 504 al vencer
+- Control de admisión: 429 + Retry-After al desbordar la cola
+- Rate limit por empleado compartido con las rutas Flask (RATE_LIMITED)
+- /api/chat/stream: eventos SSE, heartbeat, desconexión del cliente cancela al agente
+- Rutas no nativas delegadas a la app Flask (mismas rutas que chat_endpoint/dashboard_api)
+- Body máximo (413) y errores después de iniciada la respuesta
+"""
+import asyncio
+import json
+import time
+
+from unittest.mock import MagicMock, patch
+
+# Mockear dependencias pesadas antes de importar
+import sys
+sys.modules.setdefault("telegram", MagicMock())
+sys.modules.setdefault("telegram.ext", MagicMock())
+
+from src.agents.base.agent_events import (
+    agent_routed_event,
+    observation_received_event,
+    tool_called_event,
+)
+from src.api.admission import AdmissionController
+from src.api.asgi_app import ApiApp
+from src.api.chat_endpoint import app as flask_app
+from src.api.sse import answer_chunks
+
+
+async def call(app, method, path, body=None, content_type="application/json"):
+    """Ejecuta un request HTTP contra la app ASGI y retorna (status, headers, json)."""
+    payload = json.dumps(body).encode() if body is not None else b""
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": b"",
+        "headers": [(b"content-type", content_type.encode())],
+        "server": ("testserver", 80),
+        "client": ("127.0.0.1", 1234),
+    }
+    received = iter([{"type": "http.request", "body": payload, "more_body": False}])
+    sent = []
+
+    async def receive():
+        return next(received)
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    headers = {k.decode(): v.decode() for k, v in sent[0]["headers"]}
+    raw = b"".join(m.get("body", b"") for m in sent[1:])
+    data = json.loads(raw) if headers.get("content-type", "").startswith("application/json") else raw
+    return sent[0]["status"], headers, data
+
+
+async def stream(app, body, disconnect_after=None):
+    """POST /api/chat/stream; retorna (status, eventos SSE parseados, heartbeats)."""
+    scope = {
+        "type": "http", "method": "POST", "path": "/api/chat/stream", "query_string": b"",
+        "headers": [(b"content-type", b"application/json")],
+    }
+    disconnect = asyncio.Event()
+    messages = [{"type": "http.request", "body": json.dumps(body).encode(), "more_body": False}]
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    if disconnect_after is not None:
+        asyncio.get_running_loop().call_later(disconnect_after, disconnect.set)
+    await app(scope, receive, send)
+    raw = b"".join(m.get("body", b"") for m in sent[1:]).decode()
+    events, heartbeats = [], 0
+    for block in filter(None, raw.split("\n\n")):
+        if block.startswith(":"):
+            heartbeats += 1
+            continue
+        name, data = block.split("\n")
+        events.append((name.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return sent[0]["status"], events, heartbeats
+
+
+class FakeHandler:
+    def __init__(self, delay=0.0, answer=None):
+        self.delay = delay
+        self.answer = answer
+        self.deadlines = []
+        self.cancelled = False
+
+    async def handle_api(self, user_id, text, metadata=None, deadline=None, event_callback=None):
+        self.deadlines.append(deadline)
+        if event_callback:
+            await event_callback(agent_routed_event("s", "alertas", 0.9, False))
+            await event_callback(tool_called_event("s", "database_query", 1))
+            await event_callback(observation_received_event("s", "database_query", True))
+        try:
+            async with asyncio.timeout(deadline - time.monotonic()):
+                await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        response = MagicMock()
+        response.success = True
+        response.message = self.answer if self.answer is not None else f"eco: {text}"
+        return response
+
+
+def token_ok(numero_empleado=7):
+    return patch(
+        "src.api.decorators.TokenMiddleware.validar_token",
+        side_effect=lambda token: (True, {"numero_empleado": numero_empleado if token == "ok" else int(token)}, None),
+    )
+
+
+def with_handler(handler):
+    manager = MagicMock()
+    manager.handler = handler
+    return patch("src.api.asgi_app.get_handler_manager", return_value=manager)
+
+
+class TestAsgiChat:
+
+    async def test_chat_exitoso_con_deadline(self):
+        app = ApiApp(request_timeout_seconds=30)
+        handler = FakeHandler()
+        with token_ok(), with_handler(handler):
+            status, headers, data = await call(app, "POST", "/api/chat", {"token": "ok", "message": " hola "})
+        assert status == 200
+        assert data["response"] == "eco: hola" and data["numero_empleado"] == 7
+        assert headers["access-control-allow-origin"] == "*"
+        assert 25 < handler.deadlines[0] - time.monotonic() <= 30
+
+    async def test_validaciones(self):
+        app = ApiApp()
+        status, _, data = await call(app, "POST", "/api/chat", {"token": "ok"}, content_type="text/plain")
+        assert (status, data["error_code"]) == (400, "INVALID_CONTENT_TYPE")
+        status, _, data = await call(app, "POST", "/api/chat", {"message": "hola"})
+        assert (status, data["error_code"]) == (400, "MISSING_FIELD")
+        with token_ok():
+            status, _, data = await call(app, "POST", "/api/chat", {"token": "ok", "message": "  "})
+        assert (status, data["error_code"]) == (400, "EMPTY_MESSAGE")
+        with patch(
+            "src.api.decorators.TokenMiddleware.validar_token",
+            return_value=(False, None, "Token expirado"),
+        ):
+            status, _, data = await call(app, "POST", "/api/chat", {"token": "x", "message": "hola"})
+        assert (status, data["error_code"]) == (401, "EXPIRED_TOKEN")
+
+    async def test_deadline_vencido_responde_504(self):
+        app = ApiApp(request_timeout_seconds=0.05)
+        with token_ok(), with_handler(FakeHandler(delay=5)):
+            status, _, data = await call(app, "POST", "/api/chat", {"token": "ok", "message": "lento"})
+        assert (status, data["error_code"]) == (504, "TIMEOUT")
+        assert app.admission.active == 0
+
+    async def test_desborde_de_cola_responde_429(self):
+        admission = AdmissionController(max_concurrent=1, max_per_token=5, max_queue=1, queue_timeout_seconds=5)
+        app = ApiApp(admission=admission, request_timeout_seconds=5)
+        with token_ok(), with_handler(FakeHandler(delay=0.1)):
+            results = await asyncio.gather(*(
+                call(app, "POST", "/api/chat", {"token": str(i), "message": "hola"}) for i in range(3)
+            ))
+        statuses = sorted(r[0] for r in results)
+        assert statuses == [200, 200, 429]
+        rejected = next(r for r in results if r[0] == 429)
+        assert int(rejected[1]["retry-after"]) >= 1
+        assert rejected[2]["reason"] == "QUEUE_FULL"
+
+    async def test_limite_por_token_responde_429(self):
+        admission = AdmissionController(max_concurrent=4, max_per_token=1, max_queue=4)
+        app = ApiApp(admission=admission)
+        with token_ok(), with_handler(FakeHandler(delay=0.05)):
+            results = await asyncio.gather(*(
+                call(app, "POST", "/api/chat", {"token": "ok", "message": "hola"}) for _ in range(2)
+            ))
+        assert sorted(r[0] for r in results) == [200, 429]
+
+    async def test_rate_limit_por_empleado_responde_429(self):
+        app = ApiApp()
+        with patch("src.config.settings.settings.rate_limit_max_requests", 2), token_ok(), with_handler(FakeHandler()):
+            statuses = [
+                (await call(app, "POST", "/api/chat", {"token": "ok", "message": "hola"}))[0] for _ in range(2)
+            ]
+            status, headers, data = await call(app, "POST", "/api/chat", {"token": "ok", "message": "hola"})
+            otro, _, _ = await call(app, "POST", "/api/chat", {"token": "8", "message": "hola"})
+            # Mismo cupo en las rutas Flask (require_token → check_token)
+            with flask_app.test_client() as client:
+                flask_resp = client.post("/api/chat", json={"token": "ok", "message": "hola"})
+        assert statuses == [200, 200] and otro == 200
+        assert (status, data["error_code"]) == (429, "RATE_LIMITED")
+        assert int(headers["retry-after"]) == data["retry_after"] > 0
+        assert flask_resp.status_code == 429 and flask_resp.headers["Retry-After"] == headers["retry-after"]
+
+
+class TestAsgiChatStream:
+
+    async def test_eventos_en_orden(self):
+        answer = "\n".join(f"línea {i} " + "x" * 50 for i in range(10))
+        app = ApiApp()
+        with token_ok(), with_handler(FakeHandler(answer=answer)):
+            status, events, _ = await stream(app, {"token": "ok", "message": "hola"})
+        assert status == 200
+        names = [name for name, _ in events]
+        assert names[:3] == ["routing", "tool_start", "tool_end"]
+        assert names[-1] == "result"
+        deltas = [data["delta"] for name, data in events if name == "answer"]
+        assert len(deltas) > 1 and "".join(deltas) == answer
+        assert events[0][1]["agent"] == "alertas"
+        assert events[-1][1]["response"] == answer
+        assert app.admission.active == 0
+
+    async def test_heartbeat_mientras_el_agente_trabaja(self):
+        app = ApiApp(heartbeat_seconds=0.02)
+        with token_ok(), with_handler(FakeHandler(delay=0.15)):
+            _, events, heartbeats = await stream(app, {"token": "ok", "message": "hola"})
+        assert heartbeats >= 3
+        assert events[-1][0] == "result"
+
+    async def test_desconexion_cancela_al_agente(self):
+        app = ApiApp()
+        handler = FakeHandler(delay=5)
+        start = time.monotonic()
+        with token_ok(), with_handler(handler):
+            _, events, _ = await stream(app, {"token": "ok", "message": "hola"}, disconnect_after=0.05)
+        assert time.monotonic() - start < 1
+        assert handler.cancelled
+        assert "result" not in [name for name, _ in events]
+        assert app.admission.active == 0
+
+    async def test_deadline_llega_como_evento_error(self):
+        app = ApiApp(request_timeout_seconds=0.05)
+        with token_ok(), with_handler(FakeHandler(delay=5)):
+            status, events, _ = await stream(app, {"token": "ok", "message": "hola"})
+        assert status == 200
+        assert events[-1] == ("error", {"success": False, "error": "La consulta tardó demasiado", "error_code": "TIMEOUT"})
+
+    async def test_validacion_responde_json_antes_del_stream(self):
+        status, _, data = await call(ApiApp(), "POST", "/api/chat/stream", {"message": "hola"})
+        assert (status, data["error_code"]) == (400, "MISSING_FIELD")
+
+    def test_answer_chunks_corta_en_palabras(self):
+        chunks = list(answer_chunks("uno dos tres cuatro", size=8))
+        assert "".join(chunks) == "uno dos tres cuatro"
+        assert all(len(c) <= 8 for c in chunks)
+        assert chunks[0] == "uno dos "
+
+
+class TestAsgiFallback:
+
+    async def test_rutas_flask_se_delegan(self):
+        app = ApiApp(flask_app)
+        status, _, data = await call(app, "POST", "/api/chat/generate-token", {})
+        assert (status, data["error_code"]) == (501, "NOT_IMPLEMENTED")
+
+    async def test_health_nativo_y_404(self):
+        status, _, data = await call(ApiApp(), "GET", "/api/health")
+        assert (status, data["status"]) == (200, "ok")
+        status, _, data = await call(ApiApp(), "GET", "/no-existe")
+        assert status == 404
+
+
+async def raw_call(app, chunks, headers=()):
+    """POST /api/chat con el body en `chunks`; retorna los mensajes enviados."""
+    scope = {
+        "type": "http", "method": "POST", "path": "/api/chat", "query_string": b"",
+        "headers": [(b"content-type", b"application/json"), *headers],
+    }
+    messages = [
+        {"type": "http.request", "body": chunk, "more_body": i < len(chunks) - 1}
+        for i, chunk in enumerate(chunks)
+    ]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    return sent, messages
+
+
+class TestAsgiLimites:
+
+    async def test_content_length_excedido_es_413_sin_leer_el_body(self):
+        app = ApiApp(max_body_bytes=100)
+        sent, pendientes = await raw_call(app, [b"x" * 50, b"x" * 50], headers=[(b"content-length", b"5000")])
+        assert sent[0]["status"] == 413
+        assert json.loads(sent[1]["body"])["error_code"] == "PAYLOAD_TOO_LARGE"
+        assert len(pendientes) == 2
+
+    async def test_body_sin_content_length_se_corta_al_exceder(self):
+        app = ApiApp(max_body_bytes=100)
+        sent, pendientes = await raw_call(app, [b"x" * 60, b"x" * 60, b"x" * 60])
+        assert sent[0]["status"] == 413
+        assert len(pendientes) == 1  # dejó de leer en el segundo chunk
+
+    async def test_body_dentro_del_limite(self):
+        with token_ok(), with_handler(FakeHandler()):
+            status, _, data = await call(ApiApp(max_body_bytes=1000), "POST", "/api/chat", {"token": "ok", "message": "hola"})
+        assert (status, data["response"]) == (200, "eco: hola")
+
+    async def test_error_con_respuesta_iniciada_no_envia_otro_status(self):
+        app = ApiApp()
+
+        async def falla_a_mitad(request, send):
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            raise RuntimeError("se cortó el stream")
+
+        app._routes[("GET", "/api/health")] = falla_a_mitad
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        await app({"type": "http", "method": "GET", "path": "/api/health", "headers": []}, receive, send)
+        assert [m["type"] for m in sent] == ["http.response.start"]
@@ -0,0 +1,180 @@
+"""
+Tests para POST /api/chat/batch (src/api/chat_batch.py).
+
+Cobertura:
+- Preguntas idénticas se procesan una vez (duplicate_of)
+- Mensajes vacíos y fallos del agente son fallos parciales, no del lote
+- Validación de 'messages' y límite de items
+- Mismo contrato en Flask (event loop persistente) y ASGI
+- ASGI: el lote ocupa un lugar de admisión por pregunta en paralelo
+- Rate limit: el lote cobra una unidad por pregunta distinta (Flask y ASGI)
+"""
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# Mockear dependencias pesadas antes de importar
+import sys
+sys.modules.setdefault("telegram", MagicMock())
+sys.modules.setdefault("telegram.ext", MagicMock())
+
+from src.agents.base.agent import AgentResponse
+from src.api.asgi_app import ApiApp
+from src.api.admission import AdmissionController
+from src.api.chat_batch import batch_cost, parse_batch, run_batch, unique_count
+from src.api.chat_endpoint import app
+from src.pipeline.event_loop_bridge import EventLoopBridge
+
+from tests.api.test_asgi_app import call
+
+
+class FakeBatchHandler:
+    def __init__(self, admission=None):
+        self.batches = []
+        self.concurrency = []
+        self.admission = admission
+        self.active_during = []
+
+    async def handle_api_batch(self, user_id, texts, metadata=None, deadline=None, max_concurrency=4):
+        self.batches.append(list(texts))
+        self.concurrency.append(max_concurrency)
+        if self.admission is not None:
+            self.active_during.append(self.admission.active)
+        results = []
+        for text in texts:
+            if text == "falla":
+                results.append(RuntimeError("boom"))
+            elif text == "lenta":
+                results.append(TimeoutError())
+            elif text == "rechazada":
+                results.append(AgentResponse.error_response(agent_name="react", error="No pude responder"))
+            else:
+                results.append(AgentResponse.success_response(agent_name="react", message=f"r: {text}"))
+        return results
+
+
+def with_handler(handler, target="src.api.chat_batch.get_handler_manager", bridge=None):
+    manager = MagicMock()
+    manager.handler = handler
+    if bridge is not None:
+        manager.run.side_effect = bridge.run
+    return patch(target, return_value=manager)
+
+
+TOKEN = {"numero_empleado": 9}
+
+
+class TestRunBatch:
+
+    async def test_deduplica_preguntas_identicas(self):
+        handler = FakeBatchHandler()
+        with with_handler(handler):
+            body = await run_batch(TOKEN, ["¿Alertas hoy?", "  ¿alertas   HOY? ", "Tickets de 10.0.0.1"])
+        assert handler.batches == [["¿Alertas hoy?", "Tickets de 10.0.0.1"]]
+        assert (body["total"], body["unique"], body["failed"]) == (3, 2, 0)
+        assert body["results"][1] == {"index": 1, "success": True, "response": "r: ¿Alertas hoy?", "duplicate_of": 0}
+
+    async def test_fallos_parciales(self):
+        with with_handler(FakeBatchHandler()):
+            body = await run_batch(TOKEN, ["ok", "", "falla", "lenta", "rechazada"])
+        codes = [r.get("error_code") for r in body["results"]]
+        assert codes == [None, "EMPTY_MESSAGE", "PROCESSING_ERROR", "TIMEOUT", "PROCESSING_ERROR"]
+        assert body["success"] is True and body["failed"] == 4
+        assert body["results"][4] == {
+            "index": 4, "success": False, "error": "No pude responder", "error_code": "PROCESSING_ERROR",
+        }
+
+    def test_unique_count(self):
+        assert unique_count(["a", " A ", "", "b"]) == 2
+
+    def test_batch_cost(self):
+        assert batch_cost({"messages": ["a", "a", 3, "b"]}) == 2
+        assert batch_cost({"messages": "a"}) == 1 and batch_cost({"messages": []}) == 1
+
+    def test_parse_batch(self):
+        assert parse_batch({"messages": ["a", 3]}) == (["a", ""], None)
+        _, error = parse_batch({"messages": "a"})
+        assert error[1] == 400 and error[0]["error_code"] == "MISSING_FIELD"
+        with patch("src.api.chat_batch.settings.api_batch_max_items", 2):
+            _, error = parse_batch({"messages": ["a", "b", "c"]})
+        assert error[0]["error_code"] == "TOO_MANY_ITEMS"
+
+
+@pytest.fixture(scope="module")
+def bridge():
+    b = EventLoopBridge(name="test-batch-loop")
+    yield b
+    b.shutdown()
+
+
+def token_ok():
+    return patch("src.api.decorators.TokenMiddleware.validar_token", return_value=(True, TOKEN, None))
+
+
+class TestBatchEndpoints:
+
+    def test_flask(self, bridge):
+        app.config["TESTING"] = True
+        handler = FakeBatchHandler()
+        with app.test_client() as client, token_ok(), with_handler(handler, bridge=bridge), with_handler(
+            handler, target="src.api.chat_endpoint.get_handler_manager", bridge=bridge
+        ):
+            resp = client.post("/api/chat/batch", json={"token": "t", "messages": ["a", "a", "falla"]})
+        assert resp.status_code == 200
+        data = resp.get_json()
+        assert (data["unique"], data["failed"]) == (2, 1)
+
+    async def test_asgi(self):
+        handler = FakeBatchHandler()
+        with token_ok(), with_handler(handler):
+            status, _, data = await call(ApiApp(), "POST", "/api/chat/batch", {"token": "t", "messages": ["a", "b"]})
+        assert status == 200
+        assert [r["response"] for r in data["results"]] == ["r: a", "r: b"]
+
+    async def test_asgi_sin_messages(self):
+        with token_ok():
+            status, _, data = await call(ApiApp(), "POST", "/api/chat/batch", {"token": "t"})
+        assert (status, data["error_code"]) == (400, "MISSING_FIELD")
+
+    async def test_asgi_ocupa_un_lugar_por_pregunta_en_paralelo(self):
+        admission = AdmissionController(max_concurrent=10, max_per_token=3, max_queue=5)
+        handler = FakeBatchHandler(admission)
+        app = ApiApp(admission=admission, batch_max_concurrency=4)
+        with token_ok(), with_handler(handler):
+            await call(app, "POST", "/api/chat/batch", {"token": "t", "messages": ["a", "A", "b"]})
+            await call(app, "POST", "/api/chat/batch", {"token": "t", "messages": list("abcdef")})
+        # 2 distintas → 2 lugares; 6 distintas → acotado por max_per_token
+        assert handler.concurrency == [2, 3]
+        assert handler.active_during == [2, 3]
+        assert admission.active == 0
+
+
+class TestBatchRateLimit:
+
+    async def test_asgi_el_lote_agota_el_cupo(self):
+        app = ApiApp()
+        with patch("src.config.settings.settings.rate_limit_max_requests", 3), token_ok(), \
+                with_handler(FakeBatchHandler()):
+            status, _, _ = await call(app, "POST", "/api/chat/batch", {"token": "t", "messages": ["a", "b", "A"]})
+            # 2 unidades consumidas: otro lote de 2 ya no entra, una pregunta sí
+            otro, _, data = await call(app, "POST", "/api/chat/batch", {"token": "t", "messages": ["c", "d"]})
+            uno, _, _ = await call(app, "POST", "/api/chat/batch", {"token": "t", "messages": ["c"]})
+        assert status == 200
+        assert (otro, data["error_code"]) == (429, "RATE_LIMITED")
+        assert uno == 200
+
+    def test_flask_el_lote_agota_el_cupo(self, bridge):
+        app.config["TESTING"] = True
+        handler = FakeBatchHandler()
+        with patch("src.config.settings.settings.rate_limit_max_requests", 3), app.test_client() as client, \
+                token_ok(), with_handler(handler, bridge=bridge), with_handler(
+                    handler, target="src.api.chat_endpoint.get_handler_manager", bridge=bridge):
+            lote = client.post("/api/chat/batch", json={"token": "t", "messages": ["a", "b", "c"]})
+            chat = client.post("/api/chat/batch", json={"token": "t", "messages": ["d"]})
+        assert lote.status_code == 200
+        assert chat.status_code == 429 and chat.get_json()["error_code"] == "RATE_LIMITED"
+
+    async def test_lote_mayor_que_el_cupo_es_400(self):
+        with patch("src.config.settings.settings.rate_limit_max_requests", 2), token_ok():
+            status, _, data = await call(ApiApp(), "POST", "/api/chat/batch", {"token": "t", "messages": ["a", "b", "c"]})
+        assert (status, data["error_code"]) == (400, "TOO_MANY_ITEMS")
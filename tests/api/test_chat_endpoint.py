@@ -2,11 +2,13 @@
 Tests para src/api/chat_endpoint.py
 
 Cobertura:
-- POST /api/chat: validación, autenticación, procesamiento
+- POST /api/chat: validación, autenticación, procesamiento en el event loop persistente, timeout
 - POST /api/chat/validate-token: validar token sin mensaje
 - POST /api/chat/generate-token: endpoint deshabilitado
 - GET /api/health: health check
 """
+import asyncio
+
 import pytest
 from unittest.mock import MagicMock, patch, AsyncMock
 
@@ -16,6 +18,22 @@ sys.modules.setdefault("telegram", MagicMock())
 sys.modules.setdefault("telegram.ext", MagicMock())
 
 from src.api.chat_endpoint import app
+from src.pipeline.event_loop_bridge import EventLoopBridge
+
+
+@pytest.fixture(scope="module")
+def bridge():
+    """Event loop persistente real, como el del HandlerManager."""
+    b = EventLoopBridge(name="test-api-loop")
+    yield b
+    b.shutdown()
+
+
+def make_manager(handler, bridge):
+    manager = MagicMock()
+    manager.handler = handler
+    manager.run.side_effect = bridge.run
+    return manager
 
 
 @pytest.fixture
@@ -191,7 +209,7 @@ class TestChatEndpoint:
         assert resp.status_code == 401
         assert resp.get_json()["error_code"] == "INVALID_TOKEN"
 
-    def test_successful_chat(self, client):
+    def test_successful_chat(self, client, bridge):
         mock_response = MagicMock()
         mock_response.success = True
         mock_response.message = "Respuesta del bot"
@@ -199,8 +217,7 @@ class TestChatEndpoint:
         mock_handler = MagicMock()
         mock_handler.handle_api = AsyncMock(return_value=mock_response)
 
-        mock_manager = MagicMock()
-        mock_manager.handler = mock_handler
+        mock_manager = make_manager(mock_handler, bridge)
 
         with patch(
             "src.api.chat_endpoint.TokenMiddleware.validar_token",
@@ -221,12 +238,11 @@ class TestChatEndpoint:
         assert data["response"] == "Respuesta del bot"
         assert data["numero_empleado"] == 99
 
-    def test_agent_error_returns_500(self, client):
+    def test_agent_error_returns_500(self, client, bridge):
         mock_handler = MagicMock()
         mock_handler.handle_api = AsyncMock(side_effect=RuntimeError("fallo"))
 
-        mock_manager = MagicMock()
-        mock_manager.handler = mock_handler
+        mock_manager = make_manager(mock_handler, bridge)
 
         with patch(
             "src.api.chat_endpoint.TokenMiddleware.validar_token",
@@ -244,7 +260,7 @@ class TestChatEndpoint:
         assert resp.status_code == 500
         assert resp.get_json()["error_code"] == "PROCESSING_ERROR"
 
-    def test_agent_failed_response(self, client):
+    def test_agent_failed_response(self, client, bridge):
         """Cuando agent.success=False, la respuesta usa agent.error."""
         mock_response = MagicMock()
         mock_response.success = False
@@ -253,8 +269,7 @@ class TestChatEndpoint:
         mock_handler = MagicMock()
         mock_handler.handle_api = AsyncMock(return_value=mock_response)
 
-        mock_manager = MagicMock()
-        mock_manager.handler = mock_handler
+        mock_manager = make_manager(mock_handler, bridge)
 
         with patch(
             "src.api.chat_endpoint.TokenMiddleware.validar_token",
@@ -271,3 +286,27 @@ class TestChatEndpoint:
 
         assert resp.status_code == 200
         assert resp.get_json()["response"] == "No tengo esa información"
+
+    def test_timeout_returns_504(self, client, bridge):
+        async def _slow(**kwargs):
+            await asyncio.sleep(5)
+
+        mock_handler = MagicMock()
+        mock_handler.handle_api = _slow
+        mock_manager = make_manager(mock_handler, bridge)
+
+        with patch(
+            "src.api.chat_endpoint.TokenMiddleware.validar_token",
+            return_value=(True, {"numero_empleado": 5}, None),
+        ), patch(
+            "src.api.chat_endpoint.get_handler_manager",
+            return_value=mock_manager,
+        ), patch("src.api.chat_endpoint.settings.api_request_timeout_seconds", 0.05):
+            resp = client.post(
+                "/api/chat",
+                json={"token": "valid", "message": "algo"},
+                content_type="application/json",
+            )
+
+        assert resp.status_code == 504
+        assert resp.get_json()["error_code"] == "TIMEOUT"
@@ -0,0 +1,258 @@
+"""
+Tests para src/api/dashboard_api.py - consultas en paralelo del panel web.
+
+Cobertura:
+- overview, agents, knowledge y chats tardan max(consulta), no sum(consulta)
+- Consultas secundarias fallidas o vencidas → respuesta parcial marcada
+- Consulta principal fallida → 500
+- QueryPool: timeout común, defaults y métricas
+- Listados con cursor keyset: next_cursor por (fecha, idLog), cursor inválido → 400, total cacheado
+"""
+import time
+from datetime import datetime
+
+import pytest
+from flask import Flask
+from unittest.mock import patch
+
+from src.api import dashboard_api
+from src.infra.database import pagination
+from src.infra.database.pagination import decode_cursor, encode_cursor
+from src.infra.database.query_pool import QueryPool, QueryTimeoutError
+from src.utils.ttl_cache import TTLCache
+
+DELAY = 0.2
+
+
+class SlowDb:
+    """DatabaseManager falso: cada consulta tarda `delay`; `rules` cambian filas, delay o lanzan."""
+
+    def __init__(self, delay=DELAY, rules=None):
+        self.delay = delay
+        self.rules = rules or {}
+        self.calls = 0
+
+    def execute_query(self, sql, params=None):
+        self.calls += 1
+        for fragment, rule in self.rules.items():
+            if fragment in sql:
+                if isinstance(rule, Exception):
+                    raise rule
+                delay, rows = rule
+                time.sleep(delay)
+                return rows
+        time.sleep(self.delay)
+        return []
+
+
+@pytest.fixture
+def pool():
+    pool = QueryPool(max_workers=8, timeout_seconds=1.0, name="test_dashboard_queries")
+    with patch.object(dashboard_api, "_pool", pool):
+        yield pool
+    pool.shutdown()
+
+
+@pytest.fixture
+def client(pool):
+    """Blueprint del dashboard con conteos cacheados propios del test."""
+    app = Flask(__name__)
+    app.register_blueprint(dashboard_api.dashboard_bp)
+    counts = TTLCache(max_entries=16, ttl_seconds=60, name="test_dashboard_counts")
+    with patch.object(pagination, "_counts", counts), app.test_client() as c:
+        yield c
+
+
+def get(client, db, url):
+    with patch.object(dashboard_api, "_db", db):
+        inicio = time.monotonic()
+        resp = client.get(url)
+        return resp, time.monotonic() - inicio
+
+
+class TestParallelEndpoints:
+
+    @pytest.mark.parametrize("url, queries", [
+        ("/api/admin/overview?periodo=7d", 5),
+        ("/api/admin/agents", 3),
+        ("/api/admin/knowledge", 2),
+        ("/api/admin/chats", 2),
+    ])
+    def test_latencia_es_max_no_suma(self, client, url, queries):
+        db = SlowDb()
+        resp, elapsed = get(client, db, url)
+        assert resp.status_code == 200
+        assert db.calls == queries
+        assert elapsed < DELAY * 2 <= DELAY * queries
+
+    def test_overview_completo_sin_parcial_y_cacheado(self, client):
+        db = SlowDb(rules={"total_mensajes": (0, [{"total_mensajes": 4, "lat03": 4}])})
+        resp, _ = get(client, db, "/api/admin/overview?periodo=hoy")
+        data = resp.get_json()
+        assert data["mensajes"] == 4 and data["p50_s"] == 1.5 and data["parcial"] == []
+        get(client, db, "/api/admin/overview?periodo=hoy")
+        assert db.calls == 5
+
+    def test_overview_parcial_no_se_cachea(self, client, pool):
+        pool.timeout_seconds = 0.3
+        db = SlowDb(delay=0, rules={"total_prev": (1.0, [])})
+        data = get(client, db, "/api/admin/overview?periodo=ayer")[0].get_json()
+        assert data["parcial"] == ["prev"] and data["mensajes_pct_change"] == 0
+        get(client, db, "/api/admin/overview?periodo=ayer")
+        assert db.calls == 10
+
+    def test_knowledge_consulta_vencida_es_parcial(self, client, pool):
+        pool.timeout_seconds = 0.3
+        db = SlowDb(delay=0, rules={
+            "knowledge_categories": (0, [{"id": 1, "name": "red", "display_name": "Red", "icon": "", "entry_count": 3}]),
+            "conocimiento": (1.0, [{"total": 9}]),
+        })
+        resp, elapsed = get(client, db, "/api/admin/knowledge")
+        data = resp.get_json()
+        assert resp.status_code == 200 and elapsed < 0.9
+        assert data["parcial"] == ["busquedas_hoy"]
+        assert data["busquedas_hoy"] == 0 and data["total_entradas"] == 3
+
+    def test_agents_lista_parcial_en_header(self, client):
+        db = SlowDb(delay=0, rules={
+            "AgenteDef": (0, [{
+                "idAgente": 1, "nombre": "datos", "descripcion": "", "systemPrompt": "",
+                "temperatura": 0.1, "maxIteraciones": 5, "modeloOverride": None,
+                "esGeneralista": 0, "version": 2, "tools": "a,b",
+            }]),
+            "PromptHistorial": RuntimeError("timeout de red"),
+        })
+        resp, _ = get(client, db, "/api/admin/agents")
+        assert resp.status_code == 200
+        assert resp.headers["X-Partial-Results"] == "historial"
+        assert resp.get_json()[0]["historial"] == []
+
+    def test_chats_sin_total_usa_cota_inferior(self, client):
+        filas = [{
+            "telegramChatId": i, "nombre": "x", "username": "", "id_usuario": None,
+            "nombre_usuario": None, "email_usuario": None, "empresa_usuario": None,
+            "total_mensajes": 1, "exitosos": 1, "errores": 0, "ultima_actividad": "",
+            "primera_actividad": "", "ultimo_query": "",
+        } for i in range(11, 0, -1)]
+        db = SlowDb(delay=0, rules={
+            "COUNT(DISTINCT": RuntimeError("lock timeout"),
+            "TOP (11)": (0, [dict(f, ultima_actividad=datetime(2026, 10, 19, 12)) for f in filas]),
+        })
+        data = get(client, db, "/api/admin/chats?limit=10")[0].get_json()
+        assert data["parcial"] == ["total"]
+        assert data["has_more"] is True and data["total"] == 10 and len(data["items"]) == 10
+
+    def test_consulta_principal_fallida_es_500(self, client):
+        db = SlowDb(delay=0, rules={"knowledge_categories": RuntimeError("BD caída")})
+        resp, _ = get(client, db, "/api/admin/knowledge")
+        assert resp.status_code == 500
+        assert "BD caída" in resp.get_json()["error"]
+
+
+def log_row(i, ts):
+    return {
+        "idLog": 1000 - i, "correlationId": None if i % 2 else f"c{i:03d}", "idUsuario": None, "telegramUsername": "u", "query": "q",
+        "agenteNombre": "datos", "duracionMs": 10, "exitoso": 1, "fechaEjecucion": ts,
+        "channel": "telegram", "stepsTomados": 1, "totalInputTokens": 1, "totalOutputTokens": 1,
+        "costUSD": 0, "nombre_usuario": None, "email_usuario": None, "empresa_usuario": None,
+        "app_log_level": None,
+    }
+
+
+class TestKeysetEndpoints:
+
+    def test_logs_devuelve_cursor_de_la_ultima_fila(self, client):
+        ts = datetime(2026, 10, 19, 9, 30)
+        db = SlowDb(delay=0, rules={
+            "COUNT(*)": (0, [{"total": 120}]),
+            "TOP (11)": (0, [log_row(i, ts) for i in range(11)]),
+        })
+        data = get(client, db, "/api/admin/logs?limit=10")[0].get_json()
+        assert len(data["items"]) == 10 and data["has_more"] is True
+        assert data["total"] == 120
+        assert decode_cursor(data["next_cursor"]) == (ts, 991)
+
+    def test_cursor_filtra_por_timestamp_e_id(self, client):
+        calls = []
+
+        class Spy(SlowDb):
+            def execute_query(self, sql, params=None):
+                calls.append((sql, params))
+                return super().execute_query(sql, params)
+
+        db = Spy(delay=0, rules={"COUNT(*)": (0, [{"total": 3}])})
+        first = get(client, db, "/api/admin/logs?limit=10")[0].get_json()
+        assert first["next_cursor"] is None and first["has_more"] is False
+        cursor = encode_cursor(datetime(2026, 10, 19, 9, 30), 991)
+        get(client, db, f"/api/admin/logs?limit=10&cursor={cursor}")
+        sql, params = calls[-1]
+        assert "il.fechaEjecucion < CAST(:c_ts AS DATETIME)" in sql and "il.idLog < :c_id" in sql
+        assert "OFFSET" not in sql
+        assert params == {"c_ts": datetime(2026, 10, 19, 9, 30), "c_id": 991}
+
+    def test_total_cacheado_entre_paginas(self, client):
+        db = SlowDb(delay=0, rules={"COUNT(*)": (0, [{"total": 7}])})
+        for _ in range(3):
+            assert get(client, db, "/api/admin/app-logs?level=ERROR")[0].get_json()["total"] == 7
+        assert db.calls == 4  # 3 páginas + 1 conteo
+        get(client, db, "/api/admin/app-logs?level=WARNING")
+        assert db.calls == 6  # otros filtros → otro conteo
+
+    def test_app_logs_excluye_created_at_nulo(self, client):
+        calls = []
+
+        class Spy(SlowDb):
+            def execute_query(self, sql, params=None):
+                calls.append(sql)
+                return super().execute_query(sql, params)
+
+        get(client, Spy(delay=0), "/api/admin/app-logs?level=ERROR")
+        assert all("createdAt IS NOT NULL" in sql for sql in calls)
+
+    @pytest.mark.parametrize("url", [
+        "/api/admin/logs", "/api/admin/chats", "/api/admin/chats/123", "/api/admin/app-logs",
+    ])
+    def test_cursor_invalido_es_400(self, client, url):
+        resp, _ = get(client, SlowDb(delay=0), f"{url}?cursor=no-es-un-cursor")
+        assert resp.status_code == 400
+
+    def test_historial_sin_perfil_en_paginas_siguientes(self, client):
+        db = SlowDb(delay=0)
+        get(client, db, "/api/admin/chats/123")
+        assert db.calls == 3
+        get(client, db, f"/api/admin/chats/123?cursor={encode_cursor(datetime(2026, 1, 1), 41)}")
+        assert db.calls == 4
+
+
+class TestQueryPool:
+
+    def test_deadline_comun_y_defaults(self):
+        pool = QueryPool(max_workers=4, timeout_seconds=0.2)
+        inicio = time.monotonic()
+        result = pool.run({
+            "rapida": lambda: 1,
+            "lenta_a": lambda: time.sleep(0.5),
+            "lenta_b": lambda: time.sleep(0.5),
+        }, default=[])
+        assert time.monotonic() - inicio < 0.4
+        assert result.results == {"rapida": 1, "lenta_a": [], "lenta_b": []}
+        assert result.failed == {"lenta_a": "timeout", "lenta_b": "timeout"}
+        assert pool.stats()["timeouts"] == 2
+        pool.shutdown()
+
+    def test_requerida_vencida_lanza(self):
+        pool = QueryPool(max_workers=2, timeout_seconds=0.1)
+        with pytest.raises(QueryTimeoutError):
+            pool.run({"principal": lambda: time.sleep(0.3)}, required=("principal",))
+        pool.shutdown()
+
+    def test_requerida_con_error_relanza_la_excepcion(self):
+        pool = QueryPool(max_workers=2)
+
+        def falla():
+            raise ValueError("sql inválido")
+
+        with pytest.raises(ValueError, match="sql inválido"):
+            pool.run({"principal": falla, "otra": lambda: 2}, required=("principal",))
+        assert pool.stats()["errors"] == 1
+        pool.shutdown()
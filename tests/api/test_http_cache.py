@@ -0,0 +1,158 @@
+"""
+Tests para src/api/http_cache.py - ETag, 304, compresión y Cache-Control del dashboard.
+
+Cobertura:
+- JSON de /api/admin/*: ETag del contenido, 304 con If-None-Match, gzip sobre el umbral
+- Cada codificación tiene su propio ETag; contenido nuevo → 200
+- Estáticos de /admin: servidos desde memoria, precomprimidos una vez y recargados al cambiar
+- Cache-Control por ruta; errores y PUT sin ETag
+"""
+import gzip
+import os
+from unittest.mock import patch
+
+import pytest
+from flask import Flask
+
+from src.api import dashboard_api
+from src.api.http_cache import HttpCache, accepted_encodings, choose_encoding
+
+GZIP = {"Accept-Encoding": "gzip"}
+
+
+class FixedDb:
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = 0
+
+    def execute_query(self, sql, params=None):
+        self.calls += 1
+        return self.rows
+
+
+@pytest.fixture
+def wwwroot(tmp_path):
+    (tmp_path / "dashboard-wireframe.html").write_text("<html>" + "panel " * 500 + "</html>")
+    (tmp_path / "app.js").write_text("console.log('x');" * 200)
+    (tmp_path / "logo.jpg").write_bytes(os.urandom(4096))
+    return tmp_path
+
+
+@pytest.fixture
+def cache():
+    return HttpCache(compress_min_bytes=1024, static_max_age_seconds=300)
+
+
+@pytest.fixture
+def client(cache, wwwroot):
+    app = Flask(__name__)
+    app.register_blueprint(dashboard_api.dashboard_bp)
+    with patch.object(dashboard_api, "_http_cache", cache), \
+         patch.object(dashboard_api, "_WWWROOT", str(wwwroot)), \
+         app.test_client() as c:
+        yield c
+
+
+def users(n):
+    return [{
+        "idUsuario": i, "Nombre": f"Usuario {i}", "rolNombre": "Analista", "telegramChatId": 1000 + i,
+        "telegramUsername": f"u{i}", "estado": "ACTIVO", "verificado": 1, "fechaUltimaActividad": None,
+    } for i in range(n)]
+
+
+def get_users(client, db, headers=None):
+    with patch.object(dashboard_api, "_db", db):
+        return client.get("/api/admin/users", headers=headers or {})
+
+
+class TestJson:
+
+    def test_etag_y_304(self, client, cache):
+        db = FixedDb(users(3))
+        first = get_users(client, db)
+        assert first.status_code == 200 and first.headers["Cache-Control"] == "no-cache"
+        etag = first.headers["ETag"]
+        second = get_users(client, db, {"If-None-Match": etag})
+        assert second.status_code == 304 and second.data == b""
+        assert second.headers["ETag"] == etag
+        assert cache.stats()["not_modified"] == 1
+
+    def test_contenido_nuevo_es_200(self, client):
+        db = FixedDb(users(3))
+        etag = get_users(client, db).headers["ETag"]
+        db.rows = users(4)
+        resp = get_users(client, db, {"If-None-Match": etag})
+        assert resp.status_code == 200 and resp.headers["ETag"] != etag
+
+    def test_gzip_sobre_el_umbral(self, client):
+        db = FixedDb(users(50))
+        plano = get_users(client, db)
+        resp = get_users(client, db, GZIP)
+        assert resp.headers["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in resp.headers["Vary"]
+        assert gzip.decompress(resp.data) == plano.data
+        assert resp.headers["ETag"] == plano.headers["ETag"][:-1] + '-gzip"'
+        # el ETag de la versión gzip no valida la versión sin comprimir
+        assert get_users(client, db, {"If-None-Match": resp.headers["ETag"]}).status_code == 200
+        assert get_users(client, db, {**GZIP, "If-None-Match": resp.headers["ETag"]}).status_code == 304
+
+    def test_bajo_el_umbral_sin_comprimir(self, client):
+        resp = get_users(client, FixedDb(users(1)), GZIP)
+        assert "Content-Encoding" not in resp.headers and resp.status_code == 200
+
+    def test_errores_y_put_sin_etag(self, client):
+        with patch.object(dashboard_api, "_db", FixedDb(None)):
+            resp = client.get("/api/admin/users")  # iterar None → 500
+            put = client.put("/api/admin/agents/1/prompt", json={})
+        assert resp.status_code == 500 and "ETag" not in resp.headers
+        assert "ETag" not in put.headers
+
+
+class TestStatic:
+
+    def test_html_no_cache_y_304(self, client):
+        resp = client.get("/admin", headers=GZIP)
+        assert resp.headers["Cache-Control"] == "no-cache"
+        assert resp.headers["Content-Encoding"] == "gzip"
+        assert gzip.decompress(resp.data).startswith(b"<html>")
+        again = client.get("/admin", headers={**GZIP, "If-None-Match": resp.headers["ETag"]})
+        assert again.status_code == 304
+
+    def test_js_con_max_age_y_precomprimido_una_vez(self, client, cache):
+        for _ in range(3):
+            resp = client.get("/admin/app.js", headers=GZIP)
+            assert resp.headers["Cache-Control"] == "public, max-age=300"
+        assert cache.stats()["static_loads"] == 1
+        assert gzip.decompress(resp.data) == b"console.log('x');" * 200
+
+    def test_imagen_sin_comprimir(self, client):
+        resp = client.get("/admin/logo.jpg", headers=GZIP)
+        assert resp.mimetype == "image/jpeg" and "Content-Encoding" not in resp.headers
+
+    def test_if_modified_since(self, client):
+        resp = client.get("/admin/logo.jpg")
+        again = client.get("/admin/logo.jpg", headers={"If-Modified-Since": resp.headers["Last-Modified"]})
+        assert again.status_code == 304
+
+    def test_archivo_modificado_se_recarga(self, client, cache, wwwroot):
+        etag = client.get("/admin/app.js").headers["ETag"]
+        path = wwwroot / "app.js"
+        path.write_text("console.log('y');")
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        resp = client.get("/admin/app.js", headers={"If-None-Match": etag})
+        assert resp.status_code == 200 and resp.data == b"console.log('y');"
+        assert cache.stats()["static_loads"] == 2
+
+    @pytest.mark.parametrize("path", ["/admin/no-existe.js", "/admin/../secreto.txt"])
+    def test_inexistente_o_fuera_de_raiz_es_404(self, client, path):
+        assert client.get(path).status_code == 404
+
+
+class TestAcceptEncoding:
+
+    def test_q_cero_excluye(self):
+        assert accepted_encodings("gzip;q=0, deflate, br;q=0.5") == {"deflate", "br"}
+        assert choose_encoding("gzip;q=0") is None
+        assert choose_encoding("identity") is None
+        assert choose_encoding("*") in ("gzip", "br")
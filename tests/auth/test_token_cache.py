@@ -0,0 +1,93 @@
+"""
+Tests para el cache de validaciones de TokenMiddleware.
+
+Cobertura:
+- Un token válido se desencripta una sola vez y cada hit retorna una copia
+- La vigencia cacheada respeta fechaExpiracion / timestamp del token
+- Tokens malformados se cachean negativamente; expirados y del futuro no
+- Métricas de hits, misses y desencriptaciones evitadas
+"""
+import json
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from src.bot.middleware import token_middleware
+from src.bot.middleware.token_middleware import TokenMiddleware, TokenValidationCache
+from src.utils.encryption_util import desencriptar, encriptar
+
+
+@pytest.fixture
+def cache():
+    cache = TokenValidationCache()
+    with patch.object(token_middleware, "_cache", cache):
+        yield cache
+
+
+def contar_desencriptaciones():
+    return patch.object(token_middleware, "desencriptar", side_effect=desencriptar)
+
+
+def token(**datos):
+    return encriptar(json.dumps(datos))
+
+
+class TestTokenValidationCache:
+
+    def test_token_valido_se_desencripta_una_vez(self, cache):
+        t = TokenMiddleware.generar_token(123)
+        with contar_desencriptaciones() as spy:
+            resultados = [TokenMiddleware.validar_token(t) for _ in range(5)]
+        assert spy.call_count == 1
+        assert all(valido and datos["numero_empleado"] == 123 for valido, datos, _ in resultados)
+        assert cache.stats()["hits"] == 4 and cache.stats()["decryptions_avoided"] == 4
+
+    def test_hit_retorna_copia(self, cache):
+        t = TokenMiddleware.generar_token(5)
+        _, datos, _ = TokenMiddleware.validar_token(t)
+        datos["numero_empleado"] = 999
+        _, datos, _ = TokenMiddleware.validar_token(t)
+        datos["numero_empleado"] = 888
+        assert TokenMiddleware.validar_token(t)[1]["numero_empleado"] == 5
+
+    def test_vigencia_respeta_expiracion_del_token(self, cache):
+        expira = datetime.now() + timedelta(minutes=10)
+        t = token(UserId="77", fechaExpiracion=expira.isoformat())
+        assert TokenMiddleware.validar_token(t)[0] is True
+        assert len(cache.valid) == 1
+
+        class Despues(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return expira + timedelta(seconds=1)
+
+        with patch.object(token_middleware, "datetime", Despues):
+            valido, datos, error = TokenMiddleware.validar_token(t)
+        assert (valido, datos) == (False, None)
+        assert error.startswith("Token expirado")
+
+    def test_malformado_se_cachea_negativamente(self, cache):
+        with contar_desencriptaciones() as spy:
+            for _ in range(3):
+                valido, _, error = TokenMiddleware.validar_token("basura")
+                assert valido is False and error.startswith("Token inválido")
+            sin_campo = token(timestamp=datetime.now().isoformat())
+            TokenMiddleware.validar_token(sin_campo)
+            TokenMiddleware.validar_token(sin_campo)
+        assert spy.call_count == 2
+        assert cache.stats()["negative_hits"] == 3
+
+    def test_expirados_y_futuros_no_se_cachean(self, cache):
+        viejo = token(numero_empleado=1, timestamp=(datetime.now() - timedelta(minutes=5)).isoformat())
+        futuro = token(numero_empleado=1, timestamp=(datetime.now() + timedelta(minutes=5)).isoformat())
+        for t in (viejo, futuro):
+            assert TokenMiddleware.validar_token(t)[0] is False
+        assert len(cache.valid) == 0 and len(cache.invalid) == 0
+
+    def test_no_guarda_el_token_en_claro(self, cache):
+        t = TokenMiddleware.generar_token(3)
+        TokenMiddleware.validar_token(t)
+        (key,) = cache.valid.keys()
+        assert isinstance(key, bytes) and t.encode() not in key
+        assert t not in repr(cache.valid.peek(key))
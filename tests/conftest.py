@@ -7,7 +7,11 @@ de test_gateway.py corrompa las importaciones de telegram.error en otros tests.
 
 El truco: las entradas de submodulos en sys.modules son independientes del
 módulo padre, por lo que sobreviven aunque sys.modules["telegram"] se reemplace.
+
+También define valores de prueba para los campos obligatorios de Settings, así
+los tests no dependen de un .env local (que nunca se versiona).
 """
+import os
 import sys
 from unittest.mock import MagicMock
 
@@ -19,3 +23,12 @@ for _submod in [
     "telegram.ext.filters",
 ]:
     sys.modules.setdefault(_submod, MagicMock())
+
+# Campos obligatorios de Settings; un .env local, si existe, tiene prioridad
+for _var, _value in {
+    "TELEGRAM_BOT_TOKEN": "test-telegram-token",
+    "DB_NAME": "test_db",
+    "DB_USER": "test_user",
+    "DB_PASSWORD": "test_password",
+}.items():
+    os.environ.setdefault(_var, _value)
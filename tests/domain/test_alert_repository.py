@@ -0,0 +1,690 @@
+"""
+Tests para AlertRepository: eventos activos servidos desde el snapshot compartido.
+
+Cobertura:
+- Lecturas repetidas dentro de max_staleness no consultan PRTG
+- Snapshot vencido o fresh=True → recarga
+- Lecturas concurrentes comparten una sola recarga (single-flight)
+- Filtros sobre el snapshot, fallback a EKT y ConnectionError sin conectividad
+- Recarga en background
+- ActiveEventsIndex: paridad con el filtro lineal
+- Hedging BAZ_CDMX/EKT: cobertura por p95, cancelación y prioridad del principal
+- Las consultas canceladas no entran al histograma (el delay no colapsa)
+- Inventario por IP: consulta paralela con prioridad, cache positivo y negativo
+- Tickets históricos: sensores en paralelo acotados, combinación sin duplicados y cache
+- Escalamiento: cache de template/matriz/contactos, sonda de versión y precalentamiento
+"""
+
+import asyncio
+import random
+import time
+
+import pytest
+
+from src.domain.alerts.active_events_index import ActiveEventsIndex
+from src.domain.alerts.active_events_snapshot import ActiveEventsSnapshot, snapshot_for
+from src.agents.tools.get_escalation_matrix_tool import GetEscalationMatrixTool
+from src.domain.alerts.alert_caches import NOT_FOUND, AlertCaches, EscalationCaches
+from src.domain.alerts.alert_entity import AlertEvent
+from src.domain.alerts.alert_repository import AlertRepository
+from src.domain.alerts.hedging import HedgePolicy, LatencyHistogram
+
+
+SP_BAZ = "EXEC Monitoreos.dbo.PrtgObtenerEventosEnriquecidos"
+SP_BAZ_PERF = "EXEC Monitoreos.dbo.PrtgObtenerEventosEnriquecidosPerformance"
+SP_EKT = "EXEC Monitoreos.dbo.PrtgObtenerEventosEnriquecidos_EKT"
+SP_EKT_PERF = "EXEC Monitoreos.dbo.PrtgObtenerEventosEnriquecidosPerformance_EKT"
+
+
+def _row(equipo, ip, sensor="Ping", status="Down", prioridad=3):
+    return {"Equipo": equipo, "IP": ip, "Sensor": sensor, "Status": status, "Prioridad": prioridad}
+
+
+class FakeMonitoreoDb:
+    """DatabaseManager falso: filas por SP, latencia opcional y conteo de llamadas."""
+
+    def __init__(self, results=None, delay=0.0, fail=(), delays=None):
+        self.results = results or {}
+        self.delay = delay
+        self.delays = delays or {}
+        self.fail = set(fail)
+        self.calls: list[str] = []
+        self.completed: list[str] = []
+
+    async def execute_query_async(self, sql, params=None):
+        self.calls.append(sql)
+        delay = self.delays.get(sql, self.delay)
+        if delay:
+            await asyncio.sleep(delay)
+        self.completed.append(sql)
+        if sql in self.fail:
+            raise OSError("sin conexión")
+        # Copia: el repositorio anota _origen en cada fila
+        return [dict(r) for r in self.results.get(sql, [])]
+
+
+BAZ_ROWS = {
+    SP_BAZ: [
+        _row("SRV-NOMINA-01", "10.0.0.1", prioridad=5),
+        _row("SRV-CORREO", "10.0.0.2", status="Warning", prioridad=2),
+    ],
+    SP_BAZ_PERF: [
+        _row("SRV-NOMINA-01", "10.0.0.1", prioridad=5),  # duplicado (IP, Sensor)
+        _row("SRV-NOMINA-02", "10.0.0.3", sensor="CPU", prioridad=4),
+    ],
+    SP_EKT: [_row("EKT-CAJA", "10.9.0.1", prioridad=1)],
+}
+
+
+def make_repo(results=None, max_staleness=30.0, hedge=None, **kwargs):
+    db = FakeMonitoreoDb(results if results is not None else BAZ_ROWS, **kwargs)
+    snapshot = ActiveEventsSnapshot(max_staleness_seconds=max_staleness)
+    repo = AlertRepository(db, snapshot=snapshot, hedge=hedge or HedgePolicy(), caches=AlertCaches())
+    return repo, db
+
+
+class TestActiveEventsSnapshot:
+
+    async def test_lecturas_repetidas_no_consultan_prtg(self):
+        repo, db = make_repo()
+        first = await repo.get_active_events()
+        calls = len(db.calls)
+        second = await repo.get_active_events()
+        assert [e.ip for e in first] == [e.ip for e in second]
+        assert len(db.calls) == calls
+        stats = repo._snapshot.stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1
+
+    async def test_deduplica_y_ordena_por_prioridad(self):
+        repo, _ = make_repo()
+        events = await repo.get_active_events()
+        assert [e.ip for e in events] == ["10.0.0.1", "10.0.0.3", "10.0.0.2"]
+        assert all(e.origen == "BAZ_CDMX" for e in events)
+
+    async def test_filtros_sobre_snapshot(self):
+        repo, db = make_repo()
+        assert [e.ip for e in await repo.get_active_events(ip="10.0.0.3")] == ["10.0.0.3"]
+        assert [e.ip for e in await repo.get_active_events(equipo="nomina")] == ["10.0.0.1", "10.0.0.3"]
+        assert [e.ip for e in await repo.get_active_events(solo_down=True)] == ["10.0.0.1", "10.0.0.3"]
+        assert len(db.calls) == 2  # una sola carga para todas las variantes
+
+    async def test_resultado_no_comparte_lista_con_snapshot(self):
+        repo, _ = make_repo()
+        events = await repo.get_active_events()
+        events.clear()
+        assert len(await repo.get_active_events()) == 3
+
+    async def test_snapshot_vencido_recarga(self):
+        repo, db = make_repo(max_staleness=0.05)
+        await repo.get_active_events()
+        await asyncio.sleep(0.08)
+        await repo.get_active_events()
+        assert db.calls.count(SP_BAZ) == 2
+
+    async def test_fresh_fuerza_recarga(self):
+        repo, db = make_repo()
+        await repo.get_active_events()
+        db.results = {SP_BAZ: [_row("SRV-NUEVO", "10.0.0.9")]}
+        assert [e.ip for e in await repo.get_active_events()] != ["10.0.0.9"]
+        assert [e.ip for e in await repo.get_active_events(fresh=True)] == ["10.0.0.9"]
+        # La recarga forzada actualiza el snapshot para los demás lectores
+        assert [e.ip for e in await repo.get_active_events()] == ["10.0.0.9"]
+
+    async def test_lecturas_concurrentes_comparten_una_recarga(self):
+        repo, db = make_repo(delay=0.05)
+        results = await asyncio.gather(*(repo.get_active_events() for _ in range(10)))
+        assert all(len(r) == 3 for r in results)
+        assert db.calls.count(SP_BAZ) == 1
+
+    async def test_lector_cancelado_no_cancela_la_recarga(self):
+        repo, db = make_repo(delay=0.05)
+        owner = asyncio.create_task(repo.get_active_events())
+        await asyncio.sleep(0.01)
+        waiter = asyncio.create_task(repo.get_active_events())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        assert len(await owner) == 3
+        assert db.calls.count(SP_BAZ) == 1
+
+    async def test_fallback_a_ekt(self):
+        repo, _ = make_repo({SP_EKT: [_row("EKT-CAJA", "10.9.0.1")]})
+        events = await repo.get_active_events()
+        assert [e.origen for e in events] == ["EKT"]
+
+    async def test_sin_conectividad_lanza_y_no_cachea(self):
+        repo, db = make_repo(fail={SP_BAZ, SP_BAZ_PERF, SP_EKT, SP_EKT_PERF})
+        with pytest.raises(ConnectionError):
+            await repo.get_active_events()
+        db.fail.clear()
+        assert len(await repo.get_active_events()) == 3
+        assert repo._snapshot.stats()["failures"] == 1
+
+    async def test_get_active_events_all_usa_su_propio_slot(self):
+        repo, db = make_repo()
+        banco, ekt = await repo.get_active_events_all()
+        assert [e.ip for e in banco] == ["10.0.0.1", "10.0.0.3", "10.0.0.2"]
+        assert [e.origen for e in ekt] == ["EKT"]
+        calls = len(db.calls)
+        banco, ekt = await repo.get_active_events_all(solo_down=True)
+        assert len(banco) == 2 and len(ekt) == 1
+        assert len(db.calls) == calls
+
+    async def test_repos_de_la_misma_conexion_comparten_snapshot(self):
+        db = FakeMonitoreoDb(BAZ_ROWS)
+        await AlertRepository(db).get_active_events()
+        await AlertRepository(db).get_active_events()
+        assert db.calls.count(SP_BAZ) == 1
+        assert AlertRepository(db)._snapshot is snapshot_for(db)
+        assert AlertRepository(FakeMonitoreoDb())._snapshot is not snapshot_for(db)
+
+    def test_recarga_en_background(self):
+        repo, db = make_repo()
+        asyncio.run(repo.get_active_events())
+        db.results = {SP_BAZ: [_row("SRV-NUEVO", "10.0.0.9")]}
+        repo._snapshot.start_background_refresh(0.02)
+        try:
+            deadline = time.monotonic() + 2.0
+            while time.monotonic() < deadline and db.calls.count(SP_BAZ) < 2:
+                time.sleep(0.01)
+        finally:
+            repo._snapshot.stop_background_refresh()
+        assert [e.ip for e in asyncio.run(repo.get_active_events())] == ["10.0.0.9"]
+
+    def test_background_no_carga_slots_nunca_leidos(self):
+        repo, db = make_repo()
+        asyncio.run(repo._snapshot.refresh_all())
+        assert db.calls == []
+
+
+def _linear_filter(events, ip=None, equipo=None, sensor=None, solo_down=False):
+    """Filtro lineal previo a ActiveEventsIndex (referencia de paridad)."""
+    result = list(events)
+    if ip:
+        result = [e for e in result if e.ip == ip]
+    if equipo:
+        result = [e for e in result if equipo.lower() in e.equipo.lower()]
+    if sensor:
+        result = [e for e in result if sensor.lower() in e.sensor.lower()]
+    if solo_down:
+        result = [e for e in result if e.status.lower() == "down"]
+    return result
+
+
+@pytest.fixture(scope="module")
+def events():
+    rng = random.Random(7)
+    equipos = ["SRV-NOMINA", "SWITCH-CORE", "FIREWALL-DMZ", "Router-Suc", "ekt-caja", "AP"]
+    sensores = ["Ping", "CPU Load", "Memoria", "Disco C:", "HTTP https://portal", "SNMP"]
+    events = [
+        AlertEvent.model_validate({
+            "Equipo": f"{rng.choice(equipos)}-{rng.randint(1, 40):02d}",
+            "IP": f"10.0.{rng.randint(0, 3)}.{rng.randint(1, 30)}",
+            "Sensor": rng.choice(sensores),
+            "Status": rng.choice(["Down", "down", "Warning", "Unusual", "Down (parcial)"]),
+            "Prioridad": rng.randint(1, 5),
+        })
+        for _ in range(600)
+    ]
+    events.sort(key=lambda e: e.prioridad, reverse=True)
+    return events
+
+
+class TestActiveEventsIndex:
+
+    @pytest.mark.parametrize("filters", [
+        {},
+        {"ip": "10.0.1.7"},
+        {"ip": "10.9.9.9"},
+        {"equipo": "nomina"},
+        {"equipo": "SWITCH-CORE-1"},
+        {"equipo": "ap"},
+        {"equipo": "-"},
+        {"equipo": "inexistente"},
+        {"sensor": "http"},
+        {"sensor": "c:"},
+        {"solo_down": True},
+        {"equipo": "srv", "solo_down": True},
+        {"ip": "10.0.2.3", "sensor": "ping", "solo_down": True},
+        {"equipo": "router", "sensor": "memoria"},
+    ])
+    def test_paridad_con_filtro_lineal(self, events, filters):
+        index = ActiveEventsIndex(events)
+        assert index.filter(**filters) == _linear_filter(events, **filters)
+
+    def test_snapshot_vacio(self):
+        index = ActiveEventsIndex([])
+        assert index.filter(equipo="srv", solo_down=True) == []
+        assert index.filter() == []
+
+    async def test_repo_filtra_por_sensor(self):
+        repo, _ = make_repo()
+        events = await repo.get_active_events(equipo="nomina", sensor="cpu")
+        assert [e.ip for e in events] == ["10.0.0.3"]
+
+
+SP_TICKETS = "EXEC Monitoreos.dbo.IABOT_ObtenerTicketsByAlerta @ip = :ip, @sensor = :sensor"
+SP_TICKETS_EKT = "EXEC Monitoreos.dbo.IABOT_ObtenerTicketsByAlerta_EKT @ip = :ip, @sensor = :sensor"
+SP_TEMPLATE = "EXEC ABCMASplus.dbo.Template_GetById @id = :id"
+SP_TEMPLATE_EKT = "EXEC ABCMASplus.dbo.Template_GetById_EKT @id = :id"
+
+TICKET = {"Ticket": "INC1", "alerta": "Ping", "detalle": "caído", "accionCorrectiva": "reinicio"}
+
+
+def fast_hedge(**kwargs):
+    params = dict(default_delay_seconds=0.05, min_delay_seconds=0.01, min_samples=5)
+    params.update(kwargs)
+    return HedgePolicy(**params)
+
+
+class TestLatencyHistogram:
+
+    def test_percentil_sigue_la_distribucion(self):
+        hist = LatencyHistogram()
+        for _ in range(95):
+            hist.observe(0.010)
+        for _ in range(5):
+            hist.observe(1.0)
+        assert 0.010 <= hist.percentile(0.5) < 0.0125
+        assert hist.percentile(0.95) < 0.0125
+        assert hist.percentile(0.99) >= 1.0
+
+    def test_decaimiento_olvida_latencias_viejas(self):
+        hist = LatencyHistogram(window=50)
+        for _ in range(50):
+            hist.observe(2.0)
+        for _ in range(400):
+            hist.observe(0.02)
+        assert hist.percentile(0.95) < 0.05
+
+    def test_delay_acotado_y_default_sin_muestras(self):
+        policy = HedgePolicy(default_delay_seconds=0.5, min_delay_seconds=0.05, max_delay_seconds=2.0)
+        assert policy.hedge_delay("BAZ_CDMX/x") == 0.5
+        for _ in range(30):
+            policy.histogram("BAZ_CDMX/x").observe(30.0)
+        assert policy.hedge_delay("BAZ_CDMX/x") == 2.0
+
+
+class TestHedging:
+
+    async def test_principal_rapido_no_lanza_fallback(self):
+        repo, db = make_repo({SP_TICKETS: [TICKET]}, hedge=fast_hedge())
+        tickets = await repo.get_historical_tickets(ip="10.0.0.1", sensor="Ping")
+        assert len(tickets) == 1
+        assert SP_TICKETS_EKT not in db.calls
+
+    async def test_principal_lento_gana_fallback_y_se_cancela(self):
+        repo, db = make_repo(
+            {SP_TICKETS: [TICKET], SP_TICKETS_EKT: [dict(TICKET, Ticket="EKT1")]},
+            hedge=fast_hedge(),
+            delays={SP_TICKETS: 1.0},
+        )
+        start = time.monotonic()
+        tickets = await repo.get_historical_tickets(ip="10.0.0.1", sensor="Ping")
+        assert time.monotonic() - start < 0.5
+        assert [t.ticket for t in tickets] == ["EKT1"]
+        await asyncio.sleep(0)
+        assert SP_TICKETS not in db.completed  # el principal se dejó de esperar
+        assert repo._hedge.stats()["fallback_wins"] == 1
+
+    async def test_principal_vacio_lanza_fallback_sin_esperar_delay(self):
+        repo, db = make_repo(
+            {SP_TICKETS_EKT: [TICKET]}, hedge=fast_hedge(default_delay_seconds=5.0),
+        )
+        start = time.monotonic()
+        tickets = await repo.get_historical_tickets(ip="10.0.0.1", sensor="Ping")
+        assert len(tickets) == 1
+        assert time.monotonic() - start < 0.5
+        assert repo._hedge.stats()["hedged"] == 0
+
+    async def test_ordered_prioriza_principal_aunque_el_fallback_llegue_antes(self):
+        repo, _ = make_repo(
+            {
+                SP_TEMPLATE: [{"idTemplate": 7, "Aplicacion": "BAZ"}],
+                SP_TEMPLATE_EKT: [{"idTemplate": 7, "Aplicacion": "EKT"}],
+            },
+            hedge=fast_hedge(),
+            delays={SP_TEMPLATE: 0.15},
+        )
+        template = await repo.get_template_by_id(7)
+        assert template is not None and template.aplicacion == "BAZ"
+
+    async def test_ordered_usa_fallback_si_principal_vacio(self):
+        repo, _ = make_repo(
+            {SP_TEMPLATE_EKT: [{"idTemplate": 7, "Aplicacion": "EKT"}]},
+            hedge=fast_hedge(),
+            delays={SP_TEMPLATE: 0.15},
+        )
+        template = await repo.get_template_by_id(7)
+        assert template is not None and template.aplicacion == "EKT"
+
+    async def test_histograma_ajusta_el_delay(self):
+        hedge = fast_hedge(max_delay_seconds=5.0)
+        repo, db = make_repo({SP_TICKETS: [TICKET]}, hedge=hedge, delays={SP_TICKETS: 0.02})
+        for i in range(6):
+            # IPs distintas: el cache de tickets no debe evitar las consultas
+            await repo.get_historical_tickets(ip=f"10.0.0.{i}", sensor="Ping")
+        stats = hedge.stats()["instances"]["BAZ_CDMX/tickets"]
+        assert stats["samples"] == 6
+        assert 20 <= stats["hedge_delay_ms"] < 40
+        assert SP_TICKETS_EKT not in db.calls
+
+    async def test_principal_siempre_mas_lento_no_colapsa_el_delay(self):
+        hedge = fast_hedge(default_delay_seconds=0.05, min_delay_seconds=0.001, max_delay_seconds=5.0)
+
+        async def primary():
+            await asyncio.sleep(1.0)
+            return [TICKET]
+
+        async def fallback():
+            return [dict(TICKET, Ticket="EKT1")]
+
+        for _ in range(8):
+            rows, origen, _ = await hedge.run(primary, fallback, ("BAZ_CDMX", "EKT"), operation="tickets")
+            assert origen == "EKT"
+            await asyncio.sleep(0)
+        stats = hedge.stats()["instances"]["BAZ_CDMX/tickets"]
+        # las cancelaciones se cuentan pero no se miden: el delay sigue en el default
+        assert stats["samples"] == 0 and stats["cancelled"] == 8
+        assert hedge.hedge_delay("BAZ_CDMX/tickets") == 0.05
+
+    async def test_principal_que_falla_si_se_mide(self):
+        hedge = fast_hedge()
+
+        async def primary():
+            raise ConnectionError("BAZ caído")
+
+        async def fallback():
+            return [TICKET]
+
+        _, origen, errors = await hedge.run(primary, fallback, ("BAZ_CDMX", "EKT"))
+        assert origen == "EKT" and len(errors) == 1
+        assert hedge.histogram("BAZ_CDMX").samples == 1
+
+    async def test_sps_de_eventos_corren_en_paralelo(self):
+        repo, db = make_repo(delays={SP_BAZ: 0.1, SP_BAZ_PERF: 0.1}, hedge=fast_hedge(default_delay_seconds=1.0))
+        start = time.monotonic()
+        events = await repo.get_active_events()
+        assert len(events) == 3
+        assert time.monotonic() - start < 0.18
+
+    async def test_eventos_prioridad_baz_con_cobertura(self):
+        repo, db = make_repo(delays={SP_BAZ: 0.15, SP_BAZ_PERF: 0.15}, hedge=fast_hedge())
+        events = await repo.get_active_events()
+        assert {e.origen for e in events} == {"BAZ_CDMX"}
+        assert SP_EKT in db.calls  # la cobertura se lanzó pero no ganó
+
+
+SP_FISICO = "EXEC ABCMASplus.dbo.EquiposFisicos_GetByIp @ip = :ip"
+SP_VIRTUAL = "EXEC ABCMASplus.dbo.MaquinasVirtuales_GetByIp @ip = :ip"
+SP_FISICO_EKT = "EXEC ABCMASplus.dbo.EquiposFisicos_GetByIp_Ekt @ip = :ip"
+SP_VIRTUAL_EKT = "EXEC ABCMASplus.dbo.MaquinasVirtuales_GetByIp_Ekt @ip = :ip"
+SP_FISICO_LIST = "EXEC ABCMASplus.dbo.EquiposFisicos_GetByIpList @ips = :ips"
+
+FISICO = {"ip": "10.0.0.1", "hostname": "SRV-NOMINA-01", "AreaAtendedora": "Redes"}
+VIRTUAL_EKT = {"IPMaquinaVirtual": "10.0.0.1", "Hostname": "VM-EKT", "AreaAtiende": "Cómputo"}
+
+
+class TestInventoryCache:
+
+    async def test_hit_se_cachea(self):
+        repo, db = make_repo({SP_FISICO: [FISICO]})
+        item = await repo.get_inventory_by_ip("10.0.0.1")
+        assert item.hostname == "SRV-NOMINA-01" and item.fuente == "Fisico"
+        calls = len(db.calls)
+        assert (await repo.get_inventory_by_ip("10.0.0.1")).hostname == "SRV-NOMINA-01"
+        assert len(db.calls) == calls
+
+    async def test_respeta_prioridad_aunque_el_principal_sea_lento(self):
+        repo, _ = make_repo(
+            {SP_FISICO: [FISICO], SP_VIRTUAL_EKT: [VIRTUAL_EKT]}, delays={SP_FISICO: 0.1}
+        )
+        item = await repo.get_inventory_by_ip("10.0.0.1")
+        assert item.hostname == "SRV-NOMINA-01"
+
+    async def test_consulta_los_sps_en_paralelo(self):
+        repo, db = make_repo({SP_VIRTUAL_EKT: [VIRTUAL_EKT]}, delay=0.1)
+        start = time.monotonic()
+        item = await repo.get_inventory_by_ip("10.0.0.1")
+        elapsed = time.monotonic() - start
+        assert item.hostname == "VM-EKT" and item.fuente == "Virtual"
+        assert len(db.calls) == 4
+        assert elapsed < 0.25  # secuencial serían ~0.4s
+
+    async def test_hit_temprano_cancela_los_de_menor_prioridad(self):
+        repo, db = make_repo({SP_FISICO: [FISICO]}, delays={SP_VIRTUAL_EKT: 0.5})
+        await repo.get_inventory_by_ip("10.0.0.1")
+        await asyncio.sleep(0)
+        assert SP_VIRTUAL_EKT not in db.completed
+
+    async def test_ausente_se_cachea_como_negativo(self):
+        repo, db = make_repo({})
+        assert await repo.get_inventory_by_ip("10.9.9.9") is None
+        assert repo._caches.inventory.get("10.9.9.9") is NOT_FOUND
+        calls = len(db.calls)
+        assert await repo.get_inventory_by_ip("10.9.9.9") is None
+        assert len(db.calls) == calls
+
+    async def test_no_cachea_negativo_si_un_sp_fallo(self):
+        repo, db = make_repo({}, fail=[SP_FISICO_EKT])
+        assert await repo.get_inventory_by_ip("10.9.9.9") is None
+        assert repo._caches.inventory.get("10.9.9.9") is None
+        await repo.get_inventory_by_ip("10.9.9.9")
+        assert db.calls.count(SP_FISICO) == 2
+
+    async def test_negativo_vence_con_su_ttl(self):
+        repo, db = make_repo({})
+        repo._caches = AlertCaches(inventory_negative_ttl_seconds=0.05)
+        await repo.get_inventory_by_ip("10.9.9.9")
+        await asyncio.sleep(0.08)
+        db.results = {SP_FISICO: [{**FISICO, "ip": "10.9.9.9"}]}
+        assert (await repo.get_inventory_by_ip("10.9.9.9")).ip == "10.9.9.9"
+
+    async def test_lista_solo_consulta_las_ips_faltantes(self):
+        repo, db = make_repo({SP_FISICO: [FISICO]})
+        await repo.get_inventory_by_ip("10.0.0.1")
+        db.results = {SP_FISICO_LIST: [{**FISICO, "ip": "10.0.0.2", "hostname": "SRV-CORREO"}]}
+        params = []
+        original = db.execute_query_async
+
+        async def _spy(sql, p=None):
+            params.append(p)
+            return await original(sql, p)
+
+        db.execute_query_async = _spy
+        items = await repo.get_inventory_by_ip_list(["10.0.0.1", "10.0.0.2", "10.0.0.3"])
+        assert sorted(i.hostname for i in items) == ["SRV-CORREO", "SRV-NOMINA-01"]
+        assert params[0] == {"ips": "10.0.0.2,10.0.0.3"}
+
+        # Segunda vez: todo desde cache (10.0.0.3 como ausente)
+        calls = len(db.calls)
+        items = await repo.get_inventory_by_ip_list(["10.0.0.1", "10.0.0.2", "10.0.0.3"])
+        assert len(items) == 2 and len(db.calls) == calls
+
+
+class TicketsDb(FakeMonitoreoDb):
+    """Tickets por sensor y sensores recientes de la IP, con latencia por consulta."""
+
+    def __init__(self, tickets_by_sensor, sensores, delay=0.05):
+        super().__init__(delay=delay)
+        self.tickets_by_sensor = tickets_by_sensor
+        self.sensores = sensores
+        self.inflight = 0
+        self.max_inflight = 0
+
+    async def execute_query_async(self, sql, params=None):
+        self.calls.append(sql)
+        is_ticket = sql == SP_TICKETS
+        if is_ticket:
+            self.inflight += 1
+            self.max_inflight = max(self.max_inflight, self.inflight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            if is_ticket:
+                self.inflight -= 1
+        if is_ticket:
+            return [dict(r) for r in self.tickets_by_sensor.get(params["sensor"], [])]
+        if "EventosPRTG_Historico" in sql and "OPENDATASOURCE" not in sql:
+            return [{"Sensor": s, "ultima_fecha": "2026-01-01"} for s in self.sensores]
+        return []
+
+
+def _ticket(ticket_id, alerta="Ping"):
+    return {**TICKET, "Ticket": ticket_id, "alerta": alerta}
+
+
+def make_tickets_repo(tickets_by_sensor, sensores, delay=0.05):
+    db = TicketsDb(tickets_by_sensor, sensores, delay=delay)
+    repo = AlertRepository(
+        db, snapshot=ActiveEventsSnapshot(), hedge=HedgePolicy(), caches=AlertCaches()
+    )
+    return repo, db
+
+
+class TestHistoricalTickets:
+
+    async def test_sensor_exacto_no_consulta_historicos(self):
+        repo, db = make_tickets_repo({"Ping": [_ticket("INC1")]}, ["CPU", "Disco"])
+        tickets = await repo.get_historical_tickets("10.0.0.1", "Ping")
+        assert [t.ticket for t in tickets] == ["INC1"]
+        assert db.calls.count(SP_TICKETS) == 1
+
+    async def test_sensores_historicos_en_paralelo(self):
+        sensores = ["S1", "S2", "S3", "S4", "S5"]
+        repo, db = make_tickets_repo({"S5": [_ticket("INC5")]}, sensores, delay=0.05)
+        start = time.monotonic()
+        tickets = await repo.get_historical_tickets("10.0.0.1", "Ping")
+        elapsed = time.monotonic() - start
+        assert [t.ticket for t in tickets] == ["INC5"]
+        # Secuencial: exacto (BAZ+EKT) + 4 sensores vacíos (BAZ+EKT) + S5 ≈ 0.55s
+        assert elapsed < 0.4
+        assert db.max_inflight <= 3
+
+    async def test_combina_en_orden_sin_duplicados(self):
+        repo, _ = make_tickets_repo(
+            {
+                "CPU": [_ticket("INC1", "CPU"), _ticket("INC2", "CPU")],
+                "Disco": [_ticket("INC2", "Disco"), _ticket("INC3", "Disco")],
+            },
+            ["CPU", "Ping", "Disco"],
+        )
+        tickets = await repo.get_historical_tickets("10.0.0.1", "Ping")
+        assert [t.ticket for t in tickets] == ["INC1", "INC2", "INC3"]
+
+    async def test_combinacion_respeta_el_tope(self):
+        repo, _ = make_tickets_repo(
+            {f"S{i}": [_ticket(f"INC{i}-{j}") for j in range(10)] for i in range(3)},
+            ["S0", "S1", "S2"],
+        )
+        tickets = await repo.get_historical_tickets("10.0.0.1", "Ping")
+        assert len(tickets) == 15
+        assert tickets[0].ticket == "INC0-0" and tickets[-1].ticket == "INC1-4"
+
+    async def test_llamada_repetida_sale_del_cache(self):
+        repo, db = make_tickets_repo({"CPU": [_ticket("INC1")]}, ["CPU"])
+        first = await repo.get_historical_tickets("10.0.0.1", "Ping")
+        calls = len(db.calls)
+        second = await repo.get_historical_tickets("10.0.0.1", "Ping")
+        assert [t.ticket for t in second] == [t.ticket for t in first]
+        assert len(db.calls) == calls
+
+    async def test_sin_tickets_no_se_cachea(self):
+        repo, db = make_tickets_repo({}, ["CPU"])
+        assert await repo.get_historical_tickets("10.0.0.1", "Ping") == []
+        calls = len(db.calls)
+        db.tickets_by_sensor = {"Ping": [_ticket("INC9")]}
+        assert [t.ticket for t in await repo.get_historical_tickets("10.0.0.1", "Ping")] == ["INC9"]
+        assert len(db.calls) > calls
+
+
+SP_TEMPLATE_BY_IP = "EXEC ABCMASplus.dbo.IDTemplateByIp @ip = :ip"
+SP_MATRIZ = "EXEC ABCMASplus.dbo.ObtenerMatriz @idTemplate = :idTemplate"
+SP_CONTACTO = "EXEC ABCMASplus.dbo.Contacto_GetByIdGerencia @idGerencia = :idGerencia"
+VERSION_QUERY = "SELECT MAX(FechaModificacion) AS version FROM ABCMASplus.dbo.Matriz"
+
+ESCALATION_ROWS = {
+    SP_TEMPLATE_BY_IP: [{"idTemplate": 15978, "instancia": "BAZ"}],
+    SP_FISICO: [{**FISICO, "idAreaAtendedora": 42, "idAreaAdministradora": 7}],
+    SP_TEMPLATE: [{"idTemplate": 15978, "Aplicacion": "Nómina", "Atendedor_idGerencia": 42}],
+    SP_MATRIZ: [
+        {"nivel": 2, "Nombre": "Gerente", "correo": "g@x"},
+        {"nivel": 1, "Nombre": "Operador", "correo": "o@x"},
+    ],
+    SP_CONTACTO: [{"Gerencia": "Redes", "RESPONSABLE": "Ana"}],
+    VERSION_QUERY: [{"version": "2026-01-01"}],
+}
+
+
+def make_escalation_repo(**kwargs):
+    db = FakeMonitoreoDb({k: list(v) for k, v in ESCALATION_ROWS.items()})
+    caches = AlertCaches(escalation=EscalationCaches(**kwargs))
+    repo = AlertRepository(db, snapshot=ActiveEventsSnapshot(), hedge=HedgePolicy(), caches=caches)
+    return repo, db
+
+
+class TestEscalationCache:
+
+    async def test_consulta_repetida_sin_idas_a_bd(self):
+        repo, db = make_escalation_repo()
+        tool = GetEscalationMatrixTool(repo=repo)
+        first = await tool.execute(ip="10.0.0.1")
+        assert first.success and [n["nivel"] for n in first.data["niveles"]] == [1, 2]
+        assert first.data["area_atendedora"]["responsable"] == "Ana"
+        calls = len(db.calls)
+        second = await tool.execute(ip="10.0.0.1")
+        assert second.data == first.data
+        assert len(db.calls) == calls
+
+    async def test_flujo_por_template_id_tambien_se_cachea(self):
+        repo, db = make_escalation_repo()
+        tool = GetEscalationMatrixTool(repo=repo)
+        await tool.execute(template_id=15978)
+        calls = len(db.calls)
+        await tool.execute(template_id="15978")
+        assert len(db.calls) == calls
+
+    async def test_instancias_no_comparten_cache(self):
+        repo, db = make_escalation_repo()
+        await repo.get_escalation_matrix(15978, usar_ekt=False)
+        calls = len(db.calls)
+        await repo.get_escalation_matrix(15978, usar_ekt=True)
+        assert len(db.calls) > calls
+
+    async def test_cambio_de_version_invalida(self):
+        repo, db = make_escalation_repo(version_query=VERSION_QUERY)
+        await repo.refresh_escalation_cache()  # primera versión: solo referencia
+        await repo.get_escalation_matrix(15978)
+        await repo.refresh_escalation_cache()
+        assert ("15978", "BAZ_CDMX") in repo._caches.escalation.matrices
+
+        db.results[VERSION_QUERY] = [{"version": "2026-02-01"}]
+        db.results[SP_MATRIZ] = [{"nivel": 1, "Nombre": "Nuevo"}]
+        await repo.refresh_escalation_cache()
+        # Invalidado y precalentado de nuevo con la matriz actual
+        calls = len(db.calls)
+        levels = await repo.get_escalation_matrix(15978)
+        assert [l.nombre for l in levels] == ["Nuevo"]
+        assert len(db.calls) == calls
+        assert repo._caches.escalation.stats()["invalidations"] == 1
+
+    async def test_precalienta_los_mas_pedidos(self):
+        repo, db = make_escalation_repo(warmup_top=1)
+        escalation = repo._caches.escalation
+        for _ in range(3):
+            escalation.record_request(("15978", "BAZ_CDMX"))
+        escalation.record_request(("16046", "EKT"))
+        assert await repo.warm_up_escalation() == 1
+        calls = len(db.calls)
+        await repo.get_template_info(15978)
+        await repo.get_escalation_matrix(15978)
+        await repo.get_contacto_gerencia(42)
+        assert len(db.calls) == calls
+        # El precalentamiento no cuenta como pedido
+        assert escalation.most_requested(2) == [("15978", "BAZ_CDMX"), ("16046", "EKT")]
+
+    def test_conteo_persistido_entre_arranques(self, tmp_path):
+        path = tmp_path / "escalation.json"
+        escalation = EscalationCaches(warmup_path=path)
+        escalation.record_request(("15978", "BAZ_CDMX"))
+        escalation.save_requested()
+        assert EscalationCaches(warmup_path=path).most_requested() == [("15978", "BAZ_CDMX")]
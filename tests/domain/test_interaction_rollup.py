@@ -0,0 +1,171 @@
+"""
+Tests para interaction_rollup: rollups horarios y lector cacheado del overview.
+
+Cobertura:
+- Percentiles aproximados desde el histograma de latencia
+- Las consultas leen rollups hasta la marca de agua + InteractionLogs desde ahí
+- Cache por período y fallback a InteractionLogs si faltan las tablas de rollup
+- roll_up: backfill acotado, chunks por transacción, no-op al día, nunca lanza
+- notify_write mantiene pendiente el job mientras la hora no cierre
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.domain.interaction.interaction_rollup import (
+    LATENCY_BUCKETS_MS,
+    LATENCY_COLUMNS,
+    InteractionRollup,
+    OverviewReader,
+    _STATE,
+    _rollup_statements,
+    latency_percentile,
+    overview_queries,
+)
+
+
+class FakeDb:
+    """DatabaseManager falso: responde por nombre de consulta y registra escrituras."""
+
+    def __init__(self, rolled_until=None, hasta=datetime(2026, 10, 19, 12), fail_rollup_tables=False):
+        self.rolled_until = rolled_until
+        self.hasta = hasta
+        self.fail_rollup_tables = fail_rollup_tables
+        self.queries: list[str] = []
+        self.writes: list[dict] = []
+
+    def execute_query(self, sql, params=None):
+        self.queries.append(sql)
+        if self.fail_rollup_tables and "InteractionHourly" in sql:
+            raise RuntimeError("Invalid object name 'BotIAv2_InteractionHourly'")
+        if "AS rolled_until" in sql:
+            return [{"rolled_until": self.rolled_until, "hasta": self.hasta}]
+        return [{"total_mensajes": 3, "usuarios_activos": 2, "total_prev": 1}]
+
+    async def execute_query_async(self, sql, params=None):
+        return self.execute_query(sql, params)
+
+    def execute_transaction(self, statements):
+        sqls = [sql.strip() for sql, _ in statements]
+        assert sqls[0].startswith("DELETE") and sqls[-1].startswith(f"UPDATE {_STATE}")
+        params = statements[0][1]
+        self.writes.append(params)
+        self.rolled_until = params["hasta"]
+        return len(statements)
+
+
+def histograma(**counts):
+    row = {col: 0 for col in LATENCY_COLUMNS}
+    row.update(counts)
+    return row
+
+
+class TestLatencyPercentile:
+
+    def test_sin_datos_es_cero(self):
+        assert latency_percentile(histograma(), 0.5) == 0.0
+
+    def test_interpola_dentro_del_bucket(self):
+        # 10 muestras en [1000, 2000): la mediana cae a la mitad del bucket
+        assert latency_percentile(histograma(lat03=10), 0.5) == pytest.approx(1500)
+
+    def test_acumula_entre_buckets(self):
+        row = histograma(lat00=50, lat05=50)  # <250ms y [3000, 5000)
+        assert latency_percentile(row, 0.5) == pytest.approx(250)
+        assert latency_percentile(row, 0.9) == pytest.approx(3000 + 2000 * 0.8)
+
+    def test_ultimo_bucket_usa_limite_inferior(self):
+        assert latency_percentile(histograma(lat15=3), 0.9) == LATENCY_BUCKETS_MS[-1]
+
+
+class TestOverviewQueries:
+
+    def test_combina_rollup_y_hora_en_curso(self):
+        queries = overview_queries("7d")
+        assert set(queries) == {"stats", "usuarios", "prev", "agentes", "actividad"}
+        for sql in queries.values():
+            assert "BotIAv2_InteractionHourly" in sql and "UNION ALL" in sql
+            assert "rolledUntil" in sql
+        assert "PERCENTILE_CONT" not in "".join(queries.values())
+        assert "lat15" in queries["stats"]
+
+    def test_sin_rollup_lee_solo_interaction_logs(self):
+        for sql in overview_queries("hoy", use_rollup=False).values():
+            assert "InteractionHourly" not in sql and "rolledUntil" not in sql
+
+    def test_actividad_horaria_o_diaria(self):
+        assert "DATEPART(HOUR" in overview_queries("ayer")["actividad"]
+        assert "AS DATE" in overview_queries("30d")["actividad"]
+
+
+class TestOverviewReader:
+
+    def test_cachea_por_periodo(self):
+        db = FakeDb()
+        reader = OverviewReader(db, cache_ttl_seconds=60)
+        assert reader.rows("hoy")["stats"][0]["total_mensajes"] == 3
+        reader.rows("hoy")
+        assert len(db.queries) == 5
+        reader.rows("7d")
+        assert len(db.queries) == 10
+
+    async def test_async_comparte_cache(self):
+        db = FakeDb()
+        reader = OverviewReader(db, cache_ttl_seconds=60)
+        first = await reader.rows_async("hoy")
+        assert reader.rows("hoy") is first
+        assert len(db.queries) == 5
+
+    def test_sin_tablas_de_rollup_lee_interaction_logs(self):
+        db = FakeDb(fail_rollup_tables=True)
+        reader = OverviewReader(db, cache_ttl_seconds=0)
+        assert reader.rows("hoy")["usuarios"][0]["usuarios_activos"] == 2
+        db.queries.clear()
+        reader.rows("ayer")
+        assert db.queries and not any("InteractionHourly" in q for q in db.queries)
+
+
+class TestInteractionRollup:
+
+    def test_backfill_inicial_acotado_y_en_chunks(self):
+        db = FakeDb(rolled_until=None)
+        rollup = InteractionRollup(db, backfill_hours=48, chunk_hours=24)
+        assert rollup.roll_up() == 48
+        assert [w["desde"] for w in db.writes] == [db.hasta - timedelta(hours=48), db.hasta - timedelta(hours=24)]
+        assert db.writes[-1]["hasta"] == db.hasta
+        assert rollup.stats()["rolled_until"] == db.hasta.isoformat()
+
+    def test_incremental_desde_la_marca_de_agua(self):
+        db = FakeDb(rolled_until=datetime(2026, 10, 19, 10))
+        assert InteractionRollup(db).roll_up() == 2
+        assert db.writes == [{"desde": datetime(2026, 10, 19, 10), "hasta": db.hasta}]
+
+    def test_al_dia_no_escribe(self):
+        db = FakeDb(rolled_until=datetime(2026, 10, 19, 12))
+        assert InteractionRollup(db).roll_up() == 0
+        assert db.writes == []
+
+    def test_errores_no_se_propagan(self):
+        class Rota(FakeDb):
+            def execute_transaction(self, statements):
+                raise RuntimeError("deadlock")
+
+        rollup = InteractionRollup(Rota(rolled_until=datetime(2026, 10, 19, 10)))
+        assert rollup.roll_up() == 0
+        assert rollup.stats()["errors"] == 1 and rollup.stats()["pending"] is True
+
+    def test_marca_de_agua_en_la_misma_transaccion_despues_de_los_insert(self):
+        statements = _rollup_statements(datetime(2026, 10, 19, 10), datetime(2026, 10, 19, 11))
+        verbos = [sql.split()[0] for sql, _ in statements]
+        assert verbos == ["DELETE", "INSERT", "DELETE", "INSERT", "UPDATE"]
+        assert statements[-1][1] == {"hasta": datetime(2026, 10, 19, 11)}
+
+    def test_notify_write_pendiente_hasta_que_cierre_la_hora(self):
+        db = FakeDb(rolled_until=datetime(2026, 10, 19, 12), hasta=datetime.now() - timedelta(hours=1))
+        rollup = InteractionRollup(db)
+        rollup.roll_up()
+        assert rollup.stats()["pending"] is False
+        rollup.notify_write()
+        rollup.roll_up()
+        assert rollup.stats()["pending"] is True
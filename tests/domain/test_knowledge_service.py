@@ -5,11 +5,19 @@ Cobertura:
 - KnowledgeCategory: enum, display names
 - KnowledgeEntry: dataclass
 - KnowledgeService: search, scoring, category detection, stats
+- KnowledgeIndex: paridad de relevancia, particiones por rol
+- Recarga incremental por high-water mark y snapshots atómicos (incluido borrar todo)
 """
+import dataclasses
+import threading
+import time
+from datetime import datetime, timedelta
+
 import pytest
 from unittest.mock import MagicMock, patch
 
 from src.domain.knowledge.knowledge_entity import KnowledgeCategory, KnowledgeEntry
+from src.domain.knowledge.knowledge_index import KnowledgeIndex
 from src.domain.knowledge.knowledge_service import KnowledgeService
 
 
@@ -286,3 +294,399 @@ class TestKnowledgeServiceMethods:
 
     def test_clean_text_removes_punctuation(self):
         assert "?" not in KnowledgeService._clean_text("¿Cómo?")
+
+
+# ---------------------------------------------------------------------------
+# KnowledgeIndex — paridad de relevancia con el scoring lineal
+# ---------------------------------------------------------------------------
+
+C = KnowledgeCategory
+
+CORPUS = [
+    make_entry(C.RECURSOS_HUMANOS, "¿Cómo pido vacaciones?",
+               "Solicítalas en el portal de RRHH con 15 días de anticipación.",
+               ["vacaciones", "días libres", "permiso"], 2),
+    make_entry(C.RECURSOS_HUMANOS, "¿Cuándo se paga la nómina?",
+               "La nómina se deposita los días 15 y 30 de cada mes.",
+               ["nómina", "pago", "salario"]),
+    make_entry(C.POLITICAS, "Política de trabajo remoto",
+               "Se permite home office dos días por semana con aprobación del jefe.",
+               ["home office", "remoto", "teletrabajo"]),
+    make_entry(C.SISTEMAS, "¿Cómo restablezco mi contraseña del ERP?",
+               "Usa la opción olvidé mi contraseña o abre un ticket a mesa de ayuda.",
+               ["contraseña", "erp", "password"], 3),
+    make_entry(C.SISTEMAS, "¿Qué es PRTG?",
+               "PRTG es el sistema de monitoreo de red que genera las alertas.",
+               ["prtg", "monitoreo", "alertas"]),
+    make_entry(C.PROCESOS, "Proceso de reembolso de gastos",
+               "Sube las facturas al sistema de gastos antes del día 5.",
+               ["reembolso", "gastos", "facturas"]),
+    make_entry(C.CONTACTOS, "Contacto de mesa de ayuda",
+               "Extensión 5555 o correo soporte@empresa.com.",
+               ["soporte", "mesa de ayuda", "ticket"]),
+    make_entry(C.BASE_DATOS, "¿Qué contiene la tabla de alertas?",
+               "La tabla guarda eventos de PRTG con fecha, sensor y estado.",
+               ["tabla", "alertas", "base de datos"]),
+    make_entry(C.FAQS, "¿Puedo cambiar mis días de vacaciones aprobados?",
+               "Sí, cancelando la solicitud en el portal y creando una nueva.",
+               ["vacaciones", "cambio"]),
+    make_entry(C.POLITICAS, "Código de vestimenta",
+               "Vestimenta formal de lunes a jueves y casual el viernes.",
+               ["vestimenta", "ropa"]),
+]
+
+PARITY_QUERIES = [
+    "¿cómo pido vacaciones?",
+    "cuando pagan la nómina",
+    "trabajo remoto",
+    "olvidé mi contraseña del erp",
+    "alertas de prtg",
+    "reembolso de facturas",
+    "teléfono de mesa de ayuda",
+    "cambiar vacaciones aprobadas",
+    "vestimenta del viernes",
+    "salario",
+    "monitoreo de red",
+    "qué es la tabla de alertas",
+]
+
+
+def linear_search(service, query, top_k=3, min_score=0.1):
+    """Búsqueda lineal previa al índice, como referencia de relevancia."""
+    query_lower = service._clean_text(query.lower())
+    scored = [(service._calculate_score(query_lower, e), e) for e in service.knowledge_base]
+    scored = [se for se in scored if se[0] >= min_score]
+    scored.sort(reverse=True, key=lambda x: x[0])
+    return [e for _, e in scored[:top_k]]
+
+
+class TestKnowledgeIndexParity:
+
+    @pytest.mark.parametrize("query", PARITY_QUERIES)
+    def test_mismo_primer_resultado(self, query):
+        service = make_service(CORPUS)
+        expected = linear_search(service, query)
+        results = service.search(query)
+        assert results, query
+        assert results[0] is expected[0]
+
+    @pytest.mark.parametrize("query", PARITY_QUERIES)
+    def test_no_pierde_resultados_del_scoring_lineal(self, query):
+        service = make_service(CORPUS)
+        expected = linear_search(service, query)
+        results = service.search(query, top_k=len(CORPUS))
+        assert all(any(r is e for r in results) for e in expected)
+
+    def test_sin_terminos_en_comun_no_hay_resultados(self):
+        service = make_service(CORPUS)
+        assert service.search("zzzz qqqq") == []
+        assert service.search("¿qué es?") == []  # solo stopwords
+
+
+# ---------------------------------------------------------------------------
+# KnowledgeIndex — particiones, recarga y keywords
+# ---------------------------------------------------------------------------
+
+class TestKnowledgeIndex:
+
+    def test_knowledge_base_reconstruye_el_indice(self):
+        service = make_service(CORPUS)
+        service.knowledge_base = [make_entry(question="Horario de comedor", keywords=["comedor"])]
+        assert service.search("vacaciones") == []
+        assert len(service.search("comedor")) == 1
+
+    def test_reload_reindexa(self):
+        service = make_service(CORPUS)
+        service.repository.get_all_entries.return_value = [
+            make_entry(question="Estacionamiento", keywords=["estacionamiento"]),
+        ]
+        assert service.reload_from_database() is True
+        assert service.search("vacaciones") == []
+        assert len(service.search("estacionamiento")) == 1
+
+    def test_filtro_por_rol_durante_el_recorrido(self):
+        service = make_service(CORPUS)
+        service.repository.get_categories.return_value = {
+            1: C.SISTEMAS, 2: C.RECURSOS_HUMANOS, 3: C.FAQS,
+        }
+        service.repository.get_allowed_categories_by_role.return_value = [1]
+
+        results = service.search("vacaciones prtg", top_k=10, id_rol=7)
+        assert results
+        assert all(e.category == C.SISTEMAS for e in results)
+
+        # La partición del rol se resuelve una sola vez
+        service.search("contraseña", id_rol=7)
+        service.repository.get_allowed_categories_by_role.assert_called_once_with(7)
+
+    def test_rol_sin_categorias_no_ve_nada(self):
+        service = make_service(CORPUS)
+        service.repository.get_categories.return_value = {1: C.SISTEMAS}
+        service.repository.get_allowed_categories_by_role.return_value = []
+        assert service.search("vacaciones", id_rol=9) == []
+        assert service.search("qué sabes sobre sistemas", id_rol=9) == []
+
+    def test_find_by_keywords_sin_distinguir_mayusculas_en_orden_de_carga(self):
+        service = make_service(CORPUS)
+        results = service.find_by_keywords(["ALERTAS", "Vacaciones"])
+        assert results == [CORPUS[0], CORPUS[4], CORPUS[7], CORPUS[8]]
+
+    def test_entries_by_category_ordenadas_por_prioridad(self):
+        service = make_service(CORPUS)
+        sistemas = service.get_entries_by_category(C.SISTEMAS)
+        assert [e.priority for e in sistemas] == [3, 1]
+
+
+# ---------------------------------------------------------------------------
+# KnowledgeService — recarga incremental
+# ---------------------------------------------------------------------------
+
+T0 = datetime(2025, 1, 1, 12, 0, 0)
+
+
+class FakeKnowledgeTable:
+    """Tabla en memoria con la semántica de change tracking del repositorio."""
+
+    def __init__(self, entries):
+        self.rows = {e.id: e for e in entries}
+
+    def all_entries(self):
+        return sorted(self.rows.values(), key=lambda e: (-e.priority, e.id))
+
+    def changed_since(self, since, id_rol=None):
+        return [e for e in self.rows.values() if e.updated_at >= since]
+
+    def active_ids(self, id_rol=None):
+        return set(self.rows)
+
+    def by_ids(self, ids):
+        return [self.rows[i] for i in ids if i in self.rows]
+
+
+def make_tracked_service(table):
+    mock_repo = MagicMock()
+    mock_repo.health_check.return_value = True
+    mock_repo.get_all_entries.side_effect = table.all_entries
+    mock_repo.get_entries_changed_since.side_effect = table.changed_since
+    mock_repo.get_active_entry_ids.side_effect = table.active_ids
+    mock_repo.get_entries_by_ids.side_effect = table.by_ids
+    with patch(
+        "src.domain.knowledge.knowledge_service.KnowledgeRepository",
+        return_value=mock_repo,
+    ):
+        return KnowledgeService()
+
+
+def tracked(entry, entry_id, minutes=0):
+    return dataclasses.replace(entry, id=entry_id, updated_at=T0 + timedelta(minutes=minutes))
+
+
+class TestKnowledgeDeltaReload:
+
+    def test_aplica_altas_bajas_y_modificaciones(self):
+        table = FakeKnowledgeTable([tracked(e, i + 1) for i, e in enumerate(CORPUS)])
+        service = make_tracked_service(table)
+        del table.rows[2]                                   # nómina
+        table.rows[3] = dataclasses.replace(
+            table.rows[3], keywords=["teletrabajo", "homeoffice"], updated_at=T0 + timedelta(minutes=5)
+        )
+        table.rows[11] = tracked(
+            make_entry(question="Horario del comedor", keywords=["comedor"]), 11, minutes=6
+        )
+
+        assert service.reload_from_database() is True
+
+        service.repository.get_all_entries.assert_called_once()  # solo la carga inicial
+        ids = [e.id for e in service.knowledge_base]
+        assert 2 not in ids and 11 in ids
+        assert service.search("nómina") == []
+        assert service.search("comedor")[0].id == 11
+        assert service.search("homeoffice")[0].id == 3
+
+    def test_entradas_sin_cambios_conservan_objeto_y_analisis(self):
+        table = FakeKnowledgeTable([tracked(e, i + 1) for i, e in enumerate(CORPUS)])
+        service = make_tracked_service(table)
+        before = {e.id: e for e in service.knowledge_base}
+        table.rows[11] = tracked(make_entry(question="Comedor", keywords=["comedor"]), 11, minutes=1)
+
+        service.reload_from_database()
+
+        after = {e.id: e for e in service.knowledge_base}
+        assert all(after[i] is before[i] for i in before)
+
+    def test_sin_cambios_no_publica_snapshot_nuevo(self):
+        table = FakeKnowledgeTable([tracked(e, i + 1) for i, e in enumerate(CORPUS)])
+        service = make_tracked_service(table)
+        snapshot = service._snapshot
+
+        assert service.reload_from_database() is True
+        assert service._snapshot is snapshot
+        service.repository.get_entries_by_ids.assert_not_called()
+
+    def test_borrar_todas_las_entradas_publica_base_vacia(self):
+        table = FakeKnowledgeTable([tracked(e, i + 1) for i, e in enumerate(CORPUS)])
+        service = make_tracked_service(table)
+        assert service.search("vacaciones")
+        table.rows.clear()
+
+        assert service.reload_from_database() is True
+
+        assert service.knowledge_base == []
+        assert service.search("vacaciones") == []
+        assert service.search("nómina") == []
+
+    def test_cambio_de_permisos_sin_cambio_de_entradas(self):
+        table = FakeKnowledgeTable([tracked(e, i + 1) for i, e in enumerate(CORPUS)])
+        service = make_tracked_service(table)
+        service.repository.get_categories.return_value = {1: C.SISTEMAS, 2: C.RECURSOS_HUMANOS}
+        service.repository.get_allowed_categories_by_role.return_value = [1]
+        assert all(e.category == C.SISTEMAS for e in service.search("vacaciones prtg", top_k=10, id_rol=7))
+
+        service.repository.get_allowed_categories_by_role.return_value = [2]
+        assert service.reload_from_database() is True
+
+        service.repository.clear_role_permissions_cache.assert_called()
+        results = service.search("vacaciones prtg", top_k=10, id_rol=7)
+        assert results and all(e.category == C.RECURSOS_HUMANOS for e in results)
+
+    def test_reactivacion_sin_cambio_de_updated_at(self):
+        table = FakeKnowledgeTable([tracked(e, i + 1, minutes=10) for i, e in enumerate(CORPUS)])
+        hidden = dataclasses.replace(table.rows.pop(5), updated_at=T0)
+        service = make_tracked_service(table)
+        table.rows[5] = hidden  # categoría reactivada: updated_at anterior a la marca
+
+        service.reload_from_database()
+
+        service.repository.get_entries_by_ids.assert_called_once_with({5})
+        assert service.search("prtg")[0].id == 5
+
+    def test_full_recarga_todo(self):
+        table = FakeKnowledgeTable([tracked(e, i + 1) for i, e in enumerate(CORPUS)])
+        service = make_tracked_service(table)
+        service.reload_from_database(full=True)
+        assert service.repository.get_all_entries.call_count == 2
+        service.repository.get_entries_changed_since.assert_not_called()
+
+    def test_orden_igual_a_carga_completa(self):
+        table = FakeKnowledgeTable([tracked(e, i + 1) for i, e in enumerate(CORPUS)])
+        service = make_tracked_service(table)
+        table.rows[4] = dataclasses.replace(table.rows[4], priority=1, updated_at=T0 + timedelta(minutes=1))
+        service.reload_from_database()
+        assert service.knowledge_base == table.all_entries()
+
+    def test_busquedas_concurrentes_ven_snapshots_completos(self):
+        corpus_a = [tracked(e, i + 1) for i, e in enumerate(CORPUS)]
+        corpus_b = [
+            tracked(make_entry(question=f"Vacaciones B {i}", keywords=["vacaciones"]), 100 + i)
+            for i in range(10)
+        ]
+        service = make_tracked_service(FakeKnowledgeTable(corpus_a))
+        ids_a, ids_b = {e.id for e in corpus_a}, {e.id for e in corpus_b}
+        errors = []
+        stop = threading.Event()
+
+        def searcher():
+            while not stop.is_set():
+                ids = {e.id for e in service.search("vacaciones", top_k=20)}
+                if not (ids <= ids_a or ids <= ids_b):
+                    errors.append(ids)
+
+        threads = [threading.Thread(target=searcher) for _ in range(3)]
+        for t in threads:
+            t.start()
+        for i in range(20):
+            service.knowledge_base = corpus_b if i % 2 == 0 else corpus_a
+        stop.set()
+        for t in threads:
+            t.join()
+        assert errors == []
+
+    def test_auto_refresh_en_background(self):
+        table = FakeKnowledgeTable([tracked(e, i + 1) for i, e in enumerate(CORPUS)])
+        service = make_tracked_service(table)
+        table.rows[11] = tracked(make_entry(question="Comedor", keywords=["comedor"]), 11, minutes=1)
+
+        service.start_auto_refresh(interval_seconds=0.01)
+        try:
+            deadline = time.monotonic() + 2
+            while not service.search("comedor") and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            service.stop_auto_refresh()
+
+        assert service.search("comedor")[0].id == 11
+        assert service._refresh_thread is None
+
+
+# ---------------------------------------------------------------------------
+# KnowledgeService — cache de resultados
+# ---------------------------------------------------------------------------
+
+class TestKnowledgeSearchCache:
+
+    def test_consulta_repetida_o_reordenada_es_hit(self):
+        service = make_service(CORPUS)
+        first = service.search("¿Cómo pido vacaciones?")
+        with patch.object(KnowledgeIndex, "search", side_effect=AssertionError("sin cache")):
+            assert service.search("vacaciones pido") == first
+            assert service.search("¿cómo PIDO vacaciones?") == first
+        stats = service.get_cache_stats()
+        assert stats["hits"] == 2
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == round(2 / 3, 3)
+
+    def test_clave_distingue_rol_y_limite(self):
+        service = make_service(CORPUS)
+        service.repository.get_categories.return_value = {1: C.FAQS}
+        service.repository.get_allowed_categories_by_role.return_value = [1]
+
+        all_roles = service.search("vacaciones", top_k=5)
+        one = service.search("vacaciones", top_k=1)
+        faqs_only = service.search("vacaciones", top_k=5, id_rol=4)
+
+        assert len(one) == 1 and len(all_roles) == 2
+        assert [e.category for e in faqs_only] == [C.FAQS]
+        assert service.get_cache_stats()["hits"] == 0
+
+    def test_recarga_invalida_por_version(self):
+        service = make_service(CORPUS)
+        assert service.search("comedor") == []
+        version = service.get_cache_stats()["version"]
+
+        service.repository.get_all_entries.return_value = [
+            make_entry(question="Horario de comedor", keywords=["comedor"]),
+        ]
+        service.reload_from_database()
+
+        assert service.get_cache_stats()["version"] == version + 1
+        assert len(service.search("comedor")) == 1
+
+    def test_resultado_cacheado_no_se_comparte_mutable(self):
+        service = make_service(CORPUS)
+        service.search("vacaciones").clear()
+        assert service.search("vacaciones")
+
+    def test_acceso_concurrente(self):
+        service = make_service(CORPUS)
+        expected = {q: service.search(q) for q in PARITY_QUERIES}
+        errors = []
+
+        def worker():
+            for _ in range(50):
+                for q in PARITY_QUERIES:
+                    if service.search(q) != expected[q]:
+                        errors.append(q)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert errors == []
+        assert service.get_cache_stats()["hit_rate"] > 0.9
+
+    def test_registrado_en_metricas(self):
+        service = make_service(CORPUS)
+        service.search("vacaciones")
+        from src.infra.observability import get_metrics
+        assert "knowledge_search" in get_metrics().get_stats()["caches"]
@@ -0,0 +1,100 @@
+"""
+Tests para src/domain/knowledge/knowledge_vectors.py
+
+Cobertura:
+- KnowledgeVectorIndex: top-k por similitud, filtro por rol
+- Persistencia en disco y reconstrucción incremental
+- Fusión híbrida en KnowledgeService.search
+"""
+import dataclasses
+
+import numpy as np
+
+from src.domain.knowledge.knowledge_entity import KnowledgeCategory
+from src.domain.knowledge.knowledge_vectors import KnowledgeVectorIndex, entry_key
+from tests.domain.test_knowledge_service import CORPUS, make_service
+
+
+class TestKnowledgeVectorIndex:
+
+    def test_tolera_acentos_y_errores_de_tipeo(self):
+        vectors = KnowledgeVectorIndex.build(CORPUS)
+        assert vectors.search("nomina", top_k=1)[0][0] == 1
+        assert vectors.search("olvide mi contrasena", top_k=1)[0][0] == 3
+        assert vectors.search("vacasiones", top_k=1)[0][0] == 0
+
+    def test_resultados_ordenados_por_similitud(self):
+        vectors = KnowledgeVectorIndex.build(CORPUS)
+        sims = [s for _, s in vectors.search("alertas de prtg", top_k=5)]
+        assert sims == sorted(sims, reverse=True)
+        assert len(sims) == 5
+
+    def test_filtro_por_categorias(self):
+        vectors = KnowledgeVectorIndex.build(CORPUS)
+        results = vectors.search("alertas de prtg", top_k=10, allowed_categories={KnowledgeCategory.BASE_DATOS})
+        assert [doc_id for doc_id, _ in results] == [7]
+
+    def test_indice_vacio(self):
+        assert KnowledgeVectorIndex.build([]).search("vacaciones") == []
+
+
+class TestKnowledgeVectorPersistence:
+
+    def test_arranque_desde_disco_no_reembebe(self, tmp_path):
+        path = tmp_path / "vectors.npz"
+        first = KnowledgeVectorIndex.build(CORPUS, cache_path=path)
+        assert first.embedded == len(CORPUS)
+        assert path.exists()
+
+        second = KnowledgeVectorIndex.build(CORPUS, cache_path=path)
+        assert second.embedded == 0
+        assert second.reused == len(CORPUS)
+        np.testing.assert_array_equal(first.matrix, second.matrix)
+
+    def test_recarga_incremental_solo_embebe_cambios(self, tmp_path):
+        path = tmp_path / "vectors.npz"
+        previous = KnowledgeVectorIndex.build(CORPUS, cache_path=path)
+        changed = dataclasses.replace(CORPUS[2], answer="Home office tres días por semana.")
+        entries = [CORPUS[0], changed] + CORPUS[3:]
+
+        rebuilt = KnowledgeVectorIndex.build(entries, previous=previous, cache_path=path)
+        assert rebuilt.embedded == 1
+        assert rebuilt.reused == len(entries) - 1
+
+        # El archivo refleja el estado nuevo (sin la entrada eliminada)
+        from_disk = KnowledgeVectorIndex.build(entries, cache_path=path)
+        assert from_disk.embedded == 0
+        assert entry_key(CORPUS[1]) not in from_disk.keys
+
+    def test_archivo_corrupto_se_ignora(self, tmp_path):
+        path = tmp_path / "vectors.npz"
+        path.write_bytes(b"no es un npz")
+        vectors = KnowledgeVectorIndex.build(CORPUS, cache_path=path)
+        assert vectors.embedded == len(CORPUS)
+
+
+class TestHybridSearch:
+
+    def test_recupera_parafrasis_que_el_lexico_no_encuentra(self):
+        service = make_service(CORPUS)
+        assert service._index.search("contrasena", min_score=0.1) == []
+        assert service.search("contrasena")[0] is CORPUS[3]
+
+    def test_consulta_sin_relacion_no_devuelve_resultados(self):
+        service = make_service(CORPUS)
+        assert service.search("el clima de hoy") == []
+        assert service.search("pregunta completamente diferente aaabbbccc") == []
+
+    def test_fusion_respeta_filtro_por_rol(self):
+        service = make_service(CORPUS)
+        service.repository.get_categories.return_value = {1: KnowledgeCategory.POLITICAS}
+        service.repository.get_allowed_categories_by_role.return_value = [1]
+        assert service.search("contrasena", id_rol=3) == []
+
+    def test_solo_lexico_si_se_deshabilita(self):
+        service = make_service(CORPUS)
+        service.enable_vectors = False
+        service.knowledge_base = CORPUS
+        assert service._vectors is None
+        assert service.search("contrasena") == []
+        assert service.search("contraseña")[0] is CORPUS[3]
@@ -0,0 +1,173 @@
+"""
+Tests para TicketAnalysisCacheRepository: L1 en memoria delante de la tabla SQL.
+
+Cobertura:
+- Write-through: save() llena L1 y L2
+- Hit de L2 llena L1 con la vida restante de la fila
+- Single-flight: requests concurrentes (mismo loop o distintos threads) → un solo análisis LLM
+- Errores del LLM se propagan a quienes esperaban
+- Estadísticas de L1/L2 y llamadas al LLM evitadas
+"""
+
+import asyncio
+import threading
+import time
+
+from src.domain.alerts.ticket_cache_repository import TicketAnalysisCacheRepository, TicketAnalysisL1
+
+
+class FakeAbcDb:
+    """DatabaseManager falso: una fila por clave, con edad configurable."""
+
+    def __init__(self, delay=0.0):
+        self.rows: dict[tuple, dict] = {}
+        self.delay = delay
+        self.queries = 0
+        self.writes = 0
+
+    async def execute_query_async(self, sql, params=None):
+        self.queries += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        row = self.rows.get((params["ip"], params["sensor"], params["total"], params["ultima_accion"]))
+        if row is None or (params["ttl"] and row["edad_segundos"] > params["ttl"]):
+            return []
+        return [dict(row)]
+
+    async def execute_non_query_async(self, sql, params=None):
+        self.writes += 1
+        key = (params["ip"], params["sensor"], params["total"], params["ultima_accion"])
+        self.rows[key] = {"analisis": params["analisis"], "edad_segundos": 0}
+        return 1
+
+
+def make_repo(ttl_seconds=0, delay=0.0):
+    db = FakeAbcDb(delay=delay)
+    return TicketAnalysisCacheRepository(db, ttl_seconds=ttl_seconds, l1=TicketAnalysisL1()), db
+
+
+class FakeLLM:
+    def __init__(self, delay=0.05, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("LLM no disponible")
+        return f"análisis #{self.calls}"
+
+
+KEY = ("10.0.0.1", "Ping", 3, "reinicio")
+
+
+class TestTicketAnalysisCache:
+
+    async def test_save_write_through(self):
+        repo, db = make_repo()
+        await repo.save(*KEY, "análisis")
+        assert db.writes == 1
+        assert await repo.lookup(*KEY) == "análisis"
+        assert db.queries == 0
+
+    async def test_hit_de_l2_llena_l1(self):
+        repo, db = make_repo()
+        db.rows[KEY] = {"analisis": "desde SQL", "edad_segundos": 5}
+        assert await repo.lookup(*KEY) == "desde SQL"
+        assert await repo.lookup(*KEY) == "desde SQL"
+        assert db.queries == 1
+        stats = repo._l1.stats()
+        assert stats["l2_hits"] == 1 and stats["l1_hits"] == 1
+
+    async def test_l1_vence_con_la_fila_sql(self):
+        repo, db = make_repo(ttl_seconds=10)
+        db.rows[KEY] = {"analisis": "por vencer", "edad_segundos": 9.95}
+        assert await repo.lookup(*KEY) == "por vencer"
+        await asyncio.sleep(0.08)
+        db.rows[KEY]["edad_segundos"] = 11
+        assert await repo.lookup(*KEY) is None
+        assert db.queries == 2
+
+    async def test_fila_vencida_no_entra_a_l1(self):
+        repo, db = make_repo(ttl_seconds=10)
+        db.rows[KEY] = {"analisis": "vieja", "edad_segundos": 30}
+        assert await repo.lookup(*KEY) is None
+        assert len(repo._l1.cache) == 0
+
+    async def test_miss_genera_y_guarda(self):
+        repo, db = make_repo()
+        llm = FakeLLM()
+        analisis, cached = await repo.get_or_generate(*KEY, llm)
+        assert (analisis, cached) == ("análisis #1", False)
+        assert db.writes == 1
+        analisis, cached = await repo.get_or_generate(*KEY, llm)
+        assert (analisis, cached) == ("análisis #1", True)
+        assert llm.calls == 1
+
+    async def test_concurrentes_comparten_un_analisis(self):
+        repo, db = make_repo(delay=0.01)
+        llm = FakeLLM(delay=0.05)
+        results = await asyncio.gather(*(repo.get_or_generate(*KEY, llm) for _ in range(5)))
+        assert llm.calls == 1
+        assert {r[0] for r in results} == {"análisis #1"}
+        assert sorted(r[1] for r in results) == [False, True, True, True, True]
+        assert db.queries == 1 and db.writes == 1
+        stats = repo._l1.stats()
+        assert stats["joined"] == 4 and stats["llm_calls"] == 1 and stats["llm_calls_avoided"] == 4
+
+    def test_single_flight_entre_event_loops(self):
+        # Requests desde threads distintos, cada uno con su propio event loop
+        l1 = TicketAnalysisL1()
+        db = FakeAbcDb()
+        llm_calls = []
+
+        async def _llm():
+            llm_calls.append(1)
+            await asyncio.sleep(0.1)
+            return "compartido"
+
+        results = []
+
+        def _request():
+            repo = TicketAnalysisCacheRepository(db, l1=l1)
+            results.append(asyncio.run(repo.get_or_generate(*KEY, _llm)))
+
+        threads = [threading.Thread(target=_request) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(llm_calls) == 1
+        assert [r[0] for r in results] == ["compartido"] * 4
+
+    async def test_error_del_llm_llega_a_todos_y_libera_la_clave(self):
+        repo, db = make_repo()
+        llm = FakeLLM(fail=True)
+        results = await asyncio.gather(
+            *(repo.get_or_generate(*KEY, llm) for _ in range(3)), return_exceptions=True
+        )
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert llm.calls == 1 and db.writes == 0
+
+        llm.fail = False
+        analisis, cached = await repo.get_or_generate(*KEY, llm)
+        assert analisis == "análisis #2" and not cached
+
+    async def test_claves_distintas_no_se_bloquean(self):
+        repo, _ = make_repo()
+        llm = FakeLLM(delay=0.05)
+        start = time.monotonic()
+        await asyncio.gather(
+            repo.get_or_generate(*KEY, llm),
+            repo.get_or_generate("10.0.0.2", "Ping", 1, "", llm),
+        )
+        assert llm.calls == 2
+        assert time.monotonic() - start < 0.09
+
+    async def test_ultima_accion_truncada_comparte_clave(self):
+        accion = "x" * 600
+        repo, _ = make_repo()
+        await repo.save("10.0.0.1", "Ping", 1, accion, "largo")
+        assert await repo.lookup("10.0.0.1", "Ping", 1, accion[:500] + "otro") == "largo"
@@ -236,6 +236,25 @@ class TestMainHandler:
         assert response.success is False
         assert "Error fatal" in response.error
 
+    @pytest.mark.asyncio
+    async def test_handle_api_deadline_cancela_el_procesamiento(
+        self, handler, mock_react_agent, mock_memory_service
+    ):
+        """handle_api debe levantar TimeoutError al vencer el deadline."""
+        import asyncio
+        import time
+
+        async def _slow(*args, **kwargs):
+            await asyncio.sleep(5)
+
+        mock_memory_service.get_context.return_value = UserContext.empty("123")
+        mock_react_agent.execute.side_effect = _slow
+
+        start = time.monotonic()
+        with pytest.raises(TimeoutError):
+            await handler.handle_api(user_id="123", text="Test", deadline=time.monotonic() + 0.05)
+        assert time.monotonic() - start < 1
+
     @pytest.mark.asyncio
     async def test_handle_telegram_success(
         self, handler, mock_react_agent, mock_memory_service
@@ -0,0 +1,78 @@
+"""
+Tests para rate_limit_middleware - Rate limit por usuario en Telegram.
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.bot.middleware import rate_limit_middleware
+from src.bot.middleware.rate_limit_middleware import enforce_rate_limit
+from src.utils import rate_limiter
+
+
+class HandlerStop(Exception):
+    pass
+
+
+@pytest.fixture(autouse=True)
+def limiter():
+    """Limitadores nuevos con cupo de 2 y ApplicationHandlerStop real."""
+    with patch.dict(rate_limiter._limiters, clear=True), \
+            patch("src.config.settings.settings.rate_limit_max_requests", 2), \
+            patch.object(rate_limit_middleware, "ApplicationHandlerStop", HandlerStop):
+        yield
+
+
+def make_update(user_id=123, callback=False):
+    update = MagicMock()
+    update.effective_user.id = user_id
+    if callback:
+        update.message = None
+        update.callback_query.answer = AsyncMock()
+    else:
+        update.callback_query = None
+        update.message.reply_text = AsyncMock()
+    return update
+
+
+def make_context():
+    context = MagicMock()
+    context.user_data = {}
+    return context
+
+
+class TestEnforceRateLimit:
+
+    async def test_dentro_del_cupo_no_interfiere(self):
+        update = make_update()
+        for _ in range(2):
+            assert await enforce_rate_limit(update, make_context()) is None
+        update.message.reply_text.assert_not_awaited()
+
+    async def test_excedido_detiene_y_avisa_una_vez(self):
+        update, context = make_update(), make_context()
+        for _ in range(2):
+            await enforce_rate_limit(update, context)
+        for _ in range(3):
+            with pytest.raises(HandlerStop):
+                await enforce_rate_limit(update, context)
+        update.message.reply_text.assert_awaited_once()
+        assert "Demasiadas solicitudes" in update.message.reply_text.await_args.args[0]
+
+    async def test_callback_query_responde_con_answer(self):
+        update = make_update(callback=True)
+        for _ in range(2):
+            await enforce_rate_limit(update, make_context())
+        with pytest.raises(HandlerStop):
+            await enforce_rate_limit(update, make_context())
+        update.callback_query.answer.assert_awaited_once()
+
+    async def test_usuarios_independientes(self):
+        for _ in range(2):
+            await enforce_rate_limit(make_update(user_id=1), make_context())
+        assert await enforce_rate_limit(make_update(user_id=2), make_context()) is None
+
+    async def test_updates_sin_usuario_no_cuentan(self):
+        update = make_update()
+        update.effective_user = None
+        for _ in range(5):
+            assert await enforce_rate_limit(update, make_context()) is None
@@ -4,6 +4,7 @@ Tests para src/infra/database/
 Cobertura:
 - SQLValidator: validate, is_safe_query, helpers internos
 - DatabaseManager: execute_query, execute_non_query, get_session (con engine mockeado)
+- DatabaseManager.execute_transaction: todo o nada sobre SQLite
 """
 import pytest
 from unittest.mock import MagicMock, patch, AsyncMock
@@ -277,3 +278,40 @@ class TestDatabaseManagerExecuteQuery:
     def test_close_disposes_engine(self, mock_db):
         mock_db.close()
         mock_db.engine.dispose.assert_called_once()
+
+
+class TestDatabaseManagerTransaction:
+    """execute_transaction sobre SQLite real: engine AUTOCOMMIT como en producción."""
+
+    @pytest.fixture
+    def db(self, tmp_path):
+        from src.config.settings import DbConnectionConfig
+        from src.infra.database.connection import DatabaseManager
+
+        db = DatabaseManager(DbConnectionConfig(alias="test", db_type="sqlite", name=str(tmp_path / "t.db")))
+        with db.engine.connect() as conn:
+            conn.exec_driver_sql("CREATE TABLE horas (hora INTEGER PRIMARY KEY, n INTEGER NOT NULL)")
+            conn.exec_driver_sql("CREATE TABLE marca (hasta INTEGER)")
+        db.execute_non_query("INSERT INTO horas VALUES (1, 10)")
+        db.execute_non_query("INSERT INTO marca VALUES (1)")
+        yield db
+        db.close()
+
+    def test_confirma_todo(self, db):
+        db.execute_transaction([
+            ("DELETE FROM horas WHERE hora >= :d", {"d": 1}),
+            ("INSERT INTO horas VALUES (1, 11), (2, 20)", None),
+            ("UPDATE marca SET hasta = :h", {"h": 2}),
+        ])
+        assert db.execute_query("SELECT SUM(n) AS n FROM horas") == [{"n": 31}]
+        assert db.execute_query("SELECT hasta FROM marca") == [{"hasta": 2}]
+
+    def test_error_revierte_delete_y_marca(self, db):
+        with pytest.raises(RuntimeError):
+            db.execute_transaction([
+                ("DELETE FROM horas WHERE hora >= :d", {"d": 1}),
+                ("INSERT INTO horas VALUES (1, 11), (1, 12)", None),  # PK duplicada
+                ("UPDATE marca SET hasta = :h", {"h": 2}),
+            ])
+        assert db.execute_query("SELECT hora, n FROM horas") == [{"hora": 1, "n": 10}]
+        assert db.execute_query("SELECT hasta FROM marca") == [{"hasta": 1}]
@@ -0,0 +1,158 @@
+"""
+Tests para src/infra/database/pagination.py sobre SQLite real.
+
+Cobertura:
+- Recorrer todas las páginas devuelve cada fila una vez, en orden (timestamps repetidos incluidos)
+- Inserts concurrentes (otro thread/conexión) no duplican ni saltan filas; con OFFSET sí
+- Orden ascendente y predicado en HAVING (listado agrupado)
+- Cursores opacos: ida y vuelta, y cursores inválidos
+"""
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.infra.database.pagination import InvalidCursorError, Keyset, decode_cursor, encode_cursor
+
+BASE = datetime(2026, 10, 19, 9, 0)
+KEYSET = Keyset("ts", "id", ts_type=None)  # SQLite: sin CAST (DATETIME es afinidad NUMERIC)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "logs.db")
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE logs (id INTEGER PRIMARY KEY, ts TIMESTAMP NOT NULL, chat INTEGER NOT NULL)")
+    # 3 filas por timestamp: el desempate por id es el que mantiene el orden total
+    conn.executemany(
+        "INSERT INTO logs (id, ts, chat) VALUES (?, ?, ?)",
+        [(i, BASE + timedelta(seconds=i // 3), i % 4) for i in range(1, 31)],
+    )
+    conn.commit()
+    conn.close()
+    return path
+
+
+def connect(path):
+    conn = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def fetch_page(conn, keyset, cursor, limit):
+    where, params = keyset.where(cursor)
+    rows = conn.execute(
+        f"SELECT id, ts FROM logs {'WHERE ' + where if where else ''} "
+        f"ORDER BY {keyset.order_by()} LIMIT :n",
+        {**params, "n": limit + 1},
+    ).fetchall()
+    return keyset.page([dict(r) for r in rows], limit, "ts", "id")
+
+
+def walk(conn, keyset, limit, between_pages=lambda: None):
+    ids, cursor = [], None
+    while True:
+        rows, cursor = fetch_page(conn, keyset, cursor, limit)
+        ids.extend(r["id"] for r in rows)
+        if cursor is None:
+            return ids
+        between_pages()
+
+
+def insert_newer(path, start_id, count):
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO logs (id, ts, chat) VALUES (?, ?, 0)",
+        [(i, BASE + timedelta(hours=1, seconds=i)) for i in range(start_id, start_id + count)],
+    )
+    conn.commit()
+    conn.close()
+
+
+class TestKeysetSQLite:
+
+    def test_recorre_todo_en_orden_una_vez(self, db_path):
+        ids = walk(connect(db_path), KEYSET, limit=7)
+        assert ids == list(range(30, 0, -1))
+
+    def test_inserts_entre_paginas_no_duplican_ni_saltan(self, db_path):
+        conn = connect(db_path)
+        next_id = iter(range(100, 200, 5))
+        ids = walk(conn, KEYSET, limit=4, between_pages=lambda: insert_newer(db_path, next(next_id), 5))
+        assert ids == list(range(30, 0, -1))
+
+    def test_offset_si_duplica_con_inserts(self, db_path):
+        conn = connect(db_path)
+        first = [r["id"] for r in conn.execute("SELECT id FROM logs ORDER BY ts DESC, id DESC LIMIT 4")]
+        insert_newer(db_path, 100, 2)
+        second = [r["id"] for r in conn.execute("SELECT id FROM logs ORDER BY ts DESC, id DESC LIMIT 4 OFFSET 4")]
+        assert set(first) & set(second)  # lo que keyset evita
+
+    def test_writer_concurrente(self, db_path):
+        stop = threading.Event()
+
+        def writer():
+            i = 1000
+            while not stop.is_set():
+                insert_newer(db_path, i, 1)
+                i += 1
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        try:
+            ids = walk(connect(db_path), KEYSET, limit=3)
+        finally:
+            stop.set()
+            thread.join()
+        snapshot = [i for i in ids if i < 1000]
+        assert snapshot == list(range(30, 0, -1))
+        assert len(ids) == len(set(ids))
+
+    def test_orden_ascendente(self, db_path):
+        ids = walk(connect(db_path), Keyset("ts", "id", descending=False, ts_type=None), limit=8)
+        assert ids == list(range(1, 31))
+
+    def test_predicado_en_having(self, db_path):
+        keyset = Keyset("MAX(ts)", "chat", ts_type=None)
+        conn = connect(db_path)
+        insert_newer(db_path, 100, 1)  # el chat 0 pasa a ser el más reciente
+        chats, cursor = [], None
+        while True:
+            having, params = keyset.where(cursor)
+            rows = conn.execute(
+                f'SELECT chat, MAX(ts) AS ultima FROM logs GROUP BY chat '
+                f"{'HAVING ' + having if having else ''} ORDER BY {keyset.order_by()} LIMIT :n",
+                {**params, "n": 3},
+            ).fetchall()
+            rows, cursor = keyset.page([dict(r) for r in rows], 2, "ultima", "chat")
+            chats.extend(r["chat"] for r in rows)
+            if cursor is None:
+                break
+        # chat 2 → 09:00:10; chats 3 y 1 empatan en 09:00:09 y se desempatan por chat DESC
+        assert chats == [0, 2, 3, 1]
+
+
+class TestCursor:
+
+    def test_ida_y_vuelta(self):
+        ts = datetime(2026, 10, 19, 12, 30, 5, 123000)
+        assert decode_cursor(encode_cursor(ts, 42)) == (ts, 42)
+        assert decode_cursor(encode_cursor(ts, "abc-123")) == (ts, "abc-123")
+
+    def test_es_opaco_y_seguro_para_urls(self):
+        cursor = encode_cursor(datetime(2026, 1, 1), "a/b+c")
+        assert "/" not in cursor and "+" not in cursor and "=" not in cursor
+
+    @pytest.mark.parametrize("cursor", ["basura", "W10", encode_cursor(datetime(2026, 1, 1), 1)[:-3] + "!!!"])
+    def test_invalido(self, cursor):
+        with pytest.raises(InvalidCursorError):
+            KEYSET.where(cursor)
+
+    def test_parametro_casteado_al_tipo_de_la_columna(self):
+        sql, _ = Keyset("il.fechaEjecucion", "il.idLog").where(encode_cursor(datetime(2026, 1, 1), 7))
+        assert sql.count("CAST(:c_ts AS DATETIME)") == 2
+
+    def test_sin_cursor_no_filtra(self):
+        assert KEYSET.where(None) == ("", {})
@@ -10,6 +10,7 @@ Cobertura:
 """
 
 import asyncio
+import time
 import pytest
 from datetime import UTC, datetime, timedelta
 from unittest.mock import AsyncMock, MagicMock, patch
@@ -150,7 +151,7 @@ class TestMemoryRepository:
     def test_invalidate_cache(self, repository):
         """invalidate_cache debe eliminar perfil del cache."""
         # Agregar al cache
-        repository._profiles_cache["123"] = UserProfile(user_id="123")
+        repository._profiles_cache.set("123", UserProfile(user_id="123"))
 
         # Invalidar
         repository.invalidate_cache("123")
@@ -160,8 +161,8 @@ class TestMemoryRepository:
 
     def test_clear_cache(self, repository):
         """clear_cache debe limpiar todo el cache."""
-        repository._profiles_cache["123"] = UserProfile(user_id="123")
-        repository._profiles_cache["456"] = UserProfile(user_id="456")
+        repository._profiles_cache.set("123", UserProfile(user_id="123"))
+        repository._profiles_cache.set("456", UserProfile(user_id="456"))
 
         repository.clear_cache()
 
@@ -598,13 +599,10 @@ class TestMemoryServiceCacheEviction:
         # Esperar que expiren
         await asyncio.sleep(1.2)
 
-        # Verificar que están expiradas
-        for key in list(service._cache.keys()):
-            assert service._cache[key].is_expired()
-
-        # Al agregar una nueva, las expiradas deben eliminarse
-        service._evict_if_needed()
-        assert len(service._cache) == 0
+        # Al agregar una nueva, las expiradas se purgan sin evictar por LRU
+        await service.get_context("nuevo")
+        assert service._cache.keys() == ["nuevo:True:True"]
+        assert service._cache.stats()["evictions"] == 0
 
     @pytest.mark.asyncio
     async def test_lru_elimina_menos_reciente(self, mock_repository):
@@ -667,23 +665,145 @@ class TestMemoryServiceCacheEviction:
         assert stats["cache_misses"] == 0
         assert stats["hit_rate"] == 0.0
 
-    def test_evict_if_needed_elimina_expiradas(self, mock_repository):
-        """_evict_if_needed debe eliminar entradas expiradas inmediatamente."""
-        from collections import OrderedDict
-        from datetime import timedelta
-        from src.domain.memory.memory_entity import CacheEntry
-        from src.agents.base.events import UserContext
-
+    def test_purge_expired_elimina_expiradas(self, mock_repository):
+        """purge_expired debe eliminar entradas expiradas sin recorrer las vigentes."""
         service = MemoryService(repository=mock_repository, max_cache_size=10)
 
-        # Insertar entradas ya expiradas manualmente
-        expired_entry = CacheEntry(
-            context=UserContext.empty("old"),
-            ttl_seconds=1,
-            created_at=datetime.now(UTC) - timedelta(seconds=10),
+        service._cache.set("new:True:True", UserContext.empty("new"))
+        service._cache.set("old:True:True", UserContext.empty("old"), ttl_seconds=0.01)
+        time.sleep(0.02)
+
+        assert service._cache.purge_expired() == 1
+        assert service._cache.keys() == ["new:True:True"]
+
+    def test_max_cache_bytes(self, mock_repository):
+        """El cache también se acota por bytes estimados."""
+        service = MemoryService(repository=mock_repository, max_cache_size=1000, max_cache_bytes=20_000)
+
+        for i in range(100):
+            context = UserContext.empty(str(i))
+            context.working_memory = [{"role": "assistant", "content": "x" * 1000}]
+            service._cache.set(f"{i}:True:True", context)
+
+        stats = service.get_cache_stats()
+        assert stats["size_bytes"] <= 20_000
+        assert stats["evictions"] > 0
+
+
+class TestMemoryServiceWorkingMemoryAppend:
+    """Tests para la actualización incremental de working memory en cache."""
+
+    @pytest.fixture
+    def mock_repository(self):
+        repo = AsyncMock(spec=MemoryRepository)
+        repo.invalidate_cache = MagicMock()
+        repo.clear_cache = MagicMock()
+        repo.get_profile.return_value = None
+        repo.get_recent_messages.return_value = [
+            {"role": "user", "content": "hola", "timestamp": "2026-01-01T10:00:00"},
+            {"role": "assistant", "content": "¡Hola!", "timestamp": "2026-01-01T10:00:00"},
+        ]
+        return repo
+
+    @pytest.fixture
+    def service(self, mock_repository):
+        return MemoryService(
+            repository=mock_repository,
+            cache_ttl_seconds=300,
+            max_cache_size=10,
+            max_working_memory=2,
         )
-        service._cache["old:True:True"] = expired_entry
 
-        service._evict_if_needed()
+    @pytest.mark.asyncio
+    async def test_append_no_refetch_en_siguiente_turno(self, service, mock_repository):
+        """El siguiente get_context debe ver el intercambio sin volver a la BD."""
+        context = await service.get_context("123")
+
+        assert service.append_exchange(context, "¿cuántas alertas?", "Hay 3") is True
+
+        next_context = await service.get_context("123")
+        assert mock_repository.get_recent_messages.call_count == 1
+        assert next_context.working_memory[-2]["content"] == "¿cuántas alertas?"
+        assert next_context.working_memory[-1]["content"] == "Hay 3"
+
+    @pytest.mark.asyncio
+    async def test_ventana_acotada(self, service):
+        """La working memory cacheada no debe superar max_working_memory interacciones."""
+        context = await service.get_context("123")
+
+        for i in range(5):
+            service.append_exchange(context, f"q{i}", f"r{i}")
+
+        assert len(context.working_memory) == 4
+        assert [m["content"] for m in context.working_memory] == ["q3", "r3", "q4", "r4"]
+
+    @pytest.mark.asyncio
+    async def test_respuesta_vacia_solo_agrega_query(self, service):
+        """Si el agente falló, solo se agrega el mensaje del usuario (igual que el SP)."""
+        context = await service.get_context("123")
+
+        service.append_exchange(context, "q", None)
+
+        assert len(context.working_memory) == 3
+        assert context.working_memory[-1]["role"] == "user"
+        assert context.working_memory[-1]["content"] == "q"
+
+    @pytest.mark.asyncio
+    async def test_sin_entrada_en_cache_no_hace_nada(self, service):
+        """Sin entrada cacheada (cold start) no hay nada que actualizar."""
+        context = UserContext.empty("999")
+
+        assert service.append_exchange(context, "q", "r") is False
+        assert context.working_memory == []
+
+    @pytest.mark.asyncio
+    async def test_hueco_invalida_entrada(self, service, mock_repository):
+        """Si la entrada fue reconstruida durante el turno, se invalida y se recarga."""
+        stale = await service.get_context("123")
+        await service.get_context("123", force_refresh=True)
+
+        assert service.append_exchange(stale, "q", "r") is False
+        assert service.get_cache_stats()["working_memory_gaps"] == 1
+
+        await service.get_context("123")
+        assert mock_repository.get_recent_messages.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_ttl_expirado_recarga(self, mock_repository):
+        """Con TTL vencido el intercambio no se agrega y se recarga desde BD."""
+        service = MemoryService(repository=mock_repository, cache_ttl_seconds=0)
+        context = await service.get_context("123")
+        await asyncio.sleep(0.01)
+
+        assert service.append_exchange(context, "q", "r") is False
+
+        await service.get_context("123")
+        assert mock_repository.get_recent_messages.call_count == 2
+
+
+class TestMemoryRepositoryProfileCache:
+    """Tests para el cache acotado con TTL de perfiles."""
+
+    @pytest.mark.asyncio
+    async def test_cache_acotado(self):
+        """El cache de perfiles no debe crecer más allá de profile_cache_size."""
+        repository = MemoryRepository(db_manager=None, profile_cache_size=10)
+        for i in range(100):
+            await repository.save_profile(UserProfile(user_id=str(i)))
+
+        stats = repository.get_cache_stats()
+        assert stats["entries"] == 10
+        assert stats["evictions"] == 90
+
+    @pytest.mark.asyncio
+    async def test_perfil_expirado_se_recarga_de_bd(self):
+        """Al vencer el TTL, get_profile vuelve a consultar la BD."""
+        mock_db = MagicMock()
+        mock_db.execute_query_async = AsyncMock(return_value=[{"Nombre": "Juan"}])
+        repository = MemoryRepository(db_manager=mock_db, profile_cache_ttl_seconds=0)
+
+        await repository.get_profile("123")
+        await repository.get_profile("123")
 
-        assert "old:True:True" not in service._cache
+        assert mock_db.execute_query_async.call_count == 2
+        assert repository.get_cache_stats()["expirations"] >= 1
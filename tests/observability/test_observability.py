@@ -462,6 +462,16 @@ class TestMetricsCollector:
         assert stats["cache"]["misses"] == 1
         assert stats["cache"]["hit_rate_percent"] == pytest.approx(66.67, rel=0.1)
 
+    def test_registered_cache_stats(self, collector):
+        """Los caches registrados aparecen en get_stats()["caches"]."""
+        collector.register_cache("perfiles", lambda: {"hits": 3, "entries": 1})
+        collector.register_cache("roto", lambda: 1 / 0)
+
+        stats = collector.get_stats()
+
+        assert stats["caches"]["perfiles"] == {"hits": 3, "entries": 1}
+        assert "roto" not in stats["caches"]
+
     def test_latency_by_channel(self, collector):
         """Latencia debe registrarse por canal."""
         collector.record_request("telegram", 100.0, 1, True)
@@ -0,0 +1,137 @@
+"""
+Tests para EventLoopBridge y su uso desde HandlerManager.
+
+Cobertura:
+- Todas las llamadas corren en el mismo loop (recursos atados al loop se reusan)
+- Llamadas concurrentes desde varios threads
+- Timeout cancela la corrutina; las excepciones se propagan
+- run() desde el thread del loop falla en lugar de bloquearlo
+- shutdown() deja terminar tareas pendientes y un run() posterior reinicia el loop
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.pipeline.event_loop_bridge import EventLoopBridge
+from src.pipeline.handler_manager import HandlerManager
+
+
+@pytest.fixture
+def bridge():
+    b = EventLoopBridge(name="test-loop")
+    yield b
+    b.shutdown(timeout=1)
+
+
+class LoopBoundClient:
+    """Cliente async típico: su lock queda atado al loop en que se usa por primera vez."""
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        self.calls = 0
+
+    async def request(self):
+        async with self._lock:
+            await asyncio.sleep(0.001)
+            self.calls += 1
+            return asyncio.get_running_loop()
+
+
+class TestEventLoopBridge:
+
+    def test_llamadas_reusan_el_mismo_loop(self, bridge):
+        client = LoopBoundClient()
+        loops = {bridge.run(client.request()) for _ in range(5)}
+        assert loops == {bridge.loop}
+        assert client.calls == 5
+
+    def test_llamadas_concurrentes_desde_threads(self, bridge):
+        client = LoopBoundClient()
+        errors = []
+
+        def _worker():
+            try:
+                for _ in range(10):
+                    bridge.run(client.request(), timeout=5)
+            except Exception as e:  # pragma: no cover - se reporta abajo
+                errors.append(e)
+
+        threads = [threading.Thread(target=_worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert errors == []
+        assert client.calls == 80
+
+    def test_timeout_cancela_la_corrutina(self, bridge):
+        cancelled = threading.Event()
+
+        async def _slow():
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        with pytest.raises(TimeoutError):
+            bridge.run(_slow(), timeout=0.05)
+        assert cancelled.wait(1)
+
+    def test_excepcion_se_propaga(self, bridge):
+        async def _fail():
+            raise ValueError("fallo")
+
+        with pytest.raises(ValueError, match="fallo"):
+            bridge.run(_fail())
+        assert bridge.run(asyncio.sleep(0, result=1)) == 1
+
+    def test_run_desde_el_thread_del_loop_falla(self, bridge):
+        async def _nested():
+            return bridge.run(asyncio.sleep(0))
+
+        with pytest.raises(RuntimeError):
+            bridge.run(_nested(), timeout=1)
+
+    def test_shutdown_espera_tareas_pendientes_y_reinicia(self, bridge):
+        done = []
+
+        async def _background():
+            await asyncio.sleep(0.05)
+            done.append(True)
+
+        async def _spawn():
+            asyncio.get_running_loop().create_task(_background())
+
+        bridge.run(_spawn())
+        first_loop = bridge.loop
+        bridge.shutdown(timeout=1)
+        assert done == [True]
+        assert first_loop.is_closed() and not bridge.is_running()
+
+        assert bridge.run(asyncio.sleep(0, result="ok")) == "ok"
+        assert bridge.loop is not first_loop
+
+    def test_shutdown_cancela_lo_que_excede_el_plazo(self, bridge):
+        async def _spawn():
+            asyncio.get_running_loop().create_task(asyncio.sleep(10))
+
+        bridge.run(_spawn())
+        start = time.monotonic()
+        bridge.shutdown(timeout=0.1)
+        assert time.monotonic() - start < 2
+
+
+class TestHandlerManagerBridge:
+
+    def test_manager_expone_un_loop_compartido(self):
+        HandlerManager.reset()
+        try:
+            manager = HandlerManager()
+            first = manager.run(LoopBoundClient().request())
+            assert manager.run(LoopBoundClient().request()) is first
+            assert HandlerManager().bridge is manager.bridge
+        finally:
+            HandlerManager.reset()
@@ -0,0 +1,85 @@
+"""
+Tests para MainHandler.handle_api_batch.
+
+Cobertura:
+- El contexto se carga una vez y cada pregunta recibe su propia copia
+- Concurrencia acotada por max_concurrency
+- Fallos parciales y deadline por pregunta
+- La working memory cacheada recibe los intercambios en orden
+"""
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+from src.agents.base.agent import AgentResponse
+from src.agents.base.events import LightUserContext
+from src.pipeline.handler import MainHandler
+
+
+class FakeAgent:
+    def __init__(self, delay=0.02, fail_on=()):
+        self.delay = delay
+        self.fail_on = set(fail_on)
+        self.active = 0
+        self.max_active = 0
+        self.contexts = []
+
+    async def execute(self, query, context, event_callback=None, **kwargs):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        self.contexts.append(context)
+        try:
+            await asyncio.sleep(self.delay)
+            if query in self.fail_on:
+                raise RuntimeError(f"fallo en {query}")
+            context.session_notes.append(query)
+            return AgentResponse.success_response(agent_name="react", message=f"r: {query}")
+        finally:
+            self.active -= 1
+
+
+def make_handler(agent):
+    memory = MagicMock()
+    context = LightUserContext.empty("42")
+    memory.get_context = AsyncMock(return_value=context)
+    handler = MainHandler(react_agent=agent, memory_service=memory, use_fallback_on_error=False)
+    return handler, memory, context
+
+
+class TestHandleApiBatch:
+
+    async def test_contexto_una_vez_y_copias_independientes(self):
+        agent = FakeAgent()
+        handler, memory, context = make_handler(agent)
+        results = await handler.handle_api_batch("42", ["a", "b", "c"])
+
+        assert [r.message for r in results] == ["r: a", "r: b", "r: c"]
+        memory.get_context.assert_awaited_once_with("42")
+        assert len({id(c) for c in agent.contexts}) == 3 and context not in agent.contexts
+        assert context.session_notes == []
+        assert [call.args[1] for call in memory.append_exchange.call_args_list] == ["a", "b", "c"]
+        assert all(call.args[0] is context for call in memory.append_exchange.call_args_list)
+
+    async def test_concurrencia_acotada(self):
+        agent = FakeAgent(delay=0.02)
+        handler, _, _ = make_handler(agent)
+        await handler.handle_api_batch("42", [str(i) for i in range(8)], max_concurrency=3)
+        assert agent.max_active == 3
+
+    async def test_fallo_parcial(self):
+        handler, memory, _ = make_handler(FakeAgent(fail_on={"b"}))
+        results = await handler.handle_api_batch("42", ["a", "b", "c"])
+        assert results[0].success and results[2].success
+        assert not results[1].success and "fallo en b" in results[1].error
+
+    async def test_deadline_por_pregunta(self):
+        agent = FakeAgent(delay=0.05)
+        handler, memory, _ = make_handler(agent)
+        start = time.monotonic()
+        results = await handler.handle_api_batch(
+            "42", ["a", "b", "c"], deadline=time.monotonic() + 0.08, max_concurrency=1
+        )
+        assert time.monotonic() - start < 0.5
+        assert isinstance(results[0], AgentResponse)
+        assert all(isinstance(r, TimeoutError) for r in results[1:])
+        assert [call.args[1] for call in memory.append_exchange.call_args_list] == ["a"]
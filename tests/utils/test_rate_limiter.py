@@ -6,18 +6,37 @@ Cobertura:
 - RateLimiter.get_retry_after: tiempo restante
 - RateLimiter.get_remaining_requests: requests disponibles
 - Aislamiento entre usuarios
+- GCRA: recarga gradual, estado O(1) y evicción de claves inactivas
+- Costo por request: un lote consume varias unidades o ninguna
+- SQLiteRateLimitStore: un solo límite entre limitadores (procesos) que comparten archivo
 """
+import time
+
 import pytest
-from datetime import datetime, timedelta
-from unittest.mock import patch
 
-from src.utils.rate_limiter import RateLimiter
+from src.utils.rate_limiter import MemoryRateLimitStore, RateLimiter, SQLiteRateLimitStore
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
 
 
 @pytest.fixture
-def limiter():
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def limiter(clock):
     """Rate limiter con límite bajo para pruebas."""
-    return RateLimiter(max_requests=3, time_window=60)
+    return RateLimiter(max_requests=3, time_window=60, clock=clock)
 
 
 class TestIsAllowed:
@@ -41,19 +60,49 @@ class TestIsAllowed:
         # Usuario 2 no debe verse afectado por usuario 1
         assert limiter.is_allowed(user_id=2) is True
 
-    def test_old_requests_cleaned_up(self, limiter):
+    def test_old_requests_cleaned_up(self, limiter, clock):
         """Requests fuera de la ventana no cuentan."""
-        old_time = datetime.now() - timedelta(seconds=120)
-        limiter.requests[1] = [old_time, old_time, old_time]
-        # Requests expirados, debe permitir
-        assert limiter.is_allowed(user_id=1) is True
+        for _ in range(3):
+            limiter.is_allowed(user_id=1)
+        clock.advance(120)
+        # Requests expirados: la ráfaga completa vuelve a estar disponible
+        assert all(limiter.is_allowed(user_id=1) for _ in range(3))
 
-    def test_allows_after_window_expires(self, limiter):
+    def test_allows_after_window_expires(self, limiter, clock):
         """Después de expirar la ventana se pueden hacer más requests."""
-        # Llenar el límite con timestamps expirados
-        old_time = datetime.now() - timedelta(seconds=120)
-        limiter.requests[1] = [old_time, old_time, old_time]
-        # Ahora debe permitir
+        for _ in range(3):
+            limiter.is_allowed(user_id=1)
+        clock.advance(60)
+        assert limiter.is_allowed(user_id=1) is True
+
+    def test_recarga_gradual(self, limiter, clock):
+        """Con la ráfaga agotada se recupera un request cada window/max_requests."""
+        for _ in range(3):
+            limiter.is_allowed(user_id=1)
+        clock.advance(19)
+        assert limiter.is_allowed(user_id=1) is False
+        clock.advance(1)
+        assert limiter.is_allowed(user_id=1) is True
+        assert limiter.is_allowed(user_id=1) is False
+
+    def test_costo_consume_varias_unidades(self, limiter, clock):
+        result = limiter.check(user_id=1, cost=2)
+        assert result.allowed and result.remaining == 1
+        rechazo = limiter.check(user_id=1, cost=2)
+        assert not rechazo.allowed and rechazo.remaining == 1
+        assert rechazo.retry_after == pytest.approx(20)  # falta recuperar una unidad
+        assert limiter.is_allowed(user_id=1) is True
+        clock.advance(40)
+        assert limiter.check(user_id=1, cost=2).allowed
+
+    def test_costo_mayor_que_la_rafaga_nunca_pasa(self, limiter):
+        assert limiter.check(user_id=1, cost=4).allowed is False
+        assert limiter.get_remaining_requests(user_id=1) == 3
+
+    def test_rechazos_no_consumen_cupo(self, limiter, clock):
+        for _ in range(10):
+            limiter.is_allowed(user_id=1)
+        clock.advance(20)
         assert limiter.is_allowed(user_id=1) is True
 
 
@@ -67,15 +116,18 @@ class TestGetRetryAfter:
             limiter.is_allowed(user_id=1)
         limiter.is_allowed(user_id=1)  # blocked
 
-        retry = limiter.get_retry_after(user_id=1)
-        assert retry >= 0
+        assert limiter.get_retry_after(user_id=1) == 20
+        assert limiter.check(user_id=1).retry_after_seconds == 20
 
-    def test_returns_zero_for_expired_requests(self, limiter):
-        old_time = datetime.now() - timedelta(seconds=120)
-        limiter.requests[1] = [old_time]
+    def test_returns_zero_for_expired_requests(self, limiter, clock):
+        limiter.is_allowed(user_id=1)
+        clock.advance(120)
         # El request expiró, retry debe ser 0
-        retry = limiter.get_retry_after(user_id=1)
-        assert retry == 0
+        assert limiter.get_retry_after(user_id=1) == 0
+
+    def test_zero_while_requests_remain(self, limiter):
+        limiter.is_allowed(user_id=1)
+        assert limiter.get_retry_after(user_id=1) == 0
 
 
 class TestGetRemainingRequests:
@@ -92,13 +144,57 @@ class TestGetRemainingRequests:
             limiter.is_allowed(user_id=1)
         assert limiter.get_remaining_requests(user_id=1) == 0
 
-    def test_expired_requests_not_counted(self, limiter):
-        old_time = datetime.now() - timedelta(seconds=120)
-        limiter.requests[1] = [old_time, old_time]
+    def test_expired_requests_not_counted(self, limiter, clock):
+        limiter.is_allowed(user_id=1)
+        limiter.is_allowed(user_id=1)
+        clock.advance(120)
         # Los expirados no cuentan, deben quedar 3 disponibles
         assert limiter.get_remaining_requests(user_id=1) == 3
 
+    def test_consultar_no_consume(self, limiter):
+        for _ in range(5):
+            limiter.get_remaining_requests(user_id=1)
+            limiter.get_retry_after(user_id=1)
+        assert limiter.get_remaining_requests(user_id=1) == 3
+
     def test_users_isolated(self, limiter):
         for _ in range(3):
             limiter.is_allowed(user_id=1)
         assert limiter.get_remaining_requests(user_id=2) == 3
+
+
+class TestStores:
+
+    def test_estado_o1_y_eviccion_de_inactivos(self):
+        store = MemoryRateLimitStore()
+        limiter = RateLimiter(max_requests=100, time_window=0.05, store=store)
+        for _ in range(50):
+            limiter.is_allowed(user_id=1)
+        limiter.is_allowed(user_id=2)
+        assert len(store) == 2
+        time.sleep(0.06)
+        assert len(store) == 0
+
+    def test_sqlite_comparte_limite_entre_procesos(self, tmp_path, clock):
+        path = tmp_path / "rate_limits.db"
+        # Dos limitadores con conexiones propias = dos workers con el mismo archivo
+        a = RateLimiter(3, 60, store=SQLiteRateLimitStore(path), name="api", clock=clock)
+        b = RateLimiter(3, 60, store=SQLiteRateLimitStore(path), name="api", clock=clock)
+        assert [a.is_allowed(7), b.is_allowed(7), a.is_allowed(7)] == [True, True, True]
+        assert b.is_allowed(7) is False
+        assert b.get_retry_after(7) == 20
+
+    def test_sqlite_ambitos_separados_y_barrido(self, tmp_path, clock):
+        store = SQLiteRateLimitStore(tmp_path / "rate_limits.db")
+        api = RateLimiter(1, 60, store=store, name="api", clock=clock)
+        telegram = RateLimiter(1, 60, store=store, name="telegram", clock=clock)
+        assert api.is_allowed(7) and telegram.is_allowed(7)
+        assert len(store) == 2
+        assert store.sweep(now=clock() + 61) == 2 and len(store) == 0
+
+    def test_sqlite_falla_abierto(self, tmp_path, clock):
+        store = SQLiteRateLimitStore(tmp_path / "rate_limits.db")
+        limiter = RateLimiter(1, 60, store=store, clock=clock)
+        store.close()
+        assert limiter.is_allowed(7) is True
+        assert limiter.is_allowed(7) is True
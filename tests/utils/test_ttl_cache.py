@@ -0,0 +1,178 @@
+"""
+Tests para src/utils/ttl_cache.py
+
+Cobertura:
+- TTLCache.get/set: hits, misses, expiración por TTL
+- Evicción LRU por número de entradas y por bytes estimados
+- pop/clear y contabilidad de bytes
+- estimate_size: dataclasses y contenedores anidados
+"""
+from dataclasses import dataclass, field
+from unittest.mock import patch
+
+from src.utils.ttl_cache import TTLCache, estimate_size
+
+
+@dataclass
+class _Perfil:
+    user_id: str
+    resumen: str = ""
+    roles: list[str] = field(default_factory=list)
+
+
+class TestGetSet:
+
+    def test_miss_y_hit(self):
+        cache = TTLCache(max_entries=10, ttl_seconds=60)
+        assert cache.get("a") is None
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_expira_por_ttl(self):
+        cache = TTLCache(max_entries=10, ttl_seconds=60)
+        with patch("src.utils.ttl_cache.time.monotonic", return_value=1000.0):
+            cache.set("a", 1)
+        with patch("src.utils.ttl_cache.time.monotonic", return_value=1061.0):
+            assert cache.get("a") is None
+            assert "a" not in cache
+
+        stats = cache.stats()
+        assert stats["expirations"] == 1
+        assert stats["entries"] == 0
+        assert stats["bytes"] == 0
+
+    def test_set_reinicia_ttl(self):
+        cache = TTLCache(max_entries=10, ttl_seconds=60)
+        with patch("src.utils.ttl_cache.time.monotonic", return_value=1000.0):
+            cache.set("a", 1)
+        with patch("src.utils.ttl_cache.time.monotonic", return_value=1050.0):
+            cache.set("a", 2)
+        with patch("src.utils.ttl_cache.time.monotonic", return_value=1100.0):
+            assert cache.get("a") == 2
+
+
+class TestExpirationHeap:
+
+    def test_ttl_por_entrada(self):
+        cache = TTLCache(max_entries=10, ttl_seconds=60)
+        with patch("src.utils.ttl_cache.time.monotonic", return_value=1000.0):
+            cache.set("corto", 1, ttl_seconds=5)
+            cache.set("largo", 2)
+        with patch("src.utils.ttl_cache.time.monotonic", return_value=1010.0):
+            assert cache.purge_expired() == 1
+            assert cache.keys() == ["largo"]
+
+    def test_set_purga_vencidas(self):
+        """Insertar purga las vencidas antes de evictar entradas vigentes por LRU."""
+        cache = TTLCache(max_entries=2, ttl_seconds=60)
+        with patch("src.utils.ttl_cache.time.monotonic", return_value=1000.0):
+            cache.set("a", 1, ttl_seconds=5)
+            cache.set("b", 2)
+        with patch("src.utils.ttl_cache.time.monotonic", return_value=1010.0):
+            cache.set("c", 3)
+
+        stats = cache.stats()
+        assert cache.keys() == ["b", "c"]
+        assert stats["expirations"] == 1
+        assert stats["evictions"] == 0
+
+    def test_reemplazo_no_expira_con_ttl_anterior(self):
+        cache = TTLCache(max_entries=10, ttl_seconds=60)
+        with patch("src.utils.ttl_cache.time.monotonic", return_value=1000.0):
+            cache.set("a", 1, ttl_seconds=5)
+        with patch("src.utils.ttl_cache.time.monotonic", return_value=1004.0):
+            cache.set("a", 2)
+        with patch("src.utils.ttl_cache.time.monotonic", return_value=1010.0):
+            assert cache.purge_expired() == 0
+            assert cache.get("a") == 2
+
+    def test_heap_se_compacta(self):
+        """Los reemplazos repetidos no deben hacer crecer el heap sin límite."""
+        cache = TTLCache(max_entries=10, ttl_seconds=60)
+        for i in range(10_000):
+            cache.set(i % 5, i)
+
+        assert len(cache._heap) <= 2 * len(cache) + 65
+
+    def test_refresh_size(self):
+        cache = TTLCache(max_entries=10, ttl_seconds=60)
+        valor = ["x"]
+        cache.set("a", valor)
+        antes = cache.size_bytes
+
+        valor.extend(["y" * 1000])
+        cache.refresh_size("a")
+
+        assert cache.size_bytes > antes + 1000
+
+
+class TestEviction:
+
+    def test_lru_por_entradas(self):
+        cache = TTLCache(max_entries=2, ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")  # "b" pasa a ser el menos reciente
+        cache.set("c", 3)
+
+        assert "a" in cache
+        assert "b" not in cache
+        assert "c" in cache
+        assert cache.stats()["evictions"] == 1
+
+    def test_lru_por_bytes(self):
+        cache = TTLCache(max_entries=100, ttl_seconds=60, max_bytes=250, sizer=lambda v: 100)
+        for key in ("a", "b", "c"):
+            cache.set(key, key)
+
+        assert len(cache) == 2
+        assert cache.size_bytes == 200
+        assert "a" not in cache
+
+    def test_churn_mantiene_limites(self):
+        """Muchos usuarios distintos no deben hacer crecer el cache sin límite."""
+        cache = TTLCache(max_entries=500, ttl_seconds=300, max_bytes=200_000)
+        for i in range(20_000):
+            cache.set(str(i), _Perfil(user_id=str(i), resumen="x" * 200))
+
+        stats = cache.stats()
+        assert stats["entries"] <= 500
+        assert stats["bytes"] <= 200_000
+        assert stats["evictions"] == 20_000 - stats["entries"]
+
+
+class TestPopClear:
+
+    def test_pop_descuenta_bytes(self):
+        cache = TTLCache(max_entries=10, ttl_seconds=60, sizer=lambda v: 10)
+        cache.set("a", 1)
+        cache.set("b", 2)
+
+        assert cache.pop("a") == 1
+        assert cache.pop("a") is None
+        assert cache.size_bytes == 10
+
+    def test_clear(self):
+        cache = TTLCache(max_entries=10, ttl_seconds=60)
+        cache.set("a", 1)
+        cache.clear()
+
+        assert len(cache) == 0
+        assert cache.size_bytes == 0
+
+
+class TestEstimateSize:
+
+    def test_dataclass_crece_con_contenido(self):
+        chico = _Perfil(user_id="1")
+        grande = _Perfil(user_id="1", resumen="x" * 5000, roles=["admin"] * 10)
+
+        assert estimate_size(grande) > estimate_size(chico) + 5000
+
+    def test_contenedores_anidados(self):
+        assert estimate_size({"a": ["x" * 1000]}) > 1000